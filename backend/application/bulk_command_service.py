@@ -0,0 +1,169 @@
+"""
+Fleet-brede commando's: één request, N laadpalen, resultaten als stream.
+
+• Doelen: expliciete lijst cp-ids óf een filter (ocpp_version, enabled,
+  alias-prefix) over de verbonden laadpalen van álle workers
+  (:meth:`CommandService.fleet`).
+• Het OCPP-call-object wordt één keer per OCPP-versie gebouwd (via de
+  strategies) en voor alle laadpalen van die versie hergebruikt; een
+  ongeldige actie/parameters faalt dus vóórdat er iets verstuurd wordt.
+• Een vaste pool van ``concurrency`` workers verstuurt de calls; elk
+  resultaat wordt direct opgeleverd zodra het binnen is (NDJSON-stream).
+• Laadpalen die niet lokaal verbonden zijn (multi-worker) gaan via
+  :meth:`CommandService.send`, dus via forwarding.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from fastapi import HTTPException
+
+from application.command_service import CommandService, needs_report_id
+from application.connection_registry import ConnectionRegistryChargePoint
+from domain.chargepoint_session import OCPPVersion
+
+
+@dataclass
+class FleetFilter:
+    ocpp_version: Optional[str] = None
+    enabled: Optional[bool] = None
+    alias_prefix: Optional[str] = None
+
+    def matches(self, info: Dict[str, Any]) -> bool:
+        """*info* zoals :func:`~application.command_service.session_info`."""
+        if self.ocpp_version is not None and info["ocpp_version"] != self.ocpp_version:
+            return False
+        if self.enabled is not None and info["active"] != self.enabled:
+            return False
+        if self.alias_prefix is not None and not (info["alias"] or "").startswith(self.alias_prefix):
+            return False
+        return True
+
+
+class BulkCommandService:
+    def __init__(
+        self,
+        registry: ConnectionRegistryChargePoint,
+        commands: CommandService,
+        *,
+        default_concurrency: int = 100,
+        max_concurrency: int = 1000,
+    ) -> None:
+        self._registry = registry
+        self._commands = commands
+        self._default_concurrency = default_concurrency
+        self._max_concurrency = max_concurrency
+
+    # ------------------------------------------------------------ targets
+    async def resolve_targets(
+        self, cp_ids: Optional[List[str]], fleet_filter: Optional[FleetFilter]
+    ) -> List[str]:
+        if cp_ids is not None:
+            return list(dict.fromkeys(cp_ids))          # dedupe, volgorde behouden
+        flt = fleet_filter or FleetFilter()
+        return [i["id"] for i in await self._commands.fleet() if flt.matches(i)]
+
+    # ------------------------------------------------------------ run
+    def prepare(self, action: str, parameters: Dict[str, Any]) -> Dict[OCPPVersion, Any]:
+        """
+        Bouwt het call-object voor beide versies.  Een versie waarvoor de
+        actie niet bestaat krijgt de HTTPException zelf (per laadpaal
+        gerapporteerd); bestaat de actie voor géén versie → 400.
+        """
+        calls: Dict[OCPPVersion, Any] = {}
+        errors: List[HTTPException] = []
+        # report-acties krijgen per laadpaal een eigen requestId: alleen
+        # valideren, de call wordt per sessie gebouwd (None)
+        per_session = needs_report_id(action, parameters)
+        check = {**parameters, "request_id": 0} if per_session else parameters
+        for version in OCPPVersion:
+            try:
+                call = self._commands.build_call(version, action, check)
+                calls[version] = None if per_session else call
+            except HTTPException as exc:
+                calls[version] = exc
+                errors.append(exc)
+        if len(errors) == len(calls):
+            raise errors[0]
+        return calls
+
+    async def run(
+        self,
+        targets: List[str],
+        action: str,
+        parameters: Dict[str, Any],
+        calls: Dict[OCPPVersion, Any],
+        *,
+        concurrency: Optional[int] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Levert per laadpaal één resultaat op (in volgorde van binnenkomst)."""
+        limit = max(1, min(concurrency or self._default_concurrency, self._max_concurrency))
+        todo: asyncio.Queue[str] = asyncio.Queue()
+        for cp_id in targets:
+            todo.put_nowait(cp_id)
+        results: asyncio.Queue[Dict[str, Any]] = asyncio.Queue()
+
+        async def worker() -> None:
+            while True:
+                try:
+                    cp_id = todo.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                results.put_nowait(await self._one(cp_id, action, parameters, calls))
+
+        workers = [asyncio.create_task(worker()) for _ in range(min(limit, len(targets)))]
+        ok = failed = 0
+        started = time.monotonic()
+        try:
+            for _ in range(len(targets)):
+                item = await results.get()
+                if item["ok"]:
+                    ok += 1
+                else:
+                    failed += 1
+                yield item
+        finally:
+            for w in workers:
+                w.cancel()                  # client weg → stoppen
+        yield {
+            "summary": {
+                "action": action,
+                "targets": len(targets),
+                "ok": ok,
+                "failed": failed,
+                "elapsed_ms": round((time.monotonic() - started) * 1000, 1),
+            }
+        }
+
+    async def _one(
+        self,
+        cp_id: str,
+        action: str,
+        parameters: Dict[str, Any],
+        calls: Dict[OCPPVersion, Any],
+    ) -> Dict[str, Any]:
+        started = time.monotonic()
+        out: Dict[str, Any] = {"charge_point_id": cp_id}
+        try:
+            session = await self._registry.get(cp_id)
+            if session is not None and session._running:
+                ocpp_call = calls[session._settings.ocpp_version]
+                if isinstance(ocpp_call, HTTPException):
+                    raise ocpp_call
+                reply = await self._commands.send_built(session, action, parameters, ocpp_call)
+            else:
+                reply = await self._commands.send(cp_id, action, parameters)
+            out.update(ok=True, status=200, result=_unwrap(reply))
+        except HTTPException as exc:
+            out.update(ok=False, status=exc.status_code, detail=exc.detail)
+        except Exception as exc:
+            out.update(ok=False, status=500, detail=str(exc))
+        out["elapsed_ms"] = round((time.monotonic() - started) * 1000, 1)
+        return out
+
+
+def _unwrap(reply: Any) -> Any:
+    return reply.get("result", reply) if isinstance(reply, dict) else reply
@@ -0,0 +1,140 @@
+"""
+Cross-worker fan-out van EventBus-events.
+
+Lokaal gepubliceerde events uit ``topics`` gaan via de cluster-transport
+naar alle andere workers, zodat een browser op worker A ook events ziet van
+laadpalen die op worker B verbonden zijn.
+
+• Events worden in één wachtrij verzameld en per hop gebatcht
+  (max. ``batch_size`` per bericht, of wat er na ``flush_interval`` ligt).
+• Een batch wordt één keer geserialiseerd en naar alle peers gestuurd.
+• Eén sender-task, één verbinding per peer en in-volgorde verwerking van
+  casts aan de ontvangende kant → de volgorde per laadpaal blijft behouden.
+• Aan de ontvangende kant gaan events via ``bus.publish_remote`` de bus op
+  (geen echo terug; ``local_only``-subscribers slaan ze over).
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, Optional, Tuple
+
+from application.cluster_node import ClusterNode
+from application.event_bus import EventBus
+
+log = logging.getLogger("bus-bridge")
+
+
+class BusBridge:
+    MSG_TYPE = "events"
+
+    def __init__(
+        self,
+        node: ClusterNode,
+        bus: EventBus,
+        topics: Iterable[str],
+        *,
+        batch_size: int = 500,
+        flush_interval: float = 0.005,
+        max_pending: int = 50_000,
+    ) -> None:
+        self._node = node
+        self._bus = bus
+        self._topics = frozenset(topics)
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._max_pending = max_pending
+
+        self._pending: Deque[Tuple[str, Dict[str, Any]]] = deque()
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task[None] | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+        # tellers
+        self.sent_events = 0
+        self.sent_batches = 0
+        self.received_events = 0
+        self.dropped = 0
+
+        bus.add_forwarder(self.offer)
+        node.register_handler(self.MSG_TYPE, self._on_events)
+
+    # ------------------------------------------------------------ outbound
+    def offer(self, event: str, payload: Dict[str, Any]) -> None:
+        if event not in self._topics or not self._node.transport.peers():
+            return
+        if len(self._pending) >= self._max_pending:
+            self._pending.popleft()
+            self.dropped += 1
+        self._pending.append((event, payload))
+        self._ensure_task()
+        if len(self._pending) >= self._batch_size and self._wakeup is not None:
+            self._wakeup.set()
+
+    def _ensure_task(self) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if self._loop is not loop:
+            self._loop = loop
+            self._wakeup = asyncio.Event()
+            self._task = None
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._run(), name="bus-bridge")
+
+    async def _run(self) -> None:
+        assert self._wakeup is not None
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self._flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            while self._pending:
+                await self._send_batch()
+
+    async def _send_batch(self) -> None:
+        n = min(self._batch_size, len(self._pending))
+        batch = [self._pending.popleft() for _ in range(n)]
+        await self._node.transport.broadcast({
+            "type": self.MSG_TYPE,
+            "events": [[event, payload] for event, payload in batch],
+        })
+        self.sent_events += n
+        self.sent_batches += 1
+
+    async def flush(self) -> None:
+        """Stuurt alles wat nog in de wachtrij staat (bv. bij shutdown)."""
+        while self._pending:
+            await self._send_batch()
+
+    async def close(self) -> None:
+        if self._task is not None and self._loop is asyncio.get_running_loop():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        await self.flush()
+
+    # ------------------------------------------------------------ inbound
+    async def _on_events(self, _sender: str, body: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        for event, payload in body.get("events", []):
+            if event in self._topics:
+                self.received_events += 1
+                await self._bus.publish_remote(event, **payload)
+        return None
+
+    # ------------------------------------------------------------ metrics
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "topics": sorted(self._topics),
+            "pending": len(self._pending),
+            "sent_events": self.sent_events,
+            "sent_batches": self.sent_batches,
+            "received_events": self.received_events,
+            "dropped": self.dropped,
+        }
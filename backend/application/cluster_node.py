@@ -0,0 +1,199 @@
+"""
+Samenwerking tussen backend-workers: *location directory* + forwarding.
+
+Met ``uvicorn --workers N`` leeft de WebSocket van een laadpaal in precies
+één proces.  Elke worker houdt een directory 〈cp_id → worker〉 bij:
+
+• verbindt een laadpaal lokaal → ``claim`` naar alle peers;
+• verbreekt hij → ``release``;
+• een nieuwe worker vraagt bij start alle peers om hun lijst (``sync``);
+• bij een miss (bv. gemiste claim) wordt de peers gevraagd wie de
+  laadpaal heeft (``locate``).
+
+Berichten hebben een ``type``; andere componenten registreren er zelf een
+handler voor (``CommandService`` → ``command``).  :meth:`ClusterNode.ask_all`
+stelt dezelfde vraag aan alle peers (bv. ``fleet`` voor bulk-commando's).
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from infrastructure.cluster_transport import ClusterTransport, Message, PeerUnavailable
+
+log = logging.getLogger("cluster")
+
+TypeHandler = Callable[[str, Message], Awaitable[Optional[Message]]]
+
+
+class ClusterNode:
+    def __init__(
+        self,
+        transport: ClusterTransport,
+        *,
+        is_local: Callable[[str], bool],
+        local_ids: Callable[[], List[str]],
+        request_timeout: float = 35.0,
+    ) -> None:
+        self._transport = transport
+        self._is_local = is_local
+        self._local_ids = local_ids
+        self._request_timeout = request_timeout
+        self._locations: Dict[str, str] = {}
+        self._handlers: Dict[str, TypeHandler] = {
+            "claim": self._on_claim,
+            "release": self._on_release,
+            "locate": self._on_locate,
+            "sync": self._on_sync,
+        }
+        self._started = False
+        self._bg: set[asyncio.Task[Any]] = set()
+
+        # tellers
+        self.forwarded = 0
+        self.served = 0
+        self.locate_misses = 0
+
+    @property
+    def worker_id(self) -> str:
+        return self._transport.worker_id
+
+    @property
+    def transport(self) -> ClusterTransport:
+        return self._transport
+
+    def register_handler(self, msg_type: str, handler: TypeHandler) -> None:
+        self._handlers[msg_type] = handler
+
+    # ------------------------------------------------------------ lifecycle
+    async def start(self) -> None:
+        await self._transport.start(self._dispatch)
+        self._started = True
+        # directory van bestaande peers overnemen + eigen sessies aankondigen
+        for peer in self._transport.peers():
+            try:
+                reply = await self._transport.request(peer, {"type": "sync"}, timeout=5.0)
+            except (PeerUnavailable, asyncio.TimeoutError, RuntimeError):
+                continue
+            for cp_id in reply.get("cp_ids", []):
+                self._locations[cp_id] = peer
+        for cp_id in self._local_ids():
+            self.claim(cp_id)
+
+    async def close(self) -> None:
+        self._started = False
+        for task in list(self._bg):
+            task.cancel()
+        await self._transport.close()
+
+    # ------------------------------------------------------------ directory
+    def claim(self, cp_id: str) -> None:
+        self._locations.pop(cp_id, None)
+        self._cast_all({"type": "claim", "cp_id": cp_id})
+
+    def release(self, cp_id: str) -> None:
+        self._cast_all({"type": "release", "cp_id": cp_id})
+
+    def _cast_all(self, body: Message) -> None:
+        if not self._started:
+            return
+        task = asyncio.get_running_loop().create_task(self._transport.broadcast(body))
+        self._bg.add(task)
+        task.add_done_callback(self._bg.discard)
+
+    async def locate(self, cp_id: str) -> Optional[str]:
+        """Worker-id die *cp_id* bedient, of ``None``."""
+        if self._is_local(cp_id):
+            return self.worker_id
+        owner = self._locations.get(cp_id)
+        if owner is not None:
+            return owner
+        if not self._started:
+            return None
+
+        self.locate_misses += 1
+        peers = self._transport.peers()
+        replies = await asyncio.gather(
+            *(self._transport.request(p, {"type": "locate", "cp_id": cp_id}, timeout=2.0)
+              for p in peers),
+            return_exceptions=True,
+        )
+        for peer, reply in zip(peers, replies):
+            if isinstance(reply, dict) and reply.get("owner"):
+                self._locations[cp_id] = peer
+                return peer
+        return None
+
+    def forget(self, cp_id: str) -> None:
+        self._locations.pop(cp_id, None)
+
+    # ------------------------------------------------------------ requests
+    async def request(self, cp_id: str, body: Message) -> Optional[Message]:
+        """
+        Stuurt *body* naar de worker die *cp_id* bedient.  ``None`` als
+        niemand de laadpaal heeft; :class:`PeerUnavailable` als de eigenaar
+        niet reageert (de directory-entry wordt dan vergeten).
+        """
+        owner = await self.locate(cp_id)
+        if owner is None or owner == self.worker_id:
+            return None
+        self.forwarded += 1
+        try:
+            return await self._transport.request(owner, body, timeout=self._request_timeout)
+        except PeerUnavailable:
+            self.forget(cp_id)
+            raise
+
+    async def ask_all(self, body: Message, *, timeout: float = 5.0) -> Dict[str, Message]:
+        """
+        Stuurt *body* naar alle peers; antwoorden per worker-id.  Een peer
+        die niet (op tijd) antwoordt ontbreekt in het resultaat.
+        """
+        if not self._started:
+            return {}
+        peers = self._transport.peers()
+        replies = await asyncio.gather(
+            *(self._transport.request(p, body, timeout=timeout) for p in peers),
+            return_exceptions=True,
+        )
+        out: Dict[str, Message] = {}
+        for peer, reply in zip(peers, replies):
+            if isinstance(reply, dict):
+                out[peer] = reply
+            else:
+                log.warning("No %r reply from worker %s: %r", body.get("type"), peer, reply)
+        return out
+
+    async def _dispatch(self, sender: str, body: Message) -> Optional[Message]:
+        handler = self._handlers.get(body.get("type", ""))
+        if handler is None:
+            log.warning("Unknown cluster message from %s: %r", sender, body.get("type"))
+            return None
+        self.served += 1
+        return await handler(sender, body)
+
+    # ------------------------------------------------------------ handlers
+    async def _on_claim(self, sender: str, body: Message) -> None:
+        self._locations[body["cp_id"]] = sender
+
+    async def _on_release(self, sender: str, body: Message) -> None:
+        if self._locations.get(body["cp_id"]) == sender:
+            del self._locations[body["cp_id"]]
+
+    async def _on_locate(self, _sender: str, body: Message) -> Message:
+        return {"owner": self._is_local(body["cp_id"])}
+
+    async def _on_sync(self, _sender: str, _body: Message) -> Message:
+        return {"cp_ids": self._local_ids()}
+
+    # ------------------------------------------------------------ metrics
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "worker_id": self.worker_id,
+            "peers": self._transport.peers(),
+            "known_locations": len(self._locations),
+            "forwarded": self.forwarded,
+            "served": self.served,
+            "locate_misses": self.locate_misses,
+        }
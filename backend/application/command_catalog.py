@@ -0,0 +1,251 @@
+"""
+Catalogus van alle CSMS-geïnitieerde OCPP-acties (1.6 en 2.0.1).
+
+Eén keer bij import opgebouwd uit de call-dataclasses van de ``ocpp``-lib:
+per (versie, actie) een :class:`CommandSpec` met de velden (snake_case),
+welke verplicht zijn, en de gecompileerde JSON-schema-validator van de lib.
+
+``build`` doet per commando alleen nog een dict-lookup:
+
+1. camelCase-sleutels naar snake_case;
+2. eventuele *legacy*-parametervormen van de REST-laag omzetten (bv.
+   ``id_tag`` → ``id_token`` bij 2.0.1, ``key``/``value`` bij SetVariables);
+3. onbekende parameters → 400, verplichte velden controleren en het
+   call-object maken.
+
+``validate`` serialiseert het call-object zoals de lib dat doet en
+controleert het tegen het schema, zodat een ongeldige payload al als 400
+terugkomt in plaats van pas in de sessie te falen.
+"""
+from __future__ import annotations
+
+import dataclasses
+import re
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from jsonschema import Draft4Validator
+from ocpp.charge_point import remove_nones, serialize_as_dict, snake_to_camel_case
+from ocpp.messages import MessageType, get_validator
+from ocpp.v16 import call as call16          # type: ignore
+from ocpp.v201 import call as call201        # type: ignore
+
+from domain.chargepoint_session import OCPPVersion
+
+Params = Dict[str, Any]
+Adapter = Callable[[Params], Params]
+
+# Richting CSMS → laadpaal; de lib bevat ook de calls de andere kant op.
+CSMS_ACTIONS: Dict[OCPPVersion, Tuple[str, ...]] = {
+    OCPPVersion.V16: (
+        "CancelReservation", "CertificateSigned", "ChangeAvailability",
+        "ChangeConfiguration", "ClearCache", "ClearChargingProfile", "DataTransfer",
+        "DeleteCertificate", "ExtendedTriggerMessage", "GetCompositeSchedule",
+        "GetConfiguration", "GetDiagnostics", "GetInstalledCertificateIds",
+        "GetLocalListVersion", "GetLog", "InstallCertificate", "RemoteStartTransaction",
+        "RemoteStopTransaction", "ReserveNow", "Reset", "SendLocalList",
+        "SetChargingProfile", "SignedUpdateFirmware", "TriggerMessage",
+        "UnlockConnector", "UpdateFirmware",
+    ),
+    OCPPVersion.V201: (
+        "CancelReservation", "CertificateSigned", "ChangeAvailability", "ClearCache",
+        "ClearChargingProfile", "ClearDisplayMessage", "ClearVariableMonitoring",
+        "CostUpdated", "CustomerInformation", "DataTransfer", "DeleteCertificate",
+        "GetBaseReport", "GetChargingProfiles", "GetCompositeSchedule",
+        "GetDisplayMessages", "GetInstalledCertificateIds", "GetLocalListVersion",
+        "GetLog", "GetMonitoringReport", "GetReport", "GetTransactionStatus",
+        "GetVariables", "InstallCertificate", "PublishFirmware",
+        "RequestStartTransaction", "RequestStopTransaction", "ReserveNow", "Reset",
+        "SendLocalList", "SetChargingProfile", "SetDisplayMessage", "SetMonitoringBase",
+        "SetMonitoringLevel", "SetNetworkProfile", "SetVariableMonitoring",
+        "SetVariables", "TriggerMessage", "UnlockConnector", "UnpublishFirmware",
+        "UpdateFirmware",
+    ),
+}
+
+_CALL_MODULES = {OCPPVersion.V16: call16, OCPPVersion.V201: call201}
+
+_CAMEL = re.compile(r"(?<!^)(?=[A-Z])")
+
+
+def _snake(key: str) -> str:
+    return _CAMEL.sub("_", key).lower()
+
+
+# --------------------------------------------------------------------------- #
+#  Legacy-parametervormen (zoals de REST-laag en front-end ze al sturen)
+# --------------------------------------------------------------------------- #
+def _defaults(**defaults: Any) -> Adapter:
+    def _apply(params: Params) -> Params:
+        return {**defaults, **params}
+    return _apply
+
+
+def _v16_change_configuration(params: Params) -> Params:
+    if "key" not in params or "value" not in params:
+        raise HTTPException(status_code=400, detail="Missing 'key' or 'value'")
+    return params
+
+
+def _v201_request_start(params: Params) -> Params:
+    params = dict(params)
+    id_tag = params.pop("id_tag", "UNKNOWN")
+    params.setdefault("id_token", {"idToken": id_tag, "type": "Central"})
+    params.setdefault("remote_start_id", 1234)
+    return params
+
+
+def _v201_get_variables(params: Params) -> Params:
+    if "get_variable_data" in params:
+        return params
+    key: List[Dict[str, Any]] = params.get("key", [])
+    if not key:
+        raise HTTPException(status_code=400, detail="'key' list required")
+    return {"get_variable_data": key}
+
+
+def _v201_set_variables(params: Params) -> Params:
+    if "set_variable_data" in params:
+        return params
+    try:
+        comp = params["key"]["component"]
+        var_name = params["key"]["variable_name"]
+        value = params["value"]
+    except (KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Missing key/value data") from None
+    variable: Dict[str, Any] = {"name": var_name}
+    if params["key"].get("variable_instance") is not None:
+        variable["instance"] = params["key"]["variable_instance"]
+    return {
+        "set_variable_data": [
+            {"component": comp, "variable": variable, "attribute_value": value}
+        ]
+    }
+
+
+_ADAPTERS: Dict[Tuple[OCPPVersion, str], Adapter] = {
+    (OCPPVersion.V16, "RemoteStartTransaction"): _defaults(id_tag="UNKNOWN"),
+    (OCPPVersion.V16, "ChangeConfiguration"): _v16_change_configuration,
+    (OCPPVersion.V16, "Reset"): _defaults(type="Soft"),
+    (OCPPVersion.V16, "GetConfiguration"): _defaults(key=[]),
+    (OCPPVersion.V201, "RequestStartTransaction"): _v201_request_start,
+    (OCPPVersion.V201, "Reset"): _defaults(type="Immediate"),
+    # request_id komt uit de ReportCollector van de sessie (CommandService)
+    (OCPPVersion.V201, "GetBaseReport"): _defaults(report_base="FullInventory"),
+    (OCPPVersion.V201, "GetVariables"): _v201_get_variables,
+    (OCPPVersion.V201, "SetVariables"): _v201_set_variables,
+}
+
+
+# --------------------------------------------------------------------------- #
+#  Catalogus
+# --------------------------------------------------------------------------- #
+@dataclass(frozen=True)
+class CommandSpec:
+    version: OCPPVersion
+    action: str
+    call_class: type
+    fields: Tuple[str, ...]
+    required: Tuple[str, ...]
+    validator: Draft4Validator
+    adapter: Optional[Adapter] = None
+
+    def build(self, params: Params) -> Any:
+        params = {k if k in self.fields else _snake(k): v for k, v in params.items()}
+        if self.adapter is not None:
+            params = self.adapter(params)
+        kwargs: Params = {}
+        unknown: List[str] = []
+        for name, value in params.items():
+            if name not in self.fields:
+                unknown.append(name)
+            elif value is not None:
+                kwargs[name] = value
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown parameter(s) for {self.action}: {', '.join(sorted(unknown))}",
+            )
+        for name in self.required:
+            if name not in kwargs:
+                raise HTTPException(status_code=400, detail=f"Missing '{name}'")
+        return self.call_class(**kwargs)
+
+    def validate(self, call: Any) -> None:
+        payload = remove_nones(snake_to_camel_case(serialize_as_dict(call)))
+        error = next(iter(self.validator.iter_errors(payload)), None)
+        if error is not None:
+            where = "/".join(str(p) for p in error.absolute_path) or self.action
+            raise HTTPException(
+                status_code=400, detail=f"Invalid {self.action} payload at '{where}': {error.message}"
+            )
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "version": self.version.value,
+            "action": self.action,
+            "parameters": list(self.fields),
+            "required": list(self.required),
+            "schema": self.validator.schema,
+        }
+
+
+def _spec(version: OCPPVersion, action: str) -> CommandSpec:
+    cls = getattr(_CALL_MODULES[version], action)
+    fields = dataclasses.fields(cls)
+    return CommandSpec(
+        version=version,
+        action=action,
+        call_class=cls,
+        fields=tuple(f.name for f in fields),
+        required=tuple(
+            f.name for f in fields
+            if f.default is dataclasses.MISSING and f.default_factory is dataclasses.MISSING
+        ),
+        validator=get_validator(MessageType.Call, action, version.value),
+        adapter=_ADAPTERS.get((version, action)),
+    )
+
+
+class CommandCatalog:
+    def __init__(self) -> None:
+        self._specs: Dict[Tuple[OCPPVersion, str], CommandSpec] = {
+            (version, action): _spec(version, action)
+            for version, actions in CSMS_ACTIONS.items()
+            for action in actions
+        }
+
+    def get(self, version: OCPPVersion, action: str) -> CommandSpec:
+        spec = self._specs.get((version, action))
+        if spec is None:
+            raise HTTPException(
+                status_code=400, detail=f"Unknown OCPP {version.value} action: {action}"
+            )
+        return spec
+
+    def build(
+        self, version: OCPPVersion, action: str, params: Params, *, validate: bool = True
+    ) -> Any:
+        spec = self.get(version, action)
+        call = spec.build(params)
+        if validate:
+            spec.validate(call)
+        return call
+
+    def actions(self, version: OCPPVersion) -> List[str]:
+        return sorted(a for v, a in self._specs if v is version)
+
+    def describe(self, version: Optional[OCPPVersion] = None) -> List[Dict[str, Any]]:
+        return [
+            spec.describe()
+            for (v, _), spec in sorted(self._specs.items(), key=lambda kv: (kv[0][0].value, kv[0][1]))
+            if version is None or v is version
+        ]
+
+    def __len__(self) -> int:
+        return len(self._specs)
+
+
+# Singleton – schema's worden één keer gecompileerd
+catalog: CommandCatalog = CommandCatalog()
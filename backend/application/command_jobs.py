@@ -0,0 +1,225 @@
+"""
+Asynchrone commando-jobs voor endpoints die niet op de laadpaal horen te
+wachten (``/start``, ``/stop``).
+
+``submit`` maakt een :class:`CommandJob`, start de OCPP-call op de
+achtergrond en keert meteen terug; het resultaat is op te vragen via
+``GET /jobs/{id}`` en wordt bij afronden als ``CommandJobCompleted`` op de
+EventBus gezet (→ front-end WebSocket, en via de bus-bridge naar andere
+workers, die het in hun eigen store opnemen).
+
+Jobs staan in een begrensde :class:`JobStore`: afgeronde jobs vervallen na
+``ttl`` seconden, en bij een volle store verdwijnt de eerst afgeronde job.
+Zitten er alleen nog lopende jobs in, dan wordt een nieuwe job geweigerd.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+
+from application.command_service import CommandService
+from application.event_bus import EventBus, bus as default_bus
+
+log = logging.getLogger("command-jobs")
+
+PENDING = "pending"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+@dataclass
+class CommandJob:
+    charge_point_id: str
+    action: str
+    parameters: Dict[str, Any]
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    state: str = PENDING
+    result: Any = None
+    error: Optional[Dict[str, Any]] = None      # {"status": …, "detail": …}
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+
+    @property
+    def done(self) -> bool:
+        return self.state != PENDING
+
+    def to_dict(self) -> Dict[str, Any]:
+        return jsonable_encoder(asdict(self))
+
+
+class JobStoreFull(Exception):
+    """Store zit vol met lopende jobs."""
+
+
+class JobStore:
+    def __init__(self, *, max_size: int = 10_000, ttl: float = 900.0) -> None:
+        self._max_size = max_size
+        self._ttl = ttl
+        self._jobs: "OrderedDict[str, CommandJob]" = OrderedDict()
+        # afgeronde jobs in afrondvolgorde (job_id → finished_at); jobs ronden
+        # in willekeurige volgorde af, dus de invoegvolgorde van _jobs zegt niets
+        self._finished: "OrderedDict[str, float]" = OrderedDict()
+
+        # tellers
+        self.evicted = 0
+
+    def get(self, job_id: str) -> Optional[CommandJob]:
+        self._expire()
+        return self._jobs.get(job_id)
+
+    def add(self, job: CommandJob) -> None:
+        self._expire()
+        if job.id not in self._jobs and len(self._jobs) >= self._max_size:
+            if not self._finished:
+                raise JobStoreFull(f"{len(self._jobs)} jobs pending")
+            oldest, _ = self._finished.popitem(last=False)
+            del self._jobs[oldest]
+            self.evicted += 1
+        self._jobs[job.id] = job
+        if job.done:
+            self.finish(job)
+
+    def finish(self, job: CommandJob) -> None:
+        """*job* is afgerond: vanaf nu loopt zijn TTL."""
+        if job.id not in self._jobs:
+            return
+        self._finished[job.id] = job.finished_at if job.finished_at is not None else time.time()
+        self._finished.move_to_end(job.id)
+
+    def recent(self, limit: int = 100, charge_point_id: Optional[str] = None) -> List[CommandJob]:
+        self._expire()
+        out: List[CommandJob] = []
+        for job in reversed(self._jobs.values()):
+            if charge_point_id is None or job.charge_point_id == charge_point_id:
+                out.append(job)
+                if len(out) >= limit:
+                    break
+        return out
+
+    def _expire(self) -> None:
+        # _finished staat op afrondvolgorde: stop bij de eerste die nog mag blijven
+        cutoff = time.time() - self._ttl
+        finished = self._finished
+        while finished:
+            job_id, finished_at = next(iter(finished.items()))
+            if finished_at >= cutoff:
+                break
+            del finished[job_id]
+            self._jobs.pop(job_id, None)
+            self.evicted += 1
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._jobs),
+            "pending": len(self._jobs) - len(self._finished),
+            "max_size": self._max_size,
+            "ttl": self._ttl,
+            "evicted": self.evicted,
+        }
+
+
+class CommandJobService:
+    def __init__(
+        self,
+        commands: CommandService,
+        store: Optional[JobStore] = None,
+        *,
+        event_bus: EventBus = default_bus,
+    ) -> None:
+        self._commands = commands
+        self._store = store if store is not None else JobStore()
+        self._bus = event_bus
+        self._tasks: Dict[str, asyncio.Task[None]] = {}
+        # afgeronde jobs van andere workers (via de bus-bridge) ook opvraagbaar
+        event_bus.subscribe("CommandJobCompleted", self._on_completed)
+
+        # tellers
+        self.submitted = 0
+        self.succeeded = 0
+        self.failed = 0
+
+    @property
+    def store(self) -> JobStore:
+        return self._store
+
+    # ------------------------------------------------------------ API
+    async def submit(self, cp_id: str, action: str, parameters: Dict[str, Any]) -> CommandJob:
+        job = CommandJob(charge_point_id=cp_id, action=action, parameters=parameters)
+        try:
+            self._store.add(job)
+        except JobStoreFull as exc:
+            raise HTTPException(
+                status_code=429, detail="Too many pending command jobs.",
+                headers={"Retry-After": "1"},
+            ) from exc
+        self.submitted += 1
+        task = asyncio.get_running_loop().create_task(self._run(job), name=f"job:{job.id}")
+        self._tasks[job.id] = task
+        task.add_done_callback(lambda _t, jid=job.id: self._tasks.pop(jid, None))
+        await asyncio.sleep(0)          # call alvast laten vertrekken
+        return job
+
+    def get(self, job_id: str) -> CommandJob:
+        job = self._store.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Unknown or expired job")
+        return job
+
+    async def wait(self, job_id: str, timeout: float) -> CommandJob:
+        """Wacht maximaal *timeout* s op afronding; geeft de job in elk geval terug."""
+        task = self._tasks.get(job_id)
+        if task is not None and timeout > 0:
+            await asyncio.wait({task}, timeout=timeout)
+        return self.get(job_id)
+
+    # ------------------------------------------------------------ engine
+    async def _run(self, job: CommandJob) -> None:
+        try:
+            reply = await self._commands.send(job.charge_point_id, job.action, job.parameters)
+            job.result = reply.get("result", reply) if isinstance(reply, dict) else reply
+            job.state = SUCCEEDED
+            self.succeeded += 1
+        except HTTPException as exc:
+            job.error = {"status": exc.status_code, "detail": exc.detail}
+            job.state = FAILED
+            self.failed += 1
+        except Exception as exc:
+            log.error("Command job %s failed", job.id, exc_info=True)
+            job.error = {"status": 500, "detail": str(exc)}
+            job.state = FAILED
+            self.failed += 1
+        job.finished_at = time.time()
+        self._store.finish(job)
+        try:
+            await self._bus.publish("CommandJobCompleted", job=job.to_dict())
+        except Exception:  # pragma: no cover
+            log.error("Unable to publish CommandJobCompleted", exc_info=True)
+
+    async def _on_completed(self, job: Dict[str, Any]) -> None:
+        if self._store.get(job["id"]) is not None:
+            return                          # eigen job
+        try:
+            self._store.add(CommandJob(**job))
+        except JobStoreFull:
+            pass
+
+    # ------------------------------------------------------------ metrics
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._store.stats(),
+            "running": len(self._tasks),
+            "submitted": self.submitted,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+        }
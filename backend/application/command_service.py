@@ -7,26 +7,59 @@ Wijzigingen  • 4 jun 2025
   **ConfigurationChanged**-event gepubliceerd op de EventBus.
 • Kleine refactor: bus-import toegevoegd, zodat we overal central kunnen
   loggen/broadcasten.
+• Met een :class:`~application.cluster_node.ClusterNode` wordt een
+  commando voor een laadpaal die op een andere worker verbonden is naar
+  die worker doorgestuurd (``uvicorn --workers N``).  Hetzelfde geldt
+  voor ``describe`` (versie/alias/enabled/outbound-queue van de sessie) en
+  voor andere componenten die via :meth:`CommandService.serve` /
+  :meth:`CommandService.remote` een eigen berichttype gebruiken.
 """
 
 from __future__ import annotations
 
 import asyncio
 import logging
-from typing import Any
+from typing import Any, Awaitable, Callable
 
 from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
 
 from application.connection_registry import ConnectionRegistryChargePoint
+from application.cluster_node import ClusterNode
 from application.event_bus import bus                  # ★  nieuw
+from infrastructure.cluster_transport import PeerUnavailable
 from domain.chargepoint_session import ChargePointSession, OCPPVersion
-from application.ocpp_command_strategy import (
-    V16CommandStrategy,
-    V201CommandStrategy,
-)
+from domain.outbound_scheduler import OutboundDeadlineExceeded, OutboundQueueFull
+from application.command_catalog import catalog
 
 log = logging.getLogger(__name__)
 
+RemoteHandler = Callable[[ChargePointSession, dict[str, Any]], Awaitable[Any]]
+
+# acties waarvan het requestId terugkomt in NotifyReport; zonder opgegeven
+# id krijgt de call er een uit de ReportCollector van de sessie, zodat het
+# niet botst met een report waar de ConfigurationService op wacht
+REPORT_ACTIONS = frozenset({"GetBaseReport", "GetReport"})
+
+
+def needs_report_id(action: str, parameters: dict[str, Any]) -> bool:
+    return action in REPORT_ACTIONS and (
+        parameters.get("request_id", parameters.get("requestId")) is None
+    )
+
+
+def session_info(session: ChargePointSession, *, outbound: bool = True) -> dict[str, Any]:
+    """Wat de REST-laag van een sessie wil weten, ook als die op een andere worker leeft."""
+    info: dict[str, Any] = {
+        "id": session.id,
+        "ocpp_version": session._settings.ocpp_version.value,
+        "active": session._settings.enabled,
+        "alias": session._settings.alias,
+    }
+    if outbound:
+        info["outbound"] = session.outbound.stats()
+    return info
+
 
 class CommandService:
     """
@@ -34,8 +67,17 @@ class CommandService:
     inclusief versie-switching.
     """
 
-    def __init__(self, registry: ConnectionRegistryChargePoint) -> None:
+    def __init__(
+        self,
+        registry: ConnectionRegistryChargePoint,
+        cluster: ClusterNode | None = None,
+    ) -> None:
         self._registry = registry
+        self._cluster = cluster
+        self.serve("command", self._on_remote_command)
+        self.serve("describe", self._on_describe)
+        if cluster is not None:
+            cluster.register_handler("fleet", self._on_fleet)
 
     # ---------------------------------------------------------------- send
     async def send(self, cp_id: str, action: str, parameters: dict[str, Any]) -> Any:
@@ -46,15 +88,148 @@ class CommandService:
             # defensief: mocht er nog een zombie-entry staan → opruimen
             if session:
                 await self._registry.deregister(session)
+            if self._cluster is not None:
+                return await self._forward(cp_id, action, parameters)
+            raise HTTPException(status_code=404, detail="Charge-point not connected")
+
+        return await self._send_local(session, cp_id, action, parameters)
+
+    async def describe(self, cp_id: str) -> dict[str, Any]:
+        """:func:`session_info` van *cp_id*, lokaal of via de eigenaar (404 als niemand)."""
+        session = await self._live(cp_id)
+        if session is not None:
+            return session_info(session)
+        return await self.remote(cp_id, {"type": "describe", "cp_id": cp_id})
+
+    async def fleet(self) -> list[dict[str, Any]]:
+        """
+        :func:`session_info` (zonder outbound) van alle verbonden laadpalen,
+        ook die op andere workers.  Lokaal wint bij een dubbele id (overdracht).
+        """
+        items = {i["id"]: i for i in await self._local_fleet()}
+        if self._cluster is not None:
+            for reply in (await self._cluster.ask_all({"type": "fleet"})).values():
+                for info in reply.get("items", []):
+                    items.setdefault(info["id"], info)
+        return list(items.values())
+
+    async def _local_fleet(self) -> list[dict[str, Any]]:
+        return [session_info(s, outbound=False) for s in await self._registry.get_all()]
+
+    async def _live(self, cp_id: str) -> ChargePointSession | None:
+        session = await self._registry.get(cp_id)
+        if session is None or not session._running:
+            return None
+        return session
+
+    # ---------------------------------------------------------------- cluster
+    def serve(self, msg_type: str, handler: RemoteHandler) -> None:
+        """
+        Beantwoordt cluster-berichten van type *msg_type* (met ``cp_id``)
+        voor een lokaal verbonden laadpaal; zonder cluster een no-op.
+        """
+        if self._cluster is None:
+            return
+
+        async def _on_message(_sender: str, body: dict[str, Any]) -> dict[str, Any]:
+            # alleen lokaal uitvoeren (geen hops)
+            session = await self._live(body["cp_id"])
+            if session is None:
+                return {"status": 404, "detail": "Charge-point not connected"}
+            try:
+                result = await handler(session, body)
+            except HTTPException as exc:
+                return {"status": exc.status_code, "detail": exc.detail}
+            return {"status": 200, "body": jsonable_encoder(result)}
+
+        self._cluster.register_handler(msg_type, _on_message)
+
+    async def remote(self, cp_id: str, body: dict[str, Any]) -> Any:
+        """
+        Stuurt *body* naar de worker die *cp_id* bedient en geeft diens
+        ``body`` terug; fouten van de eigenaar komen terug als dezelfde
+        HTTPException (404 als niemand de laadpaal heeft).
+        """
+        if self._cluster is None:
+            raise HTTPException(status_code=404, detail="Charge-point not connected")
+        try:
+            reply = await self._cluster.request(cp_id, body)
+        except PeerUnavailable as exc:
+            raise HTTPException(
+                status_code=503,
+                detail="Worker serving this charge-point is unavailable.",
+            ) from exc
+        except asyncio.TimeoutError as exc:
+            raise HTTPException(
+                status_code=504,
+                detail="Charge-point did not respond (timeout).",
+            ) from exc
+
+        if reply is None:
             raise HTTPException(status_code=404, detail="Charge-point not connected")
+        status = reply.get("status", 500)
+        if status != 200:
+            raise HTTPException(status_code=status, detail=reply.get("detail"))
+        return reply.get("body")
+
+    async def _forward(self, cp_id: str, action: str, parameters: dict[str, Any]) -> Any:
+        return await self.remote(cp_id, {
+            "type": "command",
+            "cp_id": cp_id,
+            "action": action,
+            "parameters": jsonable_encoder(parameters),
+        })
 
-        # ............. kies strategy per OCPP-versie .....................
-        strategy = (
-            V201CommandStrategy()
-            if session._settings.ocpp_version is OCPPVersion.V201
-            else V16CommandStrategy()
+    async def _on_remote_command(
+        self, session: ChargePointSession, body: dict[str, Any]
+    ) -> Any:
+        """Commando van een andere worker."""
+        return await self._send_local(
+            session, session.id, body["action"], body.get("parameters") or {}
         )
-        ocpp_call = strategy.build(action, parameters)
+
+    async def _on_describe(self, session: ChargePointSession, _body: dict[str, Any]) -> Any:
+        return session_info(session)
+
+    async def _on_fleet(self, _sender: str, _body: dict[str, Any]) -> dict[str, Any]:
+        return {"items": await self._local_fleet()}
+
+    # ---------------------------------------------------------------- local
+    @staticmethod
+    def build_call(version: OCPPVersion, action: str, parameters: dict[str, Any]) -> Any:
+        """OCPP-call-object voor *version*, gevalideerd (HTTPException 400 bij fouten)."""
+        return catalog.build(version, action, parameters)
+
+    async def send_built(
+        self,
+        session: ChargePointSession,
+        action: str,
+        parameters: dict[str, Any],
+        ocpp_call: Any,
+    ) -> Any:
+        """
+        Zoals :meth:`send`, maar met een al gebouwd call-object (bulk);
+        ``None`` → per sessie bouwen (zie :func:`needs_report_id`).
+        """
+        return await self._send_local(
+            session, session.id, action, parameters, ocpp_call=ocpp_call
+        )
+
+    async def _send_local(
+        self,
+        session: ChargePointSession,
+        cp_id: str,
+        action: str,
+        parameters: dict[str, Any],
+        *,
+        ocpp_call: Any = None,
+    ) -> Any:
+        # ............. call-object uit de catalogus .......................
+        if ocpp_call is None:
+            reports = getattr(getattr(session, "_cp", None), "reports", None)
+            if reports is not None and needs_report_id(action, parameters):
+                parameters = {**parameters, "request_id": reports.next_id()}
+            ocpp_call = self.build_call(session._settings.ocpp_version, action, parameters)
 
         # ............. stuur call & afvang fouten ........................
         try:
@@ -66,6 +241,16 @@ class CommandService:
                 detail="Charge-point did not respond (timeout).",
             ) from exc
 
+        except OutboundQueueFull as exc:
+            raise HTTPException(
+                status_code=429,
+                detail="Too many pending commands for this charge-point.",
+                headers={"Retry-After": "1"},
+            ) from exc
+
+        except OutboundDeadlineExceeded as exc:
+            raise HTTPException(status_code=504, detail=str(exc)) from exc
+
         except RuntimeError as exc:
             # WebSocket is tijdens de call dichtgegaan
             await self._registry.deregister(session)
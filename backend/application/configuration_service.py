@@ -0,0 +1,471 @@
+"""
+Configuratie-view per laadpaal (``GET /charge-points/{id}/configuration``)
+met cache.
+
+Bij OCPP 2.0.1 kost één view een ``GetBaseReport`` + NotifyReport-stroom
+en een ronde ``GetVariables`` (ontbrekende waardes + Target-attribute voor
+de schrijfbaarheid, in batches volgens ``ItemsPerMessage`` /
+``BytesPerMessage`` van de laadpaal en zonder pauzes ertussen) – nog
+steeds seconden verkeer naar de laadpaal voor een page-refresh.  Daarom:
+
+• het resultaat wordt per laadpaal bewaard (LRU, ``max_size``, met
+  ``ttl`` als vangnet) samen met een ETag, zodat de client met
+  ``If-None-Match`` een 304 kan krijgen;
+• gelijktijdige aanvragen voor dezelfde laadpaal delen één fetch;
+• de entry vervalt bij ``ConfigurationChanged`` (ChangeConfiguration /
+  SetVariables via :class:`CommandService`), bij een NotifyReport waar
+  niemand om vroeg en bij een (nieuwe) BootNotification.  Gebeurt dat
+  terwijl er een fetch loopt, dan wordt diens resultaat niet gecachet;
+• ``refresh=True`` slaat de cache over;
+• met een :class:`~application.cluster_node.ClusterNode` haalt een worker
+  zonder de laadpaal de view op bij de worker die 'm wel heeft (diens
+  cache en single-flight gelden dan).
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+
+from application.cluster_node import ClusterNode
+from application.command_service import CommandService
+from application.connection_registry import ConnectionRegistryChargePoint
+from application.event_bus import EventBus, bus as default_bus
+from domain.chargepoint_session import ChargePointSession, OCPPVersion
+from infrastructure.report_collector import ReportCollector
+
+log = logging.getLogger("configuration")
+
+
+@dataclass(frozen=True)
+class ConfigurationView:
+    body: Dict[str, Any]
+    etag: str
+    fetched_at: float
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        """``If-None-Match``-header (lijst, ``*`` of weak tags) tegen onze ETag."""
+        if not if_none_match:
+            return False
+        tags = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+        return "*" in tags or self.etag in tags
+
+
+def _etag(body: Dict[str, Any]) -> str:
+    raw = json.dumps(body, sort_keys=True, separators=(",", ":"), default=str)
+    return '"' + hashlib.sha1(raw.encode()).hexdigest()[:20] + '"'
+
+
+class _Fetch:
+    __slots__ = ("task", "stale")
+
+    def __init__(self, task: "asyncio.Task[ConfigurationView]") -> None:
+        self.task = task
+        self.stale = False
+
+
+# --------------------------------------------------------------------------- #
+#  Helpers voor ocpp-responses (dict of dataclass)
+# --------------------------------------------------------------------------- #
+def _unwrap_result(obj: Any) -> Any:
+    """Pak ‘result’ uit ocpp-response wrappers."""
+    if isinstance(obj, dict):
+        return obj.get("result", obj)
+    return getattr(obj, "result", obj)
+
+
+def _field(d_or_obj: Any, snake: str, camel: str) -> Any:
+    """Dict/object → snake/camel fallback field-getter."""
+    if isinstance(d_or_obj, dict):
+        return d_or_obj.get(snake) or d_or_obj.get(camel)
+    return getattr(d_or_obj, snake, None) or getattr(d_or_obj, camel, None)
+
+
+# --------------------------------------------------------------------------- #
+#  GetVariables-batches (OCPP 2.0.1)
+# --------------------------------------------------------------------------- #
+_Wanted = Tuple[Dict[str, Any], str]        # (config-item, attributeType)
+# (component, component-instance, EVSE, connector, variabele, variabele-instance)
+_VarKey = Tuple[Any, Any, Any, Any, Any, Any]
+
+# zonder ItemsPerMessage in het device model: het oude vaste aantal
+_DEFAULT_ITEMS_PER_MESSAGE = 24
+# [2,"<uuid4>","GetVariables",{"getVariableData":[…]}] zonder de entries
+_ENVELOPE_BYTES = 80
+
+
+def _message_limits(raw: List[Dict[str, Any]]) -> Tuple[int, Optional[int]]:
+    """
+    ``DeviceDataCtrlr.ItemsPerMessage[GetVariables]`` en
+    ``BytesPerMessage[GetVariables]`` uit het report (ook in de platte vorm
+    ``ItemsPerMessageGetVariables``).
+    """
+    limits: Dict[str, int] = {}
+    for itm in raw:
+        if (itm.get("component") or {}).get("name") != "DeviceDataCtrlr":
+            continue
+        key = itm.get("key")
+        if itm.get("instance") == "GetVariables":
+            key = f"{key}GetVariables"
+        if key not in {"ItemsPerMessageGetVariables", "BytesPerMessageGetVariables"}:
+            continue
+        try:
+            value = int(itm.get("value"))
+        except (TypeError, ValueError):
+            continue
+        if value > 0:
+            limits[key] = value
+    return (
+        limits.get("ItemsPerMessageGetVariables", _DEFAULT_ITEMS_PER_MESSAGE),
+        limits.get("BytesPerMessageGetVariables"),
+    )
+
+
+def _var_key(component: Any, name: Any, instance: Any) -> _VarKey:
+    """
+    Identiteit van een variabele in het device model.  Alleen de naam is
+    niet genoeg: ``Enabled`` of ``Available`` bestaat op vrijwel elke
+    controller en per EVSE.
+    """
+    if not isinstance(component, dict):          # dataclass of None
+        component = {
+            "name": getattr(component, "name", None),
+            "instance": getattr(component, "instance", None),
+            "evse": getattr(component, "evse", None),
+        }
+    evse = component.get("evse") or {}
+    if not isinstance(evse, dict):
+        evse = {"id": getattr(evse, "id", None), "connector_id": getattr(evse, "connector_id", None)}
+    return (
+        component.get("name"),
+        component.get("instance"),
+        evse.get("id"),
+        evse.get("connectorId", evse.get("connector_id")),
+        name,
+        instance,
+    )
+
+
+def _item_key(itm: Dict[str, Any]) -> _VarKey:
+    return _var_key(itm.get("component"), itm.get("key"), itm.get("instance"))
+
+
+def _variable_data(wanted: _Wanted) -> Dict[str, Any]:
+    itm, attribute_type = wanted
+    variable: Dict[str, Any] = {"name": itm["key"]}
+    if itm.get("instance") is not None:
+        variable["instance"] = itm["instance"]
+    data: Dict[str, Any] = {"component": itm.get("component", {}), "variable": variable}
+    if attribute_type != "Actual":          # Actual is de default
+        data["attributeType"] = attribute_type
+    return data
+
+
+def _batches(
+    wanted: List[_Wanted], max_items: int, max_bytes: Optional[int]
+) -> List[List[_Wanted]]:
+    """Greedy: vol tot ``max_items`` entries of ``max_bytes`` (geschatte JSON-grootte)."""
+    out: List[List[_Wanted]] = []
+    batch: List[_Wanted] = []
+    size = _ENVELOPE_BYTES
+    for w in wanted:
+        n = (
+            len(json.dumps(_variable_data(w), separators=(",", ":"), default=str)) + 1
+            if max_bytes else 0
+        )
+        if batch and (len(batch) >= max_items or (max_bytes and size + n > max_bytes)):
+            out.append(batch)
+            batch, size = [], _ENVELOPE_BYTES
+        batch.append(w)
+        size += n
+    if batch:
+        out.append(batch)
+    return out
+
+
+def _dedupe(raw: List[Dict[str, Any]]) -> Dict[_VarKey, Dict[str, Any]]:
+    """
+    Index met één rij per variabele (zie :func:`_var_key`); een deel mét
+    waarde wint.  Wordt ook gebruikt om GetVariables-resultaten terug te vinden.
+    """
+    uniq: Dict[_VarKey, Dict[str, Any]] = {}
+    for itm in raw:
+        if not itm.get("key"):
+            continue
+        key = _item_key(itm)
+        if key not in uniq or (
+            uniq[key].get("value") is None and itm.get("value") is not None
+        ):
+            uniq[key] = itm
+    return uniq
+
+
+def _apply_results(
+    batch: List[_Wanted], result: Any, index: Dict[_VarKey, Dict[str, Any]]
+) -> None:
+    results = (
+        result.get("get_variable_result", [])
+        if isinstance(result, dict)
+        else getattr(result, "get_variable_result", [])
+    )
+    for pos, res in enumerate(results):
+        variable = _field(res, "variable", "variable") or {}
+        name = _field(variable, "name", "name")
+        status = _field(res, "attribute_status", "attributeStatus") or "Rejected"
+        attribute_type = _field(res, "attribute_type", "attributeType")
+        # zelfde positie als in de request – voor laadpalen die attributeType
+        # (of de volledige component) niet terugsturen
+        positional = batch[pos] if pos < len(batch) and batch[pos][0]["key"] == name else None
+        if attribute_type is None and positional is not None:
+            itm, attribute_type = positional
+        else:
+            attribute_type = attribute_type or "Actual"
+            itm = index.get(_var_key(
+                _field(res, "component", "component"), name, _field(variable, "instance", "instance")
+            ))
+            if itm is None and positional is not None:
+                itm = positional[0]
+        if itm is None:
+            continue
+        if attribute_type == "Target":
+            itm["readonly"] = status != "Accepted"
+        elif itm.get("value") is None:
+            itm["value"] = _field(res, "attribute_value", "attributeValue")
+            if status in {"Rejected", "NotSupported"}:
+                itm.setdefault("readonly", True)
+
+
+class ConfigurationService:
+    def __init__(
+        self,
+        registry: ConnectionRegistryChargePoint,
+        commands: CommandService,
+        *,
+        max_size: int = 1_000,
+        ttl: float = 3_600.0,
+        report_timeout: float = 10.0,
+        pipeline_depth: int = 2,
+        event_bus: EventBus = default_bus,
+        cluster: Optional[ClusterNode] = None,
+    ) -> None:
+        self._registry = registry
+        self._commands = commands
+        self._cluster = cluster
+        self._max_size = max_size
+        self._ttl = ttl
+        self._report_timeout = report_timeout
+        self._pipeline_depth = max(1, pipeline_depth)
+        self._views: "OrderedDict[str, ConfigurationView]" = OrderedDict()
+        self._inflight: Dict[str, _Fetch] = {}
+
+        event_bus.subscribe("ConfigurationChanged", self._on_configuration_changed)
+        event_bus.subscribe("NotifyReport", self._on_notify_report)
+        event_bus.subscribe("BootNotification", self._on_boot)
+        if cluster is not None:
+            commands.serve("configuration", self._on_remote_get)
+
+        # tellers
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0
+        self.fetches = 0
+        self.invalidations = 0
+        self.batches = 0
+        self.forwarded = 0
+
+    # ------------------------------------------------------------ API
+    async def get(self, cp_id: str, *, refresh: bool = False) -> ConfigurationView:
+        cp = await self._registry.get(cp_id)
+        if cp is None:
+            if self._cluster is None:
+                raise HTTPException(status_code=404, detail="Charge-point not connected")
+            self.forwarded += 1
+            reply = await self._commands.remote(
+                cp_id, {"type": "configuration", "cp_id": cp_id, "refresh": refresh}
+            )
+            return ConfigurationView(**reply)
+
+        if not refresh:
+            view = self._views.get(cp_id)
+            if view is not None and view.fetched_at + self._ttl > time.time():
+                self._views.move_to_end(cp_id)
+                self.hits += 1
+                return view
+
+        fetch = self._inflight.get(cp_id)
+        if fetch is not None and fetch.task.get_loop() is asyncio.get_running_loop():
+            self.shared += 1
+        else:
+            self.misses += 1
+            fetch = self._start(cp)
+        return await asyncio.shield(fetch.task)
+
+    def invalidate(self, cp_id: str) -> None:
+        if self._views.pop(cp_id, None) is not None:
+            self.invalidations += 1
+        fetch = self._inflight.get(cp_id)
+        if fetch is not None:
+            fetch.stale = True
+
+    # ------------------------------------------------------------ fetch
+    def _start(self, cp: ChargePointSession) -> _Fetch:
+        task = asyncio.get_running_loop().create_task(
+            self._fetch(cp), name=f"configuration:{cp.id}"
+        )
+        fetch = _Fetch(task)
+        self._inflight[cp.id] = fetch
+        task.add_done_callback(lambda t, f=fetch, cp_id=cp.id: self._finish(cp_id, f, t))
+        return fetch
+
+    def _finish(self, cp_id: str, fetch: _Fetch, task: "asyncio.Task[ConfigurationView]") -> None:
+        if self._inflight.get(cp_id) is fetch:
+            del self._inflight[cp_id]
+        if task.cancelled() or task.exception() is not None or fetch.stale:
+            return
+        self._views[cp_id] = task.result()
+        self._views.move_to_end(cp_id)
+        while len(self._views) > self._max_size:
+            self._views.popitem(last=False)
+
+    async def _fetch(self, cp: ChargePointSession) -> ConfigurationView:
+        self.fetches += 1
+        if cp._settings.ocpp_version is not OCPPVersion.V201:
+            body = await self._commands.send(cp.id, "GetConfiguration", {"key": []})
+        else:
+            body = await self._fetch_v201(cp)
+        body = jsonable_encoder(body)
+        return ConfigurationView(body, _etag(body), time.time())
+
+    async def _get_variables(
+        self,
+        cp_id: str,
+        batches: List[List[_Wanted]],
+        index: Dict[_VarKey, Dict[str, Any]],
+    ) -> None:
+        """
+        Verstuurt de batches via de outbound-queue van de laadpaal.  Er staan
+        steeds ``pipeline_depth`` batches klaar, zodat de volgende vertrekt
+        zodra het antwoord op de vorige binnen is (geen gaten door het
+        verwerken van de resultaten).
+        """
+        todo = iter(batches)
+
+        async def worker() -> None:
+            for batch in todo:
+                reply = await self._commands.send(
+                    cp_id, "GetVariables", {"key": [_variable_data(w) for w in batch]}
+                )
+                self.batches += 1
+                _apply_results(batch, _unwrap_result(reply), index)
+
+        workers = [
+            asyncio.create_task(worker())
+            for _ in range(min(self._pipeline_depth, len(batches)))
+        ]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            for w in workers:
+                w.cancel()
+
+    async def _fetch_v201(self, cp: ChargePointSession) -> Dict[str, Any]:
+        """GetBaseReport → NotifyReport → (bulk) GetVariables."""
+        cp_id = cp.id
+        # eigen requestId (+ buffer) reserveren vóór het versturen: de eerste
+        # NotifyReport kan binnen zijn vóór de GetBaseReport-response
+        reports: ReportCollector = cp._cp.reports         # type: ignore[attr-defined]
+        request_id = reports.open()
+        try:
+            base_resp = await self._commands.send(
+                cp_id,
+                "GetBaseReport",
+                {"requestId": request_id, "reportBase": "FullInventory"},
+            )
+            result_obj = _unwrap_result(base_resp)
+            status_val = (
+                result_obj.get("status", "Accepted")
+                if isinstance(result_obj, dict)
+                else getattr(result_obj, "status", "Accepted")
+            )
+            # alleen bij Accepted komen er NotifyReports; klaar zodra tbc == False
+            raw: List[Dict[str, Any]] = (
+                await reports.wait(request_id, self._report_timeout)
+                if status_val == "Accepted"
+                else []
+            )
+        except ConnectionError:
+            raise HTTPException(
+                status_code=503,
+                detail="Charge-point disconnected while sending its report.",
+            ) from None
+        finally:
+            reports.close(request_id)
+
+        # dedupliceren (per component/EVSE/variabele, niet alleen op naam)
+        index = _dedupe(raw)
+        cfg_list: List[Dict[str, Any]] = list(index.values())
+
+        # waarde (alleen waar die ontbreekt) én Target-attribute (schrijfbaarheid)
+        # in één ronde GetVariables, in batches zo groot als de laadpaal toestaat
+        wanted: List[_Wanted] = []
+        for itm in cfg_list:
+            if itm.get("value") is None:
+                wanted.append((itm, "Actual"))
+            wanted.append((itm, "Target"))
+        max_items, max_bytes = _message_limits(raw)
+        await self._get_variables(cp_id, _batches(wanted, max_items, max_bytes), index)
+
+        for itm in cfg_list:          # default naar read-only = True
+            itm.setdefault("readonly", True)
+
+        cfg_list.sort(key=lambda x: (str(x["key"]).lower(), tuple(map(str, _item_key(x)))))
+
+        return {
+            "status": status_val,
+            "configuration_key": cfg_list,
+        }
+
+    # ------------------------------------------------------------ events
+    async def _on_configuration_changed(self, charge_point_id: str, **_: Any) -> None:
+        self.invalidate(charge_point_id)
+
+    async def _on_notify_report(
+        self, charge_point_id: str, payload: Optional[Dict[str, Any]] = None, **_: Any
+    ) -> None:
+        # eigen reports (via de ReportCollector) tellen niet als wijziging
+        if not (payload or {}).get("solicited", False):
+            self.invalidate(charge_point_id)
+
+    async def _on_boot(self, charge_point_id: str, **_: Any) -> None:
+        self.invalidate(charge_point_id)
+
+    async def _on_remote_get(self, session: ChargePointSession, body: Dict[str, Any]) -> Any:
+        """View voor een andere worker (cluster-bericht ``configuration``)."""
+        return asdict(await self.get(session.id, refresh=bool(body.get("refresh"))))
+
+    # ------------------------------------------------------------ metrics
+    def __len__(self) -> int:
+        return len(self._views)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._views),
+            "max_size": self._max_size,
+            "ttl": self._ttl,
+            "in_flight": len(self._inflight),
+            "hits": self.hits,
+            "misses": self.misses,
+            "shared": self.shared,
+            "fetches": self.fetches,
+            "invalidations": self.invalidations,
+            "get_variables_batches": self.batches,
+            "forwarded": self.forwarded,
+        }
@@ -5,9 +5,14 @@ in Postgres.
 from __future__ import annotations
 
 import asyncio
-from typing import Dict, List, Protocol, TypeVar, Generic
+import logging
+from typing import Any, Callable, Dict, Generic, List, Optional, Protocol, Tuple, TypeVar
 
-from services.settings_repository import SettingsRepository   # ← nieuw import
+from application.settings_cache import SettingsCache
+from services.settings_repository import COLUMNS, SettingsRepository
+from services.settings_writer import SettingsWriter
+
+log = logging.getLogger("connection-registry")
 
 __all__ = [
     "ConnectionRegistryChargePoint",
@@ -24,28 +29,47 @@ T = TypeVar("T", bound=HasId)
 
 
 class _ConnectionRegistryBase(Generic[T]):
-    """Asynchrone, thread-veilige dict 〈id → item〉."""
+    """
+    Asynchrone dict 〈id → item〉 met een lock-vrij leespad.
+
+    Alle mutaties gebeuren synchroon op de event-loop (geen ``await``
+    ertussen), dus ``get`` kan de dict direct lezen.  ``get_all`` geeft een
+    gecachte, onveranderlijke tuple terug die alleen na een wijziging
+    opnieuw wordt opgebouwd (versienummer).  ``_lock`` serialiseert alleen
+    nog schrijvers die zelf moeten awaiten (bv. persistente alias-updates).
+    """
     def __init__(self) -> None:
         self._items: Dict[str, T] = {}
         self._lock = asyncio.Lock()
+        self._version = 0
+        self._snapshot: Tuple[T, ...] = ()
+        self._snapshot_version = 0
 
     # ---------- modifiers ----------
     async def register(self, item: T) -> None:
-        async with self._lock:
-            self._items[item.id] = item
+        self._items[item.id] = item
+        self._version += 1
 
     async def deregister(self, item: T) -> None:
-        async with self._lock:
-            self._items.pop(item.id, None)
+        if self._items.pop(item.id, None) is not None:
+            self._version += 1
 
     # ---------- queries ------------
     async def get(self, item_id: str) -> T | None:
-        async with self._lock:
-            return self._items.get(item_id)
+        return self._items.get(item_id)
 
-    async def get_all(self) -> List[T]:
-        async with self._lock:
-            return list(self._items.values())
+    async def get_all(self) -> Tuple[T, ...]:
+        return self.snapshot()
+
+    def snapshot(self) -> Tuple[T, ...]:
+        """Onveranderlijke momentopname; O(1) zolang er niets wijzigt."""
+        if self._snapshot_version != self._version:
+            self._snapshot = tuple(self._items.values())
+            self._snapshot_version = self._version
+        return self._snapshot
+
+    def __len__(self) -> int:
+        return len(self._items)
 
 
 # ================= Charge-Point registry =================
@@ -54,37 +78,100 @@ class ConnectionRegistryChargePoint(      # type: ignore[name-defined]
 ):
     """
     Registry voor `ChargePointSession`-objecten.
-    • Alias-cache wordt nu *persistent* bewaard in Postgres.
+    • Settings (alias) komen on-demand uit een begrensde LRU/TTL-cache met
+      batched Postgres-loader – geen volledige preload meer bij opstart.
+    • Connect/disconnect persisteren write-behind via :class:`SettingsWriter`
+      (geen DB-round-trip meer op het accept-pad).
     """
 
-    def __init__(self, repo: SettingsRepository) -> None:
+    def __init__(
+        self,
+        repo: SettingsRepository,
+        writer: SettingsWriter | None = None,
+        cache: SettingsCache | None = None,
+    ) -> None:
         super().__init__()
         self._repo = repo
-        self._aliases: Dict[str, str | None] = {}
+        self._writer = writer if writer is not None else SettingsWriter(repo)
+        self._cache = cache if cache is not None else SettingsCache(repo.load_by_ids)
+        # (cp_id, connected) – bv. de cluster-directory (claim/release)
+        self._listeners: List[Callable[[str, bool], None]] = []
+
+    def add_listener(self, callback: Callable[[str, bool], None]) -> None:
+        self._listeners.append(callback)
+
+    def _notify(self, cp_id: str, connected: bool) -> None:
+        for cb in self._listeners:
+            try:
+                cb(cp_id, connected)
+            except Exception as exc:
+                log.warning("Registry listener failed for %s: %s", cp_id, exc)
+
+    def is_local(self, cp_id: str) -> bool:
+        return cp_id in self._items
+
+    def local_ids(self) -> List[str]:
+        return list(self._items)
 
-    # ----------- bootstrap (bij opstart) -------------
-    def preload_aliases(self, cache: Dict[str, str | None]) -> None:
-        self._aliases = cache.copy()
+    # ----------- settings-lookup ---------------------
+    async def get_settings(self, cp_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Settings van *cp_id*: eerst nog niet geflushte writes, dan de
+        LRU-cache (met batched load uit Postgres bij een miss).
+        """
+        pending = self._writer.peek(cp_id)
+        if pending is not None:
+            return dict(zip(COLUMNS, pending))
+        try:
+            return await self._cache.get(cp_id)
+        except Exception as exc:
+            log.warning("Settings lookup for %s failed: %s", cp_id, exc)
+            return None
+
+    def _remember(self, item: "ChargePointSession") -> None:           # type: ignore
+        s = item._settings
+        self._cache.put(item.id, {
+            "id": item.id,
+            "alias": s.alias,
+            "enabled": s.enabled,
+            "ocpp_version": s.ocpp_version.value,
+        })
 
     # ----------- alias-logic -------------------------
     async def register(self, item: "ChargePointSession") -> None:      # type: ignore
-        # alias uit cache injecteren vóór opslag
-        if item.id in self._aliases:
-            item._settings.alias = self._aliases[item.id]
+        # alias + enabled uit cache/DB injecteren vóór opslag – anders schrijft
+        # de sessie-default (enabled=False) een eerdere set_enabled(True) weg
+        row = await self.get_settings(item.id)
+        if row is not None:
+            item._settings.alias = row.get("alias")
+            item._settings.enabled = bool(row.get("enabled", False))
         await super().register(item)
-
-        # persist current settings
-        await self._repo.upsert(
-            item.id,
-            item._settings.alias,
-            item._settings.enabled,
-            item._settings.ocpp_version.value,
-        )
+        if self._changed(item, row):
+            self._remember(item)
+            self._persist(item)
+        self._notify(item.id, True)
 
     async def deregister(self, item: "ChargePointSession") -> None:    # type: ignore
-        self._aliases[item.id] = item._settings.alias
         await super().deregister(item)
-        await self._repo.upsert(
+        if self._changed(item, await self.get_settings(item.id)):
+            self._remember(item)
+            self._persist(item)
+        self._notify(item.id, False)
+
+    @staticmethod
+    def _changed(item: "ChargePointSession", row: Optional[Dict[str, Any]]) -> bool:  # type: ignore
+        """``True`` als de sessie afwijkt van de opgeslagen rij (of er geen is)."""
+        if row is None:
+            return True
+        s = item._settings
+        return (
+            row.get("alias") != s.alias
+            or bool(row.get("enabled", False)) != s.enabled
+            or row.get("ocpp_version") != s.ocpp_version.value
+        )
+
+    def _persist(self, item: "ChargePointSession") -> None:            # type: ignore
+        self._writer.submit(
             item.id,
             item._settings.alias,
             item._settings.enabled,
@@ -93,17 +180,90 @@ class ConnectionRegistryChargePoint(      # type: ignore[name-defined]
 
     async def remember_alias(self, cp_id: str, alias: str | None) -> None:
         async with self._lock:
-            self._aliases[cp_id] = alias
             sess = self._items.get(cp_id)
             if sess:
                 sess._settings.alias = alias
-            # → persist
-            await self._repo.upsert(
-                cp_id,
-                alias,
-                sess._settings.enabled if sess else False,
-                sess._settings.ocpp_version.value if sess else "1.6",
-            )
+                enabled, version = sess._settings.enabled, sess._settings.ocpp_version.value
+            else:
+                row = await self.get_settings(cp_id) or {}
+                enabled = bool(row.get("enabled", False))
+                version = row.get("ocpp_version") or "1.6"
+            await self._save(cp_id, alias, enabled, version)
+
+    async def set_enabled(self, cp_id: str, enabled: bool) -> None:
+        """
+        Enable/disable, write-through naar Postgres.  Zit de laadpaal op een
+        andere worker, dan brengt de NOTIFY van de upsert het daar in de
+        live sessie.
+        """
+        async with self._lock:
+            sess = self._items.get(cp_id)
+            if sess:
+                sess._settings.enabled = enabled
+                alias, version = sess._settings.alias, sess._settings.ocpp_version.value
+            else:
+                row = await self.get_settings(cp_id) or {}
+                alias = row.get("alias")
+                version = row.get("ocpp_version") or "1.6"
+            await self._save(cp_id, alias, enabled, version)
+
+    async def _save(
+        self, cp_id: str, alias: str | None, enabled: bool, ocpp_version: str
+    ) -> None:
+        """
+        Expliciete wijziging: cache bijwerken en write-through (upsert +
+        NOTIFY naar andere instances).  Een oudere write-behind rij voor
+        deze cp_id vervalt, anders zou die de wijziging overschrijven.
+        """
+        self._cache.put(cp_id, dict(zip(COLUMNS, (cp_id, alias, enabled, ocpp_version))))
+        self._writer.discard(cp_id)
+        await self._repo.upsert(cp_id, alias, enabled, ocpp_version)
+
+    def apply_settings(self, rows: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Neemt extern gewijzigde settings (CSV-import, andere instance) over
+        in de settings-cache en in live sessies.  Schrijft zelf niets terug.
+        """
+        for cp_id, row in rows.items():
+            self._cache.put(cp_id, dict(row))
+            sess = self._items.get(cp_id)
+            if sess:
+                sess._settings.alias = row.get("alias")
+                sess._settings.enabled = bool(row.get("enabled"))
+                # een nog niet geschreven write-behind rij zou de wijziging
+                # terugdraaien; die krijgt de nieuwe waardes
+                if self._writer.peek(cp_id) is not None:
+                    self._persist(sess)
+
+    # ----------- cross-instance invalidatie ------------
+    async def apply_notification(self, message: Dict[str, Any]) -> None:
+        """Verwerkt een ``charge_point_settings``-NOTIFY van een andere instance."""
+        op = message.get("op")
+        if op == "upsert" and isinstance(message.get("row"), dict):
+            row = message["row"]
+            self.apply_settings({row["id"]: row})
+        elif op == "invalidate":
+            for cp_id in message.get("ids", []):
+                self._cache.invalidate(cp_id)
+        elif op == "reset":
+            await self.resync_settings()
+        else:
+            log.warning("Unknown settings notification: %r", message)
+
+    async def resync_settings(self) -> None:
+        """Cache weggooien en live sessies opnieuw uit Postgres laden."""
+        self._cache.clear()
+        live = list(self._items)
+        if live:
+            self.apply_settings(await self._repo.load_by_ids(live))
+
+    @property
+    def cache(self) -> SettingsCache:
+        return self._cache
+
+    @property
+    def writer(self) -> SettingsWriter:
+        return self._writer
 
 
 # ================= Front-end registry ====================
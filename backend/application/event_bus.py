@@ -1,26 +1,243 @@
+"""
+In-process pub/sub voor domein-events.
+
+Twee afleveringsmodi per subscriber:
+
+• **inline** (default) – ``publish`` roept de handler direct aan en wacht
+  erop.  Handig voor tests en goedkope handlers.
+• **queued** – elke subscriber krijgt een eigen, begrensde asyncio-queue
+  plus worker-task.  ``publish`` zet het event alleen in de queue en keert
+  meteen terug, zodat een trage sink (Influx, een hangende browser-tab)
+  de CALLRESULT richting laadpaal niet meer ophoudt.
+
+Bij een volle queue bepaalt de :class:`Overflow`-policy wat er gebeurt.
+``subscribe_many`` geeft meerdere event-types één gedeelde queue, zodat de
+handler ze over de types heen in publicatievolgorde ziet.
+
+Met ``add_forwarder`` kan een transport (zie :mod:`application.bus_bridge`)
+lokaal gepubliceerde events naar andere workers doorsturen; die leveren
+ze af via :meth:`EventBus.publish_remote`.  Subscribers met
+``local_only=True`` (bv. de Influx-sink, die elk event precies één keer
+moet schrijven) krijgen alleen events van de eigen worker.
+"""
 from __future__ import annotations
 
 import asyncio
 import logging
 from collections import defaultdict
-from typing import Any, Awaitable, Callable, Dict, List
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, Iterable, List
 
 log = logging.getLogger("event-bus")
 
+Handler = Callable[..., Awaitable[Any] | Any]
+EventHandler = Callable[[str, Dict[str, Any]], Awaitable[Any] | Any]
+Forwarder = Callable[[str, Dict[str, Any]], None]
+
+
+class Overflow(str, Enum):
+    """Gedrag van een queued subscriber wanneer zijn queue vol zit."""
+    DROP_OLDEST = "drop_oldest"     # oudste event weggooien, nieuwe erin
+    DROP_NEWEST = "drop_newest"     # nieuwe event weggooien
+    BLOCK = "block"                 # publisher wacht tot er plek is
+
+
+class _QueuedSubscriber:
+    """Eén handler met eigen queue + worker-task en tellers."""
+
+    def __init__(
+        self,
+        event: str,
+        handler: Handler,
+        maxsize: int,
+        overflow: Overflow,
+        *,
+        with_event: bool = False,
+    ) -> None:
+        self.event = event
+        self.handler = handler
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self.with_event = with_event        # handler(event, payload) i.p.v. handler(**payload)
+
+        self._queue: asyncio.Queue[tuple[float, str, Dict[str, Any]]] | None = None
+        self._task: asyncio.Task[None] | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+        # tellers
+        self.delivered = 0
+        self.dropped = 0
+        self.failed = 0
+        self.max_depth = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+
+    # ------------------------------------------------------------ worker
+    def _ensure_worker(self) -> asyncio.Queue[tuple[float, str, Dict[str, Any]]]:
+        """
+        Start de worker lazily in de *huidige* loop.  Subscriben gebeurt al
+        bij import (zonder draaiende loop); bovendien draait de TestClient
+        elke request in een nieuwe loop – dan beginnen we met een verse queue.
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.maxsize)
+            self._loop = loop
+            self._task = None
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(
+                self._run(self._queue), name=f"bus:{self.event}"
+            )
+        return self._queue
+
+    async def _run(self, queue: asyncio.Queue[tuple[float, str, Dict[str, Any]]]) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            enqueued_at, event, payload = await queue.get()
+            lag = loop.time() - enqueued_at
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            try:
+                rv = self.handler(event, payload) if self.with_event else self.handler(**payload)
+                if asyncio.iscoroutine(rv):
+                    await rv
+                self.delivered += 1
+            except Exception as exc:
+                self.failed += 1
+                log.error("handler error for %s: %s", self.event, exc, exc_info=True)
+            finally:
+                queue.task_done()
+
+    # ------------------------------------------------------------ enqueue
+    async def put(self, event: str, payload: Dict[str, Any]) -> None:
+        queue = self._ensure_worker()
+        item = (asyncio.get_running_loop().time(), event, payload)
+
+        if queue.full():
+            if self.overflow is Overflow.BLOCK:
+                await queue.put(item)
+            elif self.overflow is Overflow.DROP_NEWEST:
+                self.dropped += 1
+                return
+            else:  # DROP_OLDEST
+                queue.get_nowait()
+                queue.task_done()
+                self.dropped += 1
+                queue.put_nowait(item)
+        else:
+            queue.put_nowait(item)
+
+        self.max_depth = max(self.max_depth, queue.qsize())
+
+    # ------------------------------------------------------------ lifecycle
+    async def drain(self) -> None:
+        if self._queue is not None and self._loop is asyncio.get_running_loop():
+            await self._queue.join()
+
+    async def stop(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, RuntimeError):
+                pass
+        self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "handler": getattr(self.handler, "__qualname__", repr(self.handler)),
+            "overflow": self.overflow.value,
+            "maxsize": self.maxsize,
+            "depth": self._queue.qsize() if self._queue is not None else 0,
+            "max_depth": self.max_depth,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "last_lag_ms": round(self.last_lag * 1000, 3),
+            "max_lag_ms": round(self.max_lag * 1000, 3),
+        }
+
 
 class EventBus:
     """Simpel pub/sub-mechanisme (in-process)."""
 
     def __init__(self) -> None:
-        self._subs: Dict[str, List[Callable[..., Awaitable[Any] | Any]]] = defaultdict(list)
+        self._subs: Dict[str, List[Handler | _QueuedSubscriber]] = defaultdict(list)
+        self._local_only: set[int] = set()         # id() van local-only entries
+        self._forwarders: List[Forwarder] = []
 
     # ---------------------------------------------------------------- subscribe
-    def subscribe(self, event: str, handler: Callable[..., Awaitable[Any] | Any]) -> None:
-        self._subs[event].append(handler)
+    def subscribe(
+        self,
+        event: str,
+        handler: Handler,
+        *,
+        queue_size: int | None = None,
+        overflow: Overflow = Overflow.DROP_OLDEST,
+        local_only: bool = False,
+    ) -> None:
+        """
+        Zonder ``queue_size`` wordt de handler inline aangeroepen; mét
+        ``queue_size`` krijgt hij een eigen queue + worker-task.
+        ``local_only`` → geen events die van andere workers binnenkomen.
+        """
+        entry: Handler | _QueuedSubscriber = (
+            handler
+            if queue_size is None
+            else _QueuedSubscriber(event, handler, queue_size, Overflow(overflow))
+        )
+        self._subs[event].append(entry)
+        if local_only:
+            self._local_only.add(id(entry))
+
+    def subscribe_many(
+        self,
+        events: Iterable[str],
+        handler: EventHandler,
+        *,
+        queue_size: int,
+        overflow: Overflow = Overflow.DROP_OLDEST,
+        local_only: bool = False,
+    ) -> None:
+        """
+        Eén queued subscriber voor al deze *events*: ``handler(event, payload)``
+        krijgt ze in publicatievolgorde, ook over event-types heen (met een
+        queue per type kan een MeterValues een eerder StatusNotification
+        inhalen).
+        """
+        names = list(dict.fromkeys(events))
+        entry = _QueuedSubscriber(
+            ",".join(names), handler, queue_size, Overflow(overflow), with_event=True
+        )
+        for name in names:
+            self._subs[name].append(entry)
+        if local_only:
+            self._local_only.add(id(entry))
+
+    def add_forwarder(self, forwarder: Forwarder) -> None:
+        """*forwarder(event, payload)* ziet elk lokaal gepubliceerd event."""
+        self._forwarders.append(forwarder)
 
     # ---------------------------------------------------------------- publish
     async def publish(self, event: str, **payload) -> None:
+        await self._dispatch(event, payload, remote=False)
+        for fwd in self._forwarders:
+            try:
+                fwd(event, payload)
+            except Exception as exc:  # pragma: no cover
+                log.error("forwarder error for %s: %s", event, exc, exc_info=True)
+
+    async def publish_remote(self, event: str, **payload) -> None:
+        """Event van een andere worker: niet opnieuw forwarden."""
+        await self._dispatch(event, payload, remote=True)
+
+    async def _dispatch(self, event: str, payload: Dict[str, Any], *, remote: bool) -> None:
         for h in self._subs[event]:
+            if remote and id(h) in self._local_only:
+                continue
+            if isinstance(h, _QueuedSubscriber):
+                await h.put(event, payload)
+                continue
             try:
                 rv = h(**payload)
                 if asyncio.iscoroutine(rv):
@@ -28,6 +245,36 @@ class EventBus:
             except Exception as exc:  # pragma: no cover
                 log.error("handler error for %s: %s", event, exc, exc_info=True)
 
+    # ---------------------------------------------------------------- lifecycle
+    def _queued(self) -> List[_QueuedSubscriber]:
+        # dict i.p.v. set: volgorde stabiel, gedeelde subscribers één keer
+        return list({
+            id(h): h for subs in self._subs.values() for h in subs
+            if isinstance(h, _QueuedSubscriber)
+        }.values())
+
+    async def drain(self) -> None:
+        """Wacht tot alle queued subscribers hun queue hebben leeggewerkt."""
+        for sub in self._queued():
+            await sub.drain()
+
+    async def aclose(self, timeout: float = 5.0) -> None:
+        """Probeert de queues binnen *timeout* leeg te werken en stopt de workers."""
+        try:
+            await asyncio.wait_for(self.drain(), timeout)
+        except asyncio.TimeoutError:
+            log.warning("EventBus shutdown: queues not drained within %.1fs", timeout)
+        for sub in self._queued():
+            await sub.stop()
+
+    # ---------------------------------------------------------------- metrics
+    def stats(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Queue-diepte, drops en lag per queued subscriber, per event."""
+        out: Dict[str, List[Dict[str, Any]]] = {}
+        for sub in self._queued():
+            out.setdefault(sub.event, []).append(sub.stats())
+        return out
+
 
 # Singleton
 bus: EventBus = EventBus()
@@ -0,0 +1,90 @@
+"""
+Begrensde, array-gebaseerde ringbuffer met recente bus-events.
+
+Elk event krijgt een oplopend volgnummer (``seq``, start bij 1) en het
+``epoch`` van deze history.  Een front-end die (her)verbindt met
+``?since=<seq>&epoch=<epoch>`` krijgt eerst alles wat het sindsdien gemist
+heeft, daarna de live-stroom – geen volledige state-rebuild meer na een
+netwerkhik.
+
+Seq-nummers gelden alleen binnen één proces: na een herstart begint de
+teller weer bij 1 met een nieuw epoch.  Een cursor uit een ander epoch
+(of een ``since`` voorbij ``latest_seq``) is dus zinloos; zie
+:meth:`EventHistory.is_stale`.
+
+De buffer is een vaste lijst van ``capacity`` slots; slot ``seq % capacity``
+wordt overschreven, dus append is O(1) zonder allocaties en
+``since()`` is O(aantal teruggegeven events).
+"""
+from __future__ import annotations
+
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+_Entry = Tuple[int, Dict[str, Any]]
+
+
+class EventHistory:
+    def __init__(self, capacity: int = 10_000, *, epoch: str | None = None) -> None:
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.epoch = epoch or uuid.uuid4().hex[:12]
+        self._capacity = capacity
+        self._slots: List[Optional[_Entry]] = [None] * capacity
+        self._last_seq = 0
+
+    # ------------------------------------------------------------ write
+    def append(self, message: Dict[str, Any]) -> int:
+        """Slaat *message* op, zet ``seq``/``epoch`` erin en geeft dat seq terug."""
+        self._last_seq += 1
+        seq = self._last_seq
+        message["seq"] = seq
+        message["epoch"] = self.epoch
+        self._slots[seq % self._capacity] = (seq, message)
+        return seq
+
+    # ------------------------------------------------------------ read
+    @property
+    def latest_seq(self) -> int:
+        return self._last_seq
+
+    @property
+    def oldest_seq(self) -> int:
+        """Oudste seq dat nog in de buffer staat (``latest_seq + 1`` als leeg)."""
+        return max(1, self._last_seq - self._capacity + 1)
+
+    def since(self, seq: int, limit: int | None = None) -> List[Dict[str, Any]]:
+        """Alle events met ``seq`` > *seq* (oud → nieuw), hooguit *limit*."""
+        start = max(seq + 1, self.oldest_seq)
+        end = self._last_seq + 1
+        if limit is not None:
+            end = min(end, start + max(0, limit))
+        out: List[Dict[str, Any]] = []
+        slots, cap = self._slots, self._capacity
+        for s in range(start, end):
+            entry = slots[s % cap]
+            if entry is not None and entry[0] == s:
+                out.append(entry[1])
+        return out
+
+    def has_gap(self, seq: int) -> bool:
+        """``True`` als events na *seq* al uit de buffer zijn verdrongen."""
+        return seq + 1 < self.oldest_seq
+
+    def is_stale(self, seq: int, epoch: str | None = None) -> bool:
+        """
+        ``True`` als de cursor (*seq*, *epoch*) niet bij deze history hoort:
+        ander epoch (server herstart) of *seq* voorbij ``latest_seq``.  De
+        client moet dan zijn state opnieuw opbouwen.
+        """
+        return (epoch is not None and epoch != self.epoch) or seq > self._last_seq
+
+    # ------------------------------------------------------------ metrics
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "epoch": self.epoch,
+            "capacity": self._capacity,
+            "size": min(self._last_seq, self._capacity),
+            "oldest_seq": self.oldest_seq,
+            "latest_seq": self._last_seq,
+        }
@@ -0,0 +1,423 @@
+"""
+Fan-out van bus-events naar de open front-end sockets.
+
+• Elk event wordt precies één keer naar JSON geserialiseerd.
+• Elke browser krijgt een eigen, begrensde send-queue met een eigen
+  pump-task; één trage tab houdt de anderen (en de EventBus) niet meer op.
+• Blijft de queue van een client langer dan ``stall_timeout`` seconden vol,
+  dan wordt die client afgesloten (close-code 1013, *try again later*).
+• Clients kunnen zich via subscribe/unsubscribe beperken tot bepaalde
+  event-types en/of charge-point-id's; een index (event, cp_id) → clients
+  zorgt dat dispatch alleen de geïnteresseerde clients raakt.
+• Hoogfrequente events (MeterValues, StatusNotification, Heartbeat) worden
+  per client *geconflateerd*: alleen het nieuwste event per
+  (cp_id, event, evse, connector) blijft staan en wordt met maximaal
+  ``max_rate`` frames/s verstuurd, meerdere events samen als JSON-array.
+  Overige events (ChargePointConnected, transacties, …) gaan direct door.
+• Met een :class:`~application.event_history.EventHistory` krijgt elk event
+  een ``seq`` en ``epoch``; :meth:`FrontendBroadcaster.attach` met ``since``
+  speelt de gemiste events af vóór de live-stroom.  Hoort de cursor bij een
+  ander epoch (server herstart), dan eerst een ``HistoryReset``.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+from application.connection_registry import ConnectionRegistryFrontend
+from application.event_history import EventHistory
+
+log = logging.getLogger("frontend-broadcast")
+
+CLOSE_SLOW_CONSUMER = 1013
+ANY = "*"               # wildcard voor event-type of charge-point-id
+REPLAY_CHUNK = 500      # events per replay-frame
+
+# events waarvan alleen de nieuwste stand per connector interessant is
+CONFLATABLE_EVENTS = frozenset({"MeterValues", "StatusNotification", "Heartbeat"})
+
+_ConflationKey = Tuple[Any, str, Any, Any]
+
+
+def conflation_key(message: Dict[str, Any]) -> _ConflationKey | None:
+    """
+    (cp_id, event, evse_id, connector_id) voor conflateerbare events, anders
+    ``None``.  In 2.0.1 is een connector-id alleen uniek binnen zijn EVSE
+    (EVSE 1/connector 1 ≠ EVSE 2/connector 1); 1.6 kent geen evse_id.
+    """
+    event = message.get("event")
+    if event not in CONFLATABLE_EVENTS:
+        return None
+    body = message.get("payload")
+    evse = connector = None
+    if isinstance(body, dict):
+        evse = body.get("evse_id")
+        connector = body.get("connector_id")
+    return (message.get("charge_point_id"), event, evse, connector)
+
+
+def _non_empty(values: Iterable[str] | None, name: str) -> List[str] | None:
+    """``None`` blijft ``None`` (= alles); een lege lijst is een fout."""
+    if values is None:
+        return None
+    out = list(values)
+    if not out:
+        raise ValueError(f"{name} must not be empty (omit it for all)")
+    return out
+
+
+def _frame(texts: List[str]) -> str:
+    """Eén event → het object zelf; meerdere → JSON-array (zonder re-encode)."""
+    return texts[0] if len(texts) == 1 else "[" + ",".join(texts) + "]"
+
+
+class FrontendClient:
+    """Eén browser-verbinding met eigen send-queue en pump-task."""
+
+    def __init__(
+        self,
+        ws: Any,
+        *,
+        queue_size: int = 256,
+        stall_timeout: float = 10.0,
+        max_rate: float = 0.0,
+    ) -> None:
+        self.id = str(id(ws))
+        self._ws = ws
+        self._queue: asyncio.Queue[str] = asyncio.Queue(maxsize=queue_size)
+        self._stall_timeout = stall_timeout
+        self._full_since: float | None = None
+        self._task: asyncio.Task[None] | None = None
+        self._closed = False
+
+        # conflatie: nieuwste event per sleutel, max. `max_rate` frames/s
+        self._min_interval = 1.0 / max_rate if max_rate > 0 else 0.0
+        self._pending: Dict[_ConflationKey, str] = {}
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._last_flush = 0.0
+        self._stalled = False
+
+        # tellers
+        self.sent = 0
+        self.dropped = 0
+        self.conflated = 0
+
+    # ------------------------------------------------------------ lifecycle
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._pump(), name=f"fe-pump:{self.id}")
+
+    async def close(self, code: int | None = None) -> None:
+        self._closed = True
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._task is not None and self._task is not asyncio.current_task():
+            self._task.cancel()
+        try:
+            await self._ws.close(code or 1000)
+        except RuntimeError:
+            pass  # socket was al dicht
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    # ------------------------------------------------------------ sending
+    def offer(self, text: str) -> bool:
+        """
+        Zet een (al geserialiseerd) bericht in de queue zonder te wachten.
+        Geeft ``False`` terug als de client dicht is of te lang vastzit.
+        """
+        if self._closed:
+            return False
+        try:
+            self._queue.put_nowait(text)
+            self._full_since = None
+            return True
+        except asyncio.QueueFull:
+            self.dropped += 1
+            now = time.monotonic()
+            if self._full_since is None:
+                self._full_since = now
+            return now - self._full_since < self._stall_timeout
+
+    def offer_event(self, key: _ConflationKey | None, text: str) -> bool:
+        """
+        Zoals :meth:`offer`, maar met conflatie voor events met een *key*.
+        Een event zonder key neemt openstaande geconflateerde events mee in
+        hetzelfde frame, zodat de volgorde behouden blijft.
+        """
+        if self._min_interval == 0.0:
+            return self.offer(text)
+        if self._closed or self._stalled:
+            return False
+
+        if key is None:
+            texts = [*self._pending.values(), text]
+            self._pending.clear()
+            return self.offer(_frame(texts))
+
+        if self._pending.pop(key, None) is not None:
+            self.conflated += 1
+        self._pending[key] = text
+        if self._flush_handle is None:
+            loop = asyncio.get_running_loop()
+            delay = max(0.0, self._last_flush + self._min_interval - loop.time())
+            self._flush_handle = loop.call_later(delay, self._flush_pending)
+        return True
+
+    def _flush_pending(self) -> None:
+        self._flush_handle = None
+        if not self._pending or self._closed:
+            return
+        texts = list(self._pending.values())
+        self._pending.clear()
+        self._last_flush = asyncio.get_running_loop().time()
+        if not self.offer(_frame(texts)):
+            self._stalled = True        # volgende broadcast ruimt de client op
+
+    async def send_text(self, data: str) -> None:
+        """``_WsLike``-compatibel: enqueue i.p.v. direct versturen."""
+        self.offer(data)
+
+    async def _pump(self) -> None:
+        try:
+            while True:
+                text = await self._queue.get()
+                await self._ws.send_text(text)
+                self.sent += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            log.info("Front-end %s send failed: %s", self.id, exc)
+            self._closed = True
+
+    # ------------------------------------------------------------ metrics
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "depth": self._queue.qsize(),
+            "max_depth": self._queue.maxsize,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "conflated": self.conflated,
+            "pending": len(self._pending),
+        }
+
+
+class SubscriptionIndex:
+    """Index (event, cp_id) → clients, met ``*`` als wildcard op beide assen."""
+
+    def __init__(self) -> None:
+        self._index: Dict[Tuple[str, str], Set[FrontendClient]] = {}
+        self._by_client: Dict[FrontendClient, Set[Tuple[str, str]]] = {}
+
+    def add(
+        self, client: FrontendClient, events: Iterable[str], cp_ids: Iterable[str]
+    ) -> None:
+        keys = self._by_client.setdefault(client, set())
+        cp_list = list(cp_ids)
+        for evt in events:
+            for cp in cp_list:
+                self._index.setdefault((evt, cp), set()).add(client)
+                keys.add((evt, cp))
+
+    def remove(
+        self,
+        client: FrontendClient,
+        events: Iterable[str] | None = None,
+        cp_ids: Iterable[str] | None = None,
+    ) -> None:
+        """
+        Zonder *events*/*cp_ids*: alle subscriptions van de client weg.
+
+        Een wildcard laat zich niet versmallen (er is geen "alles behalve"):
+        raakt de afmelding een ``*``-subscription zonder hem helemaal weg te
+        halen, dan :class:`ValueError` en blijft alles ongewijzigd.
+        """
+        keys = self._by_client.get(client)
+        if not keys:
+            self._by_client.pop(client, None)
+            return
+        if events is None and cp_ids is None:
+            drop = set(keys)
+        else:
+            evts = set(events) if events is not None else None
+            cps = set(cp_ids) if cp_ids is not None else None
+            drop = set()
+            for e, c in keys:
+                hit_e = evts is None or e in evts
+                hit_c = cps is None or c in cps
+                if hit_e and hit_c:
+                    drop.add((e, c))
+                elif (hit_e or e == ANY) and (hit_c or c == ANY):
+                    raise ValueError(
+                        f"cannot narrow wildcard subscription ({e}, {c}); "
+                        "unsubscribe it and subscribe to explicit events instead"
+                    )
+        for key in drop:
+            bucket = self._index.get(key)
+            if bucket is not None:
+                bucket.discard(client)
+                if not bucket:
+                    del self._index[key]
+        keys -= drop
+        if not keys:
+            del self._by_client[client]
+
+    def match(self, event: str, cp_id: str | None) -> Set[FrontendClient]:
+        idx = self._index
+        keys = (
+            ((event, cp_id), (event, ANY), (ANY, cp_id), (ANY, ANY))
+            if cp_id is not None
+            else ((event, ANY), (ANY, ANY))
+        )
+        out: Set[FrontendClient] = set()
+        for key in keys:
+            bucket = idx.get(key)
+            if bucket:
+                out |= bucket
+        return out
+
+    def subscriptions(self, client: FrontendClient) -> List[Dict[str, str]]:
+        return [
+            {"event": e, "charge_point_id": c}
+            for e, c in sorted(self._by_client.get(client, ()))
+        ]
+
+
+class FrontendBroadcaster:
+    """
+    Serialize-once fan-out naar geabonneerde :class:`FrontendClient`'s.
+
+    Een nieuwe client krijgt een impliciete ``(*, *)``-subscription (alles,
+    zoals voorheen).  De eerste expliciete ``subscribe`` vervangt die.
+    """
+
+    def __init__(
+        self,
+        registry: ConnectionRegistryFrontend,
+        history: EventHistory | None = None,
+    ) -> None:
+        self._registry = registry
+        self._history = history
+        self._index = SubscriptionIndex()
+        self._implicit: Set[FrontendClient] = set()
+        self.broadcasts = 0
+        self.disconnected_slow = 0
+        self.replayed = 0
+        self.resets = 0
+
+    # ------------------------------------------------------------ clients
+    def attach(
+        self, client: FrontendClient, since: int | None = None, epoch: str | None = None
+    ) -> None:
+        """
+        Meldt *client* aan voor de live-stroom.  Met *since* worden eerst de
+        gemiste events uit de history afgespeeld; er zit geen ``await``
+        tussen replay en aanmelden, dus er valt geen event tussendoor.
+        """
+        if since is not None and self._history is not None:
+            self._replay(client, since, epoch)
+        self._index.add(client, [ANY], [ANY])
+        self._implicit.add(client)
+
+    def _replay(self, client: FrontendClient, since: int, epoch: str | None) -> None:
+        history = self._history
+        assert history is not None
+        if history.is_stale(since, epoch):
+            # cursor van een vorig proces: client gooit zijn state weg en
+            # krijgt daarna alles wat deze history nog heeft
+            self.resets += 1
+            client.offer(json.dumps({
+                "event": "HistoryReset",
+                "since": since,
+                "epoch": history.epoch,
+                "oldest_seq": history.oldest_seq,
+                "latest_seq": history.latest_seq,
+            }))
+            since = 0
+        elif history.has_gap(since):
+            client.offer(json.dumps({
+                "event": "HistoryGap",
+                "since": since,
+                "epoch": history.epoch,
+                "oldest_seq": history.oldest_seq,
+            }))
+        missed = history.since(since)
+        for i in range(0, len(missed), REPLAY_CHUNK):
+            chunk = missed[i:i + REPLAY_CHUNK]
+            client.offer(_frame([json.dumps(m) for m in chunk]))
+        self.replayed += len(missed)
+
+    def detach(self, client: FrontendClient) -> None:
+        self._index.remove(client)
+        self._implicit.discard(client)
+
+    def subscribe(
+        self,
+        client: FrontendClient,
+        events: Iterable[str] | None = None,
+        cp_ids: Iterable[str] | None = None,
+    ) -> List[Dict[str, str]]:
+        """``None`` = alles (``*``); een lege lijst is een fout (ValueError)."""
+        events, cp_ids = _non_empty(events, "events"), _non_empty(cp_ids, "charge_point_ids")
+        if client in self._implicit:
+            self._index.remove(client)
+            self._implicit.discard(client)
+        self._index.add(client, events or [ANY], cp_ids or [ANY])
+        return self._index.subscriptions(client)
+
+    def unsubscribe(
+        self,
+        client: FrontendClient,
+        events: Iterable[str] | None = None,
+        cp_ids: Iterable[str] | None = None,
+    ) -> List[Dict[str, str]]:
+        """Zie :meth:`SubscriptionIndex.remove`; ValueError laat alles staan."""
+        events, cp_ids = _non_empty(events, "events"), _non_empty(cp_ids, "charge_point_ids")
+        self._index.remove(client, events, cp_ids)
+        self._implicit.discard(client)
+        return self._index.subscriptions(client)
+
+    # ------------------------------------------------------------ dispatch
+    async def broadcast(self, message: Dict[str, Any]) -> None:
+        if self._history is not None:
+            self._history.append(message)       # ook zonder luisteraars
+        targets = self._index.match(
+            message.get("event", ""), message.get("charge_point_id")
+        )
+        if not targets:
+            return                      # niemand geïnteresseerd → niet eens serialiseren
+        text = json.dumps(message)
+        key = conflation_key(message)
+        self.broadcasts += 1
+        for client in targets:
+            if not client.offer_event(key, text):
+                await self._disconnect(client)
+
+    async def _disconnect(self, client: FrontendClient) -> None:
+        self.detach(client)
+        await self._registry.deregister(client)             # type: ignore[arg-type]
+        if not client.closed:
+            self.disconnected_slow += 1
+            log.warning("Front-end %s too slow – disconnecting", client.id)
+            await client.close(CLOSE_SLOW_CONSUMER)
+
+    async def stats(self) -> Dict[str, Any]:
+        clients: List[Dict[str, Any]] = [
+            c.stats() for c in await self._registry.get_all()  # type: ignore[attr-defined]
+        ]
+        out: Dict[str, Any] = {
+            "broadcasts": self.broadcasts,
+            "disconnected_slow": self.disconnected_slow,
+            "replayed": self.replayed,
+            "resets": self.resets,
+            "clients": clients,
+        }
+        if self._history is not None:
+            out["history"] = self._history.stats()
+        return out
@@ -0,0 +1,446 @@
+"""
+Gefaseerde rollouts van verstorende fleet-operaties (Reset, firmware,
+grote config-wijzigingen).
+
+Alles tegelijk versturen geeft een reconnect- en BootNotification-storm op
+de WebSocket-route.  Een rollout-job verstuurt het commando daarom in
+*waves* van ``batch_size`` laadpalen (via de
+:class:`~application.bulk_command_service.BulkCommandService`):
+
+1. wave versturen;
+2. **health-gate**: wachten tot minstens ``health_threshold`` van de wave
+   via ``ChargePointConnected`` terug is (of – bij ``expect_reconnect=False``
+   – het commando accepteerde), maximaal ``health_timeout`` seconden;
+3. gehaald → ``wave_interval`` wachten en door; niet gehaald → job gaat op
+   *paused* tot een operator hem hervat (of annuleert).
+
+De job-toestand (incl. resultaten per laadpaal) wordt na elke stap
+opgeslagen; na een herstart gaan *running*-jobs verder bij de lopende
+wave en worden laadpalen die al een resultaat hebben overgeslagen.
+
+Met meerdere workers draait een job alleen op de worker die hem in de
+database geclaimd heeft (zie :class:`RolloutRepository`).  Die verlengt
+elke ``lease / 3`` seconden zijn lease en neemt tegelijk jobs over
+waarvan de lease verlopen is; lukt het verlengen of opslaan niet meer, dan
+stopt de worker met die job.
+
+Status opvragen kan op elke worker: een job die hier niet draait wordt
+uit de database gelezen.  Pauzeren/hervatten/annuleren van zo'n job wordt
+als ``requested`` in de rij gezet; de eigenaar voert het uit bij zijn
+volgende lease-verlenging.  Heeft de job geen levende eigenaar (bv. een
+gepauzeerde job na een nette shutdown), dan claimt deze worker hem zelf.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from enum import Enum
+from typing import Any, Dict, List, Optional
+
+from fastapi import HTTPException
+
+from application.bulk_command_service import BulkCommandService
+from application.event_bus import EventBus, bus as default_bus
+from services.rollout_repository import RolloutRepository
+
+log = logging.getLogger("rollout")
+
+
+class RolloutState(str, Enum):
+    RUNNING = "running"
+    PAUSED = "paused"
+    COMPLETED = "completed"
+    CANCELLED = "cancelled"
+
+
+_UNFINISHED = [RolloutState.RUNNING.value, RolloutState.PAUSED.value]
+_OPERATOR_ACTIONS = ("pause", "resume", "cancel")
+
+
+@dataclass
+class RolloutJob:
+    action: str
+    parameters: Dict[str, Any]
+    targets: List[str]
+    batch_size: int = 50
+    wave_interval: float = 30.0
+    health_threshold: float = 0.9
+    health_timeout: float = 300.0
+    expect_reconnect: bool = True
+    concurrency: Optional[int] = None
+
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    state: RolloutState = RolloutState.RUNNING
+    wave: int = 0                               # index van de lopende wave
+    results: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    reconnected: List[str] = field(default_factory=list)
+    paused_reason: Optional[str] = None
+    requested: Optional[str] = None             # operator-actie die op de eigenaar wacht
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+
+    @property
+    def waves(self) -> List[List[str]]:
+        n = max(1, self.batch_size)
+        return [self.targets[i:i + n] for i in range(0, len(self.targets), n)]
+
+    def to_dict(self) -> Dict[str, Any]:
+        out = asdict(self)
+        out["state"] = self.state.value
+        return out
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RolloutJob":
+        job = cls(**data)
+        job.state = RolloutState(data["state"])
+        return job
+
+    def summary(self) -> Dict[str, Any]:
+        """Voortgang zonder de (mogelijk grote) resultaten per laadpaal."""
+        ok = sum(1 for r in self.results.values() if r.get("ok"))
+        return {
+            "id": self.id,
+            "action": self.action,
+            "state": self.state.value,
+            "paused_reason": self.paused_reason,
+            "requested": self.requested,
+            "wave": self.wave,
+            "waves": len(self.waves),
+            "targets": len(self.targets),
+            "sent": len(self.results),
+            "ok": ok,
+            "failed": len(self.results) - ok,
+            "reconnected": len(self.reconnected),
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
+
+
+class RolloutService:
+    def __init__(
+        self,
+        bulk: BulkCommandService,
+        repo: RolloutRepository,
+        *,
+        owner: Optional[str] = None,
+        lease: float = 30.0,
+        event_bus: EventBus = default_bus,
+    ) -> None:
+        self._bulk = bulk
+        self._repo = repo
+        self.owner = owner or uuid.uuid4().hex      # identiteit van deze worker
+        self._lease = lease
+        self._lease_task: Optional[asyncio.Task[None]] = None
+        self._jobs: Dict[str, RolloutJob] = {}
+        self._tasks: Dict[str, asyncio.Task[None]] = {}
+        self._resume: Dict[str, asyncio.Event] = {}
+        self._progress: Dict[str, asyncio.Event] = {}
+        self._awaiting: Dict[str, str] = {}          # cp_id → job-id (lopende gate)
+        # ook events van andere workers: een laadpaal kan elders terugkomen
+        event_bus.subscribe("ChargePointConnected", self._on_connected)
+
+        # tellers
+        self.waves_sent = 0
+        self.gates_failed = 0
+        self.claimed = 0
+        self.leases_lost = 0
+
+    # ------------------------------------------------------------ lifecycle
+    async def start(self) -> None:
+        """Onafgemaakte jobs zonder (levende) eigenaar claimen en hervatten."""
+        await self._adopt()
+        self._lease_task = asyncio.get_running_loop().create_task(
+            self._lease_loop(), name="rollout:lease"
+        )
+
+    async def close(self) -> None:
+        # toestand blijft 'running' in de DB → andere worker / herstart gaat verder
+        if self._lease_task is not None:
+            self._lease_task.cancel()
+            self._lease_task = None
+        for task in list(self._tasks.values()):
+            task.cancel()
+        for task in list(self._tasks.values()):
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+        self._tasks.clear()
+        try:
+            await self._repo.release(self._owned(), self.owner)
+        except Exception:
+            log.error("Unable to release rollout leases", exc_info=True)
+
+    # ------------------------------------------------------------ API
+    async def create(self, job: RolloutJob) -> RolloutJob:
+        if not job.targets:
+            raise HTTPException(status_code=400, detail="Rollout has no targets")
+        if not 0.0 <= job.health_threshold <= 1.0:
+            raise HTTPException(status_code=400, detail="health_threshold must be within 0..1")
+        self._bulk.prepare(job.action, job.parameters)      # 400 bij ongeldige actie
+        self._jobs[job.id] = job
+        await self._save(job)
+        self._spawn(job)
+        return job
+
+    def get(self, job_id: str) -> RolloutJob:
+        """Alleen jobs die op deze worker draaien; zie :meth:`find`."""
+        job = self._jobs.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Unknown rollout")
+        return job
+
+    def jobs(self) -> List[RolloutJob]:
+        return list(self._jobs.values())
+
+    async def find(self, job_id: str) -> RolloutJob:
+        """Lokale job, anders de opgeslagen toestand (job draait op een andere worker)."""
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job
+        data = await self._repo.load(job_id)
+        if data is None:
+            raise HTTPException(status_code=404, detail="Unknown rollout")
+        return RolloutJob.from_dict(data)
+
+    async def all_jobs(self, limit: int = 100) -> List[RolloutJob]:
+        """Jobs van alle workers; voor lokale jobs de live toestand."""
+        out = {j.id: j for j in map(RolloutJob.from_dict, await self._repo.list(limit))}
+        out.update(self._jobs)
+        return sorted(out.values(), key=lambda j: j.created_at, reverse=True)
+
+    async def pause(self, job_id: str) -> RolloutJob:
+        job = self._jobs.get(job_id)
+        if job is None:
+            return await self._remote(job_id, "pause")
+        if job.state is RolloutState.RUNNING:
+            job.state, job.paused_reason = RolloutState.PAUSED, "paused by operator"
+            self._resume_event(job).clear()
+            await self._save(job)
+        return job
+
+    async def resume(self, job_id: str) -> RolloutJob:
+        job = self._jobs.get(job_id)
+        if job is None:
+            return await self._remote(job_id, "resume")
+        if job.state is RolloutState.PAUSED:
+            job.state, job.paused_reason = RolloutState.RUNNING, None
+            await self._save(job)
+            self._resume_event(job).set()
+            if job.id not in self._tasks:
+                self._spawn(job)
+        return job
+
+    async def cancel(self, job_id: str) -> RolloutJob:
+        job = self._jobs.get(job_id)
+        if job is None:
+            return await self._remote(job_id, "cancel")
+        if job.state in (RolloutState.RUNNING, RolloutState.PAUSED):
+            job.state = RolloutState.CANCELLED
+            task = self._tasks.pop(job.id, None)
+            if task is not None:
+                task.cancel()
+            self._release(job)
+            await self._save(job)
+        return job
+
+    # ------------------------------------------------------------ ownership
+    def _owned(self) -> List[str]:
+        return [j.id for j in self._jobs.values() if j.state.value in _UNFINISHED]
+
+    async def _adopt(self) -> None:
+        for data in await self._repo.claim_unfinished(_UNFINISHED, self.owner, self._lease):
+            if data["id"] not in self._tasks:   # anders draait hij hier al
+                self._take_over(data)
+
+    def _take_over(self, data: Dict[str, Any]) -> RolloutJob:
+        job = RolloutJob.from_dict({**data, "requested": None})
+        self._jobs[job.id] = job
+        self.claimed += 1
+        log.info("Resuming rollout %s (%s) at wave %d", job.id, job.state.value, job.wave)
+        self._watch(job)
+        self._spawn(job)
+        return job
+
+    async def _remote(self, job_id: str, action: str) -> RolloutJob:
+        """Operator-actie voor een job die niet op deze worker draait."""
+        data = await self._repo.claim(job_id, _UNFINISHED, self.owner, self._lease)
+        if data is not None:                    # geen levende eigenaar → hier verder
+            self._take_over(data)
+            return await getattr(self, action)(job_id)
+        data = await self._repo.request(job_id, action, _UNFINISHED)
+        if data is None:
+            return await self.find(job_id)      # onbekend (404) of al afgerond
+        log.info("Rollout %s: %s requested from owner", job_id, action)
+        return RolloutJob.from_dict(data)
+
+    async def _apply_requested(self, job_id: str, action: Optional[str]) -> None:
+        if action in _OPERATOR_ACTIONS and job_id in self._jobs:
+            log.info("Rollout %s: applying requested %s", job_id, action)
+            await getattr(self, action)(job_id)
+
+    async def _lease_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self._lease / 3)
+            try:
+                owned = self._owned()
+                kept = await self._repo.renew(owned, self.owner, self._lease)
+                for job_id in owned:
+                    if job_id not in kept:
+                        self._abandon(job_id)
+                for job_id, action in kept.items():
+                    await self._apply_requested(job_id, action)
+                await self._adopt()             # verlopen leases van andere workers
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                log.error("Rollout lease renewal failed", exc_info=True)
+
+    def _abandon(self, job_id: str) -> None:
+        """Lease kwijt: een andere worker bezit de job nu – hier stoppen."""
+        job = self._jobs.pop(job_id, None)
+        if job is None:
+            return
+        self.leases_lost += 1
+        log.warning("Lost lease on rollout %s – stopping it on this worker", job_id)
+        task = self._tasks.pop(job_id, None)
+        if task is not None:
+            task.cancel()
+        self._release(job)
+
+    # ------------------------------------------------------------ engine
+    def _spawn(self, job: RolloutJob) -> None:
+        task = asyncio.get_running_loop().create_task(self._run(job), name=f"rollout:{job.id}")
+        self._tasks[job.id] = task
+        task.add_done_callback(self._forget_task)
+
+    def _forget_task(self, task: asyncio.Task[None]) -> None:
+        for job_id, t in list(self._tasks.items()):
+            if t is task:
+                del self._tasks[job_id]
+
+    def _resume_event(self, job: RolloutJob) -> asyncio.Event:
+        ev = self._resume.get(job.id)
+        if ev is None:
+            ev = self._resume[job.id] = asyncio.Event()
+        if job.state is not RolloutState.PAUSED:
+            ev.set()
+        return ev
+
+    async def _run(self, job: RolloutJob) -> None:
+        try:
+            waves = job.waves
+            while job.wave < len(waves):
+                await self._resume_event(job).wait()
+                await self._send_wave(job, waves[job.wave])
+                if not await self._gate(job, waves[job.wave]):
+                    self.gates_failed += 1
+                    job.state = RolloutState.PAUSED
+                    job.paused_reason = (
+                        f"health gate failed for wave {job.wave + 1}/{len(waves)}"
+                    )
+                    log.warning("Rollout %s paused: %s", job.id, job.paused_reason)
+                    self._resume_event(job).clear()
+                    await self._save(job)
+                    await self._resume_event(job).wait()    # operator beslist
+                self._release(job)
+                job.wave += 1
+                await self._save(job)
+                if job.wave < len(waves) and job.wave_interval > 0:
+                    await asyncio.sleep(job.wave_interval)
+            job.state = RolloutState.COMPLETED
+            await self._save(job)
+            log.info("Rollout %s completed: %s", job.id, job.summary())
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            log.error("Rollout %s crashed", job.id, exc_info=True)
+            job.state, job.paused_reason = RolloutState.PAUSED, "internal error"
+            await self._save(job)
+
+    async def _send_wave(self, job: RolloutJob, wave: List[str]) -> None:
+        todo = [cp for cp in wave if cp not in job.results]     # hervatten: niet dubbel
+        self._watch(job)                # vóór verzenden: snelle reboot niet missen
+        if not todo:
+            return
+        self.waves_sent += 1
+        calls = self._bulk.prepare(job.action, job.parameters)
+        async for item in self._bulk.run(
+            todo, job.action, job.parameters, calls, concurrency=job.concurrency
+        ):
+            if "summary" in item:
+                continue
+            job.results[item["charge_point_id"]] = {
+                k: item[k] for k in ("ok", "status", "detail") if k in item
+            }
+        await self._save(job)
+
+    def _healthy(self, job: RolloutJob, wave: List[str]) -> int:
+        ok = {cp for cp in wave if job.results.get(cp, {}).get("ok")}
+        if job.expect_reconnect:
+            ok &= set(job.reconnected)
+        return len(ok)
+
+    async def _gate(self, job: RolloutJob, wave: List[str]) -> bool:
+        needed = job.health_threshold * len(wave)
+        progress = self._progress.setdefault(job.id, asyncio.Event())
+        deadline = asyncio.get_running_loop().time() + job.health_timeout
+        while self._healthy(job, wave) < needed:
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                return False
+            progress.clear()
+            try:
+                await asyncio.wait_for(progress.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+        return True
+
+    def _watch(self, job: RolloutJob) -> None:
+        waves = job.waves
+        if job.wave < len(waves):
+            for cp_id in waves[job.wave]:
+                self._awaiting[cp_id] = job.id
+
+    def _release(self, job: RolloutJob) -> None:
+        for cp_id in [c for c, jid in self._awaiting.items() if jid == job.id]:
+            del self._awaiting[cp_id]
+        job.reconnected = []
+
+    async def _on_connected(self, charge_point_id: str, **_: Any) -> None:
+        job_id = self._awaiting.get(charge_point_id)
+        job = self._jobs.get(job_id) if job_id else None
+        if job is None or charge_point_id in job.reconnected:
+            return
+        job.reconnected.append(charge_point_id)
+        ev = self._progress.get(job.id)
+        if ev is not None:
+            ev.set()
+
+    async def _save(self, job: RolloutJob) -> None:
+        job.updated_at = time.time()
+        try:
+            owned = await self._repo.save(job.to_dict(), self.owner, self._lease)
+        except Exception:
+            log.error("Unable to persist rollout %s", job.id, exc_info=True)
+            return
+        if not owned:
+            self._abandon(job.id)
+
+    # ------------------------------------------------------------ metrics
+    def stats(self) -> Dict[str, Any]:
+        by_state: Dict[str, int] = {}
+        for job in self._jobs.values():
+            by_state[job.state.value] = by_state.get(job.state.value, 0) + 1
+        return {
+            "jobs": by_state,
+            "active": len(self._tasks),
+            "waves_sent": self.waves_sent,
+            "gates_failed": self.gates_failed,
+            "owner": self.owner,
+            "claimed": self.claimed,
+            "leases_lost": self.leases_lost,
+        }
@@ -0,0 +1,140 @@
+"""
+Begrensde LRU-cache (met TTL) voor charge-point settings.
+
+Vervangt de volledige alias-preload bij opstart: een record wordt pas
+opgehaald wanneer een laadpaal verbindt of iemand erom vraagt.  Misses die
+binnen ``batch_delay`` seconden binnenkomen (bv. een reconnect-storm)
+worden samengevoegd tot één ``load_by_ids``-query; gelijktijdige misses op
+dezelfde cp_id delen één future.  Onbekende ids worden ook gecachet
+(als ``None``), zodat nieuwe laadpalen niet elke keer de database raken.
+
+Geheugen en opstarttijd schalen zo met ``max_size``, niet met het aantal
+laadpalen dat ooit gezien is.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+SettingsRecord = Dict[str, Any]
+Loader = Callable[[List[str]], Awaitable[Dict[str, SettingsRecord]]]
+
+_Entry = Tuple[float, Optional[SettingsRecord]]     # (expires_at, record)
+
+
+class SettingsCache:
+    def __init__(
+        self,
+        loader: Loader,
+        *,
+        max_size: int = 10_000,
+        ttl: float = 300.0,
+        batch_delay: float = 0.002,
+    ) -> None:
+        self._loader = loader
+        self._max_size = max_size
+        self._ttl = ttl
+        self._batch_delay = batch_delay
+
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._waiting: Dict[str, asyncio.Future[Optional[SettingsRecord]]] = {}
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+        # tellers
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.evictions = 0
+
+    # ------------------------------------------------------------ lezen
+    def peek(self, cp_id: str) -> Optional[SettingsRecord]:
+        """Alleen uit de cache (geen load); ``None`` bij miss of verlopen."""
+        entry = self._entries.get(cp_id)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return entry[1]
+
+    async def get(self, cp_id: str) -> Optional[SettingsRecord]:
+        """Record voor *cp_id*, of ``None`` als de database het niet kent."""
+        entry = self._entries.get(cp_id)
+        if entry is not None:
+            if entry[0] >= time.monotonic():
+                self._entries.move_to_end(cp_id)
+                self.hits += 1
+                return entry[1]
+            del self._entries[cp_id]
+
+        self.misses += 1
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:              # nieuwe loop → oude wachtrij is dood
+            self._loop = loop
+            self._waiting = {}
+            self._flush_handle = None
+        fut = self._waiting.get(cp_id)
+        if fut is None:
+            fut = loop.create_future()
+            self._waiting[cp_id] = fut
+            if self._flush_handle is None:
+                self._flush_handle = loop.call_later(self._batch_delay, self._start_load)
+        return await asyncio.shield(fut)
+
+    def _start_load(self) -> None:
+        self._flush_handle = None
+        batch, self._waiting = self._waiting, {}
+        if batch:
+            asyncio.get_running_loop().create_task(self._load(batch))
+
+    async def _load(
+        self, batch: Dict[str, asyncio.Future[Optional[SettingsRecord]]]
+    ) -> None:
+        self.loads += 1
+        try:
+            rows = await self._loader(list(batch))
+        except Exception as exc:
+            for fut in batch.values():
+                if not fut.done():
+                    fut.set_exception(exc)
+            return
+        for cp_id, fut in batch.items():
+            record = rows.get(cp_id)
+            # een put() tijdens de load is nieuwer dan wat de DB teruggaf
+            if cp_id in self._entries:
+                record = self._entries[cp_id][1]
+            else:
+                self._store(cp_id, record)
+            if not fut.done():
+                fut.set_result(record)
+
+    # ------------------------------------------------------------ schrijven
+    def put(self, cp_id: str, record: Optional[SettingsRecord]) -> None:
+        self._store(cp_id, record)
+
+    def invalidate(self, cp_id: str) -> None:
+        self._entries.pop(cp_id, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def _store(self, cp_id: str, record: Optional[SettingsRecord]) -> None:
+        self._entries[cp_id] = (time.monotonic() + self._ttl, record)
+        self._entries.move_to_end(cp_id)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ------------------------------------------------------------ metrics
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._entries),
+            "max_size": self._max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "loads": self.loads,
+            "evictions": self.evictions,
+        }
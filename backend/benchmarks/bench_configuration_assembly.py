@@ -0,0 +1,159 @@
+"""
+Microbenchmark: samenstellen van de 2.0.1-configuratie-view (dedupe +
+GetVariables-resultaten terugkoppelen) – de oude naam-gebaseerde variant
+met geneste lussen versus de geïndexeerde variant in
+:mod:`application.configuration_service`.
+
+Gebruik (vanuit ``backend/``):
+
+    python benchmarks/bench_configuration_assembly.py [variabelen] [items_per_message]
+
+Bouwt een synthetisch device model van ``variabelen`` (default 5000)
+variabelen over een reeks componenten en EVSE's, de helft zonder waarde
+in het report.
+
+Gemeten wordt zowel een model met unieke namen (daar levert de oude
+variant nog alle rijen, dus eerlijk voor de snelheid) als een model met
+gedeelde namen (daar valt de oude variant rijen weg).  De "laadpaal"
+beantwoordt elke GetVariables direct (zonder netwerk), zodat alleen het
+werk aan CSMS-kant gemeten wordt.
+"""
+from __future__ import annotations
+
+import os
+import sys
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from application.configuration_service import (  # noqa: E402
+    _apply_results,
+    _batches,
+    _dedupe,
+    _variable_data,
+)
+
+_NAMES = ("Enabled", "Available", "Active", "Problem", "Tripped", "Power", "Current", "Voltage")
+_COMPONENTS = (
+    "AuthCtrlr", "OCPPCommCtrlr", "SmartChargingCtrlr", "TxCtrlr", "SecurityCtrlr",
+    "ClockCtrlr", "DisplayMessageCtrlr", "ReservationCtrlr", "EVSE", "Connector",
+)
+
+
+def _device_model(n: int, shared_names: bool) -> List[Dict[str, Any]]:
+    raw: List[Dict[str, Any]] = []
+    i = 0
+    while len(raw) < n:
+        comp: Dict[str, Any] = {"name": _COMPONENTS[i % len(_COMPONENTS)]}
+        comp["evse"] = {"id": i // len(_COMPONENTS) + 1}
+        for j, name in enumerate(_NAMES):
+            raw.append({
+                "key": name if shared_names and j < 4 else f"{name}{i}",
+                "instance": None,
+                "value": None if (i + j) % 2 else "x",
+                "component": comp,
+            })
+        i += 1
+    return raw[:n]
+
+
+def _respond(entries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """GetVariablesResponse zoals de ocpp-lib hem oplevert (snake_case)."""
+    return {"get_variable_result": [
+        {
+            "component": e["component"],
+            "variable": e["variable"],
+            "attribute_type": e.get("attributeType", "Actual"),
+            "attribute_status": "Accepted",
+            "attribute_value": "v",
+        }
+        for e in entries
+    ]}
+
+
+# --------------------------------------------------------------------------- #
+#  Oude implementatie (naam-dedupe, twee rondes, results × batch)
+# --------------------------------------------------------------------------- #
+def old_assembly(raw: List[Dict[str, Any]], chunk: int) -> Tuple[List[Dict[str, Any]], int]:
+    uniq: Dict[str, Dict[str, Any]] = {}
+    for itm in raw:
+        key = itm.get("key")
+        if not key:
+            continue
+        if key not in uniq or (uniq[key].get("value") is None and itm.get("value") is not None):
+            uniq[key] = itm
+    cfg_list = list(uniq.values())
+    messages = 0
+
+    missing = [c for c in cfg_list if c.get("value") is None]
+    for i in range(0, len(missing), chunk):
+        batch = missing[i : i + chunk]
+        res = _respond([{"component": c["component"], "variable": {"name": c["key"]}} for c in batch])
+        messages += 1
+        for r in res["get_variable_result"]:
+            for itm in batch:
+                if itm["key"] == r["variable"]["name"] and itm.get("value") is None:
+                    itm["value"] = r["attribute_value"]
+
+    for i in range(0, len(cfg_list), chunk):
+        batch = cfg_list[i : i + chunk]
+        res = _respond([
+            {"component": c["component"], "variable": {"name": c["key"]}, "attributeType": "Target"}
+            for c in batch
+        ])
+        messages += 1
+        for r in res["get_variable_result"]:
+            for itm in batch:
+                if itm["key"] == r["variable"]["name"]:
+                    itm["readonly"] = r["attribute_status"] != "Accepted"
+    return cfg_list, messages
+
+
+# --------------------------------------------------------------------------- #
+#  Nieuwe implementatie (index op component/EVSE/variabele, één ronde)
+# --------------------------------------------------------------------------- #
+def new_assembly(raw: List[Dict[str, Any]], chunk: int) -> Tuple[List[Dict[str, Any]], int]:
+    index = _dedupe(raw)
+    cfg_list = list(index.values())
+    wanted = []
+    for itm in cfg_list:
+        if itm.get("value") is None:
+            wanted.append((itm, "Actual"))
+        wanted.append((itm, "Target"))
+    batches = _batches(wanted, chunk, None)
+    for batch in batches:
+        _apply_results(batch, _respond([_variable_data(w) for w in batch]), index)
+    return cfg_list, len(batches)
+
+
+def _bench(
+    label: str, fn: Callable, n: int, chunk: int, shared_names: bool, rounds: int = 5
+) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        raw = [dict(itm) for itm in _device_model(n, shared_names)]
+        start = time.perf_counter()
+        rows, messages = fn(raw, chunk)
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:<24} chunk={chunk:<4} {len(rows):>6} rijen  {messages:>5} GetVariables  "
+          f"{best * 1000:8.1f} ms")
+    return best
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+    chunks = [int(sys.argv[2])] if len(sys.argv) > 2 else [24, 100, 500]
+    print("— unieke namen (beide varianten leveren alle rijen)")
+    for chunk in chunks:
+        base = _bench("naam + geneste lus (oud)", old_assembly, n, chunk, False)
+        fast = _bench("geïndexeerd", new_assembly, n, chunk, False)
+        print(f"speed-up: {base / fast:.1f}x  ({n} variabelen)\n")
+
+    print("— gedeelde namen (Enabled/Available/… op elke component)")
+    _bench("naam + geneste lus (oud)", old_assembly, n, chunks[0], True)
+    _bench("geïndexeerd", new_assembly, n, chunks[0], True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Microbenchmark: oude lock-per-lookup registry versus de versioned-snapshot
+variant in :mod:`application.connection_registry`.
+
+Gebruik (vanuit ``backend/``):
+
+    python benchmarks/bench_connection_registry.py [sessies] [readers]
+
+Registreert ``sessies`` (default 50k) sessies en laat ``readers``
+coroutines tegelijk ``get`` (en af en toe ``get_all``) doen, terwijl één
+writer sessies laat (her)verbinden.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import time
+from typing import Dict, List
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from application.connection_registry import _ConnectionRegistryBase  # noqa: E402
+
+
+class _Session:
+    __slots__ = ("id",)
+
+    def __init__(self, cp_id: str) -> None:
+        self.id = cp_id
+
+
+class LockedRegistry:
+    """De oorspronkelijke implementatie (lock op elke read, list-copy)."""
+
+    def __init__(self) -> None:
+        self._items: Dict[str, _Session] = {}
+        self._lock = asyncio.Lock()
+
+    async def register(self, item: _Session) -> None:
+        async with self._lock:
+            self._items[item.id] = item
+
+    async def deregister(self, item: _Session) -> None:
+        async with self._lock:
+            self._items.pop(item.id, None)
+
+    async def get(self, item_id: str):
+        async with self._lock:
+            return self._items.get(item_id)
+
+    async def get_all(self) -> List[_Session]:
+        async with self._lock:
+            return list(self._items.values())
+
+
+async def _bench(label: str, registry, n: int, readers: int, lookups: int) -> float:
+    sessions = [_Session(f"CP-{i:06d}") for i in range(n)]
+    for s in sessions:
+        await registry.register(s)
+
+    async def reader(offset: int) -> None:
+        for i in range(lookups):
+            await registry.get(sessions[(offset + i * 7919) % n].id)
+            if i % 1000 == 0:
+                await registry.get_all()
+            if i % 64 == 0:
+                await asyncio.sleep(0)      # andere readers laten draaien
+
+    async def writer() -> None:
+        for i in range(lookups // 100):
+            s = sessions[i % n]
+            await registry.deregister(s)
+            await registry.register(s)
+            await asyncio.sleep(0)
+
+    start = time.perf_counter()
+    await asyncio.gather(writer(), *(reader(r) for r in range(readers)))
+    elapsed = time.perf_counter() - start
+    total = readers * lookups
+    rate = total / elapsed
+    print(f"{label:<20} {total:>9} lookups  {elapsed:7.3f} s  {rate:>12,.0f} lookups/s")
+    return rate
+
+
+async def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    readers = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    lookups = 20_000
+
+    base = await _bench("lock per read (oud)", LockedRegistry(), n, readers, lookups)
+    fast = await _bench("versioned snapshot", _ConnectionRegistryBase(), n, readers, lookups)
+    print(f"speed-up: {fast / base:.1f}x  ({n} sessies, {readers} readers)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,105 @@
+"""
+Microbenchmark: ``meter_value`` line-protocol via ``influxdb_client.Point``
+versus :class:`services.line_protocol.MeterValueEncoder`.
+
+Gebruik (vanuit ``backend/``):
+
+    python benchmarks/bench_meter_value_encoding.py [aantal_berichten]
+
+Simuleert MeterValues-berichten van een vloot laadpalen (3-fase, 10
+sampled values per bericht) en rapporteert punten per seconde.
+"""
+from __future__ import annotations
+
+import os
+import sys
+import time
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from influxdb_client import Point, WritePrecision  # noqa: E402
+
+from services.line_protocol import MeterValueEncoder, _iso_to_datetime  # noqa: E402
+
+_SAMPLES = [
+    ("Voltage", "L1", "V", "230.1"),
+    ("Voltage", "L2", "V", "229.8"),
+    ("Voltage", "L3", "V", "231.0"),
+    ("Current.Import", "L1", "A", "15.9"),
+    ("Current.Import", "L2", "A", "16.0"),
+    ("Current.Import", "L3", "A", "16.1"),
+    ("Power.Active.Import", "", "W", "11040"),
+    ("Energy.Active.Import.Register", "", "Wh", "1234567"),
+    ("SoC", "", "Percent", "57"),
+    ("Temperature", "", "Celsius", "31.5"),
+]
+
+
+def _message(i: int) -> Dict[str, Any]:
+    return {
+        "connector_id": 1,
+        "meter_value": [
+            {
+                "timestamp": f"2025-06-04T12:{(i // 60) % 60:02d}:{i % 60:02d}Z",
+                "sampled_value": [
+                    {"measurand": m, "phase": ph, "unit": u, "location": "Outlet", "value": v}
+                    for m, ph, u, v in _SAMPLES
+                ],
+            }
+        ],
+    }
+
+
+def point_path(cp_id: str, body: Dict[str, Any]) -> List[str]:
+    """De oorspronkelijke implementatie uit InfluxDBService."""
+    out = []
+    connector = body.get("connector_id")
+    for mv in body.get("meter_value", []):
+        ts = _iso_to_datetime(mv.get("timestamp"))
+        for sv in mv.get("sampled_value", []):
+            try:
+                value_num = float(sv.get("value"))
+            except (TypeError, ValueError):
+                continue
+            point = (
+                Point("meter_value")
+                .tag("cp_id", cp_id)
+                .tag("connector", str(connector))
+                .tag("measurand", sv.get("measurand", ""))
+                .tag("phase", sv.get("phase", ""))
+                .tag("location", sv.get("location", ""))
+                .tag("unit", sv.get("unit", ""))
+                .field("value", value_num)
+                .time(ts, WritePrecision.NS)
+            )
+            out.append(point.to_line_protocol())
+    return out
+
+
+def _run(label: str, fn, work) -> float:
+    start = time.perf_counter()
+    points = 0
+    for cp_id, body in work:
+        points += len(fn(cp_id, body))
+    elapsed = time.perf_counter() - start
+    rate = points / elapsed
+    print(f"{label:<24} {points:>9} points  {elapsed:7.3f} s  {rate:>12,.0f} points/s")
+    return rate
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    fleet = 2_000
+    work = [(f"CP-{i % fleet:05d}", _message(i)) for i in range(n)]
+
+    encoder = MeterValueEncoder()
+    assert encoder.encode_lines(*work[0]) == point_path(*work[0])
+
+    base = _run("Point (oud)", point_path, work)
+    fast = _run("MeterValueEncoder", encoder.encode_lines, work)
+    print(f"speed-up: {fast / base:.1f}x  (prefix-cache: {encoder.cache_size()} entries)")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,7 @@ lokaal, staging of productie zonder code-aanpassing.
 """
 from functools import lru_cache
 import os
+import tempfile
 
 
 class _Settings:
@@ -14,6 +15,85 @@ class _Settings:
     INFLUX_TOKEN: str = os.getenv("INFLUX_TOKEN", "nUUDW9_TvfwX1vRVuUyVzW1lBiyGBoYTtrK6CyXU-l_Hn5RYbvppAsrnOdEPJn3RfoFsFRzC6DvVDNB8PggNfg==")
     INFLUX_ORG: str = os.getenv("INFLUX_ORG", "Sendlab")
     INFLUX_BUCKET: str = os.getenv("INFLUX_BUCKET", "CSMS_Gateway")
+    # batch-writer: flush per N regels of na T seconden, buffer begrensd
+    INFLUX_BATCH_SIZE: int = int(os.getenv("INFLUX_BATCH_SIZE", "5000"))
+    INFLUX_FLUSH_INTERVAL: float = float(os.getenv("INFLUX_FLUSH_INTERVAL", "1.0"))
+    INFLUX_MAX_BUFFER: int = int(os.getenv("INFLUX_MAX_BUFFER", "100000"))
+    # lokale spool bij Influx-storing (leeg pad = uitgeschakeld)
+    INFLUX_SPOOL_DIR: str = os.getenv(
+        "INFLUX_SPOOL_DIR", os.path.join(tempfile.gettempdir(), "csms-influx-spool")
+    )
+    INFLUX_SPOOL_MAX_BYTES: int = int(os.getenv("INFLUX_SPOOL_MAX_BYTES", str(256 * 1024 * 1024)))
+    INFLUX_SPOOL_SEGMENT_BYTES: int = int(os.getenv("INFLUX_SPOOL_SEGMENT_BYTES", str(4 * 1024 * 1024)))
+    INFLUX_REPLAY_RATE: float = float(os.getenv("INFLUX_REPLAY_RATE", "5000"))   # regels/s
+    # pre-aggregatie: windows in seconden (bv. "10,60"); leeg = uit (alles raw)
+    INFLUX_AGGREGATE_WINDOWS: str = os.getenv("INFLUX_AGGREGATE_WINDOWS", "")
+    # measurands die bij aggregatie óók raw blijven ("*" = alle, leeg = geen)
+    INFLUX_RAW_MEASURANDS: str = os.getenv("INFLUX_RAW_MEASURANDS", "")
+
+    # EventBus – queue-grootte per queued subscriber (sinks / front-ends)
+    EVENT_QUEUE_SIZE: int = int(os.getenv("EVENT_QUEUE_SIZE", "10000"))
+
+    # Front-end fan-out: send-queue per browser; langer vol dan N s → disconnect
+    FRONTEND_QUEUE_SIZE: int = int(os.getenv("FRONTEND_QUEUE_SIZE", "256"))
+    FRONTEND_STALL_TIMEOUT: float = float(os.getenv("FRONTEND_STALL_TIMEOUT", "10"))
+    # max. frames/s per browser voor MeterValues e.d. (0 = geen conflatie)
+    FRONTEND_MAX_RATE_HZ: float = float(os.getenv("FRONTEND_MAX_RATE_HZ", "2"))
+    # aantal recente events voor replay na (her)verbinden
+    EVENT_HISTORY_SIZE: int = int(os.getenv("EVENT_HISTORY_SIZE", "10000"))
+
+    # uitgaande CALLs per laadpaal: max. wachtenden en max. wachttijd per klasse
+    OUTBOUND_QUEUE_SIZE: int = int(os.getenv("OUTBOUND_QUEUE_SIZE", "32"))
+    OUTBOUND_DEADLINE_CONTROL: float = float(os.getenv("OUTBOUND_DEADLINE_CONTROL", "10"))
+    OUTBOUND_DEADLINE_CONFIG: float = float(os.getenv("OUTBOUND_DEADLINE_CONFIG", "30"))
+    OUTBOUND_DEADLINE_DIAGNOSTICS: float = float(
+        os.getenv("OUTBOUND_DEADLINE_DIAGNOSTICS", "60")
+    )
+
+    # max. wachttijd op het laatste NotifyReport-deel (configuratie-scherm)
+    NOTIFY_REPORT_TIMEOUT: float = float(os.getenv("NOTIFY_REPORT_TIMEOUT", "10"))
+
+    # configuratie-cache per laadpaal (vervalt ook bij wijzigingen/reboot)
+    CONFIG_CACHE_SIZE: int = int(os.getenv("CONFIG_CACHE_SIZE", "1000"))
+    CONFIG_CACHE_TTL: float = float(os.getenv("CONFIG_CACHE_TTL", "3600"))
+
+    # asynchrone commando-jobs (/start, /stop): max. aantal en bewaartijd
+    COMMAND_JOB_STORE_SIZE: int = int(os.getenv("COMMAND_JOB_STORE_SIZE", "10000"))
+    COMMAND_JOB_TTL: float = float(os.getenv("COMMAND_JOB_TTL", "900"))
+
+    # fleet-brede commando's: max. gelijktijdige calls per bulk-request
+    BULK_COMMAND_CONCURRENCY: int = int(os.getenv("BULK_COMMAND_CONCURRENCY", "100"))
+
+    # gefaseerde rollouts: defaults per job (overschrijfbaar in de request)
+    ROLLOUT_BATCH_SIZE: int = int(os.getenv("ROLLOUT_BATCH_SIZE", "50"))
+    ROLLOUT_WAVE_INTERVAL: float = float(os.getenv("ROLLOUT_WAVE_INTERVAL", "30"))
+    ROLLOUT_HEALTH_THRESHOLD: float = float(os.getenv("ROLLOUT_HEALTH_THRESHOLD", "0.9"))
+    ROLLOUT_HEALTH_TIMEOUT: float = float(os.getenv("ROLLOUT_HEALTH_TIMEOUT", "300"))
+    # claim op een job per worker; verlopen lease → andere worker neemt over
+    ROLLOUT_LEASE: float = float(os.getenv("ROLLOUT_LEASE", "30"))
+
+    # write-behind voor charge-point settings (connect/disconnect)
+    SETTINGS_FLUSH_INTERVAL: float = float(os.getenv("SETTINGS_FLUSH_INTERVAL", "0.5"))
+    SETTINGS_BATCH_SIZE: int = int(os.getenv("SETTINGS_BATCH_SIZE", "1000"))
+
+    # on-demand settings-cache (LRU + TTL) met batched loader
+    SETTINGS_CACHE_SIZE: int = int(os.getenv("SETTINGS_CACHE_SIZE", "10000"))
+    SETTINGS_CACHE_TTL: float = float(os.getenv("SETTINGS_CACHE_TTL", "300"))
+    SETTINGS_LOAD_BATCH_DELAY: float = float(os.getenv("SETTINGS_LOAD_BATCH_DELAY", "0.002"))
+
+    # multi-worker: "" = één proces, "unix" = peers via Unix-sockets
+    CLUSTER_TRANSPORT: str = os.getenv("CLUSTER_TRANSPORT", "")
+    CLUSTER_SOCKET_DIR: str = os.getenv(
+        "CLUSTER_SOCKET_DIR", os.path.join(tempfile.gettempdir(), "csms-cluster")
+    )
+    CLUSTER_REQUEST_TIMEOUT: float = float(os.getenv("CLUSTER_REQUEST_TIMEOUT", "35"))
+    # bus-events die tussen workers worden doorgestuurd (voor de front-ends)
+    CLUSTER_BUS_TOPICS: str = os.getenv(
+        "CLUSTER_BUS_TOPICS",
+        "MeterValues,Heartbeat,StatusNotification,StartTransaction,StopTransaction,"
+        "BootNotification,Authorize,ChargePointConnected,ChargePointDisconnected,"
+        "ConfigurationChanged,CommandJobCompleted",
+    )
 
     # Postgres (asyncpg DSN)
     POSTGRES_DSN: str = os.getenv(
@@ -2,11 +2,14 @@ from __future__ import annotations
 
 import asyncio
 import logging
+import time
 from enum import Enum
 from typing import Any, Protocol
 
 from starlette.websockets import WebSocketDisconnect          # ← nieuw
 
+from domain.outbound_scheduler import OutboundScheduler, Priority, priority_for
+
 logger = logging.getLogger(__name__)
 
 # ------------------------------------------------------------------------ #
@@ -54,12 +57,15 @@ class ChargePointSession:
         channel: WebSocketChannel,
         parser: IOcppEndpoint,
         settings: ChargePointSettings,
+        outbound: OutboundScheduler | None = None,
     ) -> None:
         self.id = session_id
         self._channel = channel
         self._cp = parser
         self._settings = settings
         self._running = False
+        # één CALL tegelijk, op prioriteit (control > config > diagnostics)
+        self.outbound = outbound if outbound is not None else OutboundScheduler()
 
     # ----------------------------------------------------------- listen
     async def listen(self) -> None:
@@ -83,27 +89,43 @@ class ChargePointSession:
             await self.disconnect()
 
     # ------------------------------------------------------ outbound RPC
-    async def send_call(self, call_obj: Any) -> Any:
-        # -------- request-logging
-        req_json = getattr(call_obj, "to_json", None)
-        logger.info(
-            "→ CP %s | request: %s",
-            self.id,
-            req_json() if callable(req_json) else repr(call_obj),
-        )
-        # -------- call
-        response = await self._cp.call(call_obj)
+    async def send_call(self, call_obj: Any, *, priority: Priority | None = None) -> Any:
+        """
+        Verstuurt een CALL via de outbound-scheduler.  Kan
+        :class:`~domain.outbound_scheduler.OutboundQueueFull` of
+        :class:`~domain.outbound_scheduler.OutboundDeadlineExceeded` gooien.
+        """
+        if priority is None:
+            priority = priority_for(type(call_obj).__name__)
+        queued_at = time.monotonic()
+        async with self.outbound.slot(priority):
+            sent_at = time.monotonic()
+            # -------- request-logging
+            req_json = getattr(call_obj, "to_json", None)
+            logger.info(
+                "→ CP %s | request: %s",
+                self.id,
+                req_json() if callable(req_json) else repr(call_obj),
+            )
+            # -------- call
+            response = await self._cp.call(call_obj)
         # -------- response-logging
         res_json = getattr(response, "to_json", None)
         logger.info(
-            "← CP %s | response: %s",
+            "← CP %s | response: %s (queue %.1f ms, charger %.1f ms)",
             self.id,
             res_json() if callable(res_json) else repr(response),
+            (sent_at - queued_at) * 1000,
+            (time.monotonic() - sent_at) * 1000,
         )
         return response
 
     # ------------------------------------------------------- disconnect
     async def disconnect(self) -> None:
+        # wachtende NotifyReport-callers niet tot hun timeout laten hangen
+        reports = getattr(self._cp, "reports", None)
+        if reports is not None:
+            reports.abort(ConnectionError(f"charge-point {self.id} disconnected"))
         await self._channel.close()
         logger.info("Session %s closed", self.id)
         self._running = False
@@ -0,0 +1,186 @@
+"""
+Uitgaande CALLs per laadpaal: prioriteit, begrensde wachtrij, deadlines.
+
+OCPP staat per verbinding maar één openstaande CALL toe.  Zonder
+scheduler wachten alle callers op de lock van de ocpp-lib in willekeurige
+volgorde, waardoor tientallen ``GetVariables`` (configuratie-scherm) een
+dringende ``RemoteStopTransaction`` kunnen ophouden.
+
+:class:`OutboundScheduler` is een *priority gate* vóór ``call()``:
+
+• drie klassen – ``CONTROL`` > ``CONFIG`` > ``DIAGNOSTICS`` – afgeleid van
+  de actie (of expliciet meegegeven); binnen een klasse FIFO;
+• maximaal ``max_in_flight`` CALLs tegelijk naar de laadpaal (OCPP: 1);
+• maximaal ``max_queue`` wachtenden → :class:`OutboundQueueFull`;
+• per klasse een deadline voor de wachttijd → :class:`OutboundDeadlineExceeded`;
+• wachttijd in de queue en responstijd van de laadpaal worden apart
+  gemeten (per klasse).
+"""
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+
+class Priority(IntEnum):
+    CONTROL = 0
+    CONFIG = 1
+    DIAGNOSTICS = 2
+
+
+_CONTROL_ACTIONS = frozenset({
+    "RemoteStartTransaction", "RemoteStopTransaction",
+    "RequestStartTransaction", "RequestStopTransaction",
+    "Reset", "UnlockConnector", "ChangeAvailability",
+    "SetChargingProfile", "ClearChargingProfile",
+    "ReserveNow", "CancelReservation", "CostUpdated",
+})
+_DIAGNOSTICS_ACTIONS = frozenset({
+    "GetConfiguration", "GetBaseReport", "GetReport", "GetVariables",
+    "GetMonitoringReport", "GetDiagnostics", "GetLog", "GetCompositeSchedule",
+    "GetChargingProfiles", "GetDisplayMessages", "GetInstalledCertificateIds",
+    "GetLocalListVersion", "GetTransactionStatus", "CustomerInformation",
+    "DataTransfer", "TriggerMessage", "ExtendedTriggerMessage",
+})
+
+
+def priority_for(action: str) -> Priority:
+    """Standaardklasse voor een OCPP-actie (alles wat wijzigt = CONFIG)."""
+    if action in _CONTROL_ACTIONS:
+        return Priority.CONTROL
+    if action in _DIAGNOSTICS_ACTIONS:
+        return Priority.DIAGNOSTICS
+    return Priority.CONFIG
+
+
+class OutboundQueueFull(Exception):
+    """Te veel wachtende CALLs voor deze laadpaal."""
+
+
+class OutboundDeadlineExceeded(Exception):
+    """CALL heeft langer in de queue gestaan dan de deadline van zijn klasse."""
+
+
+class _Timing:
+    __slots__ = ("count", "total", "last", "max")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.last = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.last = seconds
+        self.max = max(self.max, seconds)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            "last_ms": round(self.last * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+        }
+
+
+_Waiter = Tuple[int, int, "asyncio.Future[None]"]     # (priority, seq, future)
+
+
+class OutboundScheduler:
+    def __init__(
+        self,
+        *,
+        max_in_flight: int = 1,
+        max_queue: int = 32,
+        deadlines: Optional[Dict[Priority, float]] = None,
+    ) -> None:
+        self._max_in_flight = max_in_flight
+        self._max_queue = max_queue
+        self._deadlines = deadlines or {
+            Priority.CONTROL: 10.0,
+            Priority.CONFIG: 30.0,
+            Priority.DIAGNOSTICS: 60.0,
+        }
+        self._in_flight = 0
+        self._waiters: List[_Waiter] = []
+        self._seq = itertools.count()
+
+        # tellers
+        self.rejected = 0
+        self.expired = 0
+        self._queue_wait = {p: _Timing() for p in Priority}
+        self._response = {p: _Timing() for p in Priority}
+
+    @property
+    def depth(self) -> int:
+        return sum(1 for _, _, fut in self._waiters if not fut.done())
+
+    # ------------------------------------------------------------ gate
+    @asynccontextmanager
+    async def slot(self, priority: Priority) -> AsyncIterator[None]:
+        """Wacht op een vrije CALL-plek (volgens prioriteit) en houdt hem vast."""
+        enqueued = time.monotonic()
+        await self._acquire(priority)
+        started = time.monotonic()
+        self._queue_wait[priority].add(started - enqueued)
+        try:
+            yield
+        finally:
+            self._response[priority].add(time.monotonic() - started)
+            self._release()
+
+    async def _acquire(self, priority: Priority) -> None:
+        if self._in_flight < self._max_in_flight and not self.depth:
+            self._in_flight += 1
+            return
+        if self.depth >= self._max_queue:
+            self.rejected += 1
+            raise OutboundQueueFull(f"outbound queue full ({self._max_queue})")
+
+        fut: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (int(priority), next(self._seq), fut))
+        try:
+            await asyncio.wait_for(asyncio.shield(fut), self._deadlines[priority])
+        except asyncio.TimeoutError:
+            if fut.done() and not fut.cancelled():
+                return                  # net op tijd een plek gekregen
+            fut.cancel()
+            self.expired += 1
+            raise OutboundDeadlineExceeded(
+                f"{priority.name.lower()} call waited longer than "
+                f"{self._deadlines[priority]:.0f}s in the outbound queue"
+            ) from None
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                self._release()         # plek gekregen maar caller is weg
+            else:
+                fut.cancel()
+            raise
+
+    def _release(self) -> None:
+        # plek direct doorgeven aan de hoogste prioriteit (in_flight blijft gelijk)
+        while self._waiters:
+            _, _, fut = heapq.heappop(self._waiters)
+            if not fut.done():
+                fut.set_result(None)
+                return
+        self._in_flight -= 1
+
+    # ------------------------------------------------------------ metrics
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": self._in_flight,
+            "depth": self.depth,
+            "max_queue": self._max_queue,
+            "rejected": self.rejected,
+            "expired": self.expired,
+            "queue_wait": {p.name.lower(): self._queue_wait[p].stats() for p in Priority},
+            "response": {p.name.lower(): self._response[p].stats() for p in Priority},
+        }
@@ -0,0 +1,324 @@
+"""
+Transport tussen backend-workers (``uvicorn --workers N``).
+
+Elke worker is een *peer* met een eigen ``worker_id``.  Berichten zijn
+JSON-dicts; een peer kan een **request** sturen (met antwoord) of een
+**cast** (fire-and-forget).  Twee implementaties:
+
+• :class:`UnixSocketTransport` – elke worker luistert op
+  ``<socket_dir>/<worker_id>.sock``; peers worden gevonden door de
+  socket-directory te lezen.  Frames = 4-byte lengte + JSON, requests
+  worden over één persistente verbinding per peer gemultiplext.
+• :class:`InProcessTransport` + :class:`InProcessBroker` – stand-in voor
+  een externe broker: meerdere "workers" in één proces (tests, dev).
+  Berichten gaan wel door ``json`` heen, zodat dezelfde
+  serialisatie-eisen gelden als over een socket.
+
+Een adapter voor een externe broker (Redis, NATS, …) implementeert
+dezelfde :class:`ClusterTransport`-interface.
+"""
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+import logging
+import os
+import struct
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+log = logging.getLogger("cluster-transport")
+
+Message = Dict[str, Any]
+# (afzender, body) → antwoord (alleen gebruikt bij requests)
+Handler = Callable[[str, Message], Awaitable[Optional[Message]]]
+
+_HEADER = struct.Struct(">I")
+MAX_FRAME = 64 * 1024 * 1024
+
+
+class PeerUnavailable(ConnectionError):
+    """De gevraagde worker is (niet meer) bereikbaar."""
+
+
+class ClusterTransport(ABC):
+    def __init__(self, worker_id: str) -> None:
+        self.worker_id = worker_id
+        self._handler: Handler | None = None
+
+    @abstractmethod
+    async def start(self, handler: Handler) -> None: ...
+
+    @abstractmethod
+    async def close(self) -> None: ...
+
+    @abstractmethod
+    def peers(self) -> List[str]:
+        """Worker-ids van de andere bekende workers."""
+
+    @abstractmethod
+    async def request(self, peer: str, body: Message, timeout: float = 35.0) -> Message:
+        """Stuurt *body* naar *peer* en wacht op het antwoord."""
+
+    @abstractmethod
+    async def cast(self, peer: str, body: Message) -> None:
+        """Fire-and-forget naar *peer* (fouten worden gelogd, niet gegooid)."""
+
+    async def broadcast(self, body: Message) -> None:
+        await asyncio.gather(*(self.cast(p, body) for p in self.peers()))
+
+
+# ====================================================================== in-process
+class InProcessBroker:
+    """Gedeelde 'broker' voor :class:`InProcessTransport`-peers."""
+
+    def __init__(self) -> None:
+        self.members: Dict[str, InProcessTransport] = {}
+
+
+class InProcessTransport(ClusterTransport):
+    def __init__(self, broker: InProcessBroker, worker_id: str) -> None:
+        super().__init__(worker_id)
+        self._broker = broker
+
+    async def start(self, handler: Handler) -> None:
+        self._handler = handler
+        self._broker.members[self.worker_id] = self
+
+    async def close(self) -> None:
+        self._broker.members.pop(self.worker_id, None)
+
+    def peers(self) -> List[str]:
+        return [w for w in self._broker.members if w != self.worker_id]
+
+    async def _deliver(self, peer: str, body: Message) -> Optional[Message]:
+        target = self._broker.members.get(peer)
+        if target is None or target._handler is None:
+            raise PeerUnavailable(peer)
+        reply = await target._handler(self.worker_id, json.loads(json.dumps(body)))
+        return None if reply is None else json.loads(json.dumps(reply))
+
+    async def request(self, peer: str, body: Message, timeout: float = 35.0) -> Message:
+        reply = await asyncio.wait_for(self._deliver(peer, body), timeout)
+        return reply or {}
+
+    async def cast(self, peer: str, body: Message) -> None:
+        try:
+            await self._deliver(peer, body)
+        except Exception as exc:
+            log.debug("cast to %s failed: %s", peer, exc)
+
+    async def broadcast(self, body: Message) -> None:
+        data = json.dumps(body, default=str)        # één keer serialiseren
+        for peer in self.peers():
+            target = self._broker.members.get(peer)
+            if target is None or target._handler is None:
+                continue
+            try:
+                await target._handler(self.worker_id, json.loads(data))
+            except Exception as exc:
+                log.debug("broadcast to %s failed: %s", peer, exc)
+
+
+# ====================================================================== unix socket
+async def _read_frame(reader: asyncio.StreamReader) -> Message:
+    (size,) = _HEADER.unpack(await reader.readexactly(_HEADER.size))
+    if size > MAX_FRAME:
+        raise ValueError(f"frame too large ({size} bytes)")
+    return json.loads(await reader.readexactly(size))
+
+
+def _encode_frame(msg: Message) -> bytes:
+    data = json.dumps(msg, separators=(",", ":"), default=str).encode()
+    return _HEADER.pack(len(data)) + data
+
+
+class _PeerConnection:
+    """Eén uitgaande, gemultiplexte verbinding naar een peer."""
+
+    def __init__(self, peer: str, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.peer = peer
+        self._reader = reader
+        self._writer = writer
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, asyncio.Future[Message]] = {}
+        self._task = asyncio.create_task(self._read_loop(), name=f"cluster-peer:{peer}")
+        self.closed = False
+
+    async def _read_loop(self) -> None:
+        try:
+            while True:
+                frame = await _read_frame(self._reader)
+                fut = self._pending.pop(frame.get("id", 0), None)
+                if fut is not None and not fut.done():
+                    if "error" in frame:
+                        fut.set_exception(RuntimeError(frame["error"]))
+                    else:
+                        fut.set_result(frame.get("body") or {})
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            self.closed = True
+            for fut in self._pending.values():
+                if not fut.done():
+                    fut.set_exception(PeerUnavailable(self.peer))
+            self._pending.clear()
+
+    def send(self, kind: str, sender: str, body: Message) -> Optional[asyncio.Future[Message]]:
+        if self.closed:
+            raise PeerUnavailable(self.peer)
+        msg_id = next(self._ids)
+        fut: Optional[asyncio.Future[Message]] = None
+        if kind == "req":
+            fut = asyncio.get_running_loop().create_future()
+            self._pending[msg_id] = fut
+        self._writer.write(_encode_frame({"id": msg_id, "kind": kind, "from": sender, "body": body}))
+        return fut
+
+    def write_raw(self, frame: bytes) -> None:
+        """Al gecodeerd cast-frame (gedeeld tussen peers) versturen."""
+        if self.closed:
+            raise PeerUnavailable(self.peer)
+        self._writer.write(frame)
+
+    async def drain(self) -> None:
+        await self._writer.drain()
+
+    async def close(self) -> None:
+        self._task.cancel()
+        self._writer.close()
+        try:
+            await self._writer.wait_closed()
+        except Exception:
+            pass
+
+
+class UnixSocketTransport(ClusterTransport):
+    SUFFIX = ".sock"
+
+    def __init__(self, socket_dir: str | os.PathLike[str], worker_id: str) -> None:
+        super().__init__(worker_id)
+        self._dir = Path(socket_dir)
+        self._path = self._dir / f"{worker_id}{self.SUFFIX}"
+        self._server: asyncio.AbstractServer | None = None
+        self._conns: Dict[str, _PeerConnection] = {}
+        self._connecting: Dict[str, asyncio.Lock] = {}
+        self._inbound: set[asyncio.StreamWriter] = set()
+
+    # ------------------------------------------------------------ lifecycle
+    async def start(self, handler: Handler) -> None:
+        self._handler = handler
+        self._dir.mkdir(parents=True, exist_ok=True)
+        if self._path.exists():
+            self._path.unlink()
+        self._server = await asyncio.start_unix_server(self._serve, path=str(self._path))
+        log.info("Cluster peer %s listening on %s", self.worker_id, self._path)
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            for w in list(self._inbound):       # ook lopende verbindingen dicht
+                w.close()
+            await self._server.wait_closed()
+            self._server = None
+        for conn in list(self._conns.values()):
+            await conn.close()
+        self._conns.clear()
+        try:
+            self._path.unlink()
+        except FileNotFoundError:
+            pass
+
+    def peers(self) -> List[str]:
+        if not self._dir.is_dir():
+            return []
+        return sorted(
+            p.name[: -len(self.SUFFIX)]
+            for p in self._dir.iterdir()
+            if p.name.endswith(self.SUFFIX) and p != self._path
+        )
+
+    # ------------------------------------------------------------ inbound
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        write_lock = asyncio.Lock()
+
+        async def _handle(frame: Message) -> None:
+            assert self._handler is not None
+            reply: Message = {"id": frame.get("id"), "kind": "res"}
+            try:
+                reply["body"] = await self._handler(frame.get("from", "?"), frame.get("body") or {})
+            except Exception as exc:
+                log.warning("Cluster request from %s failed: %s", frame.get("from"), exc)
+                reply["error"] = str(exc)
+            if frame.get("kind") == "req":
+                async with write_lock:
+                    writer.write(_encode_frame(reply))
+                    await writer.drain()
+
+        tasks: set[asyncio.Task[None]] = set()
+        self._inbound.add(writer)
+        try:
+            while True:
+                frame = await _read_frame(reader)
+                if frame.get("kind") == "cast":
+                    await _handle(frame)        # casts in volgorde van aankomst
+                    continue
+                task = asyncio.create_task(_handle(frame))   # requests parallel
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            self._inbound.discard(writer)
+            writer.close()
+
+    # ------------------------------------------------------------ outbound
+    async def _connection(self, peer: str) -> _PeerConnection:
+        conn = self._conns.get(peer)
+        if conn is not None and not conn.closed:
+            return conn
+        lock = self._connecting.setdefault(peer, asyncio.Lock())
+        async with lock:
+            conn = self._conns.get(peer)
+            if conn is not None and not conn.closed:
+                return conn
+            path = self._dir / f"{peer}{self.SUFFIX}"
+            try:
+                reader, writer = await asyncio.open_unix_connection(str(path))
+            except ConnectionRefusedError as exc:
+                # worker is weg, socket-bestand is blijven staan → opruimen
+                path.unlink(missing_ok=True)
+                raise PeerUnavailable(peer) from exc
+            except OSError as exc:
+                raise PeerUnavailable(peer) from exc
+            conn = _PeerConnection(peer, reader, writer)
+            self._conns[peer] = conn
+            return conn
+
+    async def request(self, peer: str, body: Message, timeout: float = 35.0) -> Message:
+        conn = await self._connection(peer)
+        fut = conn.send("req", self.worker_id, body)
+        assert fut is not None
+        await conn.drain()
+        return await asyncio.wait_for(fut, timeout)
+
+    async def cast(self, peer: str, body: Message) -> None:
+        try:
+            conn = await self._connection(peer)
+            conn.send("cast", self.worker_id, body)
+            await conn.drain()
+        except Exception as exc:
+            log.debug("cast to %s failed: %s", peer, exc)
+
+    async def broadcast(self, body: Message) -> None:
+        # één keer serialiseren, dezelfde bytes naar elke peer
+        frame = _encode_frame({"id": 0, "kind": "cast", "from": self.worker_id, "body": body})
+        for peer in self.peers():
+            try:
+                conn = await self._connection(peer)
+                conn.write_raw(frame)
+                await conn.drain()
+            except Exception as exc:
+                log.debug("broadcast to %s failed: %s", peer, exc)
@@ -21,6 +21,7 @@ from ocpp.v201 import ChargePoint as _BaseV201         # type: ignore
 from ocpp.v201 import call_result as _res201           # type: ignore
 
 from application.event_bus import bus
+from infrastructure.report_collector import ReportCollector
 
 __all__ = ["V16Handler", "V201Handler"]
 log = logging.getLogger(__name__)
@@ -136,10 +137,15 @@ class V16Handler(_BaseV16):
 class V201Handler(_BaseV201):
     """
     Handler‑set voor OCPP 2.0.1.
-    • Cachet alle NotifyReport‑delen in ``self.latest_config``
-    • Zet ``self.notify_report_done`` True zodra *tbc == False*
+    • NotifyReport‑delen gaan per requestId naar ``self.reports``
+      (:class:`ReportCollector`) – daar wacht de configuratie-route op;
+      de requestIds van GetBaseReport komen uit dezelfde collector
     """
 
+    def __init__(self, *args: Any, **kw: Any) -> None:
+        super().__init__(*args, **kw)
+        self.reports = ReportCollector()
+
     # ---------------- BootNotification
     @on("BootNotification")
     async def on_boot_notification(self, charging_station, reason, **kw):
@@ -201,12 +207,8 @@ class V201Handler(_BaseV201):
         tbc: bool,
         **kw,
     ):
-        # Initialiseer cache bij start
-        if seq_no == 0 or not hasattr(self, "latest_config"):
-            self.latest_config: List[Dict[str, Any]] = []
-            self.notify_report_done = False  # type: ignore[attr-defined]
-
         # Parse elk report‑item
+        items: List[Dict[str, Any]] = []
         for entry in report_data:
             try:
                 name: str = entry["variable"]["name"]
@@ -223,9 +225,10 @@ class V201Handler(_BaseV201):
                 if best_attr is None:
                     best_attr = attrs[0] if attrs else {}
 
-                self.latest_config.append(
+                items.append(
                     {
                         "key": name,
+                        "instance": entry["variable"].get("instance"),
                         "value": best_attr.get("value"),
                         "readonly": best_attr.get("mutability", "ReadOnly")
                         == "ReadOnly",
@@ -243,9 +246,8 @@ class V201Handler(_BaseV201):
             except Exception as exc:  # pragma: no cover
                 log.error("NotifyReport‑parse error: %s", exc, exc_info=True)
 
-        # laatste deel?
-        if not tbc:
-            self.notify_report_done = True  # type: ignore[attr-defined]
+        # wachtende caller voor dit requestId (resolved direct bij tbc == False)
+        solicited = self.reports.feed(request_id, items, tbc)
 
         # ==== DEBUG‑logging =================================================
         try:
@@ -272,6 +274,8 @@ class V201Handler(_BaseV201):
             seq_no=seq_no,
             tbc=tbc,
             generated_at=generated_at,
+            request_id=request_id,
+            solicited=solicited,      # False → configuratie-cache vervalt
         )
         return _res201.NotifyReport()
 
@@ -0,0 +1,120 @@
+"""
+Verzamelt ``NotifyReport``-delen per ``requestId`` (OCPP 2.0.1).
+
+Een caller reserveert eerst een uniek requestId (``open``), stuurt daarna
+``GetBaseReport``/``GetReport`` met dat id en wacht met ``wait`` tot het
+laatste deel (``tbc == False``) binnen is – de future wordt op dat moment
+resolved, er wordt niet gepolld.  Gelijktijdige reports voor dezelfde
+laadpaal hebben zo elk hun eigen buffer.
+
+``wait`` ruimt de entry altijd op (ook bij timeout); ``abort`` laat alle
+wachtenden falen wanneer de verbinding wegvalt.
+"""
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+from typing import Any, Dict, List, Optional
+
+log = logging.getLogger(__name__)
+
+ReportItem = Dict[str, Any]
+
+
+class _PendingReport:
+    __slots__ = ("items", "future")
+
+    def __init__(self, future: "asyncio.Future[List[ReportItem]]") -> None:
+        self.items: List[ReportItem] = []
+        self.future = future
+
+
+class ReportCollector:
+    def __init__(self, *, first_id: int = 1) -> None:
+        self._ids = itertools.count(first_id)
+        self._pending: Dict[int, _PendingReport] = {}
+
+        # tellers
+        self.opened = 0
+        self.completed = 0
+        self.timed_out = 0
+        self.aborted = 0
+        self.unmatched = 0
+
+    def open(self) -> int:
+        """Reserveert een requestId dat nog niet in gebruik is."""
+        request_id = self.next_id()
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = _PendingReport(future)
+        self.opened += 1
+        return request_id
+
+    def next_id(self) -> int:
+        """
+        Vrij requestId zonder wachtende caller, voor een report waar niemand
+        op wacht (bv. ``GetBaseReport`` via de generieke commands-route).
+        """
+        request_id = next(self._ids)
+        while request_id in self._pending:
+            request_id = next(self._ids)
+        return request_id
+
+    def feed(self, request_id: int, items: List[ReportItem], tbc: bool) -> bool:
+        """Eén NotifyReport-deel; ``False`` als niemand op dit requestId wacht."""
+        pending = self._pending.get(request_id)
+        if pending is None:
+            self.unmatched += 1
+            return False
+        pending.items.extend(items)
+        if not tbc and not pending.future.done():
+            pending.future.set_result(pending.items)
+            self.completed += 1
+        return True
+
+    async def wait(self, request_id: int, timeout: float) -> List[ReportItem]:
+        """
+        Alle items van het report.  Bij een timeout komt terug wat er tot
+        dan toe binnen was (gelogd als warning).
+        """
+        pending = self._pending.get(request_id)
+        if pending is None:
+            raise KeyError(request_id)
+        try:
+            return await asyncio.wait_for(asyncio.shield(pending.future), timeout)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            log.warning(
+                "NotifyReport %s incomplete after %.1fs (%d items)",
+                request_id, timeout, len(pending.items),
+            )
+            return pending.items
+        finally:
+            self.close(request_id)
+
+    def close(self, request_id: int) -> None:
+        pending = self._pending.pop(request_id, None)
+        if pending is not None and not pending.future.done():
+            pending.future.cancel()
+
+    def abort(self, exc: Optional[BaseException] = None) -> None:
+        """Verbinding weg: alle wachtenden falen met *exc*."""
+        pending, self._pending = self._pending, {}
+        for entry in pending.values():
+            if not entry.future.done():
+                self.aborted += 1
+                entry.future.set_exception(exc or ConnectionError("charge-point disconnected"))
+                entry.future.exception()        # geen "never retrieved"-warning
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._pending),
+            "opened": self.opened,
+            "completed": self.completed,
+            "timed_out": self.timed_out,
+            "aborted": self.aborted,
+            "unmatched": self.unmatched,
+        }
@@ -1,6 +1,7 @@
 # backend/main.py
 
 import logging
+import os
 
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
@@ -9,28 +10,68 @@ from fastapi.middleware.cors import CORSMiddleware
 # Application-layer singletons
 from application.connection_registry import ConnectionRegistryChargePoint, ConnectionRegistryFrontend
 from application.command_service import CommandService
+from application.command_jobs import CommandJobService, JobStore
+from application.configuration_service import ConfigurationService
+from application.bulk_command_service import BulkCommandService
+from application.command_catalog import catalog as command_catalog
+from application.rollout_service import RolloutService
+from application.cluster_node import ClusterNode
+from application.bus_bridge import BusBridge
+from infrastructure.cluster_transport import UnixSocketTransport
+from application.event_bus import bus
+from application.event_history import EventHistory
+from application.settings_cache import SettingsCache
+from application.frontend_broadcaster import FrontendBroadcaster
 from services.settings_repository import SettingsRepository  
+from services.settings_writer import SettingsWriter
+from services.settings_listener import SettingsListener
+from services.rollout_repository import RolloutRepository
 from services.influxdb_service import InfluxDBService
 from config import settings   
 
 repo = SettingsRepository(settings().POSTGRES_DSN)    
+settings_writer = SettingsWriter(
+    repo,
+    flush_interval=settings().SETTINGS_FLUSH_INTERVAL,
+    batch_size=settings().SETTINGS_BATCH_SIZE,
+)
 
 # API / transport routes
 from routes.chargepoint_ws_routes import router as chargepoint_ws_router
 from routes.chargepoint_rpc_routes import router as chargepoint_rpc_router
 from routes.frontend_ws_routes import router as frontend_ws_router
+from routes.event_history_routes import router as event_history_router
+from routes.settings_routes import router as settings_router
+from routes.bulk_command_routes import router as bulk_command_router
+from routes.job_routes import router as job_router
+from routes.command_catalog_routes import router as command_catalog_router
+from routes.rollout_routes import router as rollout_router
 
 logger = logging.getLogger("csms")
 logger.setLevel(logging.INFO)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):                                
-    # DB-connectie + tabel maken
+    # DB-connectie + tabel maken (settings worden daarna on-demand geladen)
     await repo.init()
-    # alias-cache in registry injecteren vóór de app requests binnenkomen
-    aliases = {k: v["alias"] for k, v in (await repo.load_all()).items()}
-    cp_registry.preload_aliases(aliases)        # type: ignore[attr-defined]
+    if repo.available:
+        await settings_listener.start()     # LISTEN op wijzigingen van andere instances
+    await influx.start()
+    if cluster is not None:
+        await cluster.start()           # peers zoeken + eigen sessies claimen
+    await rollout_repo.init()
+    await rollouts.start()              # onafgemaakte rollouts hervatten
     yield
+    await rollouts.close()              # toestand staat al in de DB
+    await rollout_repo.close()
+    if bus_bridge is not None:
+        await bus_bridge.close()
+    if cluster is not None:
+        await cluster.close()
+    await bus.aclose()          # eerst queued events afleveren …
+    await influx.close()        # … dan de Influx-buffer flushen
+    await settings_listener.close()
+    await settings_writer.close()   # flush-barrière vóór de pool dichtgaat
     await repo.close()
 
 app = FastAPI(
@@ -58,10 +99,57 @@ app.add_middleware(
 )
 
 # Singletons
-cp_registry = ConnectionRegistryChargePoint(repo) 
+settings_cache = SettingsCache(
+    repo.load_by_ids,
+    max_size=settings().SETTINGS_CACHE_SIZE,
+    ttl=settings().SETTINGS_CACHE_TTL,
+    batch_delay=settings().SETTINGS_LOAD_BATCH_DELAY,
+)
+cp_registry = ConnectionRegistryChargePoint(repo, settings_writer, settings_cache)
+settings_listener = SettingsListener(
+    settings().POSTGRES_DSN,
+    origin=repo.instance_id,
+    on_message=cp_registry.apply_notification,
+    on_resync=cp_registry.resync_settings,
+)
 fe_registry = ConnectionRegistryFrontend()
-command_service = CommandService(cp_registry)
-InfluxDBService()
+event_history = EventHistory(settings().EVENT_HISTORY_SIZE)
+fe_broadcaster = FrontendBroadcaster(fe_registry, history=event_history)
+cluster: ClusterNode | None = None
+if settings().CLUSTER_TRANSPORT == "unix":
+    cluster = ClusterNode(
+        UnixSocketTransport(settings().CLUSTER_SOCKET_DIR, f"w{os.getpid()}"),
+        is_local=cp_registry.is_local,
+        local_ids=cp_registry.local_ids,
+        request_timeout=settings().CLUSTER_REQUEST_TIMEOUT,
+    )
+    cp_registry.add_listener(
+        lambda cp_id, up: cluster.claim(cp_id) if up else cluster.release(cp_id)
+    )
+command_service = CommandService(cp_registry, cluster)
+command_jobs = CommandJobService(
+    command_service,
+    JobStore(max_size=settings().COMMAND_JOB_STORE_SIZE, ttl=settings().COMMAND_JOB_TTL),
+)
+configuration_service = ConfigurationService(
+    cp_registry, command_service,
+    max_size=settings().CONFIG_CACHE_SIZE,
+    ttl=settings().CONFIG_CACHE_TTL,
+    report_timeout=settings().NOTIFY_REPORT_TIMEOUT,
+    cluster=cluster,
+)
+bulk_command_service = BulkCommandService(
+    cp_registry, command_service,
+    default_concurrency=settings().BULK_COMMAND_CONCURRENCY,
+)
+rollout_repo = RolloutRepository(settings().POSTGRES_DSN)
+rollouts = RolloutService(bulk_command_service, rollout_repo, lease=settings().ROLLOUT_LEASE)
+bus_bridge: BusBridge | None = None
+if cluster is not None:
+    bus_bridge = BusBridge(
+        cluster, bus, [t.strip() for t in settings().CLUSTER_BUS_TOPICS.split(",") if t.strip()]
+    )
+influx = InfluxDBService()
 
 # Mount routers
 app.include_router(
@@ -70,16 +158,69 @@ app.include_router(
     tags=["WebSocket – Charge Point"],
 )
 app.include_router(
-    chargepoint_rpc_router(registry=cp_registry, command_service=command_service),
+    chargepoint_rpc_router(
+        registry=cp_registry,
+        command_service=command_service,
+        jobs=command_jobs,
+        configuration=configuration_service,
+    ),
+    prefix="/api/v1",
+    tags=["RPC – Charge Point"],
+)
+app.include_router(
+    job_router(jobs=command_jobs),
+    prefix="/api/v1",
+    tags=["RPC – Charge Point"],
+)
+app.include_router(
+    command_catalog_router(catalog=command_catalog),
     prefix="/api/v1",
     tags=["RPC – Charge Point"],
 )
 app.include_router(
-    frontend_ws_router(registry=fe_registry),
+    bulk_command_router(bulk_service=bulk_command_service),
+    prefix="/api/v1",
+    tags=["RPC – Charge Point"],
+)
+app.include_router(
+    rollout_router(rollouts=rollouts, bulk_service=bulk_command_service),
+    prefix="/api/v1",
+    tags=["Rollouts"],
+)
+app.include_router(
+    settings_router(repo=repo, registry=cp_registry),
+    prefix="/api/v1",
+    tags=["Settings – bulk"],
+)
+app.include_router(
+    frontend_ws_router(registry=fe_registry, broadcaster=fe_broadcaster),
     prefix="/api/ws",
     tags=["WebSocket – Front-end"],
 )
+app.include_router(
+    event_history_router(history=event_history),
+    prefix="/api/v1",
+    tags=["Events"],
+)
 
 @app.get("/", tags=["Meta"])
 async def root() -> dict[str, str]:
     return {"message": "Welcome to the revamped CSMS API"}
+
+
+@app.get("/metrics", tags=["Meta"])
+async def metrics() -> dict:
+    """Interne tellers (queue-diepte, drops, lag) voor monitoring."""
+    return {
+        "event_bus": bus.stats(),
+        "influx": influx.stats(),
+        "frontends": await fe_broadcaster.stats(),
+        "settings_writer": settings_writer.stats(),
+        "settings_cache": settings_cache.stats(),
+        "settings_listener": settings_listener.stats(),
+        "cluster": cluster.stats() if cluster is not None else None,
+        "bus_bridge": bus_bridge.stats() if bus_bridge is not None else None,
+        "rollouts": rollouts.stats(),
+        "command_jobs": command_jobs.stats(),
+        "configuration_cache": configuration_service.stats(),
+    }
@@ -0,0 +1,57 @@
+"""
+``POST /commands/bulk`` – één commando naar (een deel van) de vloot.
+
+Het antwoord is een NDJSON-stream: per laadpaal één regel zodra het
+resultaat binnen is, afgesloten met een ``{"summary": …}``-regel.
+"""
+from __future__ import annotations
+
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from fastapi import APIRouter, HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+
+from application.bulk_command_service import BulkCommandService, FleetFilter
+
+
+class BulkFilter(BaseModel):
+    ocpp_version: Optional[str] = None          # "1.6" | "2.0.1"
+    enabled: Optional[bool] = None
+    alias_prefix: Optional[str] = None
+
+
+class BulkCommandRequest(BaseModel):
+    action: str
+    parameters: Dict[str, Any] = {}
+    charge_point_ids: Optional[List[str]] = None
+    filter: Optional[BulkFilter] = None
+    concurrency: Optional[int] = Field(None, ge=1)
+
+
+# ------------------------------------------------------------------------------
+def router(*, bulk_service: BulkCommandService) -> APIRouter:
+    r = APIRouter()
+
+    @r.post("/commands/bulk")
+    async def send_bulk(req: BulkCommandRequest) -> StreamingResponse:
+        if req.charge_point_ids is not None and req.filter is not None:
+            raise HTTPException(
+                status_code=400, detail="Use either 'charge_point_ids' or 'filter', not both"
+            )
+        # ongeldige actie/parameters → 400 vóór er iets verstuurd wordt
+        calls = bulk_service.prepare(req.action, req.parameters)
+        flt = FleetFilter(**req.filter.model_dump()) if req.filter is not None else None
+        targets = await bulk_service.resolve_targets(req.charge_point_ids, flt)
+
+        async def _lines() -> AsyncIterator[bytes]:
+            async for item in bulk_service.run(
+                targets, req.action, req.parameters, calls, concurrency=req.concurrency
+            ):
+                yield json.dumps(jsonable_encoder(item)).encode() + b"\n"
+
+        return StreamingResponse(_lines(), media_type="application/x-ndjson")
+
+    return r
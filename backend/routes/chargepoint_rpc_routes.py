@@ -1,15 +1,17 @@
 """REST/RPC-router voor het aansturen van laadpalen, incl. alias-support."""
 from __future__ import annotations
 
-import asyncio
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Optional
 
-from fastapi import APIRouter, Body, HTTPException, Query
+from fastapi import APIRouter, Body, Header, Query
+from fastapi.responses import JSONResponse, Response
 from pydantic import BaseModel
 
+from application.command_jobs import CommandJobService
 from application.command_service import CommandService
+from application.configuration_service import ConfigurationService
 from application.connection_registry import ConnectionRegistryChargePoint
-from domain.chargepoint_session import ChargePointSession, OCPPVersion
+from domain.chargepoint_session import OCPPVersion
 
 
 class CommandRequest(BaseModel):
@@ -36,29 +38,25 @@ class RemoteStopRequest(BaseModel):
 
 # ------------------------------------------------------------------------------
 def router(
-    *, registry: ConnectionRegistryChargePoint, command_service: CommandService
+    *,
+    registry: ConnectionRegistryChargePoint,
+    command_service: CommandService,
+    jobs: Optional[CommandJobService] = None,
+    configuration: Optional[ConfigurationService] = None,
 ) -> APIRouter:
     """Factory-functie die de router retourneert."""
     r = APIRouter()
+    job_service = jobs if jobs is not None else CommandJobService(command_service)
+    config_service = (
+        configuration
+        if configuration is not None
+        else ConfigurationService(registry, command_service)
+    )
 
     # ---------------------------------------------------------------- helpers
-    async def _get(cp_id: str) -> ChargePointSession:
-        cp = await registry.get(cp_id)
-        if cp is None:
-            raise HTTPException(status_code=404, detail="Charge-point not connected")
-        return cp
-
-    def _unwrap_result(obj: Any) -> Any:
-        """Pak ‘result’ uit ocpp-response wrappers."""
-        if isinstance(obj, dict):
-            return obj.get("result", obj)
-        return getattr(obj, "result", obj)
-
-    def _field(d_or_obj: Any, snake: str, camel: str) -> Any:
-        """Dict/object → snake/camel fallback field-getter."""
-        if isinstance(d_or_obj, dict):
-            return d_or_obj.get(snake) or d_or_obj.get(camel)
-        return getattr(d_or_obj, snake, None) or getattr(d_or_obj, camel, None)
+    async def _get(cp_id: str) -> Dict[str, Any]:
+        """Sessie-info van de worker waar *cp_id* verbonden is (404 als niemand)."""
+        return await command_service.describe(cp_id)
 
     # ---------------------------------------------------------------- alias-endpoints
     @r.put("/charge-points/{cp_id}/set-alias")
@@ -70,12 +68,13 @@ def router(
     @r.get("/charge-points/{cp_id}/settings")
     async def get_settings(cp_id: str):
         cp = await _get(cp_id)
-        return {
-            "id": cp.id,
-            "ocpp_version": cp._settings.ocpp_version.value,
-            "active": cp._settings.enabled,
-            "alias": cp._settings.alias,
-        }
+        return {k: cp[k] for k in ("id", "ocpp_version", "active", "alias")}
+
+    @r.get("/charge-points/{cp_id}/outbound")
+    async def outbound_queue(cp_id: str):
+        """Wachtrij van uitgaande CALLs: diepte, wachttijd en responstijd per klasse."""
+        cp = await _get(cp_id)
+        return {"id": cp["id"], **cp["outbound"]}
 
     # ---------------------------------------------------------------- generic command
     @r.post("/charge-points/{cp_id}/commands")
@@ -86,31 +85,35 @@ def router(
     @r.post("/charge-points/{cp_id}/enable")
     async def enable(cp_id: str):
         cp = await _get(cp_id)
-        cp._settings.enabled = True
-        return {"id": cp.id, "active": True}
+        await registry.set_enabled(cp_id, True)     # write-through + NOTIFY naar de eigenaar
+        return {"id": cp["id"], "active": True}
 
     @r.post("/charge-points/{cp_id}/disable")
     async def disable(cp_id: str):
         cp = await _get(cp_id)
-        cp._settings.enabled = False
-        return {"id": cp.id, "active": False}
+        await registry.set_enabled(cp_id, False)
+        return {"id": cp["id"], "active": False}
 
     # ---------------------------------------------------------------- remote start / stop
     @r.post("/charge-points/{cp_id}/start", status_code=202)
     async def remote_start(
         cp_id: str,
         req: Optional[RemoteStartRequest] = Body(None),
+        wait: float = Query(0.0, ge=0, le=60),
     ):
         """
         • Body is optioneel; zonder body krijg je de standaard-waardes uit het model.
         • connector_id wordt **alleen** meegestuurd als de client er expliciet
           om vraagt – dit gedraagt zich identiek aan de oude implementatie.
+        • Antwoordt direct met een job (``GET /jobs/{id}`` of het
+          ``CommandJobCompleted``-event voor het resultaat); met ``?wait=N``
+          wordt maximaal N s op de laadpaal gewacht.
         """
         if req is None:
             req = RemoteStartRequest()
 
         cp = await _get(cp_id)
-        v201 = cp._settings.ocpp_version is OCPPVersion.V201
+        v201 = cp["ocpp_version"] == OCPPVersion.V201.value
         action = "RequestStartTransaction" if v201 else "RemoteStartTransaction"
 
         params: Dict[str, Any] = {"id_tag": req.id_tag}
@@ -122,29 +125,32 @@ def router(
             # OCPP 1.6: connector_id alleen doorgeven als expliciet opgegeven
             params["connector_id"] = req.connector_id
 
-        return await command_service.send(cp_id, action, params)
+        job = await job_service.submit(cp_id, action, params)
+        return (await job_service.wait(job.id, wait)).to_dict()
 
     @r.post("/charge-points/{cp_id}/stop", status_code=202)
     async def remote_stop(
         cp_id: str,
         req: Optional[RemoteStopRequest] = Body(None),
+        wait: float = Query(0.0, ge=0, le=60),
     ):
         """
         transaction_id is vereist door OCPP – standaard op 1 voor backwards
         compatibility met de oude code, maar de caller kan ’m nu makkelijk
-        overschrijven.
+        overschrijven.  Zelfde job-semantiek als ``/start``.
         """
         tx_id = req.transaction_id if req else 1
         cp = await _get(cp_id)
-        v201 = cp._settings.ocpp_version is OCPPVersion.V201
+        v201 = cp["ocpp_version"] == OCPPVersion.V201.value
         action = "RequestStopTransaction" if v201 else "RemoteStopTransaction"
-        return await command_service.send(cp_id, action, {"transaction_id": tx_id})
+        job = await job_service.submit(cp_id, action, {"transaction_id": tx_id})
+        return (await job_service.wait(job.id, wait)).to_dict()
 
     # ---------------------------------------------------------------- charging current
     @r.post("/charge-points/{cp_id}/charging-current")
     async def set_current(cp_id: str, current: int = Body(..., ge=1)):
         cp = await _get(cp_id)
-        v201 = cp._settings.ocpp_version is OCPPVersion.V201
+        v201 = cp["ocpp_version"] == OCPPVersion.V201.value
         if v201:
             return await command_service.send(
                 cp_id,
@@ -165,128 +171,23 @@ def router(
 
     # ---------------------------------------------------------------- configuration (1.6 & 2.0.1)
     @r.get("/charge-points/{cp_id}/configuration")
-    async def configuration(cp_id: str):
+    async def configuration(
+        cp_id: str,
+        refresh: bool = Query(False),
+        if_none_match: Optional[str] = Header(None),
+    ):
         """
         – OCPP 1.6 : GetConfiguration  
         – OCPP 2.0.1 : GetBaseReport → NotifyReport → (bulk) GetVariables
-        """
-        cp = await _get(cp_id)
-
-        # ----------------------------- OCPP 1.6 -----------------------------
-        if cp._settings.ocpp_version is not OCPPVersion.V201:
-            return await command_service.send(cp_id, "GetConfiguration", {"key": []})
-
-        # ----------------------------- OCPP 2.0.1 ---------------------------
-        # buffers leegmaken (NIET meer verwijderen van latest_config)
-        # Alleen de notify-flag terugzetten
-        cp._cp.notify_report_done = False         # type: ignore[attr-defined]
-
-        # FullInventory-report opvragen
-        base_resp = await command_service.send(
-            cp_id,
-            "GetBaseReport",
-            {"requestId": 55, "reportBase": "FullInventory"},
-        )
-
-        # wachten op NotifyReport-einden (max 10 s)
-        for _ in range(100):
-            if getattr(cp._cp, "notify_report_done", False):   # type: ignore[attr-defined]
-                break
-            await asyncio.sleep(0.1)
 
-        raw: List[Dict[str, Any]] = getattr(cp._cp, "latest_config", [])  # type: ignore[attr-defined]
-
-        # dedupliceren
-        uniq: Dict[str, Dict[str, Any]] = {}
-        for itm in raw:
-            key = itm.get("key")
-            if not key:
-                continue
-            if key not in uniq or (
-                uniq[key].get("value") is None and itm.get("value") is not None
-            ):
-                uniq[key] = itm
-        cfg_list: List[Dict[str, Any]] = list(uniq.values())
-
-        # ontbrekende values ophalen
-        missing = [c for c in cfg_list if c.get("value") is None]
-        if missing:
-            CHUNK = 24
-            for i in range(0, len(missing), CHUNK):
-                batch = missing[i : i + CHUNK]
-                keys_payload = [
-                    {
-                        "component": itm.get("component", {}),
-                        "variable": {"name": itm["key"]},
-                    }
-                    for itm in batch
-                ]
-                gv_wrap = await command_service.send(
-                    cp_id, "GetVariables", {"key": keys_payload}
-                )
-                gv_res = _unwrap_result(gv_wrap)
-
-                results = (
-                    gv_res.get("get_variable_result", [])
-                    if isinstance(gv_res, dict)
-                    else getattr(gv_res, "get_variable_result", [])
-                )
-                for res in results:
-                    name = _field(_field(res, "variable", "variable"), "name", "name")
-                    val = _field(res, "attribute_value", "attributeValue")
-                    status = _field(res, "attribute_status", "attributeStatus") or "Rejected"
-                    for itm in batch:
-                        if itm["key"] == name and itm.get("value") is None:
-                            itm["value"] = val
-                            if status in {"Rejected", "NotSupported"}:
-                                itm["readonly"] = True
-
-        # schrijfbaarheid bepalen via Target-attribute
-        CHUNK = 24
-        for i in range(0, len(cfg_list), CHUNK):
-            batch = cfg_list[i : i + CHUNK]
-            keys_payload = [
-                {
-                    "component": itm.get("component", {}),
-                    "variable": {"name": itm["key"]},
-                    "attributeType": "Target",
-                }
-                for itm in batch
-            ]
-            gv_wrap = await command_service.send(
-                cp_id, "GetVariables", {"key": keys_payload}
-            )
-            gv_res = _unwrap_result(gv_wrap)
-
-            results = (
-                gv_res.get("get_variable_result", [])
-                if isinstance(gv_res, dict)
-                else getattr(gv_res, "get_variable_result", [])
-            )
-            for res in results:
-                name = _field(_field(res, "variable", "variable"), "name", "name")
-                status = _field(res, "attribute_status", "attributeStatus") or "Rejected"
-                for itm in batch:
-                    if itm["key"] == name:
-                        itm["readonly"] = status != "Accepted"
-
-        for itm in cfg_list:          # default naar read-only = True
-            itm.setdefault("readonly", True)
-
-        cfg_list.sort(key=lambda x: str(x["key"]).lower())
-
-        # status uit eerste response halen
-        result_obj = _unwrap_result(base_resp)
-        status_val = (
-            result_obj.get("status", "Accepted")
-            if isinstance(result_obj, dict)
-            else getattr(result_obj, "status", "Accepted")
-        )
-
-        return {
-            "status": status_val,
-            "configuration_key": cfg_list,
-        }
+        Uit de cache zolang er niets veranderd is; ``If-None-Match`` met de
+        ETag geeft 304, ``?refresh=true`` haalt opnieuw op bij de laadpaal.
+        """
+        view = await config_service.get(cp_id, refresh=refresh)
+        headers = {"ETag": view.etag, "Cache-Control": "no-cache"}
+        if view.matches(if_none_match):
+            return Response(status_code=304, headers=headers)
+        return JSONResponse(view.body, headers=headers)
 
     # ---------------------------------------------------------------- list connected
     @r.get("/get-all-charge-points")
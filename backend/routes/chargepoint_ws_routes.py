@@ -9,11 +9,13 @@ from fastapi import APIRouter, WebSocket
 
 from application.connection_registry import ConnectionRegistryChargePoint
 from application.event_bus import bus
+from config import settings as app_settings
 from domain.chargepoint_session import (
     ChargePointSession,
     ChargePointSettings,
     OCPPVersion,
 )
+from domain.outbound_scheduler import OutboundScheduler, Priority
 from infrastructure.fastapi_websocket_adapter import FastAPIWebSocketAdapter
 from infrastructure.ocpp_handlers import V16Handler, V201Handler
 from infrastructure.websocket_gateway import WebSocketGateway
@@ -71,7 +73,16 @@ def router(
         settings = ChargePointSettings()
         settings.ocpp_version = version
 
-        session = ChargePointSession(cp_id, channel, cp_parser, settings)
+        cfg = app_settings()
+        outbound = OutboundScheduler(
+            max_queue=cfg.OUTBOUND_QUEUE_SIZE,
+            deadlines={
+                Priority.CONTROL: cfg.OUTBOUND_DEADLINE_CONTROL,
+                Priority.CONFIG: cfg.OUTBOUND_DEADLINE_CONFIG,
+                Priority.DIAGNOSTICS: cfg.OUTBOUND_DEADLINE_DIAGNOSTICS,
+            },
+        )
+        session = ChargePointSession(cp_id, channel, cp_parser, settings, outbound)
         await registry.register(session)
         log.info("Charge-point connected: id=%s  proto=%s", cp_id, version.value)
 
@@ -0,0 +1,35 @@
+"""``GET /commands/catalog`` – welke OCPP-acties de CSMS kan versturen."""
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, HTTPException
+
+from application.command_catalog import CommandCatalog
+from domain.chargepoint_session import OCPPVersion
+
+
+# ------------------------------------------------------------------------------
+def router(*, catalog: CommandCatalog) -> APIRouter:
+    r = APIRouter()
+
+    @r.get("/commands/catalog")
+    async def command_catalog(
+        version: Optional[str] = None, schema: bool = True
+    ) -> List[Dict[str, Any]]:
+        """
+        Alle CSMS-geïnitieerde acties per OCPP-versie met hun parameters
+        (snake_case, camelCase wordt ook geaccepteerd), verplichte velden en
+        – tenzij ``schema=false`` – het JSON-schema van de request.
+        """
+        try:
+            ocpp_version = OCPPVersion(version) if version is not None else None
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Unknown OCPP version: {version}")
+        entries = catalog.describe(ocpp_version)
+        if not schema:
+            for entry in entries:
+                entry.pop("schema")
+        return entries
+
+    return r
@@ -0,0 +1,42 @@
+"""REST-router om door de server-side event-history te bladeren."""
+from __future__ import annotations
+
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, Query
+
+from application.event_history import EventHistory
+
+
+# ------------------------------------------------------------------------------
+def router(*, history: EventHistory) -> APIRouter:
+    r = APIRouter()
+
+    @r.get("/events")
+    async def list_events(
+        after: int = Query(0, ge=0, description="Alleen events met seq > after"),
+        limit: int = Query(100, ge=1, le=1000),
+        epoch: Optional[str] = Query(None, description="Epoch waar ``after`` bij hoort"),
+    ) -> Dict[str, Any]:
+        """
+        Eén pagina events (oud → nieuw).  Geef ``next`` terug als ``after``
+        voor de volgende pagina; ``gap`` geeft aan dat er events tussen
+        ``after`` en ``oldest_seq`` al verdrongen zijn.  ``reset`` betekent
+        dat de cursor van een ander epoch is (server herstart): de pagina
+        begint dan weer vooraan.
+        """
+        reset = history.is_stale(after, epoch)
+        if reset:
+            after = 0
+        events = history.since(after, limit)
+        return {
+            "epoch": history.epoch,
+            "events": events,
+            "next": events[-1]["seq"] if events else max(after, history.oldest_seq - 1),
+            "oldest_seq": history.oldest_seq,
+            "latest_seq": history.latest_seq,
+            "gap": history.has_gap(after),
+            "reset": reset,
+        }
+
+    return r
@@ -1,63 +1,139 @@
+"""
+WebSocket-router voor de front-end.
+
+Protocol client → server (JSON-tekst):
+
+    {"action": "subscribe",   "events": [...], "charge_point_ids": [...]}
+    {"action": "unsubscribe", "events": [...], "charge_point_ids": [...]}
+
+Ontbrekende lijsten betekenen "alles" (``*``); een lege lijst is een fout.
+Zonder subscribe ontvangt een client alle events; de eerste subscribe
+vervangt die default.  Een ``*``-subscription valt niet te versmallen met
+unsubscribe (dat geeft een Error): meld hem af en abonneer expliciet.  De
+server antwoordt met ``{"event": "Subscriptions", "subscriptions": [...]}``
+of ``{"event": "Error", "detail": ...}``.
+
+Server → client: een frame is één event-object, of een JSON-array van
+events wanneer geconflateerde events samen worden verstuurd.  Met
+``?max_rate=<Hz>`` kiest de client zelf het maximale frame-tempo
+(0 = elk event direct).
+
+Elk event draagt een ``seq`` en ``epoch``.  Bij herverbinden met
+``?since=<seq>&epoch=<epoch>`` komen eerst de gemiste events (uit de
+server-side history), daarna de live-stroom.  Is een deel al uit de
+history verdwenen, dan volgt eerst
+``{"event": "HistoryGap", "since": ..., "epoch": ..., "oldest_seq": ...}``.
+Hoort de cursor bij een ander epoch (server herstart) of ligt ``since``
+voorbij het laatste seq, dan komt
+``{"event": "HistoryReset", "epoch": ..., ...}`` en daarna alles wat de
+history nog heeft; de client moet zijn state dan opnieuw opbouwen.
+"""
 from __future__ import annotations
 
 import json
 import logging
-from typing import Callable
+from typing import Any, Dict, Optional
 
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, Query, WebSocket, WebSocketDisconnect
 
 from application.connection_registry import ConnectionRegistryFrontend
-from application.event_bus import bus
+from application.event_bus import Overflow, bus
+from application.frontend_broadcaster import FrontendBroadcaster, FrontendClient
+from config import settings
 
 log = logging.getLogger("frontend-ws")
 
 
-def router(registry: ConnectionRegistryFrontend) -> APIRouter:
+def router(
+    registry: ConnectionRegistryFrontend,
+    *,
+    broadcaster: Optional[FrontendBroadcaster] = None,
+) -> APIRouter:
     r = APIRouter()
+    fan_out = broadcaster or FrontendBroadcaster(registry)
+
+    # ---------------------------------------------------- control-berichten
+    def _handle_control(client: FrontendClient, text: str) -> Dict[str, Any]:
+        try:
+            msg = json.loads(text)
+            action = msg.get("action")
+            events = msg.get("events")
+            cp_ids = msg.get("charge_point_ids")
+            for lst in (events, cp_ids):
+                if lst is not None and not (
+                    isinstance(lst, list) and all(isinstance(x, str) for x in lst)
+                ):
+                    raise ValueError("events/charge_point_ids must be lists of strings")
+        except (ValueError, AttributeError) as exc:
+            return {"event": "Error", "detail": f"invalid message: {exc}"}
+
+        try:
+            if action == "subscribe":
+                subs = fan_out.subscribe(client, events, cp_ids)
+            elif action == "unsubscribe":
+                subs = fan_out.unsubscribe(client, events, cp_ids)
+            else:
+                return {"event": "Error", "detail": f"unknown action: {action!r}"}
+        except ValueError as exc:
+            return {"event": "Error", "detail": str(exc)}
+        return {"event": "Subscriptions", "subscriptions": subs}
 
     # ---------------------------------------------------- FE-socket endpoint
     @r.websocket("/frontend")
-    async def frontend_ws(ws: WebSocket) -> None:
+    async def frontend_ws(
+        ws: WebSocket,
+        max_rate: Optional[float] = Query(None, ge=0),
+        since: Optional[int] = Query(None, ge=0),
+        epoch: Optional[str] = Query(None, max_length=64),
+    ) -> None:
         await ws.accept()
-        ws.id = str(id(ws))            # type: ignore[attr-defined]
-        await registry.register(ws)    # type: ignore[arg-type]
-        log.info("Front-end connected: %s", ws.id)
+        client = FrontendClient(
+            ws,
+            queue_size=settings().FRONTEND_QUEUE_SIZE,
+            stall_timeout=settings().FRONTEND_STALL_TIMEOUT,
+            max_rate=settings().FRONTEND_MAX_RATE_HZ if max_rate is None else max_rate,
+        )
+        client.start()
+        await registry.register(client)    # type: ignore[arg-type]
+        fan_out.attach(client, since=since, epoch=epoch)
+        log.info("Front-end connected: %s", client.id)
 
         try:
             while True:
-                await ws.receive_text()  # FE stuurt (nog) niets terug
+                text = await ws.receive_text()
+                client.offer(json.dumps(_handle_control(client, text)))
         except WebSocketDisconnect:
-            log.info("Front-end %s disconnected", ws.id)
+            log.info("Front-end %s disconnected", client.id)
         finally:
-            await registry.deregister(ws)  # type: ignore[arg-type]
-
-    # ---------------------------------------------------- helper: broadcast
-    async def _broadcast(message: dict) -> None:
-        for fe in await registry.get_all():
-            try:
-                await fe.send_text(json.dumps(message))
-            except Exception:
-                await registry.deregister(fe)  # type: ignore[arg-type]
+            fan_out.detach(client)
+            await registry.deregister(client)  # type: ignore[arg-type]
+            await client.close()
 
     # ---------------------------------------------------- EventBus-bridge
-    def _make_handler(evt_name: str) -> Callable[..., None]:
-        async def _handler(**payload):
-            await _broadcast({"event": evt_name, **payload})
-        return _handler
-
-    for _evt in (
-        # OCPP-core events
-        "MeterValues",
-        "Heartbeat",
-        "StatusNotification",
-        "StartTransaction",
-        "StopTransaction",
-        "BootNotification",
-        "Authorize",
-        "ChargePointConnected",
-        "ChargePointDisconnected",
-        "ConfigurationChanged",
-    ):
-        bus.subscribe(_evt, _make_handler(_evt))
+    async def _forward(evt_name: str, payload: Dict[str, Any]) -> None:
+        await fan_out.broadcast({"event": evt_name, **payload})
+
+    # queued: serialiseren + fan-out gebeurt buiten de OCPP-handler.  Eén
+    # gedeelde queue voor alle types, zodat de browser ze in publicatie-
+    # volgorde krijgt (StatusNotification vóór de MeterValues erna).
+    bus.subscribe_many(
+        (
+            # OCPP-core events
+            "MeterValues",
+            "Heartbeat",
+            "StatusNotification",
+            "StartTransaction",
+            "StopTransaction",
+            "BootNotification",
+            "Authorize",
+            "ChargePointConnected",
+            "ChargePointDisconnected",
+            "ConfigurationChanged",
+            "CommandJobCompleted",
+        ),
+        _forward,
+        queue_size=settings().EVENT_QUEUE_SIZE,
+        overflow=Overflow.DROP_OLDEST,
+    )
 
     return r
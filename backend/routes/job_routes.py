@@ -0,0 +1,28 @@
+"""Status van asynchrone commando-jobs (zie :mod:`application.command_jobs`)."""
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, Query
+
+from application.command_jobs import CommandJobService
+
+
+# ------------------------------------------------------------------------------
+def router(*, jobs: CommandJobService) -> APIRouter:
+    r = APIRouter()
+
+    @r.get("/jobs/{job_id}")
+    async def get_job(job_id: str) -> Dict[str, Any]:
+        """Toestand (``pending``/``succeeded``/``failed``) en resultaat van één job."""
+        return jobs.get(job_id).to_dict()
+
+    @r.get("/jobs")
+    async def recent_jobs(
+        charge_point_id: Optional[str] = None,
+        limit: int = Query(100, ge=1, le=1000),
+    ) -> List[Dict[str, Any]]:
+        """Meest recente jobs eerst, optioneel voor één laadpaal."""
+        return [j.to_dict() for j in jobs.store.recent(limit, charge_point_id)]
+
+    return r
@@ -0,0 +1,82 @@
+"""
+Gefaseerde rollouts (``/rollouts``): aanmaken, volgen, pauzeren,
+hervatten en annuleren.  Zie :mod:`application.rollout_service`.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel, Field
+
+from application.bulk_command_service import BulkCommandService, FleetFilter
+from application.rollout_service import RolloutJob, RolloutService
+from config import settings
+from routes.bulk_command_routes import BulkFilter
+
+
+class RolloutRequest(BaseModel):
+    action: str
+    parameters: Dict[str, Any] = {}
+    charge_point_ids: Optional[List[str]] = None
+    filter: Optional[BulkFilter] = None
+    batch_size: int = Field(default_factory=lambda: settings().ROLLOUT_BATCH_SIZE, ge=1)
+    wave_interval: float = Field(default_factory=lambda: settings().ROLLOUT_WAVE_INTERVAL, ge=0)
+    health_threshold: float = Field(
+        default_factory=lambda: settings().ROLLOUT_HEALTH_THRESHOLD, ge=0, le=1
+    )
+    health_timeout: float = Field(
+        default_factory=lambda: settings().ROLLOUT_HEALTH_TIMEOUT, gt=0
+    )
+    # False voor acties zonder reboot: gate = "commando geaccepteerd"
+    expect_reconnect: bool = True
+    concurrency: Optional[int] = Field(None, ge=1)
+
+
+# ------------------------------------------------------------------------------
+def router(*, rollouts: RolloutService, bulk_service: BulkCommandService) -> APIRouter:
+    r = APIRouter()
+
+    @r.post("/rollouts", status_code=201)
+    async def create_rollout(req: RolloutRequest) -> Dict[str, Any]:
+        if req.charge_point_ids is not None and req.filter is not None:
+            raise HTTPException(
+                status_code=400, detail="Use either 'charge_point_ids' or 'filter', not both"
+            )
+        flt = FleetFilter(**req.filter.model_dump()) if req.filter is not None else None
+        targets = await bulk_service.resolve_targets(req.charge_point_ids, flt)
+        job = await rollouts.create(RolloutJob(
+            action=req.action,
+            parameters=req.parameters,
+            targets=targets,
+            batch_size=req.batch_size,
+            wave_interval=req.wave_interval,
+            health_threshold=req.health_threshold,
+            health_timeout=req.health_timeout,
+            expect_reconnect=req.expect_reconnect,
+            concurrency=req.concurrency,
+        ))
+        return job.summary()
+
+    @r.get("/rollouts")
+    async def list_rollouts() -> List[Dict[str, Any]]:
+        return [job.summary() for job in await rollouts.all_jobs()]
+
+    @r.get("/rollouts/{job_id}")
+    async def get_rollout(job_id: str) -> Dict[str, Any]:
+        job = await rollouts.find(job_id)
+        return {**job.summary(), "results": job.results}
+
+    @r.post("/rollouts/{job_id}/pause")
+    async def pause_rollout(job_id: str) -> Dict[str, Any]:
+        return (await rollouts.pause(job_id)).summary()
+
+    @r.post("/rollouts/{job_id}/resume")
+    async def resume_rollout(job_id: str) -> Dict[str, Any]:
+        return (await rollouts.resume(job_id)).summary()
+
+    @r.post("/rollouts/{job_id}/cancel")
+    async def cancel_rollout(job_id: str) -> Dict[str, Any]:
+        return (await rollouts.cancel(job_id)).summary()
+
+    return r
@@ -0,0 +1,72 @@
+"""Bulk import/export van fleet-settings als CSV (via Postgres ``COPY``)."""
+from __future__ import annotations
+
+import csv
+import io
+from typing import Dict
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+
+from application.connection_registry import ConnectionRegistryChargePoint
+from services.settings_repository import COLUMNS, SettingsImportError, SettingsRepository
+
+
+# ------------------------------------------------------------------------------
+def router(
+    *, repo: SettingsRepository, registry: ConnectionRegistryChargePoint
+) -> APIRouter:
+    r = APIRouter()
+
+    def _require_db() -> None:
+        if not repo.available:
+            raise HTTPException(status_code=503, detail="Settings database not available")
+
+    # ---------------------------------------------------------------- export
+    @r.get("/charge-point-settings/export", response_class=StreamingResponse)
+    async def export_settings() -> StreamingResponse:
+        """
+        Alle charge-point settings als CSV (``id,alias,enabled,ocpp_version``),
+        gestreamd zoals ``COPY`` de chunks aanlevert.
+        """
+        _require_db()
+        await registry.writer.flush()           # pending connect/disconnect-writes mee
+        return StreamingResponse(
+            repo.export_csv(),
+            media_type="text/csv",
+            headers={"Content-Disposition": 'attachment; filename="charge_point_settings.csv"'},
+        )
+
+    # ---------------------------------------------------------------- import
+    @r.post("/charge-point-settings/import")
+    async def import_settings(request: Request) -> Dict[str, int]:
+        """
+        Upsert van een CSV met header ``id,alias,enabled,ocpp_version`` in
+        willekeurige volgorde (request-body, ``text/csv``).  Live sessies
+        nemen de nieuwe alias/enabled direct over.  Ongeldige waarden → 400
+        met het regelnummer.
+        """
+        _require_db()
+        data = await request.body()
+        try:
+            reader = csv.reader(io.StringIO(data.decode("utf-8")))
+            header = [h.strip() for h in next(reader, None) or ()]
+            if sorted(header) != sorted(COLUMNS):
+                raise HTTPException(
+                    status_code=400, detail=f"CSV header must contain {','.join(COLUMNS)}"
+                )
+            id_col = header.index("id")
+            ids = [row[id_col] for row in reader if len(row) > id_col]
+        except (UnicodeDecodeError, csv.Error) as exc:
+            raise HTTPException(status_code=400, detail=f"invalid CSV: {exc}")
+
+        # oudere pending rijen mogen de import niet overschrijven
+        await registry.writer.flush()
+        try:
+            imported = await repo.import_csv(data, header)
+        except SettingsImportError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        registry.apply_settings(await repo.load_by_ids(set(ids)))
+        return {"imported": imported}
+
+    return r
@@ -0,0 +1,267 @@
+"""
+Batchende, niet-blokkerende writer voor InfluxDB.
+
+Records (line-protocol strings) komen via :meth:`InfluxBatchWriter.add` in
+een begrensde buffer terecht.  Een achtergrond-task flusht die buffer
+zodra er ``batch_size`` regels klaarstaan, en anders uiterlijk elke
+``flush_interval`` seconden.  De eigenlijke HTTP-call draait in een
+worker-thread (``asyncio.to_thread``), zodat de event-loop nooit op
+Influx wacht.
+
+Met een :class:`~services.telemetry_spool.TelemetrySpool` erbij gaat er bij
+een storing niets verloren:
+
+• een batch die na de retries nog faalt, gaat naar de spool en de writer
+  markeert de sink als *unhealthy*;
+• zolang de sink unhealthy is, gaan nieuwe batches direct naar de spool –
+  geen HTTP-timeouts meer per batch;
+• loopt de buffer vol (sink te traag), dan wordt er ook gespooled;
+• een replay-task speelt de spool met een begrensd tempo terug en fungeert
+  tegelijk als health-probe.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, List
+
+from services.telemetry_spool import TelemetrySpool
+
+log = logging.getLogger("InfluxBatchWriter")
+
+
+class InfluxBatchWriter:
+    def __init__(
+        self,
+        write_api: Any,
+        bucket: str,
+        *,
+        batch_size: int = 5000,
+        flush_interval: float = 1.0,
+        max_buffer: int = 100_000,
+        max_retries: int = 3,
+        retry_backoff: float = 0.5,
+        spool: TelemetrySpool | None = None,
+        replay_rate: float = 5000.0,
+        probe_interval: float = 5.0,
+    ) -> None:
+        self._write_api = write_api
+        self._bucket = bucket
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._max_retries = max_retries
+        self._retry_backoff = retry_backoff
+
+        # begrensd geheugen: bij overloop gaat de oudste regel eruit
+        self._buffer: Deque[str] = deque()
+        self._max_buffer = max_buffer
+
+        # spool + replay (optioneel)
+        self._spool = spool
+        self._replay_rate = replay_rate           # regels / seconde
+        self._probe_interval = probe_interval
+        self._healthy = True
+
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task[None] | None = None
+        self._replay_task: asyncio.Task[None] | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._closing = False
+
+        # tellers
+        self.written = 0
+        self.dropped = 0
+        self.retried = 0
+        self.failed_batches = 0
+        self.spooled = 0
+        self.replayed = 0
+
+    # ------------------------------------------------------------ intake
+    def add(self, record: str) -> None:
+        """Zet één line-protocol regel klaar (O(1), nooit blokkerend)."""
+        self._append(record)
+
+    def add_many(self, records: Iterable[str]) -> None:
+        """Zoals :meth:`add`, maar voor een heel bericht in één keer."""
+        self._buffer.extend(records)
+        overflow = len(self._buffer) - self._max_buffer
+        if overflow > 0:
+            for _ in range(overflow):
+                self._buffer.popleft()
+            self.dropped += overflow
+        self._ensure_task()
+        if len(self._buffer) >= self._batch_size and self._wakeup is not None:
+            self._wakeup.set()
+
+    def _append(self, record: str) -> None:
+        if len(self._buffer) >= self._max_buffer:
+            self._buffer.popleft()
+            self.dropped += 1
+        self._buffer.append(record)
+        self._ensure_task()
+        if len(self._buffer) >= self._batch_size and self._wakeup is not None:
+            self._wakeup.set()
+
+    # ------------------------------------------------------------ lifecycle
+    async def start(self) -> None:
+        self._closing = False
+        self._ensure_task()
+
+    async def close(self) -> None:
+        """
+        Stopt de flusher en schrijft alles wat nog in de buffer staat
+        (of spoolt het, als Influx op dat moment onbereikbaar is).
+        """
+        self._closing = True
+        same_loop = self._loop is asyncio.get_running_loop()
+
+        replay = self._replay_task
+        if replay is not None and not replay.done() and same_loop:
+            replay.cancel()
+            try:
+                await replay
+            except asyncio.CancelledError:
+                pass
+        self._replay_task = None
+
+        task = self._task
+        if task is not None and not task.done() and same_loop:
+            assert self._wakeup is not None
+            self._wakeup.set()
+            await task          # flusher werkt de buffer leeg en stopt
+        self._task = None
+        while self._buffer:
+            await self._flush_once()
+
+    def _ensure_task(self) -> None:
+        if self._closing:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # geen loop (bv. synchrone code) → flush later
+        if self._loop is not loop:
+            self._loop = loop
+            self._wakeup = asyncio.Event()
+            self._task = None
+            self._replay_task = None
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._run(), name="influx-batch-writer")
+        if self._spool is not None and (
+            self._replay_task is None or self._replay_task.done()
+        ):
+            self._replay_task = loop.create_task(
+                self._replay(), name="influx-spool-replay"
+            )
+
+    async def _run(self) -> None:
+        assert self._wakeup is not None
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self._flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            # op timeout alles flushen; op size-trigger alleen volle batches
+            while self._buffer:
+                await self._flush_once()
+                if len(self._buffer) < self._batch_size and not self._closing:
+                    break
+
+    # ------------------------------------------------------------ flush
+    def _take_batch(self) -> List[str]:
+        n = min(self._batch_size, len(self._buffer))
+        return [self._buffer.popleft() for _ in range(n)]
+
+    def _backlogged(self) -> bool:
+        return len(self._buffer) >= self._max_buffer // 2
+
+    async def _flush_once(self) -> None:
+        batch = self._take_batch()
+        if not batch:
+            return
+
+        # sink down of buffer loopt vol → meteen naar schijf
+        if self._spool is not None and (not self._healthy or self._backlogged()):
+            await self._to_spool(batch)
+            return
+
+        if await self._write_with_retry(batch):
+            self.written += len(batch)
+            return
+
+        self.failed_batches += 1
+        if self._spool is not None:
+            self._healthy = False
+            await self._to_spool(batch)
+        else:
+            self.dropped += len(batch)
+
+    async def _to_spool(self, batch: List[str]) -> None:
+        assert self._spool is not None
+        try:
+            await asyncio.to_thread(self._spool.append, batch)
+            self.spooled += len(batch)
+        except OSError as exc:
+            log.error("Spool write failed (%d lines): %s", len(batch), exc)
+            self.dropped += len(batch)
+
+    async def _write_once(self, batch: List[str]) -> bool:
+        try:
+            await asyncio.to_thread(
+                self._write_api.write, bucket=self._bucket, record="\n".join(batch)
+            )
+            return True
+        except Exception as exc:
+            log.debug("Influx write failed (%d lines): %s", len(batch), exc)
+            return False
+
+    async def _write_with_retry(self, batch: List[str]) -> bool:
+        for attempt in range(self._max_retries + 1):
+            if await self._write_once(batch):
+                return True
+            if attempt == self._max_retries:
+                log.error("Influx batch write failed (%d lines)", len(batch))
+                return False
+            self.retried += 1
+            await asyncio.sleep(self._retry_backoff * (2 ** attempt))
+        return False  # pragma: no cover
+
+    # ------------------------------------------------------------ replay
+    async def _replay(self) -> None:
+        """Speelt de spool terug met maximaal ``replay_rate`` regels/s."""
+        assert self._spool is not None
+        while not self._closing:
+            lines = await asyncio.to_thread(self._spool.peek, self._batch_size)
+            if not lines:
+                await asyncio.sleep(self._probe_interval)
+                continue
+
+            if await self._write_once(lines):
+                await asyncio.to_thread(self._spool.commit, len(lines))
+                if not self._healthy:
+                    log.info("Influx reachable again – replaying spool")
+                self._healthy = True
+                self.replayed += len(lines)
+                await asyncio.sleep(len(lines) / self._replay_rate)
+            else:
+                self._healthy = False
+                await asyncio.sleep(self._probe_interval)
+
+    # ------------------------------------------------------------ metrics
+    def stats(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {
+            "healthy": self._healthy,
+            "buffered": len(self._buffer),
+            "max_buffer": self._max_buffer,
+            "written": self.written,
+            "dropped": self.dropped,
+            "retried": self.retried,
+            "failed_batches": self.failed_batches,
+            "spooled": self.spooled,
+            "replayed": self.replayed,
+        }
+        if self._spool is not None:
+            out["spool"] = self._spool.stats()
+        return out
@@ -1,3 +1,4 @@
+import asyncio
 import json
 import logging
 from datetime import datetime, timezone
@@ -6,8 +7,12 @@ from typing import Any, Dict, List
 from influxdb_client import InfluxDBClient, Point, WritePrecision
 from influxdb_client.client.write_api import SYNCHRONOUS
 
-from application.event_bus import bus
+from application.event_bus import Overflow, bus
 from config import settings
+from services.influx_batch_writer import InfluxBatchWriter
+from services.line_protocol import MeterValueEncoder
+from services.telemetry_aggregator import TelemetryAggregator
+from services.telemetry_spool import TelemetrySpool
 
 log = logging.getLogger("InfluxDBService")
 
@@ -18,6 +23,14 @@ class InfluxDBService:
     – MeterValues  → per sampled_value een punt (numeriek ‘value’-veld)
     – ConfigurationChanged → numeriek of string, eigen measurement
     – Alle overige events → alleen veld ‘count’ = 1 (geen strings!)
+
+    Punten gaan niet meer één-voor-één over de lijn maar via een
+    :class:`InfluxBatchWriter` (buffer + achtergrond-flush in een thread).
+    Bij een storing worden batches lokaal gespooled en later teruggespeeld.
+
+    Met ``INFLUX_AGGREGATE_WINDOWS`` gaat er per window één aggregaat-punt
+    (min/max/mean/last, event-tellers) naar Influx i.p.v. elk ruw punt;
+    ``INFLUX_RAW_MEASURANDS`` bepaalt welke measurands daarnaast raw blijven.
     """
 
     _EVENTS: List[str] = [
@@ -43,15 +56,89 @@ class InfluxDBService:
             url=s.INFLUX_URL, token=s.INFLUX_TOKEN, org=s.INFLUX_ORG
         )
         self._write = self._client.write_api(write_options=SYNCHRONOUS)
+        spool = (
+            TelemetrySpool(
+                s.INFLUX_SPOOL_DIR,
+                segment_bytes=s.INFLUX_SPOOL_SEGMENT_BYTES,
+                max_bytes=s.INFLUX_SPOOL_MAX_BYTES,
+            )
+            if s.INFLUX_SPOOL_DIR
+            else None
+        )
+        self._writer = InfluxBatchWriter(
+            self._write,
+            s.INFLUX_BUCKET,
+            batch_size=s.INFLUX_BATCH_SIZE,
+            flush_interval=s.INFLUX_FLUSH_INTERVAL,
+            max_buffer=s.INFLUX_MAX_BUFFER,
+            spool=spool,
+            replay_rate=s.INFLUX_REPLAY_RATE,
+        )
+
+        self._encoder = MeterValueEncoder()
+
+        # optionele pre-aggregatie
+        windows = [float(w) for w in s.INFLUX_AGGREGATE_WINDOWS.split(",") if w.strip()]
+        self._aggregator = TelemetryAggregator(windows) if windows else None
+        raw = {m.strip() for m in s.INFLUX_RAW_MEASURANDS.split(",") if m.strip()}
+        # None = alles raw; anders alleen de genoemde measurands
+        self._raw_measurands: set[str] | None = (
+            None if self._aggregator is None or "*" in raw else raw
+        )
+        self._agg_task: asyncio.Task[None] | None = None
 
+        # queued: een trage Influx mag de OCPP-handlers nooit ophouden;
+        # local_only: events van andere workers schrijft die worker zelf al
         for evt in self._EVENTS:
-            bus.subscribe(evt, self._make_handler(evt))
+            bus.subscribe(
+                evt,
+                self._make_handler(evt),
+                queue_size=s.EVENT_QUEUE_SIZE,
+                overflow=Overflow.DROP_OLDEST,
+                local_only=True,
+            )
 
         log.info(
             "InfluxDBService ready → %s (org=%s, bucket=%s)",
             s.INFLUX_URL, s.INFLUX_ORG, s.INFLUX_BUCKET
         )
 
+    # ------------------------------------------------------ lifecycle
+    async def start(self) -> None:
+        await self._writer.start()
+        if self._aggregator is not None:
+            self._agg_task = asyncio.create_task(
+                self._aggregate_loop(), name="influx-aggregator"
+            )
+
+    async def close(self) -> None:
+        """Flusht aggregaten + resterende buffer en sluit de client (shutdown)."""
+        if self._agg_task is not None:
+            self._agg_task.cancel()
+            try:
+                await self._agg_task
+            except asyncio.CancelledError:
+                pass
+            self._agg_task = None
+        if self._aggregator is not None:
+            self._writer.add_many(self._aggregator.drain(force=True))
+        await self._writer.close()
+        self._client.close()
+
+    async def _aggregate_loop(self) -> None:
+        assert self._aggregator is not None
+        while True:
+            await asyncio.sleep(self._aggregator.tick)
+            lines = self._aggregator.drain()
+            if lines:
+                self._writer.add_many(lines)
+
+    def stats(self) -> Dict[str, Any]:
+        out = self._writer.stats()
+        if self._aggregator is not None:
+            out["aggregator"] = self._aggregator.stats()
+        return out
+
     # ------------------------------------------------------ handlers
     def _make_handler(self, evt_name: str):
         async def _handler(**payload):
@@ -76,6 +163,10 @@ class InfluxDBService:
             return
 
         # --- generieke events: alleen numeriek veld ‘count’ ----------------
+        if self._aggregator is not None:
+            self._aggregator.count_event(event, cp_id, ocpp_version)
+            return
+
         point = (
             Point(event)
             .tag("cp_id", cp_id)
@@ -86,33 +177,20 @@ class InfluxDBService:
         # Wil je tóch de ruwe payload bewaren?  Zet de volgende regel aan:
         # point.tag("raw", json.dumps(body)[:250])   # max 250 chars als tag
 
-        self._write.write(bucket=settings().INFLUX_BUCKET, record=point)
+        self._writer.add(point.to_line_protocol())
 
     # ------------------------------------------------ MeterValues
     async def _handle_meter_values(
         self, cp_id: str, ocpp_version: str, body: Dict[str, Any]
     ) -> None:
-        connector = body.get("connector_id")
-        for mv in body.get("meter_value", []):
-            ts = _iso_to_datetime(mv.get("timestamp"))
-            for sv in mv.get("sampled_value", []):
-                try:
-                    value_num = float(sv.get("value"))
-                except (TypeError, ValueError):
-                    continue  # skip non-numeric
-
-                point = (
-                    Point("meter_value")
-                    .tag("cp_id", cp_id)
-                    .tag("connector", str(connector))
-                    .tag("measurand", sv.get("measurand", ""))
-                    .tag("phase", sv.get("phase", ""))
-                    .tag("location", sv.get("location", ""))
-                    .tag("unit", sv.get("unit", ""))
-                    .field("value", value_num)
-                    .time(ts, WritePrecision.NS)
-                )
-                self._write.write(bucket=settings().INFLUX_BUCKET, record=point)
+        if self._aggregator is not None:
+            self._aggregator.add_meter_values(cp_id, body)
+            if self._raw_measurands is not None and not self._raw_measurands:
+                return          # niets meer raw doorzetten
+        # eigen encoder i.p.v. Point per sampled_value (zie line_protocol.py)
+        self._writer.add_many(
+            self._encoder.encode_lines(cp_id, body, only=self._raw_measurands)
+        )
 
     # ------------------------------------------------ ConfigurationChanged
     async def _handle_config_change(
@@ -134,16 +212,4 @@ class InfluxDBService:
         except (TypeError, ValueError):
             point.field("value_str", str(raw_val))
 
-        self._write.write(bucket=settings().INFLUX_BUCKET, record=point)
-
-
-# ---------------------------------------------------------- utils
-def _iso_to_datetime(iso_str: str | None) -> datetime:
-    if not iso_str:
-        return datetime.now(timezone.utc)
-    try:
-        if iso_str.endswith("Z"):
-            iso_str = iso_str[:-1] + "+00:00"
-        return datetime.fromisoformat(iso_str).astimezone(timezone.utc)
-    except ValueError:
-        return datetime.now(timezone.utc)
+        self._writer.add(point.to_line_protocol())
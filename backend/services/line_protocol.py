@@ -0,0 +1,151 @@
+"""
+Snelle line-protocol encoder voor de ``meter_value`` measurement.
+
+Een MeterValues-bericht bevat per sample dezelfde cp_id/connector/measurand
+-strings; via ``influxdb_client.Point`` worden die per sample opnieuw
+ge-escaped, gesorteerd en samengevoegd.  Deze encoder cachet de complete,
+al ge-escapete ``measurement,tags value=``-prefix per tag-combinatie en
+zet een heel bericht in één keer om naar line-protocol regels.
+
+De uitvoer is byte-voor-byte gelijk aan ``Point(...).to_line_protocol()``
+(zelfde tag-volgorde, lege tags weggelaten, ``1.0`` → ``1``).
+"""
+from __future__ import annotations
+
+import math
+from datetime import datetime, timezone
+from typing import Any, Container, Dict, List, Tuple
+
+_EPOCH = datetime.fromtimestamp(0, tz=timezone.utc)
+
+_ESCAPE_MEASUREMENT = str.maketrans({
+    ",": r"\,", " ": r"\ ", "\n": r"\n", "\t": r"\t", "\r": r"\r",
+})
+_ESCAPE_KEY = str.maketrans({
+    ",": r"\,", "=": r"\=", " ": r"\ ", "\n": r"\n", "\t": r"\t", "\r": r"\r",
+})
+
+_PrefixKey = Tuple[str, Any, Any, Any, Any, Any]
+
+
+def _escape_tag_value(value: Any) -> str:
+    ret = str(value).translate(_ESCAPE_KEY)
+    if ret.endswith("\\"):
+        ret += " "
+    return ret
+
+
+def _format_float(value: float) -> str:
+    s = str(value)
+    return s[:-2] if s.endswith(".0") else s
+
+
+def _iso_to_datetime(iso_str: str | None) -> datetime:
+    if not iso_str:
+        return datetime.now(timezone.utc)
+    try:
+        if iso_str.endswith("Z"):
+            iso_str = iso_str[:-1] + "+00:00"
+        return datetime.fromisoformat(iso_str).astimezone(timezone.utc)
+    except ValueError:
+        return datetime.now(timezone.utc)
+
+
+def _iso_to_ns(iso_str: str | None) -> int:
+    delta = _iso_to_datetime(iso_str) - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 10**9 + delta.microseconds * 1000
+
+
+class MeterValueEncoder:
+    """Zet MeterValues-payloads om naar ``meter_value`` line-protocol."""
+
+    MEASUREMENT = "meter_value"
+
+    def __init__(self, max_prefixes: int = 100_000) -> None:
+        self._prefixes: Dict[_PrefixKey, str] = {}
+        self._max_prefixes = max_prefixes
+        self._measurement = self.MEASUREMENT.translate(_ESCAPE_MEASUREMENT)
+
+    # ------------------------------------------------------------ prefix-cache
+    def prefix(
+        self,
+        cp_id: str,
+        connector: Any,
+        measurand: Any,
+        phase: Any,
+        location: Any,
+        unit: Any,
+    ) -> str:
+        key = (cp_id, connector, measurand, phase, location, unit)
+        cached = self._prefixes.get(key)
+        if cached is not None:
+            return cached
+
+        # alfabetische tag-volgorde, net als Point; None/"" weglaten
+        tags = (
+            ("connector", str(connector)),
+            ("cp_id", cp_id),
+            ("location", location),
+            ("measurand", measurand),
+            ("phase", phase),
+            ("unit", unit),
+        )
+        parts = [self._measurement]
+        for tag, value in tags:
+            if value is None:
+                continue
+            escaped = _escape_tag_value(value)
+            if escaped != "":
+                parts.append(f"{tag}={escaped}")
+        prefix = ",".join(parts) + " value="
+
+        if len(self._prefixes) >= self._max_prefixes:
+            self._prefixes.clear()     # simpele begrenzing; herbouwen is goedkoop
+        self._prefixes[key] = prefix
+        return prefix
+
+    # ------------------------------------------------------------ encode
+    def encode_lines(
+        self,
+        cp_id: str,
+        body: Dict[str, Any],
+        only: Container[str] | None = None,
+    ) -> List[str]:
+        """
+        Eén regel per numerieke sampled_value in het bericht; met *only*
+        alleen de measurands uit die verzameling.
+        """
+        connector = body.get("connector_id")
+        lines: List[str] = []
+        append = lines.append
+        prefix = self.prefix
+
+        for mv in body.get("meter_value", []):
+            ts = _iso_to_ns(mv.get("timestamp"))
+            for sv in mv.get("sampled_value", []):
+                measurand = sv.get("measurand", "")
+                if only is not None and measurand not in only:
+                    continue
+                try:
+                    value = float(sv.get("value"))
+                except (TypeError, ValueError):
+                    continue  # skip non-numeric
+                if not math.isfinite(value):
+                    continue
+                p = prefix(
+                    cp_id,
+                    connector,
+                    measurand,
+                    sv.get("phase", ""),
+                    sv.get("location", ""),
+                    sv.get("unit", ""),
+                )
+                append(f"{p}{_format_float(value)} {ts}")
+        return lines
+
+    def encode(self, cp_id: str, body: Dict[str, Any]) -> str:
+        """Heel MeterValues-bericht als één multi-line payload."""
+        return "\n".join(self.encode_lines(cp_id, body))
+
+    def cache_size(self) -> int:
+        return len(self._prefixes)
@@ -0,0 +1,201 @@
+"""
+Persistentie van rollout-jobs (tabel ``rollout_jobs``).
+
+Eén rij per job; specificatie en voortgang staan als JSONB, zodat een
+herstart midden in een rollout verder kan waar hij gebleven was (zie
+:mod:`application.rollout_service`).  Net als de
+:class:`~services.settings_repository.SettingsRepository` zijn alle
+methodes no-ops zolang er geen pool is (unit-tests zonder Postgres).
+
+Bij meerdere workers draait elke job op precies één worker: die *claimt*
+de rij (``owner`` + ``lease_until``) met een conditionele ``UPDATE …
+RETURNING`` en verlengt de lease zolang de job loopt.  Een job waarvan de
+lease verlopen is (worker gecrasht) kan door een andere worker worden
+overgenomen; een worker die zijn lease kwijt is kan niets meer opslaan.
+
+Andere workers lezen de job-toestand uit de tabel (``load``/``list``).
+Pauzeren, hervatten of annuleren van een job die elders loopt gaat via
+de kolom ``requested``: de eigenaar leest en wist die bij het verlengen
+van zijn lease (``renew``) en voert de actie dan zelf uit.
+"""
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, List, Optional, Sequence
+
+import asyncpg
+
+_CREATE_SQL = """
+CREATE TABLE IF NOT EXISTS rollout_jobs (
+    id          TEXT PRIMARY KEY,
+    state       TEXT        NOT NULL,
+    job         JSONB       NOT NULL,
+    updated_at  TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+ALTER TABLE rollout_jobs ADD COLUMN IF NOT EXISTS owner       TEXT;
+ALTER TABLE rollout_jobs ADD COLUMN IF NOT EXISTS lease_until TIMESTAMPTZ;
+ALTER TABLE rollout_jobs ADD COLUMN IF NOT EXISTS requested   TEXT;
+"""
+_LOAD_SQL = "SELECT job, requested FROM rollout_jobs WHERE id = $1"
+_LIST_SQL = "SELECT job, requested FROM rollout_jobs ORDER BY updated_at DESC LIMIT $1"
+# nieuwe job: meteen geclaimd door de aanmaker; bestaande: alleen de eigenaar
+_SAVE_SQL = """
+INSERT INTO rollout_jobs (id, state, job, updated_at, owner, lease_until)
+VALUES ($1, $2, $3::jsonb, now(), $4, now() + make_interval(secs => $5))
+ON CONFLICT (id) DO UPDATE
+  SET state      = EXCLUDED.state,
+      job        = EXCLUDED.job,
+      updated_at = EXCLUDED.updated_at
+  WHERE rollout_jobs.owner IS NULL OR rollout_jobs.owner = $4
+RETURNING id;
+"""
+_CLAIM_UNFINISHED_SQL = """
+UPDATE rollout_jobs
+   SET owner = $2, lease_until = now() + make_interval(secs => $3)
+ WHERE state = ANY($1::text[])
+   AND (owner IS NULL OR owner = $2 OR lease_until < now())
+RETURNING job;
+"""
+_CLAIM_SQL = """
+UPDATE rollout_jobs
+   SET owner = $2, lease_until = now() + make_interval(secs => $3)
+ WHERE id = $1 AND state = ANY($4::text[])
+   AND (owner IS NULL OR owner = $2 OR lease_until < now())
+RETURNING job, requested;
+"""
+# verlengen + openstaande operator-actie in één keer ophalen en wissen
+_RENEW_SQL = """
+WITH mine AS (
+    SELECT id, requested FROM rollout_jobs
+     WHERE id = ANY($1::text[]) AND owner = $2
+       FOR UPDATE
+)
+UPDATE rollout_jobs r
+   SET lease_until = now() + make_interval(secs => $3), requested = NULL
+  FROM mine
+ WHERE r.id = mine.id
+RETURNING r.id, mine.requested;
+"""
+_REQUEST_SQL = """
+UPDATE rollout_jobs SET requested = $2
+ WHERE id = $1 AND state = ANY($3::text[])
+RETURNING job, requested;
+"""
+_RELEASE_SQL = """
+UPDATE rollout_jobs SET owner = NULL, lease_until = NULL
+ WHERE id = ANY($1::text[]) AND owner = $2;
+"""
+
+
+class RolloutRepository:
+    def __init__(self, dsn: str) -> None:
+        self._dsn = dsn
+        self._pool: Optional[asyncpg.Pool] = None
+
+    # ------------------------------------------------------------ lifecycle
+    async def init(self) -> None:
+        if self._pool is not None:
+            return
+        self._pool = await asyncpg.create_pool(dsn=self._dsn, min_size=1, max_size=2)
+        async with self._pool.acquire() as con:
+            await con.execute(_CREATE_SQL)
+
+    async def close(self) -> None:
+        if self._pool:
+            await self._pool.close()
+            self._pool = None
+
+    @property
+    def available(self) -> bool:
+        return self._pool is not None
+
+    # ------------------------------------------------------------ CRUD
+    async def save(self, job: Dict[str, Any], owner: str, lease: float) -> bool:
+        """
+        Upsert van de volledige job-toestand (``job["id"]``, ``job["state"]``).
+        ``False`` als een andere worker de job inmiddels bezit.
+        """
+        if self._pool is None:
+            return True
+        async with self._pool.acquire() as con:
+            row = await con.fetchrow(
+                _SAVE_SQL, job["id"], job["state"], json.dumps(job), owner, float(lease)
+            )
+        return row is not None
+
+    async def load(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Opgeslagen toestand van één job (ook als een andere worker hem draait)."""
+        if self._pool is None:
+            return None
+        async with self._pool.acquire() as con:
+            row = await con.fetchrow(_LOAD_SQL, job_id)
+        return _job(row) if row is not None else None
+
+    async def list(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """Recentste jobs van alle workers (nieuwste eerst)."""
+        if self._pool is None:
+            return []
+        async with self._pool.acquire() as con:
+            rows = await con.fetch(_LIST_SQL, limit)
+        return [_job(r) for r in rows]
+
+    async def claim(
+        self, job_id: str, states: Sequence[str], owner: str, lease: float
+    ) -> Optional[Dict[str, Any]]:
+        """Claimt één onafgemaakte job zonder levende eigenaar; anders ``None``."""
+        if self._pool is None:
+            return None
+        async with self._pool.acquire() as con:
+            row = await con.fetchrow(_CLAIM_SQL, job_id, owner, float(lease), list(states))
+        return _job(row) if row is not None else None
+
+    async def request(
+        self, job_id: str, action: str, states: Sequence[str]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Zet een operator-actie (``pause``/``resume``/``cancel``) klaar voor
+        de eigenaar.  ``None`` als de job onbekend of al afgerond is.
+        """
+        if self._pool is None:
+            return None
+        async with self._pool.acquire() as con:
+            row = await con.fetchrow(_REQUEST_SQL, job_id, action, list(states))
+        return _job(row) if row is not None else None
+
+    async def claim_unfinished(
+        self, states: List[str], owner: str, lease: float
+    ) -> List[Dict[str, Any]]:
+        """
+        Claimt alle jobs in een van *states* die geen (levende) eigenaar
+        hebben en geeft ze terug (oudste eerst) – om te hervatten.
+        """
+        if self._pool is None:
+            return []
+        async with self._pool.acquire() as con:
+            rows = await con.fetch(_CLAIM_UNFINISHED_SQL, states, owner, float(lease))
+        jobs = [json.loads(r["job"]) for r in rows]
+        return sorted(jobs, key=lambda j: j.get("updated_at", 0))
+
+    async def renew(
+        self, job_ids: List[str], owner: str, lease: float
+    ) -> Dict[str, Optional[str]]:
+        """
+        Verlengt de lease.  Geeft de ids terug die we nog steeds bezitten,
+        met de operator-actie die voor die job klaarstond (of ``None``).
+        """
+        if self._pool is None or not job_ids:
+            return dict.fromkeys(job_ids)
+        async with self._pool.acquire() as con:
+            rows = await con.fetch(_RENEW_SQL, job_ids, owner, float(lease))
+        return {r["id"]: r["requested"] for r in rows}
+
+    async def release(self, job_ids: List[str], owner: str) -> None:
+        """Claim opgeven (nette shutdown) zodat een andere worker meteen verder kan."""
+        if self._pool is None or not job_ids:
+            return
+        async with self._pool.acquire() as con:
+            await con.execute(_RELEASE_SQL, job_ids, owner)
+
+
+def _job(row: Any) -> Dict[str, Any]:
+    return {**json.loads(row["job"]), "requested": row["requested"]}
@@ -0,0 +1,128 @@
+"""
+``LISTEN`` op ``charge_point_settings``-notificaties van andere instances.
+
+Houdt één eigen Postgres-verbinding open (buiten de pool) en geeft elke
+notificatie van een *andere* instance door aan ``on_message``.  Valt de
+verbinding weg, dan wordt er met backoff opnieuw verbonden; omdat
+notificaties in dat gat verloren kunnen zijn, volgt na een reconnect
+``on_resync`` (cache leeggooien / live sessies herladen).
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import asyncpg
+
+from services.settings_repository import NOTIFY_CHANNEL
+
+log = logging.getLogger("SettingsListener")
+
+MessageHandler = Callable[[Dict[str, Any]], Any]
+ResyncHandler = Callable[[], Awaitable[None]]
+
+
+class SettingsListener:
+    def __init__(
+        self,
+        dsn: str,
+        *,
+        origin: str,
+        on_message: MessageHandler,
+        on_resync: ResyncHandler,
+        channel: str = NOTIFY_CHANNEL,
+        reconnect_delay: float = 1.0,
+        max_reconnect_delay: float = 30.0,
+    ) -> None:
+        self._dsn = dsn
+        self._origin = origin
+        self._on_message = on_message
+        self._on_resync = on_resync
+        self._channel = channel
+        self._reconnect_delay = reconnect_delay
+        self._max_reconnect_delay = max_reconnect_delay
+
+        self._task: asyncio.Task[None] | None = None
+        self._con: Optional[asyncpg.Connection] = None
+
+        # tellers
+        self.received = 0
+        self.ignored = 0
+        self.reconnects = 0
+
+    # ------------------------------------------------------------ lifecycle
+    async def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="settings-listener")
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        delay = self._reconnect_delay
+        first = True
+        while True:
+            lost = asyncio.Event()
+            try:
+                self._con = await asyncpg.connect(dsn=self._dsn)
+                self._con.add_termination_listener(lambda _c: lost.set())
+                await self._con.add_listener(self._channel, self._dispatch)
+                log.info("Listening for settings changes on '%s'", self._channel)
+                if not first:
+                    self.reconnects += 1
+                    await self._on_resync()     # gemiste notificaties inhalen
+                first, delay = False, self._reconnect_delay
+                await lost.wait()
+                log.warning("Settings listener connection lost – reconnecting")
+            except asyncio.CancelledError:
+                await self._close_connection()
+                raise
+            except Exception as exc:
+                log.warning("Settings listener connect failed: %s", exc)
+                delay = min(delay * 2, self._max_reconnect_delay)
+            await self._close_connection()
+            await asyncio.sleep(delay)
+
+    async def _close_connection(self) -> None:
+        con, self._con = self._con, None
+        if con is not None and not con.is_closed():
+            try:
+                await con.close()
+            except Exception:
+                pass
+
+    # ------------------------------------------------------------ dispatch
+    def _dispatch(self, _con: Any, _pid: int, _channel: str, payload: str) -> None:
+        self.handle(payload)
+
+    def handle(self, payload: str) -> None:
+        """Verwerkt één NOTIFY-payload (ook los te gebruiken in tests)."""
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            log.warning("Ignoring malformed settings notification: %r", payload[:200])
+            return
+        if message.get("origin") == self._origin:
+            self.ignored += 1
+            return
+        self.received += 1
+        result = self._on_message(message)
+        if asyncio.iscoroutine(result):
+            asyncio.get_running_loop().create_task(result)
+
+    # ------------------------------------------------------------ metrics
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "connected": self._con is not None and not self._con.is_closed(),
+            "received": self.received,
+            "ignored": self.ignored,
+            "reconnects": self.reconnects,
+        }
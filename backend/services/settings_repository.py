@@ -8,17 +8,101 @@ geïnitialiseerd, worden `upsert()`- en `load_all()`-aanroepen simpelweg
 no-ops zodat de rest van de applicatie blijft werken.  In productie
 roept `init()` de pool (zoals voorheen) wél op en wordt er gewoon naar
 Postgres geschreven.
+
+Bulk-pad: ``upsert_many`` (één ``UNNEST``-statement), ``load_by_ids``,
+streaming ``iter_all`` (server-side cursor) en CSV import/export via
+``COPY``.
+
+Elke write stuurt in dezelfde transactie een ``NOTIFY`` op kanaal
+``charge_point_settings`` (JSON: ``op`` = ``upsert`` met de rij,
+``invalidate`` met ids, of ``reset``), zodat andere backend-instances hun
+settings-cache bijwerken (zie :mod:`services.settings_listener`).
+
+Alle SQL staat als vaste module-constante, zodat asyncpg's
+prepared-statement-cache per pool-connectie (``statement_cache_size``)
+elk statement maar één keer hoeft te preparen.
 """
 from __future__ import annotations
 
+import asyncio
+import io
+import json
+import re
+import uuid
 import asyncpg
-from typing import Dict, Any, Optional
+from typing import Any, AsyncIterator, Dict, Iterable, Optional, Sequence, Tuple, Union
+
+# (id, alias, enabled, ocpp_version)
+SettingsRow = Tuple[str, Optional[str], bool, str]
+
+COLUMNS = ("id", "alias", "enabled", "ocpp_version")
+
+NOTIFY_CHANNEL = "charge_point_settings"
+_NOTIFY_SQL = "SELECT pg_notify($1, $2)"
+_NOTIFY_IDS_PER_MESSAGE = 200       # NOTIFY-payload is max. ~8 kB
+_EXPORT_BUFFER_CHUNKS = 16          # COPY-chunks tussen Postgres en de HTTP-response
+
+_SELECT_ALL_SQL = "SELECT id, alias, enabled, ocpp_version FROM charge_point_settings"
+_SELECT_BY_IDS_SQL = _SELECT_ALL_SQL + " WHERE id = ANY($1::text[])"
+_ON_CONFLICT_SQL = """
+ON CONFLICT (id) DO UPDATE
+  SET alias        = EXCLUDED.alias,
+      enabled      = EXCLUDED.enabled,
+      ocpp_version = EXCLUDED.ocpp_version;
+"""
+_UPSERT_SQL = (
+    "INSERT INTO charge_point_settings (id, alias, enabled, ocpp_version)\n"
+    "VALUES ($1, $2, $3, $4)" + _ON_CONFLICT_SQL
+)
+_UPSERT_MANY_SQL = (
+    "INSERT INTO charge_point_settings (id, alias, enabled, ocpp_version)\n"
+    "SELECT * FROM UNNEST($1::text[], $2::text[], $3::bool[], $4::text[])"
+    + _ON_CONFLICT_SQL
+)
+# import: eerst COPY naar een temp-tabel, dan één upsert.  ``ord`` nummert
+# de rijen in CSV-volgorde (COPY vult 'm niet zelf), zodat bij een dubbele
+# id de laatste rij in het bestand wint i.p.v. een willekeurige.
+_IMPORT_STAGE_SQL = (
+    "CREATE TEMP TABLE _settings_import (LIKE charge_point_settings "
+    "INCLUDING DEFAULTS) ON COMMIT DROP;\n"
+    "ALTER TABLE _settings_import ADD COLUMN ord bigserial"
+)
+_IMPORT_MERGE_SQL = (
+    "INSERT INTO charge_point_settings (id, alias, enabled, ocpp_version)\n"
+    "SELECT DISTINCT ON (id) id, alias, enabled, ocpp_version "
+    "FROM _settings_import ORDER BY id, ord DESC" + _ON_CONFLICT_SQL
+)
+
+
+_COPY_LINE = re.compile(r"\bline (\d+)\b")
+
+
+class SettingsImportError(ValueError):
+    """Ongeldige CSV-inhoud; ``line`` is de CSV-regel (header = 1) indien bekend."""
+
+    def __init__(self, message: str, line: Optional[int] = None) -> None:
+        super().__init__(f"CSV line {line}: {message}" if line is not None else message)
+        self.line = line
+
+
+def _import_error(exc: asyncpg.PostgresError) -> SettingsImportError:
+    """asyncpg-fout uit COPY/merge → :class:`SettingsImportError` met regelnummer."""
+    where = getattr(exc, "context", None) or ""
+    match = _COPY_LINE.search(where)
+    message = getattr(exc, "message", None) or str(exc)
+    detail = getattr(exc, "detail", None)
+    if detail:
+        message = f"{message} ({detail})"
+    return SettingsImportError(message, int(match.group(1)) if match else None)
 
 
 class SettingsRepository:
-    def __init__(self, dsn: str) -> None:
+    def __init__(self, dsn: str, *, statement_cache_size: int = 100) -> None:
         self._dsn = dsn
+        self._statement_cache_size = statement_cache_size
         self._pool: Optional[asyncpg.Pool] = None
+        # afzender-id in NOTIFY-payloads: eigen notificaties negeren
+        self.instance_id = uuid.uuid4().hex
 
     # ----------------------------------------------------------------------
     # Lifecycle
@@ -28,7 +112,9 @@ class SettingsRepository:
         if self._pool is not None:
             return  # al gecreëerd
 
-        self._pool = await asyncpg.create_pool(dsn=self._dsn)
+        self._pool = await asyncpg.create_pool(
+            dsn=self._dsn, statement_cache_size=self._statement_cache_size
+        )
         async with self._pool.acquire() as con:
             await con.execute(
                 """
@@ -46,6 +132,11 @@ class SettingsRepository:
             await self._pool.close()
             self._pool = None
 
+    @property
+    def available(self) -> bool:
+        """``True`` zodra er een pool is (anders zijn alle writes no-ops)."""
+        return self._pool is not None
+
     # ----------------------------------------------------------------------
     # CRUD helpers – vallen nu stil wanneer er geen database beschikbaar is
     # ----------------------------------------------------------------------
@@ -56,7 +147,7 @@ class SettingsRepository:
         enabled: bool,
         ocpp_version: str,
     ) -> None:
-        """Slaat (of update) één settings-record.
+        """Slaat (of update) één settings-record, write-through + ``NOTIFY``.
 
         Tijdens unit tests is er vaak nog geen Postgres; wanneer de pool
         ontbreekt slaan we het schrijven daarom stil i.p.v. een exception
@@ -67,20 +158,49 @@ class SettingsRepository:
             return
 
         async with self._pool.acquire() as con:
-            await con.execute(
-                """
-                INSERT INTO charge_point_settings (id, alias, enabled, ocpp_version)
-                VALUES ($1, $2, $3, $4)
-                ON CONFLICT (id) DO UPDATE
-                  SET alias        = EXCLUDED.alias,
-                      enabled      = EXCLUDED.enabled,
-                      ocpp_version = EXCLUDED.ocpp_version;
-                """,
-                cp_id,
-                alias,
-                enabled,
-                ocpp_version,
-            )
+            async with con.transaction():
+                await con.execute(
+                    _UPSERT_SQL,
+                    cp_id,
+                    alias,
+                    enabled,
+                    ocpp_version,
+                )
+                await self._notify(con, {
+                    "op": "upsert",
+                    "row": dict(zip(COLUMNS, (cp_id, alias, enabled, ocpp_version))),
+                })
+
+    async def upsert_many(self, rows: Iterable[SettingsRow]) -> int:
+        """
+        Upsert van veel records in één statement (``UNNEST`` over arrays),
+        i.p.v. één round-trip per laadpaal.  Geeft het aantal rijen terug.
+        """
+        # dubbele ids in één INSERT … ON CONFLICT mogen niet → laatste wint
+        rows = list({r[0]: r for r in rows}.values())
+        if self._pool is None or not rows:
+            return 0
+
+        ids, aliases, enabled, versions = (list(col) for col in zip(*rows))
+        async with self._pool.acquire() as con:
+            async with con.transaction():
+                await con.execute(
+                    _UPSERT_MANY_SQL,
+                    ids,
+                    aliases,
+                    enabled,
+                    versions,
+                )
+                for i in range(0, len(ids), _NOTIFY_IDS_PER_MESSAGE):
+                    await self._notify(con, {
+                        "op": "invalidate",
+                        "ids": ids[i:i + _NOTIFY_IDS_PER_MESSAGE],
+                    })
+        return len(rows)
+
+    async def _notify(self, con: asyncpg.Connection, message: Dict[str, Any]) -> None:
+        message["origin"] = self.instance_id
+        await con.execute(_NOTIFY_SQL, NOTIFY_CHANNEL, json.dumps(message))
 
     async def load_all(self) -> Dict[str, Dict[str, Any]]:
         """Laadt alle cached settings uit Postgres.
@@ -92,7 +212,101 @@ class SettingsRepository:
             return {}
 
         async with self._pool.acquire() as con:
-            rows = await con.fetch(
-                "SELECT id, alias, enabled, ocpp_version FROM charge_point_settings"
-            )
+            rows = await con.fetch(_SELECT_ALL_SQL)
             return {r["id"]: dict(r) for r in rows}
+
+    async def load_by_ids(self, ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Alleen de gevraagde laadpalen (onbekende ids ontbreken in de dict)."""
+        ids = list(ids)
+        if self._pool is None or not ids:
+            return {}
+
+        async with self._pool.acquire() as con:
+            rows = await con.fetch(_SELECT_BY_IDS_SQL, ids)
+            return {r["id"]: dict(r) for r in rows}
+
+    async def iter_all(self, prefetch: int = 1000) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streamt alle records via een server-side cursor, ``prefetch`` rijen
+        per round-trip – de tabel staat nooit in zijn geheel in het geheugen.
+        """
+        if self._pool is None:
+            return
+
+        async with self._pool.acquire() as con:
+            async with con.transaction():       # cursors leven in een transactie
+                async for r in con.cursor(_SELECT_ALL_SQL, prefetch=prefetch):
+                    yield dict(r)
+
+    # ----------------------------------------------------------------------
+    # Bulk CSV (COPY)
+    # ----------------------------------------------------------------------
+    async def export_csv(self) -> AsyncIterator[bytes]:
+        """
+        Hele tabel als CSV (met header) via ``COPY … TO STDOUT``, chunk
+        voor chunk.  De COPY-sink schrijft in een begrensde queue en wacht
+        dus op de consumer: ook een grote vloot staat nooit in zijn geheel
+        in het geheugen.  Stopt de consumer, dan wordt de COPY afgebroken.
+        """
+        if self._pool is None:
+            return
+
+        pool = self._pool
+        queue: "asyncio.Queue[Union[bytes, BaseException, None]]" = asyncio.Queue(
+            maxsize=_EXPORT_BUFFER_CHUNKS
+        )
+
+        async def _copy() -> None:
+            try:
+                async with pool.acquire() as con:
+                    await con.copy_from_query(
+                        _SELECT_ALL_SQL + " ORDER BY id",
+                        output=queue.put,
+                        format="csv",
+                        header=True,
+                    )
+            except Exception as exc:
+                await queue.put(exc)
+            else:
+                await queue.put(None)
+
+        task = asyncio.get_running_loop().create_task(_copy(), name="settings-export")
+        try:
+            while (chunk := await queue.get()) is not None:
+                if isinstance(chunk, BaseException):
+                    raise chunk
+                yield chunk
+        finally:
+            task.cancel()
+
+    async def import_csv(self, data: bytes, columns: Sequence[str] = COLUMNS) -> int:
+        """
+        CSV via ``COPY`` naar een temp-tabel en daarna één upsert.  *columns*
+        is de kolomvolgorde in de CSV (de header); COPY koppelt op naam, niet
+        op positie.  Geeft het aantal upserts terug.
+
+        Ongeldige waarden (``enabled=misschien``, lege id, …) geven een
+        :class:`SettingsImportError` met het CSV-regelnummer.
+        """
+        columns = [c.strip() for c in columns]
+        if sorted(columns) != sorted(COLUMNS):
+            raise SettingsImportError(f"CSV header must contain {','.join(COLUMNS)}", 1)
+        if self._pool is None:
+            return 0
+
+        async with self._pool.acquire() as con:
+            try:
+                async with con.transaction():
+                    await con.execute(_IMPORT_STAGE_SQL)
+                    await con.copy_to_table(
+                        "_settings_import",
+                        source=io.BytesIO(data),
+                        columns=columns,
+                        format="csv",
+                        header=True,
+                    )
+                    status = await con.execute(_IMPORT_MERGE_SQL)
+                    await self._notify(con, {"op": "reset"})
+            except (asyncpg.DataError, asyncpg.IntegrityConstraintViolationError) as exc:
+                raise _import_error(exc) from exc
+        return int(status.rsplit(" ", 1)[-1])   # "INSERT 0 <n>"
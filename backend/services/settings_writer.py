@@ -0,0 +1,169 @@
+"""
+Write-behind, coalescerende persistentie van charge-point settings.
+
+``register``/``deregister`` in de registry wachtten voorheen op een
+Postgres-round-trip per laadpaal – op het WebSocket-accept-pad.  Nu zetten
+ze alleen de nieuwste stand klaar (:meth:`SettingsWriter.submit`, O(1)).
+Meerdere updates voor dezelfde cp_id binnen één flush-interval vallen
+samen tot één rij; een achtergrond-task schrijft de rijen in bulk via
+:meth:`SettingsRepository.upsert_many`.
+
+:meth:`flush` is een barrière: na afloop staat alles wat daarvóór is
+aangeboden in de database (of is de fout gelogd en blijft het pending).
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+
+from services.settings_repository import SettingsRepository, SettingsRow
+
+log = logging.getLogger("SettingsWriter")
+
+
+class SettingsWriter:
+    def __init__(
+        self,
+        repo: SettingsRepository,
+        *,
+        flush_interval: float = 0.5,
+        batch_size: int = 1000,
+        retry_backoff: float = 1.0,
+    ) -> None:
+        self._repo = repo
+        self._flush_interval = flush_interval
+        self._batch_size = batch_size
+        self._retry_backoff = retry_backoff
+
+        # cp_id → nieuwste rij (dict behoudt volgorde van eerste aanbieding)
+        self._pending: Dict[str, SettingsRow] = {}
+        self._flush_lock: asyncio.Lock | None = None
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task[None] | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._closing = False
+
+        # tellers
+        self.submitted = 0
+        self.coalesced = 0
+        self.written = 0
+        self.batches = 0
+        self.failed_batches = 0
+
+    # ------------------------------------------------------------ intake
+    def submit(
+        self, cp_id: str, alias: Optional[str], enabled: bool, ocpp_version: str
+    ) -> None:
+        """Zet de nieuwste stand van *cp_id* klaar (nooit blokkerend)."""
+        if not self._repo.available:
+            return                      # geen database → niets te persisteren
+        self.submitted += 1
+        if self._pending.pop(cp_id, None) is not None:
+            self.coalesced += 1
+        self._pending[cp_id] = (cp_id, alias, enabled, ocpp_version)
+        self._ensure_task()
+        if len(self._pending) >= self._batch_size and self._wakeup is not None:
+            self._wakeup.set()
+
+    def peek(self, cp_id: str) -> Optional[SettingsRow]:
+        """Nog niet geschreven rij voor *cp_id* (nieuwer dan de database)."""
+        return self._pending.get(cp_id)
+
+    def discard(self, cp_id: str) -> None:
+        """Vergeet een pending rij (wordt door een write-through vervangen)."""
+        self._pending.pop(cp_id, None)
+
+    # ------------------------------------------------------------ lifecycle
+    def _bind_loop(self, loop: asyncio.AbstractEventLoop) -> None:
+        if self._loop is not loop:
+            self._loop = loop
+            self._wakeup = asyncio.Event()
+            self._flush_lock = asyncio.Lock()
+            self._task = None
+
+    def _ensure_task(self) -> None:
+        if self._closing:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._bind_loop(loop)
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._run(), name="settings-writer")
+
+    async def _run(self) -> None:
+        assert self._wakeup is not None
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self._flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if self._pending and not await self._flush_pending():
+                await asyncio.sleep(self._retry_backoff)
+
+    async def flush(self) -> bool:
+        """
+        Barrière: schrijft alles wat nu pending is.  ``False`` als een batch
+        faalde (die rijen blijven pending voor een volgende poging).
+        """
+        if not self._pending:
+            return True
+        self._ensure_task()
+        return await self._flush_pending()
+
+    async def close(self) -> None:
+        """Stopt de achtergrond-task en doet een laatste flush."""
+        self._closing = True
+        task = self._task
+        if task is not None and not task.done() and self._loop is asyncio.get_running_loop():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        if self._pending and not await self._flush_pending():
+            log.error("Settings writer closed with %d unsaved rows", len(self._pending))
+
+    # ------------------------------------------------------------ flush
+    async def _flush_pending(self) -> bool:
+        self._bind_loop(asyncio.get_running_loop())
+        assert self._flush_lock is not None
+        async with self._flush_lock:
+            while self._pending:
+                batch = self._take_batch()
+                try:
+                    await self._repo.upsert_many(batch)
+                except Exception as exc:
+                    self.failed_batches += 1
+                    log.warning("Settings batch write failed (%d rows): %s", len(batch), exc)
+                    self._requeue(batch)
+                    return False
+                self.batches += 1
+                self.written += len(batch)
+        return True
+
+    def _take_batch(self) -> List[SettingsRow]:
+        batch: List[SettingsRow] = []
+        for cp_id in list(self._pending)[: self._batch_size]:
+            batch.append(self._pending.pop(cp_id))
+        return batch
+
+    def _requeue(self, batch: List[SettingsRow]) -> None:
+        # nieuwere updates die tijdens de write binnenkwamen gaan vóór
+        for row in batch:
+            self._pending.setdefault(row[0], row)
+
+    # ------------------------------------------------------------ metrics
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._pending),
+            "submitted": self.submitted,
+            "coalesced": self.coalesced,
+            "written": self.written,
+            "batches": self.batches,
+            "failed_batches": self.failed_batches,
+        }
@@ -0,0 +1,188 @@
+"""
+Streaming pre-aggregatie vóór de time-series sink.
+
+In plaats van elk sampled_value en elke Heartbeat als eigen punt naar
+Influx te sturen, houdt deze stage per tumbling window (bv. 10 s en 60 s)
+bij:
+
+• per (cp, connector, measurand, phase, location, unit):
+  ``min`` / ``max`` / ``mean`` / ``last`` / ``count``
+  → één punt in measurement ``meter_value_agg`` per window;
+• per (event, cp, ocpp-versie): een teller
+  → één punt ``<event> count=N`` per window (i.p.v. N× ``count=1``).
+
+Windows zijn uitgelijnd op epoch-veelvouden van de windowlengte en lopen
+op ontvangsttijd, zodat klokafwijkingen van laadpalen geen oude windows
+openhouden.  Welke measurands daarnaast nog *raw* worden doorgezet, bepaalt
+de service (zie ``INFLUX_RAW_MEASURANDS``).
+"""
+from __future__ import annotations
+
+import math
+import time
+from typing import Any, Dict, Iterable, List, Tuple
+
+from services.line_protocol import _escape_tag_value, _format_float
+
+_SeriesKey = Tuple[str, Any, Any, Any, Any, Any]
+_EventKey = Tuple[str, str, str]
+
+
+class _Stats:
+    __slots__ = ("min", "max", "sum", "count", "last")
+
+    def __init__(self, value: float) -> None:
+        self.min = self.max = self.sum = self.last = value
+        self.count = 1
+
+    def add(self, value: float) -> None:
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        self.sum += value
+        self.count += 1
+        self.last = value
+
+
+class TelemetryAggregator:
+    MEASUREMENT = "meter_value_agg"
+
+    def __init__(self, windows: Iterable[float]) -> None:
+        self._windows = sorted({float(w) for w in windows if w > 0})
+        if not self._windows:
+            raise ValueError("at least one aggregation window is required")
+        # per window: {bucket_start: {key: stats}}
+        self._series: Dict[float, Dict[int, Dict[_SeriesKey, _Stats]]] = {
+            w: {} for w in self._windows
+        }
+        self._events: Dict[float, Dict[int, Dict[_EventKey, int]]] = {
+            w: {} for w in self._windows
+        }
+
+        # tellers
+        self.samples_in = 0
+        self.events_in = 0
+        self.points_out = 0
+
+    @property
+    def tick(self) -> float:
+        """Interval waarop :meth:`drain` zinvol aangeroepen kan worden."""
+        return self._windows[0]
+
+    @staticmethod
+    def _bucket(now: float, window: float) -> int:
+        return int(now // window)
+
+    # ------------------------------------------------------------ intake
+    def add_meter_values(
+        self, cp_id: str, body: Dict[str, Any], now: float | None = None
+    ) -> None:
+        now = time.time() if now is None else now
+        connector = body.get("connector_id")
+        for mv in body.get("meter_value", []):
+            for sv in mv.get("sampled_value", []):
+                try:
+                    value = float(sv.get("value"))
+                except (TypeError, ValueError):
+                    continue
+                if not math.isfinite(value):
+                    continue
+                key = (
+                    cp_id,
+                    connector,
+                    sv.get("measurand", ""),
+                    sv.get("phase", ""),
+                    sv.get("location", ""),
+                    sv.get("unit", ""),
+                )
+                self.samples_in += 1
+                for w in self._windows:
+                    bucket = self._series[w].setdefault(self._bucket(now, w), {})
+                    st = bucket.get(key)
+                    if st is None:
+                        bucket[key] = _Stats(value)
+                    else:
+                        st.add(value)
+
+    def count_event(
+        self, event: str, cp_id: str, ocpp_version: str, now: float | None = None
+    ) -> None:
+        now = time.time() if now is None else now
+        key = (event, cp_id, ocpp_version)
+        self.events_in += 1
+        for w in self._windows:
+            bucket = self._events[w].setdefault(self._bucket(now, w), {})
+            bucket[key] = bucket.get(key, 0) + 1
+
+    # ------------------------------------------------------------ output
+    def drain(self, now: float | None = None, *, force: bool = False) -> List[str]:
+        """
+        Geeft line-protocol regels voor alle *afgesloten* windows (of alle
+        windows bij ``force=True``, bv. bij shutdown) en vergeet die.
+        """
+        now = time.time() if now is None else now
+        lines: List[str] = []
+        for w in self._windows:
+            current = self._bucket(now, w)
+            tag = f"window={_format_float(w)}s"
+            for store, render in (
+                (self._series[w], self._render_series),
+                (self._events[w], self._render_events),
+            ):
+                for b in [b for b in store if force or b < current]:
+                    ts_ns = int(b * w * 1_000_000_000)
+                    lines.extend(render(store.pop(b), tag, ts_ns))
+        self.points_out += len(lines)
+        return lines
+
+    def _render_series(
+        self, bucket: Dict[_SeriesKey, _Stats], window_tag: str, ts_ns: int
+    ) -> List[str]:
+        out = []
+        for (cp_id, connector, measurand, phase, location, unit), st in bucket.items():
+            tags = [
+                ("connector", str(connector)),
+                ("cp_id", cp_id),
+                ("location", location),
+                ("measurand", measurand),
+                ("phase", phase),
+                ("unit", unit),
+            ]
+            tag_str = ",".join(
+                f"{k}={_escape_tag_value(v)}" for k, v in tags if v not in (None, "")
+            )
+            fields = (
+                f"count={st.count}i,"
+                f"last={_format_float(st.last)},"
+                f"max={_format_float(st.max)},"
+                f"mean={_format_float(st.sum / st.count)},"
+                f"min={_format_float(st.min)}"
+            )
+            out.append(f"{self.MEASUREMENT},{tag_str},{window_tag} {fields} {ts_ns}")
+        return out
+
+    @staticmethod
+    def _render_events(
+        bucket: Dict[_EventKey, int], window_tag: str, ts_ns: int
+    ) -> List[str]:
+        out = []
+        for (event, cp_id, ocpp), n in bucket.items():
+            tags = ",".join(
+                f"{k}={_escape_tag_value(v)}"
+                for k, v in (("cp_id", cp_id), ("ocpp", ocpp))
+                if v not in (None, "")
+            )
+            prefix = f"{_escape_tag_value(event)},{tags}" if tags else _escape_tag_value(event)
+            out.append(f"{prefix},{window_tag} count={n}i {ts_ns}")
+        return out
+
+    # ------------------------------------------------------------ metrics
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "windows_s": self._windows,
+            "open_series": sum(len(b) for s in self._series.values() for b in s.values()),
+            "samples_in": self.samples_in,
+            "events_in": self.events_in,
+            "points_out": self.points_out,
+        }
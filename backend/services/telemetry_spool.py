@@ -0,0 +1,171 @@
+"""
+Duurzame, lokale spool voor telemetrie (line protocol) tijdens een
+Influx-storing.
+
+Opbouw
+──────
+• De spool is een map met append-only *segmenten* (``000000000001.lp``,
+  ``000000000002.lp``, …); elk segment bevat gewone line-protocol regels.
+• Er wordt altijd naar het nieuwste segment geschreven; boven
+  ``segment_bytes`` wordt een nieuw segment gestart.
+• Replay leest altijd het oudste segment; een volledig teruggespeeld
+  segment wordt verwijderd.
+• Boven ``max_bytes`` gaat het *oudste* segment eruit (evictie), zodat
+  een lange storing de schijf niet vol laat lopen.
+
+Alle methodes zijn synchroon en thread-safe; de writer roept ze aan via
+``asyncio.to_thread`` zodat schijf-I/O de event-loop niet blokkeert.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List
+
+log = logging.getLogger("TelemetrySpool")
+
+_SUFFIX = ".lp"
+
+
+class TelemetrySpool:
+    def __init__(
+        self,
+        directory: str | os.PathLike[str],
+        *,
+        segment_bytes: int = 4 * 1024 * 1024,
+        max_bytes: int = 256 * 1024 * 1024,
+    ) -> None:
+        self._dir = Path(directory)
+        self._dir.mkdir(parents=True, exist_ok=True)
+        self._segment_bytes = segment_bytes
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+        # bestaande segmenten (na herstart) oppakken
+        self._segments: List[Path] = sorted(self._dir.glob(f"*{_SUFFIX}"))
+        self._sizes: Dict[Path, int] = {p: p.stat().st_size for p in self._segments}
+        last = int(self._segments[-1].stem) if self._segments else 0
+        self._next_seq = last + 1
+        self._active: Path | None = None          # segment waar we naar schrijven
+
+        # replay-cursor in het oudste segment
+        self._reading: Path | None = None
+        self._read_lines: List[str] = []
+        self._read_offset = 0
+
+        # tellers
+        self.spooled_lines = 0
+        self.replayed_lines = 0
+        self.evicted_segments = 0
+        self.evicted_bytes = 0
+
+        if self._segments:
+            log.info(
+                "Spool %s: %d segment(en), %d bytes te replayen",
+                self._dir, len(self._segments), self.size_bytes(),
+            )
+
+    # ------------------------------------------------------------ schrijven
+    def append(self, lines: List[str]) -> None:
+        if not lines:
+            return
+        data = ("\n".join(lines) + "\n").encode("utf-8")
+        with self._lock:
+            active = self._active
+            if active is None or self._sizes[active] >= self._segment_bytes:
+                active = self._roll()
+            with open(active, "ab") as fh:
+                fh.write(data)
+            self._sizes[active] += len(data)
+            self.spooled_lines += len(lines)
+            self._evict()
+
+    def _roll(self) -> Path:
+        path = self._dir / f"{self._next_seq:012d}{_SUFFIX}"
+        self._next_seq += 1
+        path.touch()
+        self._segments.append(path)
+        self._sizes[path] = 0
+        self._active = path
+        return path
+
+    def _evict(self) -> None:
+        """Oudste segmenten weggooien tot we weer onder de cap zitten."""
+        while self.size_bytes() > self._max_bytes and len(self._segments) > 1:
+            oldest = self._segments[0]
+            if oldest == self._reading:
+                self._reset_cursor()
+            size = self._sizes[oldest]
+            self._drop_segment(oldest)
+            self.evicted_segments += 1
+            self.evicted_bytes += size
+            log.warning("Spool full – evicted %s (%d bytes)", oldest.name, size)
+
+    # ------------------------------------------------------------ replay
+    def peek(self, max_lines: int) -> List[str]:
+        """Geeft maximaal *max_lines* regels vanaf de replay-cursor."""
+        with self._lock:
+            while self._reading is None:
+                if not self._segments:
+                    return []
+                oldest = self._segments[0]
+                if oldest == self._active:
+                    # niet lezen uit een segment waar nog naar geschreven wordt
+                    self._active = None
+                text = oldest.read_text(encoding="utf-8")
+                lines = [ln for ln in text.split("\n") if ln]
+                if not lines:               # leeg segment → direct opruimen
+                    self._drop_segment(oldest)
+                    continue
+                self._reading = oldest
+                self._read_lines = lines
+                self._read_offset = 0
+            end = self._read_offset + max_lines
+            return self._read_lines[self._read_offset:end]
+
+    def commit(self, n: int) -> None:
+        """Markeert *n* gepeekte regels als weggeschreven."""
+        with self._lock:
+            if self._reading is None:
+                return
+            self._read_offset += n
+            self.replayed_lines += n
+            if self._read_offset >= len(self._read_lines):
+                done = self._reading
+                self._reset_cursor()
+                self._drop_segment(done)
+
+    def _drop_segment(self, path: Path) -> None:
+        if path == self._active:
+            self._active = None
+        if path in self._sizes:
+            self._segments.remove(path)
+            self._sizes.pop(path)
+        path.unlink(missing_ok=True)
+
+    def _reset_cursor(self) -> None:
+        self._reading = None
+        self._read_lines = []
+        self._read_offset = 0
+
+    # ------------------------------------------------------------ status
+    def is_empty(self) -> bool:
+        with self._lock:
+            return not any(self._sizes.values())
+
+    def size_bytes(self) -> int:
+        return sum(self._sizes.values())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "directory": str(self._dir),
+            "segments": len(self._segments),
+            "bytes": self.size_bytes(),
+            "max_bytes": self._max_bytes,
+            "spooled_lines": self.spooled_lines,
+            "replayed_lines": self.replayed_lines,
+            "evicted_segments": self.evicted_segments,
+            "evicted_bytes": self.evicted_bytes,
+        }
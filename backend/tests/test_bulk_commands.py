@@ -0,0 +1,120 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from application.bulk_command_service import BulkCommandService
+from application.command_service import CommandService
+from domain.chargepoint_session import OCPPVersion
+from routes.bulk_command_routes import router
+
+
+class FakeSession:
+    def __init__(self, cp_id, version, *, alias=None, enabled=True, delay=0.0, fail=None):
+        self.id = cp_id
+        self._settings = SimpleNamespace(ocpp_version=version, alias=alias, enabled=enabled)
+        self._running = True
+        self._delay = delay
+        self._fail = fail
+        self.sent = []
+
+    async def send_call(self, call):
+        self.sent.append(call)
+        await asyncio.sleep(self._delay)
+        if self._fail is not None:
+            raise self._fail
+        return {"status": "Accepted"}
+
+
+class FakeRegistry:
+    def __init__(self, sessions):
+        self.sessions = {s.id: s for s in sessions}
+
+    async def get(self, cp_id):
+        return self.sessions.get(cp_id)
+
+    async def get_all(self):
+        return tuple(self.sessions.values())
+
+    async def deregister(self, session):
+        self.sessions.pop(session.id, None)
+
+
+def _client(sessions, **kwargs):
+    registry = FakeRegistry(sessions)
+    bulk = BulkCommandService(registry, CommandService(registry), **kwargs)
+    app = FastAPI()
+    app.include_router(router(bulk_service=bulk))
+    return TestClient(app)
+
+
+def _lines(resp):
+    return [json.loads(line) for line in resp.text.splitlines() if line]
+
+
+def test_bulk_by_filter_reuses_call_per_version():
+    sessions = [
+        FakeSession("a1", OCPPVersion.V16, alias="depot-1"),
+        FakeSession("a2", OCPPVersion.V201, alias="depot-2"),
+        FakeSession("b1", OCPPVersion.V16, alias="home"),
+    ]
+    client = _client(sessions)
+    resp = client.post("/commands/bulk", json={
+        "action": "Reset", "filter": {"alias_prefix": "depot-"},
+    })
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    lines = _lines(resp)
+    assert sorted(l["charge_point_id"] for l in lines[:-1]) == ["a1", "a2"]
+    assert all(l["ok"] and l["status"] == 200 for l in lines[:-1])
+    assert lines[-1]["summary"]["ok"] == 2 and lines[-1]["summary"]["failed"] == 0
+    assert sessions[0].sent[0].type == "Soft"
+    assert sessions[1].sent[0].type == "Immediate"
+    assert sessions[2].sent == []
+
+
+def test_bulk_reports_per_charger_errors():
+    sessions = [
+        FakeSession("ok", OCPPVersion.V16),
+        FakeSession("slow", OCPPVersion.V16, fail=asyncio.TimeoutError()),
+    ]
+    client = _client(sessions)
+    resp = client.post("/commands/bulk", json={
+        "action": "Reset", "charge_point_ids": ["ok", "slow", "gone", "ok"],
+    })
+    by_id = {l["charge_point_id"]: l for l in _lines(resp)[:-1]}
+    assert set(by_id) == {"ok", "slow", "gone"}            # dubbele id maar één keer
+    assert by_id["ok"]["ok"] is True
+    assert by_id["slow"]["status"] == 504
+    assert by_id["gone"]["status"] == 404
+    summary = _lines(resp)[-1]["summary"]
+    assert (summary["targets"], summary["ok"], summary["failed"]) == (3, 1, 2)
+
+
+def test_bulk_rejects_unknown_action_before_sending():
+    session = FakeSession("a1", OCPPVersion.V16)
+    client = _client([session])
+    resp = client.post("/commands/bulk", json={"action": "Nope", "charge_point_ids": ["a1"]})
+    assert resp.status_code == 400
+    assert session.sent == []
+
+
+def test_bulk_concurrency_is_bounded():
+    active = peak = 0
+
+    class Counting(FakeSession):
+        async def send_call(self, call):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            return {"status": "Accepted"}
+
+    sessions = [Counting(f"cp{i}", OCPPVersion.V16) for i in range(20)]
+    client = _client(sessions)
+    resp = client.post("/commands/bulk", json={"action": "Reset", "concurrency": 4})
+    assert _lines(resp)[-1]["summary"]["ok"] == 20
+    assert peak == 4
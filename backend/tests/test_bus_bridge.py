@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+from application.bus_bridge import BusBridge
+from application.cluster_node import ClusterNode
+from application.event_bus import EventBus
+from infrastructure.cluster_transport import (
+    InProcessBroker,
+    InProcessTransport,
+    UnixSocketTransport,
+)
+
+
+async def _worker(transport, topics=("MeterValues", "ChargePointConnected")):
+    bus = EventBus()
+    node = ClusterNode(transport, is_local=lambda _cp: False, local_ids=list)
+    bridge = BusBridge(node, bus, topics, batch_size=50, flush_interval=0.001)
+    await node.start()
+    return bus, bridge, node
+
+
+@pytest.mark.asyncio
+async def test_events_reach_other_workers_in_order_without_echo():
+    broker = InProcessBroker()
+    bus_a, bridge_a, _ = await _worker(InProcessTransport(broker, "A"))
+    bus_b, bridge_b, _ = await _worker(InProcessTransport(broker, "B"))
+
+    seen_a, seen_b, sink_b = [], [], []
+    bus_a.subscribe("MeterValues", lambda **p: seen_a.append(p["n"]))
+    bus_b.subscribe("MeterValues", lambda **p: seen_b.append((p["charge_point_id"], p["n"])))
+    bus_b.subscribe("MeterValues", lambda **p: sink_b.append(p), local_only=True)
+
+    for n in range(120):
+        await bus_a.publish("MeterValues", charge_point_id=f"cp{n % 3}", n=n)
+    await bus_a.publish("Heartbeat", charge_point_id="cp0")     # geen topic
+    await asyncio.sleep(0.05)
+
+    assert seen_a == list(range(120))                           # geen echo terug
+    for cp in ("cp0", "cp1", "cp2"):
+        assert [n for c, n in seen_b if c == cp] == [n for n in range(120) if f"cp{n % 3}" == cp]
+    assert sink_b == []                                         # local_only-sink
+    assert bridge_a.stats()["sent_events"] == 120
+    assert bridge_a.stats()["sent_batches"] >= 3                # batch_size=50
+    assert bridge_b.stats()["received_events"] == 120
+    await bridge_a.close()
+    await bridge_b.close()
+
+
+@pytest.mark.asyncio
+async def test_bridge_over_unix_sockets(tmp_path):
+    bus_a, bridge_a, node_a = await _worker(UnixSocketTransport(tmp_path, "a"))
+    bus_b, bridge_b, node_b = await _worker(UnixSocketTransport(tmp_path, "b"))
+    got = []
+    bus_b.subscribe("ChargePointConnected", lambda **p: got.append(p["n"]))
+
+    for n in range(500):
+        await bus_a.publish("ChargePointConnected", charge_point_id="cp1", n=n)
+    for _ in range(100):
+        if len(got) == 500:
+            break
+        await asyncio.sleep(0.01)
+
+    assert got == list(range(500))
+    await bridge_a.close()
+    await bridge_b.close()
+    await node_a.close()
+    await node_b.close()
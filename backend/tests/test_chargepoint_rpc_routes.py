@@ -17,7 +17,10 @@ from routes.chargepoint_rpc_routes import (
     RemoteStartRequest,
     RemoteStopRequest,
 )
+from application.command_service import session_info
 from domain.chargepoint_session import ChargePointSettings, OCPPVersion
+from domain.outbound_scheduler import OutboundScheduler
+from infrastructure.report_collector import ReportCollector
 
 # ---------------------- FAKE IMPLEMENTATIONS ----------------------
 
@@ -28,11 +31,12 @@ class FakeSession:
         self._settings.ocpp_version = ocpp_version
         self._settings.enabled = False
         self._settings.alias = None
+        self.outbound = OutboundScheduler()
         # Voor OCPP 2.0.1‐logica in configuration:
         self._cp = type("cp", (), {})()
-        # standaard: notify_report_done = True, latest_config lege lijst
-        self._cp.latest_config: List[Dict[str, Any]] = []
-        self._cp.notify_report_done = True
+        # items die de nep-laadpaal via NotifyReport terugstuurt
+        self.report_items: List[Dict[str, Any]] = []
+        self._cp.reports = ReportCollector()
 
 class FakeRegistry:
     def __init__(self):
@@ -51,6 +55,10 @@ class FakeRegistry:
         if cp_id in self._items:
             self._items[cp_id]._settings.alias = alias
 
+    async def set_enabled(self, cp_id: str, enabled: bool):
+        if cp_id in self._items:
+            self._items[cp_id]._settings.enabled = enabled
+
     async def register(self, session: FakeSession):
         # Als er al een alias in cache staat, zet die over
         if session.id in self._aliases:
@@ -63,8 +71,16 @@ class FakeRegistry:
         self._items.pop(session.id, None)
 
 class FakeCommandService:
-    def __init__(self):
+    def __init__(self, registry: Optional[FakeRegistry] = None):
         self.sent_commands: List[Dict[str, Any]] = []
+        self._registry = registry
+        self.base_report_status = "Accepted"
+
+    async def describe(self, cp_id: str) -> Dict[str, Any]:
+        session = await self._registry.get(cp_id) if self._registry else None
+        if session is None:
+            raise HTTPException(status_code=404, detail="Charge-point not connected")
+        return session_info(session)
 
     async def send(self, cp_id: str, action: str, parameters: Dict[str, Any]) -> Any:
         self.sent_commands.append({
@@ -77,8 +93,16 @@ class FakeCommandService:
             # _unwrap_result moet dict met "result" returnen
             return {"result": ["cfg1", "cfg2"]}
         if action == "GetBaseReport":
-            # Provide a status field to test reading status
-            return {"result": {"status": "Accepted"}}
+            # NotifyReport (report_items van de sessie) komt kort ná de response
+            # binnen, in twee delen – net als bij een echte laadpaal
+            session = self._registry._items.get(cp_id) if self._registry else None
+            if session is not None and self.base_report_status == "Accepted":
+                items = [dict(i) for i in session.report_items]
+                rid = parameters["requestId"]
+                loop = asyncio.get_running_loop()
+                loop.call_later(0.01, session._cp.reports.feed, rid, items[:1], True)
+                loop.call_later(0.02, session._cp.reports.feed, rid, items[1:], False)
+            return {"result": {"status": self.base_report_status}}
         if action == "GetVariables":
             # Return get_variable_result based on input keys_payload
             return {
@@ -103,8 +127,8 @@ def registry():
     return FakeRegistry()
 
 @pytest.fixture
-def command_service():
-    return FakeCommandService()
+def command_service(registry):
+    return FakeCommandService(registry)
 
 @pytest.fixture
 def app(registry, command_service):
@@ -121,15 +145,13 @@ def setup_sessions(registry):
     # Registreer twee sessies: één OCPP 1.6 (cp16) en één OCPP 2.0.1 (cp201)
     v16 = FakeSession("cp16", OCPPVersion.V16)
     v201 = FakeSession("cp201", OCPPVersion.V201)
-    # Stel bestaande latest_config in voor v201 om decision coverage te verhogen
+    # NotifyReport-items voor v201 om decision coverage te verhogen
     # Voeg items toe: één zonder waarde, één met waarde None en één met waarde reeds gezet
-    v201._cp.latest_config = [
+    v201.report_items = [
         {"key": "A", "value": None, "component": {"name": "CompA"}},
         {"key": "B", "value": "existing", "component": {"name": "CompB"}},
         {"key": None, "value": "ignored"}  # moet overgeslagen worden
     ]
-    # Stel notify_report_done initieel op False zodat we de loop in configuration testen
-    v201._cp.notify_report_done = False
     registry._items["cp16"] = v16
     registry._items["cp201"] = v201
     return
@@ -300,15 +322,8 @@ async def test_configuration_v16_and_v201_full_logic(client, command_service, re
     assert response.json() == {"result": ["cfg1", "cfg2"]}
 
     # --- OCPP 2.0.1: 
-    # FakeSession.latest_config = [{"key":"A",value=None}, {"key":"B", value="existing"}, {"key":None}]
-    # We simuleren dat notify_report_done later pas True wordt; start achtergrond-taak die het op True zet
-    async def mark_notify_done():
-        await asyncio.sleep(0.05)
-        session = registry._items["cp201"]
-        session._cp.notify_report_done = True
-
-    # Start achtergrond-coroutine
-    asyncio.create_task(mark_notify_done())
+    # FakeSession.report_items = [{"key":"A",value=None}, {"key":"B", value="existing"}, {"key":None}]
+    # FakeCommandService voert die als NotifyReport (2 delen) aan de ReportCollector
 
     response = client.get("/charge-points/cp201/configuration")
     assert response.status_code == 200
@@ -328,10 +343,37 @@ async def test_configuration_v16_and_v201_full_logic(client, command_service, re
     assert keys["B"]["value"] == "existing"
     assert keys["B"]["readonly"] is True
 
+    # eigen requestId, na afloop opgeruimd
+    sent = [c for c in command_service.sent_commands if c["action"] == "GetBaseReport"]
+    assert sent[-1]["parameters"]["requestId"] == 1
+    assert len(registry._items["cp201"]._cp.reports) == 0
+
     # 404‐case: niet-bestaande cp
     response = client.get("/charge-points/unknown/configuration")
     assert response.status_code == 404
 
+
+def test_configuration_v201_rejected_report_does_not_wait(client, command_service, registry):
+    command_service.base_report_status = "NotSupported"
+    response = client.get("/charge-points/cp201/configuration")
+    assert response.status_code == 200
+    assert response.json() == {"status": "NotSupported", "configuration_key": []}
+    assert len(registry._items["cp201"]._cp.reports) == 0
+
+
+def test_configuration_v201_disconnect_during_report(client, command_service, registry):
+    session = registry._items["cp201"]
+    command_service.base_report_status = "Accepted"
+
+    async def send(cp_id, action, parameters):
+        # verbinding valt weg terwijl de laadpaal nog rapporteert
+        asyncio.get_running_loop().call_later(0.01, session._cp.reports.abort)
+        return {"result": {"status": "Accepted"}}
+
+    command_service.send = send
+    response = client.get("/charge-points/cp201/configuration")
+    assert response.status_code == 503
+
 def test_list_cps_filters_and_all(client, registry):
     # Twee sessies “cp16” (inactive) en “cp201” (inactive) geregistreerd
     # List zonder filter
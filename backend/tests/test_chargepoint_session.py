@@ -107,3 +107,17 @@ async def test_send_call_logs_and_handles_no_response(session, fake_parser, capl
     ]
     assert any("request" in msg for msg in logs)
     assert any("response" in msg for msg in logs)
+
+
+@pytest.mark.asyncio
+async def test_disconnect_aborts_pending_reports(session, fake_parser):
+    from infrastructure.report_collector import ReportCollector
+
+    fake_parser.reports = ReportCollector()
+    rid = fake_parser.reports.open()
+    waiter = asyncio.ensure_future(fake_parser.reports.wait(rid, timeout=5))
+    await asyncio.sleep(0)
+
+    await session.disconnect()
+    with pytest.raises(ConnectionError):
+        await waiter
@@ -0,0 +1,216 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from fastapi import FastAPI, HTTPException
+from ocpp.v16 import call_result
+
+from application.bulk_command_service import BulkCommandService, FleetFilter
+from application.cluster_node import ClusterNode
+from application.command_service import CommandService
+from application.connection_registry import ConnectionRegistryChargePoint
+from domain.chargepoint_session import OCPPVersion
+from domain.outbound_scheduler import OutboundScheduler
+from infrastructure.cluster_transport import (
+    InProcessBroker,
+    InProcessTransport,
+    PeerUnavailable,
+    UnixSocketTransport,
+)
+from routes.chargepoint_rpc_routes import router
+
+
+class _Repo:
+    available = False
+    instance_id = "test"
+
+    def __init__(self, db=None):
+        self._db = db
+
+    async def load_by_ids(self, ids):
+        if self._db is None:
+            return {}
+        return {i: dict(self._db.rows[i]) for i in ids if i in self._db.rows}
+
+    async def upsert(self, cp_id, alias, enabled, ocpp_version):
+        row = {"id": cp_id, "alias": alias, "enabled": enabled, "ocpp_version": ocpp_version}
+        self._db.rows[cp_id] = row
+        for registry in self._db.listeners:          # NOTIFY naar alle instances
+            await registry.apply_notification({"op": "upsert", "row": dict(row)})
+
+
+class _Db:
+    """Gedeelde settings-tabel met LISTEN/NOTIFY voor meerdere workers."""
+
+    def __init__(self):
+        self.rows = {}
+        self.listeners = []
+
+
+class FakeSession:
+    def __init__(self, cp_id, behaviour):
+        self.id = cp_id
+        self._running = True
+        self._settings = SimpleNamespace(alias=None, enabled=True, ocpp_version=OCPPVersion.V16)
+        self._behaviour = behaviour
+        self.calls = []
+        self.outbound = OutboundScheduler()
+
+    async def send_call(self, call):
+        self.calls.append(call)
+        if isinstance(self._behaviour, Exception):
+            raise self._behaviour
+        return self._behaviour
+
+
+async def _worker(broker, name, db=None):
+    registry = ConnectionRegistryChargePoint(_Repo(db))
+    if db is not None:
+        db.listeners.append(registry)
+    node = ClusterNode(
+        InProcessTransport(broker, name),
+        is_local=registry.is_local,
+        local_ids=registry.local_ids,
+    )
+    registry.add_listener(lambda cp, up: node.claim(cp) if up else node.release(cp))
+    service = CommandService(registry, node)
+    await node.start()
+    return registry, node, service
+
+
+@pytest.mark.asyncio
+async def test_command_is_forwarded_to_worker_owning_the_charger():
+    broker = InProcessBroker()
+    reg_a, node_a, svc_a = await _worker(broker, "A")
+    reg_b, node_b, svc_b = await _worker(broker, "B")
+
+    sess = FakeSession("cp1", call_result.RemoteStopTransaction(status="Accepted"))
+    await reg_b.register(sess)
+    await asyncio.sleep(0.01)                   # claim-broadcast laten landen
+
+    assert await node_a.locate("cp1") == "B"
+    result = await svc_a.send("cp1", "RemoteStopTransaction", {"transaction_id": 7})
+    assert result == {"result": {"status": "Accepted"}}
+    assert sess.calls[0].transaction_id == 7
+    assert node_a.stats()["forwarded"] == 1
+
+    with pytest.raises(HTTPException) as exc:
+        await svc_a.send("unknown", "RemoteStopTransaction", {"transaction_id": 1})
+    assert exc.value.status_code == 404
+
+    # fouten van de eigenaar komen met dezelfde status terug
+    sess._behaviour = asyncio.TimeoutError()
+    with pytest.raises(HTTPException) as exc:
+        await svc_a.send("cp1", "RemoteStopTransaction", {"transaction_id": 1})
+    assert exc.value.status_code == 504
+
+    await reg_b.deregister(sess)
+    await asyncio.sleep(0.01)
+    assert await node_a.locate("cp1") is None
+
+
+@pytest.mark.asyncio
+async def test_chargepoint_routes_on_a_worker_without_the_charger():
+    broker, db = InProcessBroker(), _Db()
+    reg_a, _, svc_a = await _worker(broker, "A", db)
+    reg_b, _, _ = await _worker(broker, "B", db)
+
+    sess = FakeSession("cp1", call_result.RemoteStartTransaction(status="Accepted"))
+    sess._settings.enabled = False
+    await reg_b.register(sess)
+    await asyncio.sleep(0.01)
+
+    app = FastAPI()
+    app.include_router(router(registry=reg_a, command_service=svc_a))
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://a") as client:
+        settings = (await client.get("/charge-points/cp1/settings")).json()
+        assert settings == {"id": "cp1", "ocpp_version": "1.6", "active": False, "alias": None}
+
+        resp = await client.post("/charge-points/cp1/start?wait=5", json={"id_tag": "T1"})
+        assert resp.status_code == 202
+        assert resp.json()["state"] == "succeeded"
+        assert resp.json()["result"] == {"status": "Accepted"}
+        assert sess.calls[0].id_tag == "T1"
+
+        # enable op A: via de tabel + NOTIFY in de live sessie op B
+        resp = await client.post("/charge-points/cp1/enable")
+        assert resp.json() == {"id": "cp1", "active": True}
+        assert sess._settings.enabled is True
+        assert db.rows["cp1"]["enabled"] is True
+        assert (await client.get("/charge-points/cp1/settings")).json()["active"] is True
+
+        assert (await client.post("/charge-points/nope/enable")).status_code == 404
+        assert "nope" not in db.rows
+
+
+@pytest.mark.asyncio
+async def test_bulk_filter_targets_chargers_of_all_workers():
+    broker = InProcessBroker()
+    reg_a, _, svc_a = await _worker(broker, "A")
+    reg_b, _, _ = await _worker(broker, "B")
+    accepted = call_result.RemoteStopTransaction(status="Accepted")
+    await reg_a.register(FakeSession("a1", accepted))
+    await reg_b.register(FakeSession("b1", accepted))
+    depot = FakeSession("b2", accepted)
+    depot._settings.alias = "depot-2"
+    await reg_b.register(depot)
+    await asyncio.sleep(0.01)
+
+    bulk = BulkCommandService(reg_a, svc_a)
+    assert sorted(await bulk.resolve_targets(None, None)) == ["a1", "b1", "b2"]
+    assert await bulk.resolve_targets(None, FleetFilter(alias_prefix="depot")) == ["b2"]
+
+    calls = bulk.prepare("RemoteStopTransaction", {"transaction_id": 3})
+    items = [i async for i in bulk.run(["b2"], "RemoteStopTransaction", {"transaction_id": 3}, calls)]
+    assert items[0]["ok"] and depot.calls[0].transaction_id == 3
+
+
+@pytest.mark.asyncio
+async def test_late_joining_worker_syncs_directory_and_dead_peer_gives_503():
+    broker = InProcessBroker()
+    reg_a, node_a, _ = await _worker(broker, "A")
+    await reg_a.register(FakeSession("cp9", None))
+    _, node_c, svc_c = await _worker(broker, "C")
+    assert node_c._locations == {"cp9": "A"}        # via sync, zonder locate
+
+    await node_a.close()
+    with pytest.raises(HTTPException) as exc:
+        await svc_c.send("cp9", "RemoteStopTransaction", {"transaction_id": 1})
+    assert exc.value.status_code == 503
+    assert "cp9" not in node_c._locations
+
+
+@pytest.mark.asyncio
+async def test_unix_socket_transport_request_cast_and_stale_peer(tmp_path):
+    received = []
+
+    async def handler_b(sender, body):
+        received.append((sender, body["n"]))
+        return {"echo": body["n"] * 2}
+
+    async def handler_a(_sender, _body):
+        return None
+
+    a = UnixSocketTransport(tmp_path, "a")
+    b = UnixSocketTransport(tmp_path, "b")
+    await a.start(handler_a)
+    await b.start(handler_b)
+    assert a.peers() == ["b"] and b.peers() == ["a"]
+
+    replies = await asyncio.gather(*(a.request("b", {"n": i}) for i in range(20)))
+    assert [r["echo"] for r in replies] == [i * 2 for i in range(20)]
+
+    received.clear()
+    for i in range(50):
+        await a.cast("b", {"n": i})
+    await asyncio.sleep(0.05)
+    assert [n for _, n in received] == list(range(50))   # casts in volgorde
+
+    await b.close()
+    await asyncio.sleep(0.01)                   # a ziet EOF op de oude verbinding
+    with pytest.raises(PeerUnavailable):
+        await a.request("b", {"n": 1}, timeout=1)
+    assert a.peers() == []
+    await a.close()
@@ -0,0 +1,64 @@
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from application.command_catalog import CSMS_ACTIONS, catalog
+from domain.chargepoint_session import OCPPVersion
+from routes.command_catalog_routes import router
+
+
+def test_catalog_covers_every_csms_action():
+    assert len(catalog) == sum(len(a) for a in CSMS_ACTIONS.values())
+    assert "UpdateFirmware" in catalog.actions(OCPPVersion.V16)
+    assert "SetNetworkProfile" in catalog.actions(OCPPVersion.V201)
+    # laadpaal → CSMS zit er niet in
+    assert "BootNotification" not in catalog.actions(OCPPVersion.V16)
+
+
+def test_build_accepts_snake_and_camel_case():
+    a = catalog.build(OCPPVersion.V16, "UnlockConnector", {"connector_id": 2})
+    b = catalog.build(OCPPVersion.V16, "UnlockConnector", {"connectorId": 2})
+    assert a == b and a.connector_id == 2
+
+    call = catalog.build(OCPPVersion.V201, "TriggerMessage", {
+        "requested_message": "Heartbeat", "evse": {"id": 1},
+    })
+    assert call.requested_message == "Heartbeat"
+
+
+def test_missing_and_unknown_parameters_are_400():
+    with pytest.raises(HTTPException) as exc:
+        catalog.build(OCPPVersion.V16, "UnlockConnector", {})
+    assert exc.value.status_code == 400 and "connector_id" in exc.value.detail
+
+    with pytest.raises(HTTPException) as exc:
+        catalog.build(OCPPVersion.V16, "UnlockConnector", {"connector_id": 1, "bogus": 1})
+    assert "bogus" in exc.value.detail
+
+
+def test_schema_validation_rejects_bad_payload():
+    with pytest.raises(HTTPException) as exc:
+        catalog.build(OCPPVersion.V16, "Reset", {"type": "Sideways"})
+    assert exc.value.status_code == 400 and "Invalid Reset payload" in exc.value.detail
+
+    with pytest.raises(HTTPException):
+        catalog.build(OCPPVersion.V201, "ChangeAvailability", {"operational_status": 1})
+    # zonder validatie wordt het object wel gebouwd (legacy-strategy gedrag)
+    catalog.build(OCPPVersion.V16, "Reset", {"type": "Sideways"}, validate=False)
+
+
+def test_catalog_endpoint():
+    app = FastAPI()
+    app.include_router(router(catalog=catalog))
+    client = TestClient(app)
+
+    resp = client.get("/commands/catalog", params={"version": "1.6", "schema": "false"})
+    assert resp.status_code == 200
+    entries = {e["action"]: e for e in resp.json()}
+    assert set(entries) == set(CSMS_ACTIONS[OCPPVersion.V16])
+    assert entries["RemoteStopTransaction"]["required"] == ["transaction_id"]
+    assert "schema" not in entries["Reset"]
+
+    full = client.get("/commands/catalog").json()
+    assert len(full) == len(catalog) and "properties" in full[0]["schema"]
+    assert client.get("/commands/catalog", params={"version": "3.0"}).status_code == 400
@@ -0,0 +1,133 @@
+import asyncio
+import time
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from application.command_jobs import CommandJob, CommandJobService, JobStore, JobStoreFull
+from application.event_bus import EventBus
+from routes.job_routes import router
+
+
+class FakeCommands:
+    def __init__(self, delay=0.0, error=None):
+        self.delay = delay
+        self.error = error
+        self.sent = []
+
+    async def send(self, cp_id, action, parameters):
+        self.sent.append((cp_id, action))
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return {"result": {"status": "Accepted"}}
+
+
+@pytest.mark.asyncio
+async def test_submit_returns_immediately_and_publishes_result():
+    bus = EventBus()
+    seen = []
+    bus.subscribe("CommandJobCompleted", lambda job: seen.append(job))
+    service = CommandJobService(FakeCommands(delay=0.05), event_bus=bus)
+
+    job = await service.submit("cp1", "RemoteStartTransaction", {"id_tag": "T"})
+    assert job.state == "pending"
+
+    done = await service.wait(job.id, 1.0)
+    assert done.state == "succeeded" and done.result == {"status": "Accepted"}
+    assert seen[0]["id"] == job.id and seen[0]["state"] == "succeeded"
+    assert service.stats()["succeeded"] == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_command_is_recorded_on_the_job():
+    service = CommandJobService(
+        FakeCommands(error=HTTPException(status_code=504, detail="timeout")),
+        event_bus=EventBus(),
+    )
+    job = await service.submit("cp1", "RemoteStopTransaction", {"transaction_id": 1})
+    job = await service.wait(job.id, 1.0)
+    assert job.state == "failed"
+    assert job.error == {"status": 504, "detail": "timeout"}
+
+
+def test_store_evicts_expired_and_oldest_finished():
+    store = JobStore(max_size=2, ttl=60)
+    old = CommandJob("cp1", "A", {}, state="succeeded", finished_at=time.time() - 120)
+    store.add(old)
+    assert store.get(old.id) is None                  # TTL verstreken
+
+    a = CommandJob("cp1", "A", {}, state="succeeded", finished_at=time.time())
+    b = CommandJob("cp1", "B", {})
+    c = CommandJob("cp1", "C", {})
+    store.add(a)
+    store.add(b)
+    store.add(c)                                      # a (afgerond) wijkt
+    assert store.get(a.id) is None and store.get(c.id) is c
+    with pytest.raises(JobStoreFull):
+        store.add(CommandJob("cp1", "D", {}))         # alleen nog lopende jobs
+
+
+def test_store_expires_jobs_in_finish_order_not_insert_order():
+    store = JobStore(max_size=10, ttl=60)
+    slow = CommandJob("cp1", "Reset", {})
+    fast = CommandJob("cp2", "Reset", {})
+    store.add(slow)
+    store.add(fast)
+
+    fast.state, fast.finished_at = "succeeded", time.time() - 120   # lang geleden klaar
+    store.finish(fast)
+    slow.state, slow.finished_at = "succeeded", time.time()         # net klaar
+    store.finish(slow)
+
+    assert store.get(fast.id) is None and store.get(slow.id) is slow
+    assert store.stats()["pending"] == 0 and store.evicted == 1
+
+
+class PerChargerDelay(FakeCommands):
+    def __init__(self, delays):
+        super().__init__()
+        self.delays = delays
+
+    async def send(self, cp_id, action, parameters):
+        self.delay = self.delays.get(cp_id, 0.0)
+        return await super().send(cp_id, action, parameters)
+
+
+@pytest.mark.asyncio
+async def test_job_finishing_first_is_evicted_first():
+    service = CommandJobService(
+        PerChargerDelay({"cp1": 0.05}), store=JobStore(max_size=2), event_bus=EventBus()
+    )
+    slow = await service.submit("cp1", "Reset", {})
+    fast = await service.submit("cp2", "Reset", {})
+    await service.wait(slow.id, 1.0)                # fast is al eerder klaar
+
+    third = await service.submit("cp3", "Reset", {})
+    assert service.store.get(fast.id) is None
+    assert service.store.get(slow.id) is slow and service.store.get(third.id) is third
+    await service.wait(third.id, 1.0)
+
+
+@pytest.mark.asyncio
+async def test_remote_completion_lands_in_local_store():
+    bus = EventBus()
+    service = CommandJobService(FakeCommands(), event_bus=bus)
+    remote = CommandJob("cp9", "Reset", {}, state="succeeded", finished_at=time.time())
+    await bus.publish_remote("CommandJobCompleted", job=remote.to_dict())
+    assert service.get(remote.id).charge_point_id == "cp9"
+
+
+def test_job_routes():
+    service = CommandJobService(FakeCommands(), event_bus=EventBus())
+    app = FastAPI()
+    app.include_router(router(jobs=service))
+    client = TestClient(app)
+
+    job = CommandJob("cp1", "Reset", {}, state="succeeded", result={"status": "Accepted"},
+                     finished_at=time.time())
+    service.store.add(job)
+    assert client.get(f"/jobs/{job.id}").json()["result"] == {"status": "Accepted"}
+    assert client.get("/jobs/nope").status_code == 404
+    assert [j["id"] for j in client.get("/jobs", params={"charge_point_id": "cp1"}).json()] == [job.id]
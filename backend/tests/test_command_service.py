@@ -234,3 +234,22 @@ async def test_send_success_v201_and_strategy_used():
         {"id_tag": "T", "remote_start_id": 99},
     )
     assert response == {"result": expected_result}
+
+
+@pytest.mark.asyncio
+async def test_get_base_report_request_id_comes_from_report_collector():
+    """Zonder requestId reserveert de service er een die niet in gebruik is."""
+    from types import SimpleNamespace
+    from infrastructure.report_collector import ReportCollector
+
+    session = FakeSession(ocpp_version=OCPPVersion.V201, send_behavior={"status": "Accepted"})
+    session._cp = SimpleNamespace(reports=ReportCollector())
+    waiting = session._cp.reports.open()            # bv. de ConfigurationService
+    service = CommandService(FakeRegistry(session=session))
+
+    await service.send("cp1", "GetBaseReport", {})
+    assert session._sent_call.report_base == "FullInventory"
+    assert session._sent_call.request_id not in (waiting, 55)
+
+    await service.send("cp1", "GetBaseReport", {"requestId": 7})
+    assert session._sent_call.request_id == 7
@@ -0,0 +1,285 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from application.configuration_service import ConfigurationService
+from application.event_bus import EventBus
+from domain.chargepoint_session import ChargePointSettings, OCPPVersion
+from infrastructure.report_collector import ReportCollector
+from routes.chargepoint_rpc_routes import router
+
+
+class FakeSession:
+    def __init__(self, cp_id, version=OCPPVersion.V201):
+        self.id = cp_id
+        self._settings = ChargePointSettings()
+        self._settings.ocpp_version = version
+        self._cp = type("cp", (), {})()
+        self._cp.reports = ReportCollector()
+
+
+class FakeRegistry:
+    def __init__(self, *sessions):
+        self._items = {s.id: s for s in sessions}
+
+    async def get(self, cp_id):
+        return self._items.get(cp_id)
+
+
+class FakeCommands:
+    """GetBaseReport → NotifyReport na *delay*; GetVariables echo't 'Accepted'."""
+
+    def __init__(self, registry, delay=0.02):
+        self.registry = registry
+        self.delay = delay
+        self.value = "1"
+        self.sent = []
+
+    async def send(self, cp_id, action, parameters):
+        self.sent.append(action)
+        if action == "GetBaseReport":
+            reports = self.registry._items[cp_id]._cp.reports
+            item = {"key": "HeartbeatInterval", "value": self.value, "component": {"name": "OCPPCommCtrlr"}}
+            asyncio.get_running_loop().call_later(
+                self.delay, reports.feed, parameters["requestId"], [item], False
+            )
+            return {"result": {"status": "Accepted"}}
+        if action == "GetVariables":
+            return {"result": {"get_variable_result": [
+                {"variable": e["variable"], "attributeStatus": "Accepted"} for e in parameters["key"]
+            ]}}
+        return {"result": {"configuration_key": [{"key": "A", "value": self.value}]}}
+
+
+def _service(*sessions, bus=None):
+    registry = FakeRegistry(*sessions)
+    commands = FakeCommands(registry)
+    service = ConfigurationService(registry, commands, event_bus=bus or EventBus())
+    return service, commands
+
+
+@pytest.mark.asyncio
+async def test_cached_view_and_single_flight():
+    service, commands = _service(FakeSession("cp1"))
+
+    a, b = await asyncio.gather(service.get("cp1"), service.get("cp1"))
+    assert a is b
+    assert commands.sent.count("GetBaseReport") == 1
+    assert a.body["configuration_key"][0]["value"] == "1"
+
+    again = await service.get("cp1")
+    assert again is a
+    assert commands.sent.count("GetBaseReport") == 1
+    assert service.stats()["hits"] == 1 and service.stats()["shared"] == 1
+
+    commands.value = "2"
+    fresh = await service.get("cp1", refresh=True)
+    assert fresh.etag != a.etag
+    assert commands.sent.count("GetBaseReport") == 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("event, payload", [
+    ("ConfigurationChanged", {"ocpp_action": "SetVariables", "parameters": {}, "result": ""}),
+    ("BootNotification", {"ocpp_version": "2.0.1", "payload": {}}),
+    ("NotifyReport", {"ocpp_version": "2.0.1", "payload": {"solicited": False}}),
+])
+async def test_events_invalidate(event, payload):
+    bus = EventBus()
+    service, commands = _service(FakeSession("cp1"), bus=bus)
+    await service.get("cp1")
+
+    await bus.publish(event, charge_point_id="cp1", **payload)
+    assert len(service) == 0
+    await service.get("cp1")
+    assert commands.sent.count("GetBaseReport") == 2
+
+
+@pytest.mark.asyncio
+async def test_own_notify_report_keeps_cache():
+    bus = EventBus()
+    service, _ = _service(FakeSession("cp1"), bus=bus)
+    await service.get("cp1")
+    await bus.publish("NotifyReport", charge_point_id="cp1", payload={"solicited": True})
+    assert len(service) == 1
+
+
+@pytest.mark.asyncio
+async def test_change_during_fetch_is_not_cached():
+    bus = EventBus()
+    service, _ = _service(FakeSession("cp1"), bus=bus)
+    pending = asyncio.ensure_future(service.get("cp1"))
+    await asyncio.sleep(0)
+    await bus.publish("ConfigurationChanged", charge_point_id="cp1")
+
+    view = await pending                  # caller krijgt wel antwoord …
+    assert view.body["status"] == "Accepted"
+    assert len(service) == 0              # … maar het wordt niet bewaard
+
+
+def test_route_etag_and_not_modified():
+    session = FakeSession("cp16", OCPPVersion.V16)
+    registry = FakeRegistry(session)
+    commands = FakeCommands(registry)
+    app = FastAPI()
+    app.include_router(router(
+        registry=registry,
+        command_service=commands,
+        configuration=ConfigurationService(registry, commands, event_bus=EventBus()),
+    ))
+    client = TestClient(app)
+
+    first = client.get("/charge-points/cp16/configuration")
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+
+    cached = client.get("/charge-points/cp16/configuration", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["ETag"] == etag
+    assert commands.sent.count("GetConfiguration") == 1
+
+    commands.value = "2"
+    refreshed = client.get(
+        "/charge-points/cp16/configuration?refresh=true", headers={"If-None-Match": etag}
+    )
+    assert refreshed.status_code == 200
+    assert refreshed.json()["result"]["configuration_key"][0]["value"] == "2"
+
+    assert client.get("/charge-points/unknown/configuration").status_code == 404
+
+
+# ------------------------------------------------------------------ GetVariables-batches
+from application.configuration_service import _batches, _message_limits, _variable_data
+
+
+def _report(n, limits=()):
+    items = [
+        {"key": f"Var{i}", "value": None, "component": {"name": "Ctrl"}} for i in range(n)
+    ]
+    for key, instance, value in limits:
+        items.append({
+            "key": key, "instance": instance, "value": value,
+            "component": {"name": "DeviceDataCtrlr"},
+        })
+    return items
+
+
+def test_message_limits_from_device_model():
+    assert _message_limits(_report(1)) == (24, None)
+    raw = _report(1, [
+        ("ItemsPerMessage", "GetReport", "5"),
+        ("ItemsPerMessage", "GetVariables", "50"),
+        ("BytesPerMessage", "GetVariables", "4096"),
+    ])
+    assert _message_limits(raw) == (50, 4096)
+    assert _message_limits(_report(1, [("ItemsPerMessageGetVariables", None, "10")])) == (10, None)
+    assert _message_limits(_report(1, [("ItemsPerMessage", "GetVariables", "x")])) == (24, None)
+
+
+def test_batches_respect_items_and_bytes():
+    wanted = [(itm, "Target") for itm in _report(10)]
+    assert [len(b) for b in _batches(wanted, 4, None)] == [4, 4, 2]
+
+    entry = len(str(_variable_data(wanted[0]))) + 1
+    by_bytes = _batches(wanted, 100, 80 + 3 * entry)
+    assert all(len(b) <= 3 for b in by_bytes)
+    assert sum(len(b) for b in by_bytes) == 10
+
+
+class PipelineCommands:
+    """Houdt bij hoeveel GetVariables tegelijk openstaan; echo't attributeType niet."""
+
+    def __init__(self, report):
+        self.report = report
+        self.registry = None
+        self.calls = []
+        self.open = 0
+        self.max_open = 0
+
+    async def send(self, cp_id, action, parameters):
+        if action == "GetBaseReport":
+            reports = self.registry._items[cp_id]._cp.reports
+            asyncio.get_running_loop().call_soon(
+                reports.feed, parameters["requestId"], [dict(i) for i in self.report], False
+            )
+            return {"result": {"status": "Accepted"}}
+        self.calls.append(parameters["key"])
+        self.open += 1
+        self.max_open = max(self.max_open, self.open)
+        await asyncio.sleep(0.005)
+        self.open -= 1
+        return {"result": {"get_variable_result": [
+            {
+                "variable": e["variable"],
+                "attributeValue": "v",
+                "attributeStatus": "Accepted" if e["variable"]["name"] != "Var0"
+                or "attributeType" not in e else "Rejected",
+            }
+            for e in parameters["key"]
+        ]}}
+
+
+@pytest.mark.asyncio
+async def test_single_pipelined_get_variables_pass():
+    session = FakeSession("cp1")
+    registry = FakeRegistry(session)
+    commands = PipelineCommands(_report(30, [("ItemsPerMessage", "GetVariables", "20")]))
+    commands.registry = registry
+    service = ConfigurationService(registry, commands, event_bus=EventBus())
+
+    view = await service.get("cp1")
+
+    # 31 items (30 zonder value + ItemsPerMessage): 30 Actual + 31 Target → batches van ≤ 20
+    assert [len(c) for c in commands.calls] == [20, 20, 20, 1]
+    assert commands.max_open == 2                     # volgende batch staat al klaar
+    rows = {r["key"]: r for r in view.body["configuration_key"]}
+    assert rows["Var0"]["value"] == "v" and rows["Var0"]["readonly"] is True
+    assert rows["Var1"]["value"] == "v" and rows["Var1"]["readonly"] is False
+    assert service.stats()["get_variables_batches"] == 4
+
+
+# ------------------------------------------------------------------ dedupe / index
+from application.configuration_service import _apply_results, _dedupe
+
+
+def _var(component, name, value=None, evse=None, instance=None):
+    comp = {"name": component}
+    if evse is not None:
+        comp["evse"] = {"id": evse}
+    return {"key": name, "instance": instance, "value": value, "component": comp}
+
+
+def test_dedupe_keeps_same_name_on_other_components():
+    raw = [
+        _var("OCPPCommCtrlr", "Enabled", None),
+        _var("OCPPCommCtrlr", "Enabled", "true"),       # tweede deel mét waarde wint
+        _var("AuthCtrlr", "Enabled", "false"),
+        _var("EVSE", "Enabled", "true", evse=1),
+        _var("EVSE", "Enabled", "false", evse=2),
+        _var("DeviceDataCtrlr", "ItemsPerMessage", "10", instance="GetReport"),
+        _var("DeviceDataCtrlr", "ItemsPerMessage", "20", instance="GetVariables"),
+    ]
+    rows = list(_dedupe(raw).values())
+    assert len(rows) == 6
+    assert {r["value"] for r in rows if r["component"]["name"] == "OCPPCommCtrlr"} == {"true"}
+
+
+def test_results_are_matched_on_component_and_evse():
+    rows = [_var("EVSE", "Available", evse=1), _var("EVSE", "Available", evse=2)]
+    batch = [(rows[0], "Actual"), (rows[1], "Actual"), (rows[0], "Target"), (rows[1], "Target")]
+    # andere volgorde dan de request, met component + attributeType zoals de lib ze teruggeeft
+    results = {"get_variable_result": [
+        {"component": {"name": "EVSE", "evse": {"id": 2}}, "variable": {"name": "Available"},
+         "attribute_type": "Target", "attribute_status": "Accepted"},
+        {"component": {"name": "EVSE", "evse": {"id": 2}}, "variable": {"name": "Available"},
+         "attribute_status": "Accepted", "attribute_value": "false"},
+        {"component": {"name": "EVSE", "evse": {"id": 1}}, "variable": {"name": "Available"},
+         "attribute_type": "Target", "attribute_status": "Rejected"},
+        {"component": {"name": "EVSE", "evse": {"id": 1}}, "variable": {"name": "Available"},
+         "attribute_type": "Actual", "attribute_status": "Accepted", "attribute_value": "true"},
+    ]}
+    _apply_results(batch, results, _dedupe(rows))
+    assert (rows[0]["value"], rows[0]["readonly"]) == ("true", True)
+    assert (rows[1]["value"], rows[1]["readonly"]) == ("false", False)
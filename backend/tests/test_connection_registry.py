@@ -0,0 +1,84 @@
+import pytest
+
+from application.connection_registry import ConnectionRegistryFrontend
+
+
+class _Item:
+    def __init__(self, item_id: str):
+        self.id = item_id
+
+
+@pytest.mark.asyncio
+async def test_get_all_snapshot_is_cached_until_registry_changes():
+    reg = ConnectionRegistryFrontend()
+    a, b = _Item("a"), _Item("b")
+    await reg.register(a)
+
+    first = await reg.get_all()
+    assert first == (a,)
+    assert await reg.get_all() is first            # geen nieuwe kopie
+
+    await reg.register(b)
+    second = await reg.get_all()
+    assert second == (a, b) and first == (a,)      # oude snapshot onveranderd
+
+    await reg.deregister(_Item("unknown"))
+    assert await reg.get_all() is second           # no-op → zelfde snapshot
+
+    await reg.deregister(a)
+    assert await reg.get_all() == (b,)
+    assert await reg.get("a") is None and await reg.get("b") is b
+    assert len(reg) == 1
+
+
+# ---------------------------------------------------------------- charge-point registry
+from types import SimpleNamespace
+
+from application.connection_registry import ConnectionRegistryChargePoint
+from domain.chargepoint_session import ChargePointSettings, OCPPVersion
+
+
+class _Repo:
+    def __init__(self):
+        self.available = True
+        self.rows = {}
+        self.upserts = 0
+
+    async def upsert(self, cp_id, alias, enabled, ocpp_version):
+        self.upserts += 1
+        self.rows[cp_id] = {"id": cp_id, "alias": alias, "enabled": enabled,
+                            "ocpp_version": ocpp_version}
+
+    async def upsert_many(self, rows):
+        for cp_id, alias, enabled, version in rows:
+            await self.upsert(cp_id, alias, enabled, version)
+        return len(rows)
+
+    async def load_by_ids(self, ids):
+        return {i: dict(self.rows[i]) for i in ids if i in self.rows}
+
+
+def _session(cp_id):
+    settings = ChargePointSettings()
+    settings.ocpp_version = OCPPVersion.V16
+    return SimpleNamespace(id=cp_id, _settings=settings)
+
+
+@pytest.mark.asyncio
+async def test_enabled_survives_reconnect_without_extra_writes():
+    repo = _Repo()
+    reg = ConnectionRegistryChargePoint(repo)
+
+    first = _session("cp1")
+    await reg.register(first)                      # nieuwe laadpaal → wel opslaan
+    assert reg._writer.submitted == 1
+    await reg.set_enabled("cp1", True)
+    await reg.deregister(first)
+    assert reg._writer.submitted == 1              # niets gewijzigd → geen write
+
+    again = _session("cp1")                        # nieuwe sessie: default enabled=False
+    await reg.register(again)
+    assert again._settings.enabled is True
+    assert reg._writer.submitted == 1
+    assert (await reg.get_settings("cp1"))["enabled"] is True
+    assert repo.rows["cp1"]["enabled"] is True
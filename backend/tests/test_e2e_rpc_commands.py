@@ -159,15 +159,21 @@ def test_enable_disable_and_settings(client):
     assert r.json()["active"] is False
 
 def test_remote_start_and_stop_via_http(client):
-    # Remote start
+    # Remote start → job; resultaat via /jobs/{id}
     r = client.post("/api/v1/charge-points/CP-4/start")
     assert r.status_code == 202
-    assert r.json()["status"] == "Accepted"
+    job = r.json()
+    assert job["action"] == "RemoteStartTransaction"
+    r = client.get(f"/api/v1/jobs/{job['id']}")
+    assert r.status_code == 200
+    assert r.json()["state"] == "succeeded"
+    assert r.json()["result"]["status"] == "Accepted"
 
-    # Remote stop
-    r = client.post("/api/v1/charge-points/CP-4/stop")
+    # Remote stop, met wachten op het resultaat
+    r = client.post("/api/v1/charge-points/CP-4/stop?wait=5")
     assert r.status_code == 202
-    assert r.json()["status"] == "Accepted"
+    assert r.json()["state"] == "succeeded"
+    assert r.json()["result"]["status"] == "Accepted"
 
 def test_configuration_via_http(client):
     r = client.get("/api/v1/charge-points/CP-4/configuration")
@@ -0,0 +1,150 @@
+import asyncio
+
+import pytest
+
+from application.event_bus import EventBus, Overflow
+
+
+@pytest.mark.asyncio
+async def test_inline_subscriber_is_awaited_by_publish():
+    bus = EventBus()
+    seen = []
+
+    async def handler(**payload):
+        seen.append(payload)
+
+    bus.subscribe("Heartbeat", handler)
+    await bus.publish("Heartbeat", charge_point_id="cp1")
+
+    # inline → direct afgeleverd, geen queue-statistieken
+    assert seen == [{"charge_point_id": "cp1"}]
+    assert bus.stats() == {}
+
+
+@pytest.mark.asyncio
+async def test_queued_publish_does_not_wait_for_slow_handler():
+    bus = EventBus()
+    release = asyncio.Event()
+    seen = []
+
+    async def slow(**payload):
+        await release.wait()
+        seen.append(payload["n"])
+
+    bus.subscribe("MeterValues", slow, queue_size=10)
+
+    # publish keert terug terwijl de handler nog hangt
+    await asyncio.wait_for(bus.publish("MeterValues", n=1), timeout=0.1)
+    await bus.publish("MeterValues", n=2)
+    assert seen == []
+
+    release.set()
+    await bus.drain()
+    assert seen == [1, 2]
+
+    stats = bus.stats()["MeterValues"][0]
+    assert stats["delivered"] == 2
+    assert stats["dropped"] == 0
+    assert stats["max_depth"] >= 1
+    await bus.aclose()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "overflow, expected",
+    [
+        (Overflow.DROP_OLDEST, [0, 3, 4]),
+        (Overflow.DROP_NEWEST, [0, 1, 2]),
+    ],
+)
+async def test_queued_overflow_policies(overflow, expected):
+    bus = EventBus()
+    release = asyncio.Event()
+    seen = []
+
+    async def handler(n):
+        await release.wait()
+        seen.append(n)
+
+    bus.subscribe("StatusNotification", handler, queue_size=2, overflow=overflow)
+
+    await bus.publish("StatusNotification", n=0)
+    await asyncio.sleep(0)          # worker pakt n=0 op en blijft hangen
+    for n in range(1, 5):
+        await bus.publish("StatusNotification", n=n)
+
+    release.set()
+    await bus.drain()
+    assert seen == expected
+    assert bus.stats()["StatusNotification"][0]["dropped"] == 2
+    await bus.aclose()
+
+
+@pytest.mark.asyncio
+async def test_queued_block_policy_applies_backpressure():
+    bus = EventBus()
+    release = asyncio.Event()
+    seen = []
+
+    async def handler(n):
+        await release.wait()
+        seen.append(n)
+
+    bus.subscribe("Heartbeat", handler, queue_size=1, overflow=Overflow.BLOCK)
+    await bus.publish("Heartbeat", n=0)
+    await asyncio.sleep(0)
+    await bus.publish("Heartbeat", n=1)
+
+    # queue vol → publish wacht
+    blocked = asyncio.create_task(bus.publish("Heartbeat", n=2))
+    await asyncio.sleep(0.01)
+    assert not blocked.done()
+
+    release.set()
+    await blocked
+    await bus.drain()
+    assert seen == [0, 1, 2]
+    assert bus.stats()["Heartbeat"][0]["dropped"] == 0
+    await bus.aclose()
+
+
+@pytest.mark.asyncio
+async def test_queued_handler_errors_are_counted_not_raised():
+    bus = EventBus()
+
+    def broken(**_):
+        raise ValueError("boom")
+
+    bus.subscribe("Authorize", broken, queue_size=4)
+    await bus.publish("Authorize", id_tag="x")
+    await bus.drain()
+
+    stats = bus.stats()["Authorize"][0]
+    assert stats["failed"] == 1
+    assert stats["delivered"] == 0
+    await bus.aclose()
+
+
+@pytest.mark.asyncio
+async def test_subscribe_many_keeps_publish_order_across_event_types():
+    bus = EventBus()
+    release = asyncio.Event()
+    seen = []
+
+    async def handler(event, payload):
+        await release.wait()
+        seen.append((event, payload["n"]))
+
+    bus.subscribe_many(["StatusNotification", "MeterValues"], handler, queue_size=10)
+    await bus.publish("StatusNotification", n=1)
+    await bus.publish("MeterValues", n=2)
+    await bus.publish("StatusNotification", n=3)
+    await bus.publish("Heartbeat", n=4)             # niet geabonneerd
+
+    release.set()
+    await bus.drain()
+    assert seen == [("StatusNotification", 1), ("MeterValues", 2), ("StatusNotification", 3)]
+    # één gedeelde subscriber, één keer in de stats
+    (stats,) = bus.stats()["StatusNotification,MeterValues"]
+    assert stats["delivered"] == 3
+    await bus.aclose()
@@ -0,0 +1,138 @@
+import asyncio
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from application.event_history import EventHistory
+from application.frontend_broadcaster import FrontendBroadcaster, FrontendClient
+from routes.event_history_routes import router
+
+
+def test_ring_buffer_assigns_seq_and_evicts_oldest():
+    h = EventHistory(capacity=3)
+    assert h.since(0) == [] and h.oldest_seq == 1 and h.latest_seq == 0
+
+    for n in range(5):
+        h.append({"event": "Heartbeat", "n": n})
+
+    assert h.latest_seq == 5 and h.oldest_seq == 3
+    assert [m["seq"] for m in h.since(0)] == [3, 4, 5]
+    assert [m["n"] for m in h.since(3)] == [3, 4]
+    assert h.since(5) == []
+    assert [m["seq"] for m in h.since(2, limit=2)] == [3, 4]
+    assert h.has_gap(1) and not h.has_gap(2)
+    assert {m["epoch"] for m in h.since(0)} == {h.epoch}
+
+
+def test_cursor_from_other_epoch_or_beyond_latest_is_stale():
+    h = EventHistory(capacity=10, epoch="a")
+    for n in range(3):
+        h.append({"event": "Heartbeat", "n": n})
+
+    assert not h.is_stale(2, "a") and not h.is_stale(3) and not h.is_stale(0, "a")
+    assert h.is_stale(2, "b")                  # herstart: ander epoch
+    assert h.is_stale(7)                       # oude cursor zonder epoch
+    assert EventHistory().epoch != EventHistory().epoch
+
+
+class _WS:
+    def __init__(self):
+        self.sent = []
+
+    async def send_text(self, text):
+        self.sent.append(text)
+
+    async def close(self, code=None):
+        pass
+
+
+class _Registry:
+    async def deregister(self, _c):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_reconnect_with_since_replays_before_live():
+    history = EventHistory(capacity=100)
+    fan_out = FrontendBroadcaster(_Registry(), history=history)
+    for n in range(3):
+        await fan_out.broadcast({"event": "BootNotification", "n": n})   # niemand luistert
+
+    ws = _WS()
+    client = FrontendClient(ws)
+    client.start()
+    fan_out.attach(client, since=1)
+    await fan_out.broadcast({"event": "BootNotification", "n": 3})
+    await asyncio.sleep(0.01)
+
+    replay, live = (json.loads(t) for t in ws.sent)
+    assert [m["seq"] for m in replay] == [2, 3]
+    assert live["seq"] == 4 and live["n"] == 3
+    assert fan_out.replayed == 2
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_since_beyond_history_announces_gap():
+    history = EventHistory(capacity=2)
+    fan_out = FrontendBroadcaster(_Registry(), history=history)
+    for n in range(5):
+        await fan_out.broadcast({"event": "BootNotification", "n": n})
+
+    ws = _WS()
+    client = FrontendClient(ws)
+    client.start()
+    fan_out.attach(client, since=0)
+    await asyncio.sleep(0.01)
+
+    gap = json.loads(ws.sent[0])
+    assert gap == {"event": "HistoryGap", "since": 0, "epoch": history.epoch, "oldest_seq": 4}
+    assert [m["seq"] for m in json.loads(ws.sent[1])] == [4, 5]
+    await client.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("since, epoch", [(2, "previous-run"), (50, None)])
+async def test_stale_cursor_sends_reset_and_full_replay(since, epoch):
+    history = EventHistory(capacity=100)
+    fan_out = FrontendBroadcaster(_Registry(), history=history)
+    for n in range(3):
+        await fan_out.broadcast({"event": "BootNotification", "n": n})
+
+    ws = _WS()
+    client = FrontendClient(ws)
+    client.start()
+    fan_out.attach(client, since=since, epoch=epoch)
+    await asyncio.sleep(0.01)
+
+    reset, replay = (json.loads(t) for t in ws.sent)
+    assert reset["event"] == "HistoryReset"
+    assert reset["epoch"] == history.epoch and reset["latest_seq"] == 3
+    assert [m["seq"] for m in replay] == [1, 2, 3]
+    assert fan_out.resets == 1
+    await client.close()
+
+
+def test_http_paging_through_history():
+    history = EventHistory(capacity=10)
+    for n in range(5):
+        history.append({"event": "Heartbeat", "n": n})
+    app = FastAPI()
+    app.include_router(router(history=history))
+    client = TestClient(app)
+
+    page = client.get("/events", params={"after": 0, "limit": 2}).json()
+    assert [e["seq"] for e in page["events"]] == [1, 2]
+    assert page["next"] == 2 and page["latest_seq"] == 5 and page["gap"] is False
+
+    page = client.get("/events", params={"after": page["next"], "limit": 10}).json()
+    assert [e["seq"] for e in page["events"]] == [3, 4, 5]
+
+    page = client.get("/events", params={"after": 5}).json()
+    assert page["events"] == [] and page["next"] == 5
+    assert page["epoch"] == history.epoch and page["reset"] is False
+
+    page = client.get("/events", params={"after": 4, "epoch": "previous-run"}).json()
+    assert page["reset"] is True and [e["seq"] for e in page["events"]] == [1, 2, 3, 4, 5]
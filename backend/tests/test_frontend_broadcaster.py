@@ -0,0 +1,245 @@
+import asyncio
+import json
+
+import pytest
+
+from application.frontend_broadcaster import (
+    CLOSE_SLOW_CONSUMER,
+    FrontendBroadcaster,
+    FrontendClient,
+)
+
+
+class Registry:
+    def __init__(self, *clients):
+        self.items = list(clients)
+
+    async def get_all(self):
+        return list(self.items)
+
+    async def deregister(self, item):
+        if item in self.items:
+            self.items.remove(item)
+
+
+class RecordingWS:
+    def __init__(self, block: asyncio.Event | None = None):
+        self.sent = []
+        self.closed_with = None
+        self._block = block
+
+    async def send_text(self, text):
+        if self._block is not None:
+            await self._block.wait()
+        self.sent.append(text)
+
+    async def close(self, code=None):
+        self.closed_with = code
+
+
+@pytest.mark.asyncio
+async def test_message_serialized_once_and_delivered_to_all(monkeypatch):
+    calls = []
+    real_dumps = json.dumps
+
+    def counting_dumps(obj, *a, **kw):
+        calls.append(obj)
+        return real_dumps(obj, *a, **kw)
+
+    monkeypatch.setattr("application.frontend_broadcaster.json.dumps", counting_dumps)
+
+    sockets = [RecordingWS() for _ in range(3)]
+    clients = [FrontendClient(ws) for ws in sockets]
+    for c in clients:
+        c.start()
+    fan_out = FrontendBroadcaster(Registry(*clients))
+    for c in clients:
+        fan_out.attach(c)
+
+    await fan_out.broadcast({"event": "Heartbeat", "charge_point_id": "cp1"})
+    await asyncio.sleep(0.01)
+
+    assert len(calls) == 1
+    assert all(len(ws.sent) == 1 for ws in sockets)
+    for c in clients:
+        await c.close()
+
+
+@pytest.mark.asyncio
+async def test_slow_client_does_not_block_others_and_is_disconnected():
+    stuck = asyncio.Event()          # wordt nooit gezet
+    slow_ws, fast_ws = RecordingWS(block=stuck), RecordingWS()
+    slow = FrontendClient(slow_ws, queue_size=2, stall_timeout=0.05)
+    fast = FrontendClient(fast_ws, queue_size=2)
+    slow.start()
+    fast.start()
+    registry = Registry(slow, fast)
+    fan_out = FrontendBroadcaster(registry)
+    fan_out.attach(slow)
+    fan_out.attach(fast)
+
+    for i in range(4):
+        await fan_out.broadcast({"event": "MeterValues", "n": i})
+        await asyncio.sleep(0)
+    assert len(fast_ws.sent) == 4
+    assert slow.stats()["dropped"] >= 1
+    assert slow in registry.items            # nog binnen stall_timeout
+
+    await asyncio.sleep(0.06)
+    await fan_out.broadcast({"event": "MeterValues", "n": 99})
+
+    assert slow not in registry.items
+    assert slow_ws.closed_with == CLOSE_SLOW_CONSUMER
+    stats = await fan_out.stats()
+    assert stats["disconnected_slow"] == 1
+    assert [c["id"] for c in stats["clients"]] == [fast.id]
+    await fast.close()
+
+
+def test_subscription_index_matches_wildcards():
+    from application.frontend_broadcaster import ANY, SubscriptionIndex
+
+    a, b, c = object(), object(), object()
+    idx = SubscriptionIndex()
+    idx.add(a, ["MeterValues"], ["cp1"])
+    idx.add(b, [ANY], ["cp2"])
+    idx.add(c, ["Heartbeat"], [ANY])
+
+    assert idx.match("MeterValues", "cp1") == {a}
+    assert idx.match("MeterValues", "cp2") == {b}
+    assert idx.match("Heartbeat", "cp2") == {b, c}
+    assert idx.match("Heartbeat", None) == {c}
+
+    idx.remove(b, cp_ids=["cp2"])
+    assert idx.match("StatusNotification", "cp2") == set()
+    assert idx.subscriptions(b) == []
+
+
+def test_empty_subscribe_lists_are_rejected():
+    fan_out = FrontendBroadcaster(Registry())
+    client = object()
+    fan_out.attach(client)
+
+    with pytest.raises(ValueError):
+        fan_out.subscribe(client, events=[])
+    with pytest.raises(ValueError):
+        fan_out.subscribe(client, events=["MeterValues"], cp_ids=[])
+    # impliciete (*, *) blijft staan
+    assert fan_out._index.match("Heartbeat", "cp1") == {client}
+
+
+def test_unsubscribe_cannot_narrow_a_wildcard():
+    fan_out = FrontendBroadcaster(Registry())
+    client = object()
+    fan_out.attach(client)
+
+    with pytest.raises(ValueError):
+        fan_out.unsubscribe(client, events=["MeterValues"])         # impliciete (*, *)
+    assert fan_out._index.match("MeterValues", "cp1") == {client}
+
+    fan_out.subscribe(client, events=["MeterValues", "Heartbeat"])
+    with pytest.raises(ValueError):
+        fan_out.unsubscribe(client, cp_ids=["cp1"])                 # (MeterValues, *)
+    assert fan_out.unsubscribe(client, events=["MeterValues"]) == [
+        {"event": "Heartbeat", "charge_point_id": "*"},
+    ]
+    assert fan_out._index.match("MeterValues", "cp1") == set()
+    assert fan_out.unsubscribe(client) == []
+
+
+@pytest.mark.asyncio
+async def test_high_frequency_events_are_conflated_per_connector():
+    import json
+
+    ws = RecordingWS()
+    client = FrontendClient(ws, max_rate=20)        # ≥ 50 ms tussen frames
+    client.start()
+    fan_out = FrontendBroadcaster(Registry(client))
+    fan_out.attach(client)
+
+    await fan_out.broadcast({"event": "MeterValues", "charge_point_id": "cp1",
+                             "payload": {"connector_id": 1, "n": 0}})
+    await asyncio.sleep(0.01)
+    for n in range(1, 50):
+        for conn in (1, 2):
+            await fan_out.broadcast({"event": "MeterValues", "charge_point_id": "cp1",
+                                     "payload": {"connector_id": conn, "n": n}})
+    await asyncio.sleep(0.1)
+
+    frames = [json.loads(t) for t in ws.sent]
+    assert len(frames) == 2
+    assert frames[0]["payload"] == {"connector_id": 1, "n": 0}
+    assert [e["payload"] for e in frames[1]] == [
+        {"connector_id": 1, "n": 49},
+        {"connector_id": 2, "n": 49},
+    ]
+    assert client.stats()["conflated"] == 96
+    await client.close()
+
+
+def test_conflation_key_distinguishes_evses_v201():
+    from application.frontend_broadcaster import conflation_key
+
+    def status(evse, conn):
+        return {"event": "StatusNotification", "charge_point_id": "cp1",
+                "payload": {"evse_id": evse, "connector_id": conn}}
+
+    assert conflation_key(status(1, 1)) != conflation_key(status(2, 1))
+    assert conflation_key(status(1, 1)) == conflation_key(status(1, 1))
+    # MeterValues in 2.0.1 heeft alleen evse_id, 1.6 alleen connector_id
+    assert conflation_key({"event": "MeterValues", "charge_point_id": "cp1",
+                           "payload": {"evse_id": 1}}) != conflation_key(
+        {"event": "MeterValues", "charge_point_id": "cp1", "payload": {"connector_id": 1}})
+
+
+@pytest.mark.asyncio
+async def test_status_per_evse_connector_is_not_conflated_away_v201():
+    import json
+
+    ws = RecordingWS()
+    client = FrontendClient(ws, max_rate=20)
+    client.start()
+    fan_out = FrontendBroadcaster(Registry(client))
+    fan_out.attach(client)
+
+    await fan_out.broadcast({"event": "Heartbeat", "charge_point_id": "cp1"})
+    await asyncio.sleep(0.01)                       # eerste frame direct
+    for status in ("Occupied", "Available"):
+        for evse in (1, 2):
+            await fan_out.broadcast({
+                "event": "StatusNotification", "charge_point_id": "cp1",
+                "payload": {"evse_id": evse, "connector_id": 1, "connector_status": status},
+            })
+    await asyncio.sleep(0.1)
+
+    frames = [json.loads(t) for t in ws.sent]
+    assert [(e["payload"]["evse_id"], e["payload"]["connector_status"]) for e in frames[1]] == [
+        (1, "Available"),
+        (2, "Available"),
+    ]
+    assert client.stats()["conflated"] == 2
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_lifecycle_events_bypass_conflation_and_keep_order():
+    import json
+
+    ws = RecordingWS()
+    client = FrontendClient(ws, max_rate=1)
+    client.start()
+    fan_out = FrontendBroadcaster(Registry(client))
+    fan_out.attach(client)
+
+    await fan_out.broadcast({"event": "Heartbeat", "charge_point_id": "cp1"})
+    await asyncio.sleep(0.01)                       # eerste frame direct
+    await fan_out.broadcast({"event": "StatusNotification", "charge_point_id": "cp1",
+                             "payload": {"connector_id": 1, "status": "Charging"}})
+    await fan_out.broadcast({"event": "ChargePointDisconnected", "charge_point_id": "cp1"})
+    await asyncio.sleep(0.01)
+
+    frames = [json.loads(t) for t in ws.sent]
+    assert frames[0]["event"] == "Heartbeat"
+    assert [e["event"] for e in frames[1]] == ["StatusNotification", "ChargePointDisconnected"]
+    assert client.stats()["pending"] == 0
+    await client.close()
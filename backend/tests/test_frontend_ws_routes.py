@@ -1,9 +1,11 @@
 import pytest
 from fastapi import FastAPI, WebSocket
 from fastapi.testclient import TestClient
+import asyncio
 import json
 
 # Importeer router en bus uit jouw code
+from application.frontend_broadcaster import FrontendBroadcaster, FrontendClient
 from routes.frontend_ws_routes import router
 import application.event_bus as event_bus_module
 
@@ -53,29 +55,33 @@ async def test_websocket_register_and_deregister():
     assert registry.deregistered[0] is registry.registered[0]
 
 
-def test_broadcast_and_event_subscription(monkeypatch):
+@pytest.mark.asyncio
+async def test_broadcast_and_event_subscription(monkeypatch):
     """
     Test de broadcasting-logica via de eventbus-subscriptions:
-    - Vervang bus.subscribe zodat we kunnen nagaan welke handlers geregistreerd zijn.
-    - Roep een handler aan en verifieer dat alle actieve WS-clients het bericht ontvangen,
-      en dat mislukte send_text() leidt tot deregistratie.
+    - Vervang bus.subscribe_many zodat we kunnen nagaan welke events geregistreerd zijn.
+    - Roep een handler aan en verifieer dat alle actieve FE-clients het bericht ontvangen,
+      en dat een mislukte send_text() leidt tot deregistratie.
     """
     registry = DummyRegistry()
 
-    # Leg vast welke handlers voor welk event worden geregistreerd
+    # Leg vast welke events met welke (gedeelde) handler worden geregistreerd
     subscribed = {}
 
-    def fake_subscribe(event_name, handler):
-        subscribed[event_name] = handler
+    def fake_subscribe_many(events, handler, **_opts):
+        for event_name in events:
+            subscribed[event_name] = handler
 
-    # Mook de bus.subscribe methode
-    monkeypatch.setattr(event_bus_module.bus, "subscribe", fake_subscribe)
+    # Mook de bus.subscribe_many methode
+    monkeypatch.setattr(event_bus_module.bus, "subscribe_many", fake_subscribe_many)
 
-    # Initialiseer de router (hierdoor wordt fake_subscribe aangeroepen voor alle events)
-    _ = router(registry)
+    # Initialiseer de router (één subscriber voor alle events)
+    fan_out = FrontendBroadcaster(registry)
+    _ = router(registry, broadcaster=fan_out)
 
     # Controleer dat er ten minste voor "MeterValues" een handler is opgeslagen
     assert "MeterValues" in subscribed
+    assert subscribed["MeterValues"] is subscribed["StatusNotification"]
 
     # ─── Maak twee fake WS-objecten ──────────────────────────────────────
     class FakeWS:
@@ -85,29 +91,33 @@ def test_broadcast_and_event_subscription(monkeypatch):
         async def send_text(self, text: str):
             self.sent.append(text)
 
-    class BadWS:
-        def __init__(self):
-            self.sent = []
+        async def close(self, code=None):
+            pass
 
+    class BadWS(FakeWS):
         async def send_text(self, text: str):
             # Simuleer een fout tijdens verzenden
             raise Exception("send failed")
 
     ws_good = FakeWS()
     ws_bad = BadWS()
+    fe_good = FrontendClient(ws_good)
+    fe_bad = FrontendClient(ws_bad)
+    fe_good.start()
+    fe_bad.start()
 
-    # Vul registry._all met beide WS-instanties
-    registry._all = [ws_good, ws_bad]
+    # Vul registry._all met beide clients en meld ze aan bij de fan-out
+    registry._all = [fe_good, fe_bad]
+    fan_out.attach(fe_good)
+    fan_out.attach(fe_bad)
 
     # Haal de handler voor "MeterValues" uit onze subscribed-dict
     handler = subscribed["MeterValues"]
 
     # Roep de handler aan (simuleer een event met extra payload)
     payload = {"foo": "bar", "baz": 123}
-    import asyncio
-
-    # Omdat handler een coroutine is, voeren we hem uit via de event loop
-    asyncio.get_event_loop().run_until_complete(handler(**payload))
+    await handler("MeterValues", payload)
+    await asyncio.sleep(0.01)          # pump-tasks laten versturen
 
     # ─── Controleer resultaat voor ws_good ───────────────────────────
     # ws_good heeft één JSON-bericht ontvangen
@@ -118,7 +128,66 @@ def test_broadcast_and_event_subscription(monkeypatch):
     assert msg["foo"] == "bar"
     assert msg["baz"] == 123
 
-    # ─── Controleer dat ws_bad is verwijderd uit registry._all ────────
-    assert ws_bad not in registry._all
-    # En dat ws_bad in deregistered staat
-    assert ws_bad in registry.deregistered
+    # ─── ws_bad is dood; bij het volgende event wordt hij opgeruimd ──
+    await handler("MeterValues", payload)
+    assert fe_bad not in registry._all
+    # En dat fe_bad in deregistered staat
+    assert fe_bad in registry.deregistered
+
+    await fe_good.close()
+
+
+def test_subscribe_protocol_filters_events_per_charge_point(monkeypatch):
+    """
+    Een client die zich abonneert op MeterValues van cp-A krijgt geen
+    events van cp-B of van andere event-types meer.
+    """
+    handlers = {}
+    monkeypatch.setattr(
+        event_bus_module.bus,
+        "subscribe_many",
+        lambda events, h, **_opts: handlers.update(dict.fromkeys(events, h)),
+    )
+    registry = DummyRegistry()
+    app = FastAPI()
+    app.include_router(router(registry))
+    client = TestClient(app)
+
+    with client.websocket_connect("/frontend") as ws:
+        ws.send_text(json.dumps({
+            "action": "subscribe",
+            "events": ["MeterValues"],
+            "charge_point_ids": ["cp-A"],
+        }))
+        ack = ws.receive_json()
+        assert ack == {
+            "event": "Subscriptions",
+            "subscriptions": [{"event": "MeterValues", "charge_point_id": "cp-A"}],
+        }
+
+        # events publiceren via de portal-loop van de TestClient
+        portal = ws.portal
+        portal.call(lambda: handlers["MeterValues"]("MeterValues", {"charge_point_id": "cp-B", "n": 1}))
+        portal.call(lambda: handlers["Heartbeat"]("Heartbeat", {"charge_point_id": "cp-A", "n": 2}))
+        portal.call(lambda: handlers["MeterValues"]("MeterValues", {"charge_point_id": "cp-A", "n": 3}))
+        msg = ws.receive_json()
+        assert msg["charge_point_id"] == "cp-A" and msg["n"] == 3
+
+        # ongeldige berichten → Error, verbinding blijft open
+        ws.send_text("not json")
+        assert ws.receive_json()["event"] == "Error"
+        ws.send_text(json.dumps({"action": "dance"}))
+        assert ws.receive_json()["event"] == "Error"
+
+        ws.send_text(json.dumps({"action": "subscribe", "events": []}))
+        assert ws.receive_json()["event"] == "Error"
+        ws.send_text(json.dumps({"action": "unsubscribe", "charge_point_ids": ["cp-B"]}))
+        assert ws.receive_json()["event"] == "Subscriptions"       # raakt cp-A niet
+        ws.send_text(json.dumps({"action": "subscribe", "events": ["Heartbeat"]}))
+        ws.receive_json()
+        ws.send_text(json.dumps({"action": "unsubscribe", "charge_point_ids": ["cp-A"]}))
+        err = ws.receive_json()                                     # (Heartbeat, *) versmallen
+        assert err["event"] == "Error" and "wildcard" in err["detail"]
+
+        ws.send_text(json.dumps({"action": "unsubscribe"}))
+        assert ws.receive_json() == {"event": "Subscriptions", "subscriptions": []}
@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+from services.influx_batch_writer import InfluxBatchWriter
+
+
+class FakeWriteApi:
+    """Verzamelt alle write()-calls; kan de eerste N calls laten falen."""
+
+    def __init__(self, fail_times: int = 0):
+        self.calls = []
+        self._fail_times = fail_times
+
+    def write(self, bucket, record):
+        if self._fail_times:
+            self._fail_times -= 1
+            raise ConnectionError("influx down")
+        self.calls.append((bucket, record))
+
+
+@pytest.mark.asyncio
+async def test_flush_on_batch_size():
+    api = FakeWriteApi()
+    w = InfluxBatchWriter(api, "b", batch_size=3, flush_interval=60)
+
+    w.add_many(["m v=1 1", "m v=2 2", "m v=3 3"])
+    for _ in range(50):
+        if api.calls:
+            break
+        await asyncio.sleep(0.01)
+
+    # één HTTP-call met drie regels
+    assert api.calls == [("b", "m v=1 1\nm v=2 2\nm v=3 3")]
+    assert w.stats()["written"] == 3
+    await w.close()
+
+
+@pytest.mark.asyncio
+async def test_flush_on_interval_and_close():
+    api = FakeWriteApi()
+    w = InfluxBatchWriter(api, "b", batch_size=100, flush_interval=0.02)
+
+    w.add("m v=1 1")
+    await asyncio.sleep(0.1)
+    assert len(api.calls) == 1
+
+    # close flusht wat er nog in de buffer staat
+    w.add("m v=2 2")
+    await w.close()
+    assert api.calls[-1] == ("b", "m v=2 2")
+    assert w.stats()["written"] == 2
+
+
+@pytest.mark.asyncio
+async def test_buffer_is_bounded_and_counts_drops():
+    api = FakeWriteApi()
+    w = InfluxBatchWriter(api, "b", batch_size=100, flush_interval=60, max_buffer=2)
+
+    w.add_many(["a v=1", "b v=1", "c v=1"])
+    assert w.stats()["dropped"] == 1
+    assert w.stats()["buffered"] == 2
+
+    await w.close()
+    # oudste regel is weggegooid
+    assert api.calls == [("b", "b v=1\nc v=1")]
+
+
+@pytest.mark.asyncio
+async def test_retry_then_give_up():
+    api = FakeWriteApi(fail_times=10)
+    w = InfluxBatchWriter(
+        api, "b", batch_size=10, flush_interval=60, max_retries=2, retry_backoff=0
+    )
+    w.add("m v=1 1")
+    await w.close()
+
+    stats = w.stats()
+    assert stats["retried"] == 2
+    assert stats["failed_batches"] == 1
+    assert stats["dropped"] == 1
+    assert stats["written"] == 0
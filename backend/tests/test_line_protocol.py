@@ -0,0 +1,74 @@
+from datetime import datetime, timezone
+
+import pytest
+from influxdb_client import Point, WritePrecision
+
+from services.line_protocol import MeterValueEncoder
+
+
+def _point_path(cp_id, body):
+    """Referentie: de oude Point-per-sampled_value implementatie."""
+    out = []
+    connector = body.get("connector_id")
+    for mv in body.get("meter_value", []):
+        ts = datetime.fromisoformat(mv["timestamp"].replace("Z", "+00:00"))
+        for sv in mv.get("sampled_value", []):
+            try:
+                value = float(sv.get("value"))
+            except (TypeError, ValueError):
+                continue
+            out.append(
+                Point("meter_value")
+                .tag("cp_id", cp_id)
+                .tag("connector", str(connector))
+                .tag("measurand", sv.get("measurand", ""))
+                .tag("phase", sv.get("phase", ""))
+                .tag("location", sv.get("location", ""))
+                .tag("unit", sv.get("unit", ""))
+                .field("value", value)
+                .time(ts.astimezone(timezone.utc), WritePrecision.NS)
+                .to_line_protocol()
+            )
+    return out
+
+
+BODY = {
+    "connector_id": 1,
+    "meter_value": [
+        {
+            "timestamp": "2025-06-04T12:00:00.123456Z",
+            "sampled_value": [
+                {"value": "230.5", "measurand": "Voltage", "phase": "L1", "unit": "V"},
+                {"value": "16", "measurand": "Current.Import", "phase": "L1-N",
+                 "location": "Outlet", "unit": "A"},
+                {"value": "1200"},                               # alle tags leeg
+                {"value": "n/a", "measurand": "Voltage"},        # niet-numeriek
+            ],
+        },
+        {
+            "timestamp": "2025-06-04T12:00:10+02:00",
+            "sampled_value": [
+                {"value": "7.25", "measurand": "Energy Active,Import=x", "unit": "kWh"},
+            ],
+        },
+    ],
+}
+
+
+@pytest.mark.parametrize("cp_id", ["CP-1", "cp with space,comma=eq"])
+def test_encoder_matches_point_output(cp_id):
+    enc = MeterValueEncoder()
+    assert enc.encode_lines(cp_id, BODY) == _point_path(cp_id, BODY)
+    assert enc.encode(cp_id, BODY) == "\n".join(_point_path(cp_id, BODY))
+
+
+def test_prefix_cache_is_reused_and_bounded():
+    enc = MeterValueEncoder(max_prefixes=2)
+    enc.encode_lines("CP-1", BODY)
+    # drie unieke tag-sets, cap 2 → cache is één keer geleegd
+    assert enc.cache_size() <= 2
+
+    enc = MeterValueEncoder()
+    enc.encode_lines("CP-1", BODY)
+    enc.encode_lines("CP-1", BODY)
+    assert enc.cache_size() == 4
@@ -120,21 +120,13 @@ def test_v16_get_configuration_default_and_override(v16_strategy):
     assert result_override.key == ["cfg1", "cfg2"]
 
 
-def test_v16_security_boot_notification_raises_attribute_error(v16_strategy):
-    # Omdat SecurityBootNotification niet bestaat in ocpp.v16.call,
-    # verwachten we nu een AttributeError wanneer we proberen te bouwen.
-    with pytest.raises(AttributeError):
+def test_v16_security_boot_notification_is_not_a_csms_action(v16_strategy):
+    # SecurityBootNotification wordt door de laadpaal verstuurd, niet door
+    # de CSMS – de catalogus kent hem dus niet.
+    with pytest.raises(HTTPException) as exc:
         v16_strategy.build("SecurityBootNotification", {})
-
-    with pytest.raises(AttributeError):
-        v16_strategy.build("SecurityBootNotification", {
-            "charge_box_serial_number": "SN123",
-            "firmware_version": "FW1.0",
-            "iccid": "ICCID123",
-            "imsi": "IMSI456",
-            "meter_type": "TypeX",
-            "meter_serial_number": "MSN789",
-        })
+    assert exc.value.status_code == 400
+    assert "Unknown OCPP 1.6 action" in exc.value.detail
 
 
 def test_v16_unknown_action_raises(v16_strategy):
@@ -191,9 +183,14 @@ def test_v201_request_stop_transaction_missing(v201_strategy):
 def test_v201_get_base_report_default_and_override(v201_strategy):
     action = "GetBaseReport"
 
-    result_default = v201_strategy.build(action, {})
+    # request_id komt uit de ReportCollector (CommandService), geen vaste default
+    with pytest.raises(HTTPException) as exc:
+        v201_strategy.build(action, {})
+    assert "Missing 'request_id'" in exc.value.detail
+
+    result_default = v201_strategy.build(action, {"requestId": 3})
     assert isinstance(result_default, V201GetBaseReport)
-    assert result_default.request_id == 55
+    assert result_default.request_id == 3
     assert result_default.report_base == "FullInventory"
 
     params_override = {"requestId": 7, "reportBase": "CustomReport"}
@@ -239,6 +236,19 @@ def test_v201_set_variables_success(v201_strategy):
     assert entry["attribute_value"] == "ValueX"
 
 
+def test_v201_set_variables_keeps_component_and_instance(v201_strategy):
+    key_dict = {
+        "component": {"name": "EVSE", "evse": {"id": 2}},
+        "variable_name": "Power",
+        "variable_instance": "Max",
+    }
+    result = v201_strategy.build("SetVariables", {"key": key_dict, "value": "11000"})
+
+    entry = result.set_variable_data[0]
+    assert entry["component"] == {"name": "EVSE", "evse": {"id": 2}}
+    assert entry["variable"] == {"name": "Power", "instance": "Max"}
+
+
 def test_v201_set_variables_missing_key_or_value(v201_strategy):
     action = "SetVariables"
     # Ontbreekt 'value'
@@ -177,10 +177,11 @@ async def test_v201_notify_report_multiple_conditions(capture_publish_calls):
     Test de on_notify_report-logica in V201Handler:
       • seq_no=0 met variableAttribute die wél een “value” bevat.
       • seq_no=1 met lege variableAttribute (geen attrs).
-      • tbc=True → notify_report_done blijft False.
-      • tbc=False → notify_report_done wordt True.
+      • tbc=True → report nog niet compleet in ``handler.reports``.
+      • tbc=False → report compleet, alle items bij de wachtende caller.
     """
     handler = V201Handler("CP3", None)
+    rid = handler.reports.open()
 
     # --- Eerste report: seq_no=0, attrs met ‘value’ ---
     entry1 = {
@@ -205,21 +206,11 @@ async def test_v201_notify_report_multiple_conditions(capture_publish_calls):
     await handler.on_notify_report(
         generated_at=generated_at,
         report_data=[entry1],
-        request_id=10,
+        request_id=rid,
         seq_no=0,
         tbc=True,
     )
-
-    # Controleer eerste cache-item
-    assert len(handler.latest_config) == 1
-    item = handler.latest_config[0]
-    assert item["key"] == "Key1"
-    assert item["value"] == "Val1"
-    assert item["readonly"] is False
-    assert item["data_type"] == "Integer"
-    assert item["unit"] == "A"
-    assert item["values_list"] == [1, 2, 3]
-    assert handler.notify_report_done is False
+    assert handler.reports.stats()["completed"] == 0
 
     # Controleer publicatie
     assert capture_publish_calls[-1][0] == "NotifyReport"
@@ -238,19 +229,25 @@ async def test_v201_notify_report_multiple_conditions(capture_publish_calls):
     await handler.on_notify_report(
         generated_at=generated_at,
         report_data=[entry2],
-        request_id=10,
+        request_id=rid,
         seq_no=1,
         tbc=False,
     )
+    assert handler.reports.stats()["completed"] == 1
 
-    # Controleer tweede cache-item en tbc-flag
-    assert len(handler.latest_config) == 2
-    item2 = handler.latest_config[1]
+    # Controleer de geparste items
+    item, item2 = await handler.reports.wait(rid, 1.0)
+    assert item["key"] == "Key1"
+    assert item["value"] == "Val1"
+    assert item["readonly"] is False
+    assert item["data_type"] == "Integer"
+    assert item["unit"] == "A"
+    assert item["values_list"] == [1, 2, 3]
     assert item2["key"] == "Key2"
     assert item2["value"] is None
     # Lege variableAttribute → default mutability="ReadOnly" → readonly=True
     assert item2["readonly"] is True
-    assert handler.notify_report_done is True
+    assert not hasattr(handler, "latest_config")
 
     # Nogmaals publicatiecontrole
     assert capture_publish_calls[-1][0] == "NotifyReport"
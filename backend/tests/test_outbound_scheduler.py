@@ -0,0 +1,111 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from application.command_service import CommandService
+from domain.chargepoint_session import ChargePointSession, ChargePointSettings, OCPPVersion
+from domain.outbound_scheduler import (
+    OutboundDeadlineExceeded,
+    OutboundQueueFull,
+    OutboundScheduler,
+    Priority,
+    priority_for,
+)
+
+
+class SlowParser:
+    """Houdt elke CALL vast tot ``release`` gezet wordt; onthoudt de volgorde."""
+
+    def __init__(self):
+        self.order = []
+        self.release = asyncio.Event()
+
+    async def call(self, msg):
+        self.order.append(type(msg).__name__)
+        await self.release.wait()
+        return "ok"
+
+
+def _session(parser, **kw):
+    settings = ChargePointSettings()
+    settings.ocpp_version = OCPPVersion.V16
+    return ChargePointSession("cp1", SimpleNamespace(), parser, settings, OutboundScheduler(**kw))
+
+
+class GetConfiguration: ...
+class RemoteStopTransaction: ...
+class ChangeConfiguration: ...
+
+
+def test_priority_classes():
+    assert priority_for("RemoteStopTransaction") is Priority.CONTROL
+    assert priority_for("SetVariables") is Priority.CONFIG
+    assert priority_for("GetVariables") is Priority.DIAGNOSTICS
+
+
+@pytest.mark.asyncio
+async def test_control_overtakes_queued_diagnostics():
+    parser = SlowParser()
+    session = _session(parser)
+
+    first = asyncio.create_task(session.send_call(GetConfiguration()))
+    await asyncio.sleep(0)
+    queued = [asyncio.create_task(session.send_call(GetConfiguration())) for _ in range(3)]
+    queued.append(asyncio.create_task(session.send_call(ChangeConfiguration())))
+    queued.append(asyncio.create_task(session.send_call(RemoteStopTransaction())))
+    await asyncio.sleep(0)
+    assert session.outbound.stats()["in_flight"] == 1
+    assert session.outbound.depth == 5
+
+    parser.release.set()
+    await asyncio.gather(first, *queued)
+    assert parser.order == [
+        "GetConfiguration", "RemoteStopTransaction", "ChangeConfiguration",
+        "GetConfiguration", "GetConfiguration", "GetConfiguration",
+    ]
+    stats = session.outbound.stats()
+    assert stats["queue_wait"]["control"]["count"] == 1
+    assert stats["response"]["diagnostics"]["count"] == 4
+
+
+@pytest.mark.asyncio
+async def test_full_queue_rejects_and_maps_to_429():
+    parser = SlowParser()
+    session = _session(parser, max_queue=1)
+    session._running = True
+    blocker = asyncio.create_task(session.send_call(GetConfiguration()))
+    waiting = asyncio.create_task(session.send_call(GetConfiguration()))
+    await asyncio.sleep(0)
+
+    with pytest.raises(OutboundQueueFull):
+        await session.send_call(GetConfiguration())
+
+    registry = SimpleNamespace(get=None)
+    service = CommandService(registry)
+    with pytest.raises(HTTPException) as exc:
+        await service.send_built(session, "Reset", {}, RemoteStopTransaction())
+    assert exc.value.status_code == 429
+    assert session.outbound.rejected == 2
+
+    parser.release.set()
+    await asyncio.gather(blocker, waiting)
+
+
+@pytest.mark.asyncio
+async def test_deadline_expires_waiting_call():
+    parser = SlowParser()
+    session = _session(parser, deadlines={p: 0.02 for p in Priority})
+    blocker = asyncio.create_task(session.send_call(GetConfiguration()))
+    await asyncio.sleep(0)
+
+    with pytest.raises(OutboundDeadlineExceeded):
+        await session.send_call(RemoteStopTransaction())
+    assert session.outbound.expired == 1 and session.outbound.depth == 0
+
+    parser.release.set()
+    await blocker
+    # plek is na afloop weer vrij
+    assert await session.send_call(GetConfiguration()) == "ok"
+    assert session.outbound.stats()["in_flight"] == 0
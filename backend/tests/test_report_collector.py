@@ -0,0 +1,85 @@
+import sys
+import os
+
+topdir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, topdir)
+
+import asyncio
+import time
+
+import pytest
+
+from infrastructure.ocpp_handlers import V201Handler
+from infrastructure.report_collector import ReportCollector
+
+
+def _entry(name, value):
+    return {
+        "component": {"name": "Ctrl"},
+        "variable": {"name": name},
+        "variableAttribute": [{"type": "Actual", "value": value, "mutability": "ReadWrite"}],
+    }
+
+
+@pytest.mark.asyncio
+async def test_resolves_on_last_part_without_polling():
+    reports = ReportCollector()
+    rid = reports.open()
+    loop = asyncio.get_running_loop()
+    loop.call_later(0.01, reports.feed, rid, [{"key": "A"}], True)
+    loop.call_later(0.02, reports.feed, rid, [{"key": "B"}], False)
+
+    started = time.monotonic()
+    items = await reports.wait(rid, timeout=5)
+    assert [i["key"] for i in items] == ["A", "B"]
+    assert time.monotonic() - started < 0.5
+    assert len(reports) == 0
+    assert reports.stats()["completed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_reports_get_own_id_and_buffer():
+    handler = V201Handler("CP9", None)
+    first, second = handler.reports.open(), handler.reports.open()
+    assert first != second
+
+    waits = asyncio.gather(
+        handler.reports.wait(first, timeout=5), handler.reports.wait(second, timeout=5)
+    )
+    # delen van beide reports door elkaar
+    await handler.on_notify_report("t", [_entry("X", "1")], request_id=first, seq_no=0, tbc=True)
+    await handler.on_notify_report("t", [_entry("Y", "2")], request_id=second, seq_no=0, tbc=False)
+    await handler.on_notify_report("t", [_entry("Z", "3")], request_id=first, seq_no=1, tbc=False)
+
+    a, b = await waits
+    assert [i["key"] for i in a] == ["X", "Z"]
+    assert [i["key"] for i in b] == ["Y"]
+
+
+@pytest.mark.asyncio
+async def test_timeout_returns_partial_and_cleans_up():
+    reports = ReportCollector()
+    rid = reports.open()
+    reports.feed(rid, [{"key": "A"}], True)
+
+    assert await reports.wait(rid, timeout=0.05) == [{"key": "A"}]
+    assert len(reports) == 0
+    assert reports.stats()["timed_out"] == 1
+    # late delen worden genegeerd
+    assert reports.feed(rid, [{"key": "B"}], False) is False
+    assert reports.stats()["unmatched"] == 1
+
+
+@pytest.mark.asyncio
+async def test_abort_fails_waiters():
+    reports = ReportCollector()
+    rid = reports.open()
+    waiter = asyncio.ensure_future(reports.wait(rid, timeout=5))
+    await asyncio.sleep(0)
+
+    reports.abort(ConnectionError("gone"))
+    with pytest.raises(ConnectionError):
+        await waiter
+    assert len(reports) == 0
+    assert reports.stats()["aborted"] == 1
+    assert reports.open() == rid + 1
@@ -0,0 +1,283 @@
+import asyncio
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from application.rollout_service import RolloutJob, RolloutService, RolloutState
+from application.event_bus import EventBus
+
+
+class FakeBulk:
+    """Stuurt niets echt; laadpalen in ``offline`` falen met 404."""
+
+    def __init__(self, bus, reconnect=True):
+        self.bus = bus
+        self.reconnect = reconnect
+        self.offline = set()
+        self.sent = []
+
+    def prepare(self, action, parameters):
+        return {}
+
+    async def run(self, targets, action, parameters, calls, *, concurrency=None):
+        self.sent.append(list(targets))
+        for cp_id in targets:
+            if cp_id in self.offline:
+                yield {"charge_point_id": cp_id, "ok": False, "status": 404}
+                continue
+            yield {"charge_point_id": cp_id, "ok": True, "status": 200}
+            if self.reconnect:
+                await self.bus.publish("ChargePointConnected", charge_point_id=cp_id)
+        yield {"summary": {}}
+
+
+class MemRepo:
+    """In-memory variant van RolloutRepository, incl. owner/lease-claims."""
+
+    def __init__(self):
+        self.rows = {}
+        self.owners = {}            # job-id → (owner, lease_until)
+        self.requested = {}         # job-id → operator-actie voor de eigenaar
+
+    def _free(self, job_id, owner):
+        current = self.owners.get(job_id)
+        return current is None or current[0] == owner or current[1] < time.monotonic()
+
+    async def save(self, job, owner=None, lease=0.0):
+        if job["id"] in self.rows and not (
+            self.owners.get(job["id"]) is None or self.owners[job["id"]][0] == owner
+        ):
+            return False
+        if job["id"] not in self.rows and owner is not None:
+            self.owners[job["id"]] = (owner, time.monotonic() + lease)
+        self.rows[job["id"]] = job
+        return True
+
+    async def claim_unfinished(self, states, owner, lease):
+        out = []
+        for job_id, job in self.rows.items():
+            if job["state"] in states and self._free(job_id, owner):
+                self.owners[job_id] = (owner, time.monotonic() + lease)
+                out.append(job)
+        return out
+
+    async def renew(self, job_ids, owner, lease):
+        kept = [j for j in job_ids if (self.owners.get(j) or (None,))[0] == owner]
+        for j in kept:
+            self.owners[j] = (owner, time.monotonic() + lease)
+        return {j: self.requested.pop(j, None) for j in kept}
+
+    def _row(self, job_id):
+        return {**self.rows[job_id], "requested": self.requested.get(job_id)}
+
+    async def load(self, job_id):
+        return self._row(job_id) if job_id in self.rows else None
+
+    async def list(self, limit=100):
+        return [self._row(j) for j in list(self.rows)[-limit:]]
+
+    async def claim(self, job_id, states, owner, lease):
+        job = self.rows.get(job_id)
+        if job is None or job["state"] not in states or not self._free(job_id, owner):
+            return None
+        self.owners[job_id] = (owner, time.monotonic() + lease)
+        return self._row(job_id)
+
+    async def request(self, job_id, action, states):
+        job = self.rows.get(job_id)
+        if job is None or job["state"] not in states:
+            return None
+        self.requested[job_id] = action
+        return self._row(job_id)
+
+    async def release(self, job_ids, owner):
+        for j in job_ids:
+            if (self.owners.get(j) or (None,))[0] == owner:
+                self.owners[j] = None
+
+
+async def _wait_state(svc, job_id, state, timeout=2.0):
+    async def _poll():
+        while svc.get(job_id).state is not state:
+            await asyncio.sleep(0.005)
+    await asyncio.wait_for(_poll(), timeout)
+
+
+def _job(n, **kw):
+    kw.setdefault("batch_size", 2)
+    kw.setdefault("wave_interval", 0)
+    kw.setdefault("health_timeout", 0.2)
+    return RolloutJob(action="Reset", parameters={}, targets=[f"cp{i}" for i in range(n)], **kw)
+
+
+@pytest.mark.asyncio
+async def test_rollout_runs_in_waves_gated_on_reconnect():
+    bus = EventBus()
+    bulk, repo = FakeBulk(bus), MemRepo()
+    svc = RolloutService(bulk, repo, event_bus=bus)
+
+    job = await svc.create(_job(5))
+    await _wait_state(svc, job.id, RolloutState.COMPLETED)
+
+    assert bulk.sent == [["cp0", "cp1"], ["cp2", "cp3"], ["cp4"]]
+    assert repo.rows[job.id]["state"] == "completed"
+    assert job.summary()["ok"] == 5
+
+
+@pytest.mark.asyncio
+async def test_failed_health_gate_pauses_until_resumed():
+    bus = EventBus()
+    bulk, repo = FakeBulk(bus), MemRepo()
+    bulk.offline = {"cp1"}                      # 1/2 terug < 0.9
+    svc = RolloutService(bulk, repo, event_bus=bus)
+
+    job = await svc.create(_job(4))
+    await _wait_state(svc, job.id, RolloutState.PAUSED)
+    assert "health gate" in job.paused_reason
+    assert bulk.sent == [["cp0", "cp1"]]
+    assert repo.rows[job.id]["state"] == "paused"
+
+    await svc.resume(job.id)
+    await _wait_state(svc, job.id, RolloutState.COMPLETED)
+    assert bulk.sent == [["cp0", "cp1"], ["cp2", "cp3"]]
+
+
+@pytest.mark.asyncio
+async def test_operator_pause_and_cancel():
+    bus = EventBus()
+    bulk = FakeBulk(bus)
+    svc = RolloutService(bulk, MemRepo(), event_bus=bus)
+
+    job = await svc.create(_job(6, wave_interval=0.05))
+    await svc.pause(job.id)
+    await asyncio.sleep(0.15)
+    assert job.state is RolloutState.PAUSED
+    assert len(bulk.sent) <= 2                   # lopende wave mag afmaken
+
+    await svc.cancel(job.id)
+    assert job.state is RolloutState.CANCELLED
+    await svc.close()
+
+
+@pytest.mark.asyncio
+async def test_restart_resumes_without_resending():
+    bus = EventBus()
+    repo = MemRepo()
+    job = _job(4)
+    job.wave = 1
+    job.results = {"cp0": {"ok": True}, "cp1": {"ok": True}, "cp2": {"ok": True}}
+    await repo.save(job.to_dict())
+
+    bulk = FakeBulk(bus)
+    svc = RolloutService(bulk, repo, event_bus=bus)
+    await svc.start()
+    # cp2 kwam terug tijdens de herstart
+    await bus.publish("ChargePointConnected", charge_point_id="cp2")
+    await _wait_state(svc, job.id, RolloutState.COMPLETED)
+    assert bulk.sent == [["cp3"]]
+
+
+@pytest.mark.asyncio
+async def test_without_reconnect_expectation_gate_uses_command_result():
+    bus = EventBus()
+    bulk = FakeBulk(bus, reconnect=False)
+    svc = RolloutService(bulk, MemRepo(), event_bus=bus)
+
+    job = await svc.create(_job(3, expect_reconnect=False))
+    await _wait_state(svc, job.id, RolloutState.COMPLETED)
+    assert svc.gates_failed == 0
+
+
+@pytest.mark.asyncio
+async def test_only_one_worker_resumes_a_shared_job():
+    bus = EventBus()
+    repo = MemRepo()
+    job = _job(4)
+    await repo.save(job.to_dict())              # onafgemaakt, zonder eigenaar
+
+    bulk_a, bulk_b = FakeBulk(bus), FakeBulk(bus)
+    a = RolloutService(bulk_a, repo, owner="worker-a", lease=0.3, event_bus=bus)
+    b = RolloutService(bulk_b, repo, owner="worker-b", lease=0.3, event_bus=bus)
+    await asyncio.gather(a.start(), b.start())
+
+    await _wait_state(a, job.id, RolloutState.COMPLETED)
+    await asyncio.sleep(0.25)                   # b heeft inmiddels opnieuw gescand
+    assert bulk_a.sent == [["cp0", "cp1"], ["cp2", "cp3"]]
+    assert bulk_b.sent == []
+    assert b.jobs() == []
+    await a.close()
+    await b.close()
+
+
+@pytest.mark.asyncio
+async def test_expired_lease_is_taken_over_and_old_owner_stops():
+    bus = EventBus()
+    repo = MemRepo()
+    bulk_a, bulk_b = FakeBulk(bus), FakeBulk(bus)
+    a = RolloutService(bulk_a, repo, owner="worker-a", lease=0.3, event_bus=bus)
+    await a.start()
+    job = await a.create(_job(4, wave_interval=0.5))
+    await asyncio.sleep(0.05)                   # wave 1 verstuurd, a wacht op interval
+
+    repo.owners[job.id] = ("worker-a", 0.0)     # a "hangt": lease verlopen
+    b = RolloutService(bulk_b, repo, owner="worker-b", lease=0.3, event_bus=bus)
+    await b.start()
+    assert repo.owners[job.id][0] == "worker-b"
+
+    await _wait_state(b, job.id, RolloutState.COMPLETED)
+    assert bulk_b.sent == [["cp2", "cp3"]]      # b gaat verder bij de lopende wave
+    await asyncio.sleep(0.15)                   # a merkt bij het verlengen dat hij hem kwijt is
+    assert a.jobs() == [] and a.leases_lost == 1
+    assert bulk_a.sent == [["cp0", "cp1"]]
+    await a.close()
+    await b.close()
+
+
+@pytest.mark.asyncio
+async def test_other_worker_sees_and_controls_a_remote_job():
+    bus = EventBus()
+    repo = MemRepo()
+    bulk_a = FakeBulk(bus)
+    bulk_a.offline = {"cp1"}                    # gate faalt → a pauzeert
+    a = RolloutService(bulk_a, repo, owner="worker-a", lease=0.15, event_bus=bus)
+    b = RolloutService(FakeBulk(bus), repo, owner="worker-b", lease=0.15, event_bus=bus)
+    await a.start()
+    await b.start()
+    job = await a.create(_job(4, health_timeout=5))
+
+    seen = await b.find(job.id)                 # niet lokaal → uit de DB
+    assert seen.id == job.id and seen.state is RolloutState.RUNNING
+    assert [j.id for j in await b.all_jobs()] == [job.id]
+
+    asked = await b.pause(job.id)
+    assert asked.requested == "pause" and b.jobs() == []
+    await _wait_state(a, job.id, RolloutState.PAUSED)   # a pakt het op bij renew
+    assert (await b.find(job.id)).state is RolloutState.PAUSED
+
+    await b.cancel(job.id)
+    await _wait_state(a, job.id, RolloutState.CANCELLED)
+    assert repo.rows[job.id]["state"] == "cancelled"
+    assert b.claimed == 0
+    await a.close()
+    await b.close()
+
+
+@pytest.mark.asyncio
+async def test_resume_of_orphaned_paused_job_claims_it():
+    bus = EventBus()
+    repo = MemRepo()
+    job = _job(2, state=RolloutState.PAUSED, paused_reason="paused by operator")
+    await repo.save(job.to_dict())              # eigenaar weg (nette shutdown)
+
+    bulk = FakeBulk(bus)
+    b = RolloutService(bulk, repo, owner="worker-b", event_bus=bus)
+    resumed = await b.resume(job.id)
+    assert resumed.state is RolloutState.RUNNING and b.claimed == 1
+    await _wait_state(b, job.id, RolloutState.COMPLETED)
+    assert bulk.sent == [["cp0", "cp1"]]
+
+    with pytest.raises(HTTPException) as exc:
+        await b.find("unknown")
+    assert exc.value.status_code == 404
+    await b.close()
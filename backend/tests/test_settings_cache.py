@@ -0,0 +1,104 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from application.connection_registry import ConnectionRegistryChargePoint
+from application.settings_cache import SettingsCache
+from domain.chargepoint_session import OCPPVersion
+
+
+class Loader:
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = []
+
+    async def __call__(self, ids):
+        self.calls.append(sorted(ids))
+        await asyncio.sleep(0)
+        return {i: self.rows[i] for i in ids if i in self.rows}
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_are_merged_into_one_load():
+    loader = Loader({"cp1": {"alias": "A"}, "cp2": {"alias": "B"}})
+    cache = SettingsCache(loader, batch_delay=0.001)
+
+    results = await asyncio.gather(
+        cache.get("cp1"), cache.get("cp2"), cache.get("cp1"), cache.get("unknown")
+    )
+    assert results == [{"alias": "A"}, {"alias": "B"}, {"alias": "A"}, None]
+    assert loader.calls == [["cp1", "cp2", "unknown"]]
+
+    # daarna: hits, ook voor het onbekende id (negatieve cache)
+    assert await cache.get("unknown") is None
+    assert await cache.get("cp2") == {"alias": "B"}
+    assert len(loader.calls) == 1
+    assert cache.stats()["hits"] == 2
+
+
+@pytest.mark.asyncio
+async def test_lru_eviction_and_ttl_expiry():
+    loader = Loader({})
+    cache = SettingsCache(loader, max_size=2, ttl=0.02, batch_delay=0)
+    cache.put("a", {"alias": "a"})
+    cache.put("b", {"alias": "b"})
+    assert await cache.get("a") == {"alias": "a"}      # a wordt recent gebruikt
+    cache.put("c", {"alias": "c"})                     # → b eruit
+    assert cache.peek("b") is None and cache.peek("a") is not None
+    assert cache.stats()["evictions"] == 1
+
+    await asyncio.sleep(0.03)
+    assert cache.peek("a") is None
+    assert await cache.get("a") is None                # verlopen → opnieuw geladen
+    assert loader.calls == [["a"]]
+
+
+@pytest.mark.asyncio
+async def test_load_failure_propagates_and_is_not_cached():
+    async def broken(_ids):
+        raise ConnectionError("db down")
+
+    cache = SettingsCache(broken, batch_delay=0)
+    with pytest.raises(ConnectionError):
+        await cache.get("cp1")
+    assert len(cache) == 0
+
+
+class _Repo:
+    available = False
+
+    def __init__(self, rows):
+        self.loader = Loader(rows)
+
+    async def load_by_ids(self, ids):
+        return await self.loader(ids)
+
+    async def upsert(self, *_row):
+        pass
+
+
+def _session(cp_id):
+    return SimpleNamespace(
+        id=cp_id,
+        _settings=SimpleNamespace(alias=None, enabled=False, ocpp_version=OCPPVersion.V16),
+    )
+
+
+@pytest.mark.asyncio
+async def test_registry_resolves_alias_on_connect_and_keeps_cache_bounded():
+    repo = _Repo({"cp1": {"id": "cp1", "alias": "Garage", "enabled": True, "ocpp_version": "1.6"}})
+    cache = SettingsCache(repo.load_by_ids, max_size=1, batch_delay=0)
+    registry = ConnectionRegistryChargePoint(repo, cache=cache)
+
+    s1 = _session("cp1")
+    await registry.register(s1)
+    assert s1._settings.alias == "Garage"
+
+    s1._settings.alias = "Renamed"
+    await registry.deregister(s1)
+    await registry.register(_session("cp2"))
+    assert len(cache) == 1                             # begrensd, groeit niet door
+
+    await registry.remember_alias("cp2", "Carport")
+    assert (await registry.get_settings("cp2"))["alias"] == "Carport"
@@ -0,0 +1,79 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from application.connection_registry import ConnectionRegistryChargePoint
+from application.settings_cache import SettingsCache
+from domain.chargepoint_session import OCPPVersion
+from services.settings_listener import SettingsListener
+
+
+class FakeRepo:
+    available = False
+    instance_id = "me"
+
+    def __init__(self):
+        self.rows = {}
+        self.upserts = []
+
+    async def upsert(self, cp_id, alias, enabled, ocpp_version):
+        self.upserts.append((cp_id, alias, enabled, ocpp_version))
+
+    async def load_by_ids(self, ids):
+        return {i: self.rows[i] for i in ids if i in self.rows}
+
+
+def _session(cp_id):
+    return SimpleNamespace(
+        id=cp_id,
+        _settings=SimpleNamespace(alias=None, enabled=False, ocpp_version=OCPPVersion.V16),
+    )
+
+
+@pytest.mark.asyncio
+async def test_enable_and_alias_are_write_through():
+    repo = FakeRepo()
+    registry = ConnectionRegistryChargePoint(repo, cache=SettingsCache(repo.load_by_ids, batch_delay=0))
+    sess = _session("cp1")
+    await registry.register(sess)
+
+    await registry.set_enabled("cp1", True)
+    await registry.remember_alias("cp1", "Garage")
+
+    assert sess._settings.enabled is True and sess._settings.alias == "Garage"
+    assert repo.upserts == [("cp1", None, True, "1.6"), ("cp1", "Garage", True, "1.6")]
+    assert registry.cache.peek("cp1")["alias"] == "Garage"
+
+
+@pytest.mark.asyncio
+async def test_notifications_from_other_instances_update_cache_and_sessions():
+    repo = FakeRepo()
+    registry = ConnectionRegistryChargePoint(repo, cache=SettingsCache(repo.load_by_ids, batch_delay=0))
+    sess = _session("cp1")
+    await registry.register(sess)
+    registry.cache.put("cp2", {"id": "cp2", "alias": "stale"})
+
+    listener = SettingsListener(
+        "postgresql://unused",
+        origin=repo.instance_id,
+        on_message=registry.apply_notification,
+        on_resync=registry.resync_settings,
+    )
+    row = {"id": "cp1", "alias": "Remote", "enabled": True, "ocpp_version": "1.6"}
+    listener.handle(json.dumps({"op": "upsert", "row": row, "origin": "other"}))
+    listener.handle(json.dumps({"op": "invalidate", "ids": ["cp2"], "origin": "other"}))
+    listener.handle(json.dumps({"op": "upsert", "row": {**row, "alias": "mine"}, "origin": "me"}))
+    listener.handle("not json")
+    await asyncio.sleep(0)
+
+    assert sess._settings.alias == "Remote" and sess._settings.enabled is True
+    assert registry.cache.peek("cp2") is None
+    assert listener.stats()["received"] == 2 and listener.stats()["ignored"] == 1
+
+    # reset (bv. na CSV-import elders) → live sessies herladen
+    repo.rows["cp1"] = {**row, "alias": "Imported"}
+    listener.handle(json.dumps({"op": "reset", "origin": "other"}))
+    await asyncio.sleep(0.01)
+    assert sess._settings.alias == "Imported"
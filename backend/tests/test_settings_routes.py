@@ -0,0 +1,225 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from application.connection_registry import ConnectionRegistryChargePoint
+from domain.chargepoint_session import OCPPVersion
+from routes.settings_routes import router
+from services.settings_repository import SettingsImportError, SettingsRepository
+
+
+class FakeRepo:
+    def __init__(self, available=True):
+        self.available = available
+        self.rows = {"cp1": {"id": "cp1", "alias": "old", "enabled": False, "ocpp_version": "1.6"}}
+        self.imported = None
+
+    async def upsert_many(self, rows):
+        return len(list(rows))
+
+    async def export_csv(self):
+        yield b"id,alias,enabled,ocpp_version\n"
+        yield b"cp1,old,f,1.6\n"
+
+    async def import_csv(self, data, columns=None):
+        if b"maybe" in data:
+            raise SettingsImportError('invalid input syntax for type boolean: "maybe"', 3)
+        self.imported = data
+        self.columns = columns
+        self.rows["cp1"] = {"id": "cp1", "alias": "Garage", "enabled": True, "ocpp_version": "1.6"}
+        return 1
+
+    async def load_by_ids(self, ids):
+        return {i: self.rows[i] for i in ids if i in self.rows}
+
+
+def _app(repo, registry):
+    app = FastAPI()
+    app.include_router(router(repo=repo, registry=registry))
+    return TestClient(app)
+
+
+def test_import_upserts_and_updates_live_sessions():
+    repo = FakeRepo()
+    registry = ConnectionRegistryChargePoint(repo)
+    sess = SimpleNamespace(
+        id="cp1",
+        _settings=SimpleNamespace(alias="old", enabled=False, ocpp_version=OCPPVersion.V16),
+    )
+    asyncio.run(registry.register(sess))
+    client = _app(repo, registry)
+
+    body = b"id,alias,enabled,ocpp_version\ncp1,Garage,true,1.6\n"
+    resp = client.post("/charge-point-settings/import", content=body,
+                       headers={"Content-Type": "text/csv"})
+    assert resp.status_code == 200 and resp.json() == {"imported": 1}
+    assert repo.imported == body
+    assert sess._settings.alias == "Garage" and sess._settings.enabled is True
+
+    resp = client.get("/charge-point-settings/export")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/csv")
+    assert resp.text.startswith("id,alias,enabled,ocpp_version")
+
+
+def test_import_rejects_wrong_header_and_missing_database():
+    repo = FakeRepo()
+    client = _app(repo, ConnectionRegistryChargePoint(repo))
+    resp = client.post("/charge-point-settings/import", content=b"name,alias\nx,y\n")
+    assert resp.status_code == 400
+
+    resp = client.post("/charge-point-settings/import",
+                       content=b"id,alias,enabled,ocpp_version\ncp2,x,t,1.6\ncp1,y,maybe,1.6\n")
+    assert resp.status_code == 400
+    assert resp.json()["detail"].startswith("CSV line 3:")
+
+    offline = FakeRepo(available=False)
+    client = _app(offline, ConnectionRegistryChargePoint(offline))
+    assert client.get("/charge-point-settings/export").status_code == 503
+
+
+@pytest.mark.asyncio
+async def test_repository_bulk_methods_are_noops_without_pool():
+    repo = SettingsRepository("postgresql://unused")
+    assert repo.available is False
+    assert await repo.upsert_many([("cp1", None, False, "1.6")]) == 0
+    assert await repo.load_by_ids(["cp1"]) == {}
+    assert [r async for r in repo.iter_all()] == []
+    assert [c async for c in repo.export_csv()] == []
+    assert await repo.import_csv(b"id,alias,enabled,ocpp_version\n") == 0
+
+
+def test_import_maps_columns_by_header_name():
+    repo = FakeRepo()
+    client = _app(repo, ConnectionRegistryChargePoint(repo))
+    body = b"ocpp_version,enabled,id,alias\n1.6,true,cp1,Garage\n"
+    resp = client.post("/charge-point-settings/import", content=body)
+    assert resp.status_code == 200
+    assert repo.columns == ["ocpp_version", "enabled", "id", "alias"]
+
+
+# ---------------------------------------------------------------- repository met nep-pool
+class _Tx:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class _Con:
+    def __init__(self, chunks=(), error=None):
+        self.chunks = chunks
+        self.error = error
+        self.copied = 0
+        self.columns = None
+        self.executed = []
+
+    def transaction(self):
+        return _Tx()
+
+    async def execute(self, *args):
+        self.executed.append(args[0])
+        return "INSERT 0 1"
+
+    async def copy_from_query(self, query, *, output, **_kw):
+        for chunk in self.chunks:
+            await output(chunk)
+            self.copied += 1
+
+    async def copy_to_table(self, table, *, columns, source, **_kw):
+        self.columns = columns
+        self.source = source.read()
+        if self.error is not None:
+            raise self.error
+
+
+class _Pool:
+    def __init__(self, con):
+        self.con = con
+
+    def acquire(self):
+        pool = self
+
+        class _Acquire:
+            async def __aenter__(self):
+                return pool.con
+
+            async def __aexit__(self, *exc):
+                return False
+
+        return _Acquire()
+
+
+@pytest.mark.asyncio
+async def test_export_streams_with_backpressure():
+    import services.settings_repository as repo_module
+
+    con = _Con([b"id,alias,enabled,ocpp_version\n"] + [b"cp,x,t,1.6\n"] * 100)
+    repo = SettingsRepository("postgresql://unused")
+    repo._pool = _Pool(con)
+
+    stream = repo.export_csv()
+    first = await stream.__anext__()
+    await asyncio.sleep(0.01)
+    assert first.startswith(b"id,")
+    # COPY loopt niet verder dan de begrensde buffer vooruit
+    assert con.copied <= repo_module._EXPORT_BUFFER_CHUNKS + 2
+    rest = [c async for c in stream]
+    assert len(rest) == 100 and con.copied == 101
+
+
+@pytest.mark.asyncio
+async def test_import_maps_database_errors_to_line_numbers():
+    import asyncpg
+
+    bad = asyncpg.exceptions.InvalidTextRepresentationError.new({
+        "C": "22P02",
+        "M": 'invalid input syntax for type boolean: "maybe"',
+        "W": 'COPY _settings_import, line 3, column enabled: "maybe"',
+    })
+    con = _Con(error=bad)
+    repo = SettingsRepository("postgresql://unused")
+    repo._pool = _Pool(con)
+
+    with pytest.raises(SettingsImportError) as exc:
+        await repo.import_csv(b"...", ["enabled", "id", "alias", "ocpp_version"])
+    assert exc.value.line == 3 and "boolean" in str(exc.value)
+    assert con.columns == ["enabled", "id", "alias", "ocpp_version"]
+
+    con.error = asyncpg.exceptions.UniqueViolationError.new({"C": "23505", "M": "duplicate key"})
+    with pytest.raises(SettingsImportError) as exc:
+        await repo.import_csv(b"...")
+    assert exc.value.line is None
+
+    with pytest.raises(SettingsImportError):
+        await repo.import_csv(b"...", ["id", "alias"])
+
+
+@pytest.mark.asyncio
+async def test_import_last_row_per_duplicate_id_wins():
+    import csv
+    import io
+
+    import services.settings_repository as repo_module
+
+    con = _Con()
+    repo = SettingsRepository("postgresql://unused")
+    repo._pool = _Pool(con)
+    data = b"id,alias,enabled,ocpp_version\ncp1,old,true,1.6\ncp2,x,false,1.6\ncp1,new,false,2.0.1\n"
+    await repo.import_csv(data)
+
+    stage, merge = con.executed[:2]
+    assert stage == repo_module._IMPORT_STAGE_SQL and "ord bigserial" in stage
+    assert "ord" not in con.columns                 # COPY nummert via de sequence
+
+    # DISTINCT ON houdt per id de eerste rij volgens ORDER BY; ord = CSV-volgorde
+    assert "ORDER BY id, ord DESC" in merge
+    rows = [dict(r, ord=n) for n, r in enumerate(csv.DictReader(io.StringIO(con.source.decode())))]
+    kept = {}
+    for row in sorted(rows, key=lambda r: (r["id"], -r["ord"])):
+        kept.setdefault(row["id"], row)
+    assert kept["cp1"]["alias"] == "new" and kept["cp1"]["ocpp_version"] == "2.0.1"
@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from services.settings_writer import SettingsWriter
+
+
+class FakeRepo:
+    def __init__(self, available=True, fail_times=0):
+        self.available = available
+        self.fail_times = fail_times
+        self.calls = []
+
+    async def upsert_many(self, rows):
+        if self.fail_times:
+            self.fail_times -= 1
+            raise ConnectionError("db down")
+        self.calls.append(list(rows))
+        return len(rows)
+
+
+@pytest.mark.asyncio
+async def test_updates_for_same_cp_are_coalesced_into_one_bulk_write():
+    repo = FakeRepo()
+    writer = SettingsWriter(repo, flush_interval=0.01)
+
+    for i in range(5):
+        writer.submit("cp1", f"alias-{i}", True, "1.6")
+    writer.submit("cp2", None, False, "2.0.1")
+    assert writer.stats()["pending"] == 2
+
+    await asyncio.sleep(0.05)
+    assert repo.calls == [[("cp1", "alias-4", True, "1.6"), ("cp2", None, False, "2.0.1")]]
+    stats = writer.stats()
+    assert stats["coalesced"] == 4 and stats["written"] == 2 and stats["pending"] == 0
+    await writer.close()
+
+
+@pytest.mark.asyncio
+async def test_flush_is_a_barrier_and_splits_batches():
+    repo = FakeRepo()
+    writer = SettingsWriter(repo, flush_interval=60, batch_size=3)
+    for i in range(7):
+        writer.submit(f"cp{i}", None, False, "1.6")
+    await writer.flush()
+    assert [len(c) for c in repo.calls] == [3, 3, 1]
+    assert writer.stats()["pending"] == 0
+    await writer.close()
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_stays_pending_without_clobbering_newer_values():
+    repo = FakeRepo(fail_times=1)
+    writer = SettingsWriter(repo, flush_interval=60)
+    writer.submit("cp1", "old", False, "1.6")
+
+    assert await writer.flush() is False
+    writer.submit("cp1", "new", True, "1.6")
+    assert await writer.flush() is True
+    assert repo.calls == [[("cp1", "new", True, "1.6")]]
+    assert writer.stats()["failed_batches"] == 1
+    await writer.close()
+
+
+@pytest.mark.asyncio
+async def test_close_flushes_and_no_database_means_no_work():
+    repo = FakeRepo()
+    writer = SettingsWriter(repo, flush_interval=60)
+    writer.submit("cp1", None, False, "1.6")
+    await writer.close()
+    assert repo.calls == [[("cp1", None, False, "1.6")]]
+
+    offline = SettingsWriter(FakeRepo(available=False))
+    offline.submit("cp1", None, False, "1.6")
+    assert offline.stats()["pending"] == 0
@@ -0,0 +1,67 @@
+import pytest
+
+from services.telemetry_aggregator import TelemetryAggregator
+
+
+def _body(*values, measurand="Voltage", phase="L1"):
+    return {
+        "connector_id": 1,
+        "meter_value": [
+            {
+                "timestamp": "2025-06-04T12:00:00Z",
+                "sampled_value": [
+                    {"value": str(v), "measurand": measurand, "phase": phase, "unit": "V"}
+                    for v in values
+                ],
+            }
+        ],
+    }
+
+
+def test_meter_values_aggregate_per_window():
+    agg = TelemetryAggregator([10])
+    agg.add_meter_values("CP-1", _body(230, 232), now=100.0)
+    agg.add_meter_values("CP-1", _body(228, "n/a"), now=105.0)
+
+    # window [100, 110) is nog open
+    assert agg.drain(now=109.9) == []
+
+    lines = agg.drain(now=110.0)
+    assert lines == [
+        "meter_value_agg,connector=1,cp_id=CP-1,measurand=Voltage,phase=L1,unit=V,"
+        "window=10s count=3i,last=228,max=232,mean=230,min=228 100000000000"
+    ]
+    # afgesloten windows worden vergeten
+    assert agg.drain(now=200.0) == []
+
+
+def test_event_counters_replace_count_1_points():
+    agg = TelemetryAggregator([60])
+    for t in (0.0, 1.0, 59.0):
+        agg.count_event("Heartbeat", "CP-1", "1.6", now=t)
+    agg.count_event("Heartbeat", "CP-2", "2.0.1", now=2.0)
+
+    lines = sorted(agg.drain(now=60.0))
+    assert lines == [
+        "Heartbeat,cp_id=CP-1,ocpp=1.6,window=60s count=3i 0",
+        "Heartbeat,cp_id=CP-2,ocpp=2.0.1,window=60s count=1i 0",
+    ]
+
+
+def test_multiple_windows_and_forced_drain():
+    agg = TelemetryAggregator([60, 10])
+    agg.add_meter_values("CP-1", _body(1, 2, 3), now=5.0)
+
+    # 10s-window afgesloten, 60s-window nog open
+    lines = agg.drain(now=15.0)
+    assert len(lines) == 1 and "window=10s" in lines[0]
+
+    # bij shutdown worden ook open windows geschreven
+    lines = agg.drain(now=15.0, force=True)
+    assert len(lines) == 1 and "window=60s" in lines[0]
+    assert agg.stats()["points_out"] == 2
+
+
+def test_requires_a_window():
+    with pytest.raises(ValueError):
+        TelemetryAggregator([0])
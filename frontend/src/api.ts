@@ -15,10 +15,31 @@ export interface CpSettings {
   alias?: string | null;
 }
 
+/* 2.0.1: component (+ evse) en variable-instance horen bij de identiteit */
+export interface ConfigComponent {
+  name: string;
+  instance?: string | null;
+  evse?: { id: number; connectorId?: number | null } | null;
+}
+
 export interface ConfigKey {
   key: string;
   readonly: boolean;
   value?: string;
+  instance?: string | null;
+  component?: ConfigComponent | null;
+}
+
+/* Commando-job (start/stop antwoorden direct met 202 + job) */
+export interface CommandJob {
+  id: string;
+  charge_point_id: string;
+  action: string;
+  state: "pending" | "succeeded" | "failed";
+  result?: any;
+  error?: { status: number; detail: string } | null;
+  created_at: number;
+  finished_at?: number | null;
 }
 
 /* ---------------- helpers ---------------- */
@@ -64,8 +85,14 @@ export async function fetchConfiguration(cpId: string): Promise<ConfigKey[]> {
   return data.result?.configuration_key ?? data.configuration_key ?? [];
 }
 
+/* start/stop geven de job terug; het resultaat volgt via het
+   CommandJobCompleted-event of fetchJob */
 export const remoteStart = (cpId: string) =>
-  fetch(`${BASE}/charge-points/${cpId}/start`, { method: "POST" });
+  getJson<CommandJob>(`${BASE}/charge-points/${cpId}/start`, { method: "POST" });
 
 export const remoteStop = (cpId: string) =>
-  fetch(`${BASE}/charge-points/${cpId}/stop`, { method: "POST" });
+  getJson<CommandJob>(`${BASE}/charge-points/${cpId}/stop`, { method: "POST" });
+
+export async function fetchJob(jobId: string): Promise<CommandJob> {
+  return getJson<CommandJob>(`${BASE}/jobs/${jobId}`);
+}
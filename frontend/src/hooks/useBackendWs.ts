@@ -1,4 +1,5 @@
 import { useEffect, useState } from "react";
+import type { CommandJob } from "../api";
 
 /* ------------------------------------------------ types ---------------- */
 export interface BackendEvent {
@@ -6,10 +7,19 @@ export interface BackendEvent {
   charge_point_id?: string;
   ocpp_version?: string;
   payload?: unknown;
+  /** Afgeronde commando-job (alleen bij ``CommandJobCompleted``). */
+  job?: CommandJob;
+  /** Volgnummer uit de server-side history (ontbreekt bij control-berichten). */
+  seq?: number;
+  /** Instance-id van die history; verandert bij een server-herstart. */
+  epoch?: string;
 }
 
 /* ------------------------------------------------ module-scope store ---- */
-/** Buffer dat de *gehele* sessie blijft bestaan (tot aan pagina-refresh). */
+/** Max. aantal events dat we in het geheugen houden (oudste eerst eruit). */
+const MAX_EVENTS = 2000;
+
+/** Buffer dat de sessie blijft bestaan (tot aan pagina-refresh). */
 let eventBuffer: BackendEvent[] = [];
 
 /** Alle React-state-setters die op updates willen luisteren. */
@@ -18,32 +28,75 @@ const listeners: Array<(events: BackendEvent[]) => void> = [];
 /** Eén gedeelde WebSocket-sessie voor de hele SPA. */
 let ws: WebSocket | undefined;
 
+/** Laatst ontvangen seq: bij herverbinden vraagt de server alleen de rest. */
+let lastSeq: number | undefined;
+
+/** Epoch waar lastSeq bij hoort – seq's van een vorig serverproces zijn zinloos. */
+let lastEpoch: string | undefined;
+
+const WS_URL = "ws://localhost:5062/api/ws/frontend";
+const RECONNECT_MS = 2000;
+
 /* ------------------------------------------------ helpers -------------- */
 function broadcast() {
-  // Kopie om referentie-stabiliteit te garanderen
-  const snapshot = eventBuffer.slice();
+  // eventBuffer wordt per frame vervangen, nooit gemuteerd → direct delen
+  const snapshot = eventBuffer;
   listeners.forEach((cb) => cb(snapshot));
 }
 
+function wsUrl() {
+  if (lastSeq === undefined) return WS_URL;
+  const qs = new URLSearchParams({ since: String(lastSeq) });
+  if (lastEpoch !== undefined) qs.set("epoch", lastEpoch);
+  return `${WS_URL}?${qs}`;
+}
+
 function initWebSocket() {
   if (ws) return; // al opgezet
 
-  ws = new WebSocket("ws://localhost:5062/api/ws/frontend");
+  ws = new WebSocket(wsUrl());
 
   ws.onmessage = (ev) => {
     try {
-      const evt = JSON.parse(ev.data) as BackendEvent;
-      eventBuffer.push(evt);
+      // frame = één event, of een array van (geconflateerde) events
+      const data = JSON.parse(ev.data) as BackendEvent | BackendEvent[];
+      const batch = Array.isArray(data) ? data : [data];
+      if (batch[0]?.event === "HistoryReset") {
+        // server herstart (ander epoch): oude state weg, de replay die volgt
+        // bouwt hem opnieuw op.  Het reset-frame blijft vooraan staan zodat
+        // pagina's hun REST-state ook opnieuw kunnen laden.
+        eventBuffer = [];
+        lastSeq = undefined;
+      }
+      for (const evt of batch) {
+        if (evt.seq !== undefined) lastSeq = evt.seq;
+        if (evt.epoch !== undefined) lastEpoch = evt.epoch;
+      }
+      eventBuffer = eventBuffer.concat(batch);
+      if (eventBuffer.length > MAX_EVENTS) {
+        eventBuffer = eventBuffer.slice(-MAX_EVENTS);
+      }
       broadcast();
     } catch {
       /* ignore malformed JSON */
     }
   };
 
+  // server weg (deploy, netwerk) → opnieuw verbinden en gemiste events ophalen
+  ws.onclose = () => {
+    ws = undefined;
+    setTimeout(initWebSocket, RECONNECT_MS);
+  };
+
   /* NB: we sluiten de socket *niet* automatisch bij unmount:
          pas bij een volledige pagina-refresh gaat de verbinding dicht. */
 }
 
+/** Het reset-frame vooraan de buffer (nieuw object per server-herstart). */
+export function historyReset(events: BackendEvent[]): BackendEvent | undefined {
+  return events[0]?.event === "HistoryReset" ? events[0] : undefined;
+}
+
 /* ------------------------------------------------ exported hook -------- */
 export default function useBackendWs(): BackendEvent[] {
   const [events, setEvents] = useState<BackendEvent[]>(() => eventBuffer);
@@ -1,4 +1,4 @@
-import { useEffect, useMemo, useState, useCallback } from "react";
+import { useEffect, useMemo, useRef, useState, useCallback } from "react";
 import { useParams } from "react-router-dom";
 import {
   Typography,
@@ -18,18 +18,20 @@ import {
   Snackbar,
   Alert,
 } from "@mui/material";
+import type { AlertColor } from "@mui/material";
 import EditIcon from "@mui/icons-material/Edit";
 import SaveIcon from "@mui/icons-material/Save";
 import {
   fetchConfiguration,
+  fetchJob,
   remoteStart,
   remoteStop,
   fetchSettings,
   setAlias,
 } from "../api";
-import type { ConfigKey, CpSettings } from "../api";
+import type { CommandJob, ConfigKey, CpSettings } from "../api";
 import ConfigTable from "../ui/ConfigTable";
-import useBackendWs from "../hooks/useBackendWs";
+import useBackendWs, { historyReset } from "../hooks/useBackendWs";
 import type { BackendEvent } from "../hooks/useBackendWs";
 import EventLogPanel from "../ui/EventLogPanel";
 
@@ -37,8 +39,10 @@ import EventLogPanel from "../ui/EventLogPanel";
 const useSnack = () => {
   const [open, setOpen] = useState(false);
   const [msg, setMsg] = useState("");
-  const show = useCallback((m: string) => {
+  const [severity, setSeverity] = useState<AlertColor>("success");
+  const show = useCallback((m: string, sev: AlertColor = "success") => {
     setMsg(m);
+    setSeverity(sev);
     setOpen(true);
   }, []);
   return {
@@ -49,7 +53,7 @@ const useSnack = () => {
         onClose={() => setOpen(false)}
         anchorOrigin={{ vertical: "bottom", horizontal: "center" }}
       >
-        <Alert severity="success" variant="filled" sx={{ width: "100%" }}>
+        <Alert severity={severity} variant="filled" sx={{ width: "100%" }}>
           {msg}
         </Alert>
       </Snackbar>
@@ -58,6 +62,20 @@ const useSnack = () => {
   };
 };
 
+/* ------------------------------------------------ job helpers ------ */
+/** Fallback als het CommandJobCompleted-event niet binnenkomt (WS weg). */
+const JOB_POLL_MS = 2000;
+
+function describeJob(label: string, job: CommandJob): [string, AlertColor] {
+  if (job.state === "failed") {
+    return [`${label} failed: ${job.error?.detail ?? "unknown error"}`, "error"];
+  }
+  const status = job.result?.status;
+  return status && status !== "Accepted"
+    ? [`${label}: ${status}`, "warning"]
+    : [`${label} accepted`, "success"];
+}
+
 /* ------------------------------------------------ helpers ------ */
 interface SampleRow {
   timestamp: string;
@@ -150,6 +168,59 @@ export default function ChargePointDetail() {
   const backendEvents = useBackendWs();
   const cpEvents = backendEvents.filter((e) => e.charge_point_id === id);
 
+  /* ------- lopende start/stop-jobs: job-id → label ------- */
+  const [jobs, setJobs] = useState<Record<string, string>>({});
+  const jobsRef = useRef(jobs);
+
+  const finishJob = useCallback(
+    (job: CommandJob) => {
+      const label = jobsRef.current[job.id];
+      if (label === undefined) return; // niet van ons of al gemeld
+      const rest = { ...jobsRef.current };
+      delete rest[job.id];
+      jobsRef.current = rest;
+      setJobs(rest);
+      show(...describeJob(label, job));
+    },
+    [show]
+  );
+
+  const runJob = async (label: string, send: (cpId: string) => Promise<CommandJob>) => {
+    try {
+      const job = await send(id);
+      if (job.state !== "pending") {
+        show(...describeJob(label, job));
+        return;
+      }
+      jobsRef.current = { ...jobsRef.current, [job.id]: label };
+      setJobs(jobsRef.current);
+      show(`${label} sent`, "info");
+    } catch (err) {
+      show(`${label} failed: ${(err as Error).message}`, "error");
+    }
+  };
+
+  /* job klaar → CommandJobCompleted via de WS (kan al vóór het 202 binnen zijn) */
+  useEffect(() => {
+    backendEvents.forEach((ev) => {
+      if (ev.event === "CommandJobCompleted" && ev.job) finishJob(ev.job);
+    });
+  }, [backendEvents, jobs, finishJob]);
+
+  /* … of via GET /jobs/{id} als dat event uitblijft */
+  useEffect(() => {
+    const ids = Object.keys(jobs);
+    if (ids.length === 0) return;
+    const timer = setInterval(() => {
+      ids.forEach((jobId) =>
+        fetchJob(jobId)
+          .then((job) => job.state !== "pending" && finishJob(job))
+          .catch(() => undefined)
+      );
+    }, JOB_POLL_MS);
+    return () => clearInterval(timer);
+  }, [jobs, finishJob]);
+
   /* ---------------- init ---------------- */
   useEffect(() => {
     fetchSettings(id).then((s) => {
@@ -177,14 +248,25 @@ export default function ChargePointDetail() {
     show("Alias saved");
   };
 
-  const handleConfigChange = async (key: string, value: string) => {
+  const handleConfigChange = async (cfg: ConfigKey, value: string) => {
+    /* 2.0.1: SetVariables op precies dit component/EVSE + instance */
+    const body = cfg.component
+      ? {
+          action: "SetVariables",
+          parameters: {
+            key: {
+              component: cfg.component,
+              variable_name: cfg.key,
+              variable_instance: cfg.instance ?? undefined,
+            },
+            value,
+          },
+        }
+      : { action: "ChangeConfiguration", parameters: { key: cfg.key, value } };
     await fetch(`http://localhost:5062/api/v1/charge-points/${id}/commands`, {
       method: "POST",
       headers: { "Content-Type": "application/json" },
-      body: JSON.stringify({
-        action: "ChangeConfiguration",
-        parameters: { key, value },
-      }),
+      body: JSON.stringify(body),
     });
     show("Configuration updated");
     refreshConfig();
@@ -198,6 +280,14 @@ export default function ChargePointDetail() {
     }
   }, [cpEvents, show]);
 
+  /* ------- server herstart → settings + config opnieuw laden ------- */
+  const reset = historyReset(backendEvents);
+  useEffect(() => {
+    if (!reset) return;
+    fetchSettings(id).then(setSettings);
+    refreshConfig();
+  }, [reset, id, refreshConfig]);
+
   /* ------- derived data ------- */
   const lastByType: BackendEvent[] = useMemo(() => {
     const m = new Map<string, BackendEvent>();
@@ -255,20 +345,16 @@ export default function ChargePointDetail() {
             <Button
               variant="contained"
               color="success"
-              onClick={async () => {
-                await remoteStart(id);
-                show("Remote-start sent");
-              }}
+              disabled={Object.values(jobs).includes("Remote-start")}
+              onClick={() => runJob("Remote-start", remoteStart)}
             >
               Remote Start
             </Button>
             <Button
               variant="contained"
               color="secondary"
-              onClick={async () => {
-                await remoteStop(id);
-                show("Remote-stop sent");
-              }}
+              disabled={Object.values(jobs).includes("Remote-stop")}
+              onClick={() => runJob("Remote-stop", remoteStop)}
             >
               Remote Stop
             </Button>
@@ -9,7 +9,7 @@ import {
   setChargePointActive,
 } from "../api";
 import type { ChargePointInfo } from "../api";
-import useBackendWs, { type BackendEvent } from "../hooks/useBackendWs";
+import useBackendWs, { historyReset, type BackendEvent } from "../hooks/useBackendWs";
 import EventLogPanel from "../ui/EventLogPanel";
 
 /* =================================================================== */
@@ -59,6 +59,12 @@ export default function HomePage() {
     }
   }, [backendEvents, refreshList]);
 
+  // server herstart → gemiste connects/disconnects zijn niet af te spelen
+  const reset = historyReset(backendEvents);
+  useEffect(() => {
+    if (reset) refreshList();
+  }, [reset, refreshList]);
+
   /* ---------------- render ---------------- */
   if (loading) return <CircularProgress />;
   if (err)
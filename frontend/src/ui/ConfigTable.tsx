@@ -3,19 +3,37 @@ import {
   Table, TableBody, TableCell, TableContainer, TableHead, TableRow,
   Paper, Select, MenuItem, TextField, Button, Typography
 } from "@mui/material";
+import type { ConfigComponent, ConfigKey } from "../api";
 
 /* ---------------- types ---------------- */
-export interface ConfigKey {
-  key: string;
-  readonly: boolean;
-  value?: string;
-}
+export type { ConfigKey } from "../api";
 
 interface Props {
   configKeys: ConfigKey[];
-  onConfigChange: (key: string, value: string) => Promise<void>;
+  onConfigChange: (cfg: ConfigKey, value: string) => Promise<void>;
 }
 
+/* dezelfde naam kan op meerdere componenten/EVSE's bestaan (2.0.1) */
+export const configRowId = (c: ConfigKey) =>
+  JSON.stringify([
+    c.component?.name ?? null,
+    c.component?.instance ?? null,
+    c.component?.evse?.id ?? null,
+    c.component?.evse?.connectorId ?? null,
+    c.key,
+    c.instance ?? null,
+  ]);
+
+const componentLabel = (c?: ConfigComponent | null) => {
+  if (!c) return "-";
+  let label = c.instance ? `${c.name} (${c.instance})` : c.name;
+  if (c.evse) {
+    label += ` · EVSE ${c.evse.id}`;
+    if (c.evse.connectorId != null) label += `/${c.evse.connectorId}`;
+  }
+  return label;
+};
+
 /* ====================================================================== */
 export default function ConfigTable({ configKeys, onConfigChange }: Props) {
   const [editValues, setEditValues] = useState<Record<string, string>>({});
@@ -23,21 +41,26 @@ export default function ConfigTable({ configKeys, onConfigChange }: Props) {
   /* keep local buffer in sync */
   useEffect(() => {
     const buf: Record<string, string> = {};
-    configKeys.forEach((c) => { buf[c.key] = c.value ?? ""; });
+    configKeys.forEach((c) => { buf[configRowId(c)] = c.value ?? ""; });
     setEditValues(buf);
   }, [configKeys]);
 
+  const hasComponents = configKeys.some((c) => c.component);
+  const columns = hasComponents
+    ? ["Component", "Key", "Access", "Current value", "Action"]
+    : ["Key", "Access", "Current value", "Action"];
+
   const isBoolean = (v: string | undefined) => v === "true" || v === "false";
 
-  const handleSet = async (k: string) => {
-    await onConfigChange(k, editValues[k]);
+  const handleSet = async (cfg: ConfigKey) => {
+    await onConfigChange(cfg, editValues[configRowId(cfg)]);
   };
 
   return (
     <TableContainer component={Paper} sx={{ mt: 2 }}>
       <Table size="small">
         <TableHead sx={{ bgcolor: "secondary.main" }}>
-          {["Key", "Access", "Current value", "Action"].map((h) => (
+          {columns.map((h) => (
             <TableCell key={h} sx={{ color: "secondary.contrastText", fontWeight: 600 }}>
               {h}
             </TableCell>
@@ -46,12 +69,20 @@ export default function ConfigTable({ configKeys, onConfigChange }: Props) {
 
         <TableBody>
           {configKeys.map((cfg) => {
+            const rowId = configRowId(cfg);
             const readOnly = cfg.readonly;
-            const editableVal = editValues[cfg.key] ?? "";
+            const editableVal = editValues[rowId] ?? "";
 
             return (
-              <TableRow key={cfg.key} hover>
-                <TableCell sx={{ wordBreak: "break-word", width: "35%" }}>{cfg.key}</TableCell>
+              <TableRow key={rowId} hover>
+                {hasComponents && (
+                  <TableCell sx={{ wordBreak: "break-word", width: "20%" }}>
+                    {componentLabel(cfg.component)}
+                  </TableCell>
+                )}
+                <TableCell sx={{ wordBreak: "break-word", width: hasComponents ? "20%" : "35%" }}>
+                  {cfg.instance ? `${cfg.key} (${cfg.instance})` : cfg.key}
+                </TableCell>
                 <TableCell sx={{ width: "15%" }}>{readOnly ? "Read-only" : "Read/Write"}</TableCell>
 
                 <TableCell sx={{ width: "40%" }}>
@@ -61,7 +92,7 @@ export default function ConfigTable({ configKeys, onConfigChange }: Props) {
                     <Select
                       size="small"
                       value={editableVal}
-                      onChange={(e) => setEditValues((p) => ({ ...p, [cfg.key]: e.target.value }))}
+                      onChange={(e) => setEditValues((p) => ({ ...p, [rowId]: e.target.value }))}
                       sx={{ minWidth: 100 }}
                     >
                       <MenuItem value="true">true</MenuItem>
@@ -72,14 +103,14 @@ export default function ConfigTable({ configKeys, onConfigChange }: Props) {
                       size="small"
                       fullWidth
                       value={editableVal}
-                      onChange={(e) => setEditValues((p) => ({ ...p, [cfg.key]: e.target.value }))}
+                      onChange={(e) => setEditValues((p) => ({ ...p, [rowId]: e.target.value }))}
                     />
                   )}
                 </TableCell>
 
                 <TableCell sx={{ width: "10%", textAlign: "center" }}>
                   {!readOnly && (
-                    <Button variant="contained" size="small" onClick={() => handleSet(cfg.key)}>
+                    <Button variant="contained" size="small" onClick={() => handleSet(cfg)}>
                       Set
                     </Button>
                   )}
@@ -90,7 +121,7 @@ export default function ConfigTable({ configKeys, onConfigChange }: Props) {
 
           {configKeys.length === 0 && (
             <TableRow>
-              <TableCell colSpan={4} align="center">
+              <TableCell colSpan={columns.length} align="center">
                 <Typography variant="body2" color="text.secondary">
                   (no data)
                 </Typography>